@@ -0,0 +1,487 @@
+"""
+Benchmarks - Tempo e memoria dos caminhos quentes
+===================================================
+Suite reproduzivel (dados do synthetic_market com seed fixa) para:
+
+    indicators      calculate_all / get_all_scores por tamanho de entrada,
+                    e o ciclo com OHLCVBuffer (parse + scores)
+    confluence      calculate_confluence / generate_signal
+    learning        label_from_candles / update_future_prices / daily_review
+                    (1k, 10k, 100k registros)
+    persistence     save/load JSON de posicoes (PositionBook) e do analysis_log
+    dashboard       serializacao do payload (json do WebSocket, delta+gzip do push)
+
+Cada caso mede o tempo de parede (perf_counter, mediana e minimo de
+varias repeticoes) e o pico de memoria alocada numa execucao separada
+com tracemalloc (o setup e o reset entre repeticoes ficam fora da
+medicao). O resultado vai para
+um JSON com o commit, versoes e maquina, para comparar entre commits:
+
+    python benchmarks.py --out bench_base.json
+    python benchmarks.py --out bench_new.json --compare bench_base.json
+    python benchmarks.py --quick --filter learning
+
+Roda num diretorio temporario (os motores gravam estado no cwd).
+"""
+
+import argparse
+import gc
+import json
+import logging
+import os
+import platform
+import statistics
+import subprocess
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+import config
+from synthetic_market import generate_ohlcv
+
+logger = logging.getLogger("Benchmarks")
+
+SEED = 42
+MIN_TIME = 0.2          # Segundos minimos de medicao por caso
+MAX_REPEATS = 50
+REGRESSION_RATIO = 1.2  # Mais lento que isso vs base = regressao
+
+# name -> (sizes, sizes --quick, setup(size) -> run() ou (run(), reset()))
+BENCHMARKS: Dict[str, tuple] = {}
+
+
+def benchmark(name: str, sizes: List[int], quick: Optional[List[int]] = None):
+    """
+    Registra um caso: setup(size) prepara os dados e retorna a funcao medida,
+    ou (funcao medida, reset) quando a medida altera os dados: reset roda
+    antes de cada repeticao, fora do tempo medido.
+    """
+    def register(setup: Callable[[int], Callable[[], object]]):
+        BENCHMARKS[name] = (sizes, quick or sizes[:2], setup)
+        return setup
+    return register
+
+
+# ============================================================
+# DADOS
+# ============================================================
+FIXED_NOW = datetime(2025, 1, 2, 12, 0, 0)
+
+
+def _candles(n: int) -> pd.DataFrame:
+    return generate_ohlcv(n, timeframe="5m", seed=SEED)
+
+
+def _scores_by_tf(n: int = 300) -> Dict:
+    from indicators import get_all_scores
+    frames = {name: generate_ohlcv(n, timeframe=tf, seed=SEED + i)
+              for i, (name, tf) in enumerate(config.TIMEFRAMES[config.TRADE_MODE].items())}
+    return {name: get_all_scores(df) for name, df in frames.items()}, frames
+
+
+def _analysis_records(n: int, evaluated_frac: float = 0.5) -> List[Dict]:
+    """n registros no formato do record_analysis, espalhados nas ultimas 24h."""
+    rng = np.random.default_rng(SEED)
+    step = timedelta(hours=24) / n
+    indicators = list(config.INDICATOR_WEIGHTS)
+    directions = np.where(rng.random(n) < 0.5, "long", "short")
+    prices = 150 * np.exp(np.cumsum(rng.normal(0, 0.001, n)))
+    confidence = rng.uniform(0.2, 0.9, n)
+    scores = rng.uniform(-1, 1, (n, len(indicators))).round(4)
+    reasons = ["", "low_confidence", "few_indicators", "low_rr", "rsi_filter", "volume_filter"]
+    records = []
+    n_evaluated = int(n * evaluated_frac)
+    for i in range(n):
+        price = float(prices[i])
+        record = {
+            "timestamp": (FIXED_NOW - timedelta(hours=24) + step * i).isoformat(),
+            "analysis_number": i + 1,
+            "price": price,
+            "direction": str(directions[i]),
+            "confidence": round(float(confidence[i]), 4),
+            "confluence_score": round(float(confidence[i]) * 0.9, 4),
+            "agreeing_indicators": int(rng.integers(1, len(indicators) + 1)),
+            "total_indicators": len(indicators),
+            "combined_scores": dict(zip(indicators, scores[i].tolist())),
+            "rsi_value": round(float(rng.uniform(10, 90)), 2),
+            "volume_ratio": round(float(rng.uniform(0.3, 3)), 3),
+            "signal_generated": bool(confidence[i] > 0.75),
+            "rejection_reason": "" if confidence[i] > 0.75 else reasons[i % len(reasons)],
+            "price_after_5m": 0.0,
+            "price_after_15m": 0.0,
+            "price_after_30m": 0.0,
+            "price_after_1h": 0.0,
+            "would_have_profited": None,
+            "potential_pnl_pct": 0.0,
+        }
+        if i < n_evaluated:
+            after = price * (1 + rng.normal(0, 0.004, 4))
+            record.update({
+                "price_after_5m": float(after[0]), "price_after_15m": float(after[1]),
+                "price_after_30m": float(after[2]), "price_after_1h": float(after[3]),
+                "would_have_profited": bool(rng.random() < 0.5),
+                "potential_pnl_pct": round(float(rng.normal(0, 0.6)), 3),
+            })
+        records.append(record)
+    return records
+
+
+def _learning_engine(n: int, evaluated_frac: float = 0.5):
+    from learning_engine import LearningEngine
+    engine = LearningEngine(clock=lambda: FIXED_NOW, autosave=False)
+    engine.analysis_log = _analysis_records(n, evaluated_frac)
+    engine._log_version += 1
+    return engine
+
+
+# Campos que a rotulagem preenche (restaurados pelo reset dos casos)
+_LABEL_FIELDS = ("price_after_5m", "price_after_15m", "price_after_30m", "price_after_1h",
+                 "would_have_profited", "potential_pnl_pct")
+
+
+def _label_reset(engine) -> Callable[[], None]:
+    """Reset que devolve as analises pendentes (e os contadores) ao estado sem rotulo."""
+    pending = engine._pending_labels()
+    saved = [{k: r[k] for k in _LABEL_FIELDS} for r in pending]
+    state = dict(engine.state)
+
+    def reset():
+        for record, fields in zip(pending, saved):
+            for key in [k for k in record if k.startswith(("mfe_", "mae_")) or k == "label_expired"]:
+                del record[key]
+            record.update(fields)
+        engine.state = dict(state)
+        engine._label_cursor = 0
+    return reset
+
+
+def _positions(n: int) -> List[Dict]:
+    rng = np.random.default_rng(SEED)
+    strategies = ["sniper", "memecoin", "arbitrage", "scalping", "leverage", "whale"]
+    return [{
+        "trade_id": f"real_{i:06d}",
+        "strategy": strategies[i % len(strategies)],
+        "coin": "SOL",
+        "amount_usd": round(float(rng.uniform(5, 50)), 2),
+        "entry_price": round(float(rng.uniform(120, 180)), 4),
+        "quantity": round(float(rng.uniform(0.01, 0.5)), 6),
+        "take_profit": 1.02, "stop_loss": 0.98,
+        "opened_at": 1_735_689_600 + i * 60,
+        "tx_buy": "x" * 88,
+        "status": "open" if i % 4 == 0 else "closed_tp",
+    } for i in range(n)]
+
+
+def sample_dashboard_payload(n: int) -> Dict:
+    """Payload do cloud push (mesmo formato do main.py) com n posicoes/historicos."""
+    from strategies_manager import StrategiesManager
+    manager = StrategiesManager()
+    exec_scores = _scores_by_tf()[0]["execution"]
+    return {
+        "price": 150.0, "capital": config.CAPITAL_USDC, "mode": "Benchmark",
+        "paper_trading": True, "analysis_count": n, "last_update": "12:00:00",
+        "open_positions": n, "open_pnl": 1.0, "total_pnl": 2.0, "win_rate": 55.0, "total_trades": n,
+        "positions": _positions(n),
+        "indicators": {
+            "RSI": exec_scores.get("rsi", {}).get("value", 50),
+            "EMA": exec_scores.get("ema_alignment", 0),
+            "Ichimoku": exec_scores.get("ichimoku_trend", 0),
+            "Volume": exec_scores.get("volume", {}).get("ratio", 1.0),
+        },
+        "last_signal": None,
+        "confluence": {"direction": "long", "confidence": 61.0, "agreeing": 4,
+                       "scores": {k: 0.1 for k in config.INDICATOR_WEIGHTS}},
+        "logs": [f"[12:00:{i % 60:02d}] log line {i}" for i in range(30)],
+        "learning": {"days": 3, "risk_level": 1.0, "threshold": 55.0, "streak": 1},
+        "analysis_history": _analysis_records(max(20, n // 10))[:n],
+        "strategies": manager.get_all_dashboard_data(),
+        "wallet": {"sol": 1.0, "usdc": 10.0},
+        "allocations": manager.get_all_allocations(),
+        "real_positions": manager.get_real_positions_dashboard(),
+        "agents": manager.agent_manager.get_all_dashboard_data(),
+        "settings_applied": False,
+    }
+
+
+# ============================================================
+# CASOS
+# ============================================================
+@benchmark("indicators.calculate_all", [100, 300, 1_000, 10_000, 100_000], [300, 1_000])
+def bench_calculate_all(n):
+    from indicators import calculate_all
+    df = _candles(n)
+    return lambda: calculate_all(df)
+
+
+@benchmark("indicators.get_all_scores", [100, 300, 1_000, 10_000, 100_000], [300, 1_000])
+def bench_get_all_scores(n):
+    from indicators import get_all_scores
+    df = _candles(n)
+    return lambda: get_all_scores(df)
+
+
+@benchmark("indicators.buffer_cycle", [100, 300, 1_000, 10_000, 100_000], [300, 1_000])
+def bench_buffer_cycle(n):
+    # Ciclo do bot com OHLCVBuffer: parse da resposta + scores no buffer
+    from indicators import get_all_scores
+    from ohlcv_buffer import OHLCVBuffer
+    from synthetic_market import to_ohlcv_list
+    rows = to_ohlcv_list(_candles(n))
+    buf = OHLCVBuffer(n)
+
+    def cycle():
+        buf.load_rows(rows)
+        return get_all_scores(buf)
+    return cycle
+
+
+@benchmark("confluence.calculate_confluence", [300])
+def bench_calculate_confluence(n):
+    from confluence import ConfluenceEngine
+    engine = ConfluenceEngine(_learning_engine(100))
+    scores, _ = _scores_by_tf(n)
+    return lambda: engine.calculate_confluence(scores)
+
+
+@benchmark("confluence.generate_signal", [300])
+def bench_generate_signal(n):
+    from confluence import ConfluenceEngine
+    engine = ConfluenceEngine(_learning_engine(100))
+    scores, frames = _scores_by_tf(n)
+    symbol = f"{config.TRADE_TOKEN}/{config.BASE_TOKEN}"
+    return lambda: engine.generate_signal(symbol, scores, frames["execution"])
+
+
+@benchmark("learning.label_from_candles", [1_000, 10_000, 100_000], [1_000, 10_000])
+def bench_label_from_candles(n):
+    # Caminho ao vivo: candles de execucao cobrindo as ultimas 24h do log
+    engine = _learning_engine(n)
+    candles = generate_ohlcv(25 * 12, timeframe="5m", seed=SEED,
+                             start=FIXED_NOW - timedelta(hours=25))
+    return lambda: engine.label_from_candles(candles), _label_reset(engine)
+
+
+@benchmark("learning.update_future_prices", [1_000, 10_000, 100_000], [1_000, 10_000])
+def bench_update_future_prices(n):
+    # Fallback sem candles; cada repeticao parte dos mesmos registros pendentes
+    engine = _learning_engine(n)
+    return lambda: engine.update_future_prices(151.0), _label_reset(engine)
+
+
+@benchmark("learning.daily_review", [1_000, 10_000, 100_000], [1_000, 10_000])
+def bench_daily_review(n):
+    engine = _learning_engine(n)
+    state = json.loads(json.dumps(engine.state))
+
+    def run():
+        engine.state = json.loads(json.dumps(state))
+        engine._log_version += 1  # Sem cache do frame: mede a revisao completa
+        return engine.daily_review()
+    return run
+
+
+@benchmark("persistence.positions_save", [100, 1_000, 10_000], [100, 1_000])
+def bench_positions_save(n):
+    from position_book import PositionBook
+    book = PositionBook(recent_closed=n)
+    book.path = "bench_positions.json"
+    for pos in _positions(n):
+        if pos["status"] == "open":
+            book._index_open(pos)
+        else:
+            book._push_closed(pos)
+    return book.save
+
+
+@benchmark("persistence.positions_load", [100, 1_000, 10_000], [100, 1_000])
+def bench_positions_load(n):
+    from position_book import PositionBook
+    # Estado normal: fechadas ja arquivadas (sem migracao a cada load)
+    positions = [dict(p, archived=True) if p["status"] != "open" else p for p in _positions(n)]
+    with open("bench_positions_load.json", "w") as f:
+        json.dump(positions, f, indent=2)
+
+    def run():
+        book = PositionBook("bench_positions_load.json", recent_closed=n)
+        return book.load()
+    return run
+
+
+@benchmark("persistence.analysis_log_save", [1_000, 10_000], [1_000])
+def bench_analysis_log_save(n):
+    engine = _learning_engine(n)
+    return lambda: engine._save("analysis_log", "bench_analysis_log.json", force=True)
+
+
+@benchmark("persistence.analysis_log_load", [1_000, 10_000], [1_000])
+def bench_analysis_log_load(n):
+    with open("bench_analysis_log_load.json", "w") as f:
+        json.dump(_analysis_records(n), f, indent=2, default=str)
+
+    def run():
+        with open("bench_analysis_log_load.json") as f:
+            return json.load(f)
+    return run
+
+
+@benchmark("dashboard.ws_payload_json", [10, 100, 1_000], [10, 100])
+def bench_ws_payload(n):
+    payload = sample_dashboard_payload(n)
+    return lambda: json.dumps(payload, default=str)
+
+
+@benchmark("dashboard.push_full_encode", [10, 100, 1_000], [10, 100])
+def bench_push_full(n):
+    from push_protocol import DeltaEncoder, encode_body
+    payload = sample_dashboard_payload(n)
+
+    def run():
+        encoder = DeltaEncoder()
+        return encode_body(encoder.build(payload))
+    return run
+
+
+@benchmark("dashboard.push_delta_encode", [10, 100, 1_000], [10, 100])
+def bench_push_delta(n):
+    from push_protocol import DeltaEncoder, encode_body
+    payload = sample_dashboard_payload(n)
+    encoder = DeltaEncoder()
+    encoder.ack(encoder.build(payload)["version"])
+    tick = iter(range(10**9))
+
+    def run():
+        # Ciclo tipico: so preco e logs mudam
+        payload["price"] = 150.0 + next(tick) * 1e-4
+        envelope = encoder.build(payload)
+        encoder.ack(envelope["version"])
+        return encode_body(envelope)
+    return run
+
+
+# ============================================================
+# EXECUCAO
+# ============================================================
+def _measure(run: Callable[[], object], reset: Optional[Callable[[], None]] = None) -> Dict:
+    reset = reset or (lambda: None)
+    reset()
+    run()  # Aquecimento (imports, caches)
+    times = []
+    total = 0.0
+    while len(times) < MAX_REPEATS and (total < MIN_TIME or len(times) < 3):
+        reset()
+        gc.collect()
+        start = time.perf_counter()
+        run()
+        elapsed = time.perf_counter() - start
+        times.append(elapsed)
+        total += elapsed
+
+    reset()
+    gc.collect()
+    tracemalloc.start()
+    run()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {
+        "repeats": len(times),
+        "median_s": statistics.median(times),
+        "min_s": min(times),
+        "peak_kb": round(peak / 1024, 1),
+    }
+
+
+def _git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+            cwd=os.path.dirname(os.path.abspath(__file__)), timeout=10,
+        ).stdout.strip()
+    except (OSError, subprocess.SubprocessError):
+        return ""
+
+
+def run_benchmarks(quick: bool = False, name_filter: str = "") -> Dict:
+    """Roda os casos selecionados num diretorio temporario."""
+    results = []
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmp:
+        os.chdir(tmp)
+        try:
+            for name, (sizes, quick_sizes, setup) in BENCHMARKS.items():
+                if name_filter and name_filter not in name:
+                    continue
+                for size in (quick_sizes if quick else sizes):
+                    case = setup(size)
+                    stats = _measure(*case) if isinstance(case, tuple) else _measure(case)
+                    results.append({"name": name, "size": size, **stats})
+                    logger.info(
+                        f"{name:34s} n={size:<7d} {stats['median_s'] * 1e3:10.3f} ms "
+                        f"(min {stats['min_s'] * 1e3:.3f}) | pico {stats['peak_kb']:,.0f} KB"
+                    )
+        finally:
+            os.chdir(cwd)
+
+    return {
+        "commit": _git_commit(),
+        "created": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+        "machine": f"{platform.system()} {platform.machine()} ({os.cpu_count()} cpus)",
+        "quick": quick,
+        "results": results,
+    }
+
+
+def compare(current: Dict, base: Dict, ratio: float = REGRESSION_RATIO) -> List[Dict]:
+    """Razao current/base do tempo mediano por (name, size)."""
+    base_index = {(r["name"], r["size"]): r for r in base.get("results", [])}
+    rows = []
+    for r in current["results"]:
+        b = base_index.get((r["name"], r["size"]))
+        if not b or not b["median_s"]:
+            continue
+        time_ratio = r["median_s"] / b["median_s"]
+        rows.append({
+            "name": r["name"], "size": r["size"],
+            "time_ratio": round(time_ratio, 3),
+            "peak_ratio": round(r["peak_kb"] / b["peak_kb"], 3) if b["peak_kb"] else None,
+            "regression": time_ratio > ratio,
+        })
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks dos caminhos quentes")
+    parser.add_argument("--out", default="benchmark_results.json", help="Arquivo JSON de saida")
+    parser.add_argument("--compare", help="JSON de uma execucao anterior (base)")
+    parser.add_argument("--quick", action="store_true", help="So os tamanhos menores")
+    parser.add_argument("--filter", default="", help="Roda so casos cujo nome contem o texto")
+    args = parser.parse_args()
+
+    # Logs dos motores (registros, revisoes) poluem a saida
+    logging.basicConfig(level=logging.WARNING, format="%(message)s")
+    logger.setLevel(logging.INFO)
+
+    report = run_benchmarks(quick=args.quick, name_filter=args.filter)
+    if args.compare:
+        with open(args.compare) as f:
+            base = json.load(f)
+        report["base_commit"] = base.get("commit", "")
+        report["comparison"] = compare(report, base)
+        for row in report["comparison"]:
+            flag = "  << REGRESSAO" if row["regression"] else ""
+            logger.info(f"{row['name']:34s} n={row['size']:<7d} x{row['time_ratio']:.2f}{flag}")
+
+    with open(args.out, "w") as f:
+        json.dump(report, f, indent=2)
+    logger.info(f"Resultados em {args.out}")
+
+
+if __name__ == "__main__":
+    main()
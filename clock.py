@@ -0,0 +1,176 @@
+"""
+Clock - Fonte de tempo plugavel (real ou simulada)
+====================================================
+Todos os modulos pegam a hora daqui em vez de chamar time.time(),
+datetime.utcnow(), datetime.now(tz) ou asyncio.sleep() direto:
+
+    import clock
+    clock.time()          # epoch em segundos
+    clock.monotonic()     # para medir intervalos / agendar
+    clock.utcnow()        # datetime UTC naive (como datetime.utcnow)
+    clock.now(BR_TZ)      # datetime com fuso
+    await clock.sleep(s)
+
+Por padrao o relogio e o real. Com set_clock(SimulatedClock(...)) o codigo
+roda em tempo virtual: sleep() nao espera de verdade, o relogio salta
+direto para o proximo prazo pendente (auto_advance) ou so anda com
+advance() manual (testes passo a passo, learning_replay).
+
+SimulatedClock e so para codigo sem I/O real (replay offline, testes).
+O auto_advance enxerga apenas os sleeps do relogio: durante um await de
+rede ele continua saltando para o proximo prazo, o tempo virtual anda
+centenas de segundos e o loop fica girando. Por isso o bot (main.py)
+sempre usa o relogio real.
+
+Medicoes de custo de CPU (time.perf_counter) e timeouts de rede
+(asyncio.wait_for) continuam em tempo real de proposito.
+
+Somente stdlib.
+"""
+
+import asyncio
+import heapq
+import itertools
+import time as _time
+from datetime import datetime, timezone, tzinfo
+from typing import List, Optional, Tuple
+
+# Voltas do event loop antes de saltar o relogio: as tarefas prontas
+# rodam ate o proximo await e registram seus sleeps antes do salto
+AUTO_IDLE_HOPS = 8
+
+
+class RealClock:
+    """Relogio de parede."""
+
+    simulated = False
+
+    def time(self) -> float:
+        return _time.time()
+
+    def monotonic(self) -> float:
+        return _time.monotonic()
+
+    def utcnow(self) -> datetime:
+        return datetime.now(timezone.utc).replace(tzinfo=None)
+
+    def now(self, tz: Optional[tzinfo] = None) -> datetime:
+        return datetime.now(tz)
+
+    async def sleep(self, seconds: float):
+        await asyncio.sleep(seconds)
+
+
+class SimulatedClock:
+    """
+    Relogio virtual avancado manualmente ou por eventos.
+
+    start: epoch inicial (padrao = agora real).
+    auto_advance: quando as tarefas prontas ja rodaram, salta o relogio
+        para o prazo do sleep mais proximo e acorda quem venceu. Nao
+        espera I/O real pendente: use so sem rede (ver docstring do modulo).
+    """
+
+    simulated = True
+
+    def __init__(self, start: Optional[float] = None, auto_advance: bool = True):
+        self._now = _time.time() if start is None else float(start)
+        self._start = self._now
+        self.auto_advance = auto_advance
+        self._waiters: List[Tuple[float, int, asyncio.Future]] = []
+        self._seq = itertools.count()
+        self._auto_scheduled = False
+
+    def time(self) -> float:
+        return self._now
+
+    def monotonic(self) -> float:
+        return self._now - self._start
+
+    def utcnow(self) -> datetime:
+        return datetime.fromtimestamp(self._now, timezone.utc).replace(tzinfo=None)
+
+    def now(self, tz: Optional[tzinfo] = None) -> datetime:
+        return datetime.fromtimestamp(self._now, tz)
+
+    # ---- Avanco ----
+
+    def advance(self, seconds: float):
+        """Anda o relogio e acorda os sleeps que venceram."""
+        self.advance_to(self._now + max(0.0, seconds))
+
+    def advance_to(self, timestamp: float):
+        if timestamp > self._now:
+            self._now = timestamp
+        waiters = self._waiters
+        while waiters and waiters[0][0] <= self._now:
+            _, _, fut = heapq.heappop(waiters)
+            if not fut.done():
+                fut.set_result(None)
+
+    def next_deadline(self) -> Optional[float]:
+        """Prazo do proximo sleep pendente (None se ninguem dorme)."""
+        while self._waiters and self._waiters[0][2].done():
+            heapq.heappop(self._waiters)  # cancelados
+        return self._waiters[0][0] if self._waiters else None
+
+    def _auto_step(self, hops: int = AUTO_IDLE_HOPS):
+        loop = asyncio.get_running_loop()
+        if hops > 0:
+            # Cede algumas voltas do loop para cadeias de await terminarem
+            loop.call_soon(self._auto_step, hops - 1)
+            return
+        deadline = self.next_deadline()
+        if deadline is None:
+            self._auto_scheduled = False
+            return
+        self.advance_to(deadline)
+        loop.call_soon(self._auto_step)
+
+    # ---- Sleep ----
+
+    async def sleep(self, seconds: float):
+        if seconds <= 0:
+            await asyncio.sleep(0)
+            return
+        loop = asyncio.get_running_loop()
+        fut = loop.create_future()
+        heapq.heappush(self._waiters, (self._now + seconds, next(self._seq), fut))
+        if self.auto_advance and not self._auto_scheduled:
+            self._auto_scheduled = True
+            loop.call_soon(self._auto_step)
+        await fut
+
+
+_clock = RealClock()
+
+
+def get_clock():
+    return _clock
+
+
+def set_clock(new_clock):
+    """Instala o relogio global. Retorna o anterior (para restaurar)."""
+    global _clock
+    previous, _clock = _clock, new_clock
+    return previous
+
+
+def time() -> float:
+    return _clock.time()
+
+
+def monotonic() -> float:
+    return _clock.monotonic()
+
+
+def utcnow() -> datetime:
+    return _clock.utcnow()
+
+
+def now(tz: Optional[tzinfo] = None) -> datetime:
+    return _clock.now(tz)
+
+
+async def sleep(seconds: float):
+    await _clock.sleep(seconds)
@@ -122,6 +122,8 @@ MIN_RISK_REWARD = 1.2              # R:R mínimo 1.2:1 (era 1.5 - muito restriti
 JUPITER_API_URL = "https://lite-api.jup.ag/swap/v1"
 JUPITER_SWAP_URL = "https://lite-api.jup.ag/swap/v1/swap"
 JUPITER_PRICE_URL = "https://lite-api.jup.ag/swap/v1/price"
+JUPITER_MAX_CONCURRENT_QUOTES = 4   # Quotes simultaneas (limite compartilhado)
+REAL_QUOTE_TRIGGER_MARGIN_PCT = 1.0 # Posicao a menos de X pp de TP/SL/trailing: quote exata
 
 # ============================================================
 # DADOS DE PREÇO - GeckoTerminal (grátis, sem API key!)
@@ -129,13 +131,24 @@ JUPITER_PRICE_URL = "https://lite-api.jup.ag/swap/v1/price"
 # Pool SOL/USDC com MAIOR LIQUIDEZ na Solana (Orca Whirlpool)
 GECKO_POOL_ADDRESS = "FpCMFDFGYotvufJ7HrFHsWEiiQCGbkLCtwHiDnh7o28Q"
 
+# Gravacao / replay das APIs de mercado (GeckoTerminal, DexScreener, Jupiter)
+MARKET_RECORD_FILE = ""            # Ex: "market_capture.jsonl.gz" - grava toda request/response
+MARKET_REPLAY_URL = ""             # Ex: "http://127.0.0.1:8765" - usa o market_replay_server.py
+
 # ============================================================
 # OPERAÇÃO
 # ============================================================
 PAPER_TRADING = True               # SEMPRE comece em True!
 LOOP_INTERVAL_SECONDS = 60         # Intervalo entre análises (evita rate limit)
+STRATEGY_SCHEDULER_ENABLED = True  # Cada estrategia na sua cadencia (ver STRATEGY_SCHEDULE)
+REAL_TRADE_MIN_INTERVAL_S = LOOP_INTERVAL_SECONDS  # Minimo entre trades reais da mesma estrategia
 LOG_FILE = "trading_bot.log"
 LOG_LEVEL = "INFO"
+LOG_FORMAT = "text"                # "text" ou "json" (uma linha JSON por registro no arquivo)
+LOG_MAX_BYTES = 10 * 1024 * 1024   # Rotacao por tamanho do LOG_FILE
+LOG_BACKUP_COUNT = 5               # Arquivos antigos mantidos (trading_bot.log.1, .2...)
+LOG_ROTATE_WHEN = ""               # Ex: "midnight" - rotacao por tempo em vez de tamanho
+LOG_QUEUE_SIZE = 10000             # Fila do log em memoria (cheia = descarta, nao bloqueia)
 
 # ============================================================
 # DASHBOARD
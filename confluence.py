@@ -9,8 +9,8 @@ import json
 import os
 from typing import Dict, List, Optional
 from dataclasses import dataclass
-from datetime import datetime
 import config
+import clock
 from indicators import get_all_scores, calculate_all
 
 
@@ -160,7 +160,8 @@ class ConfluenceEngine:
     # --------------------------------------------------------
     def calculate_stop_loss(self, price: float, direction: str,
                             scores: Dict, df) -> float:
-        df_calc = calculate_all(df.copy())
+        # DataFrame vindo de OHLCVBuffer.to_frame() ja traz os indicadores
+        df_calc = df if "kumo_top" in df.columns else calculate_all(df.copy())
         last = df_calc.iloc[-1]
         candidates = []
 
@@ -291,7 +292,7 @@ class ConfluenceEngine:
             return None  # Volume muito baixo, pode ser armadilha
 
         return TradeSignal(
-            timestamp=datetime.utcnow().isoformat(),
+            timestamp=clock.utcnow().isoformat(),
             symbol=symbol, direction=direction,
             confidence=conf["confidence"], entry_price=price,
             stop_loss=sl, take_profits=tps,
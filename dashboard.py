@@ -743,6 +743,8 @@ DASHBOARD_HTML = r"""
         .strat-card.is-paused .strat-pnl { color: var(--text-muted) !important; }
         .strat-paused-badge { display: none; font-size: 0.6em; color: var(--red); background: rgba(255,68,102,0.1); border: 1px solid rgba(255,68,102,0.2); padding: 2px 8px; border-radius: 4px; font-weight: 600; letter-spacing: 0.5px; margin-left: auto; }
         .strat-card.is-paused .strat-paused-badge { display: inline-block; }
+        .strat-sim-metrics { font-size: 0.62em; color: var(--text-muted); font-family: 'JetBrains Mono', monospace; margin-top: 6px; }
+        .strat-sim-metrics.has-errors { color: var(--red); }
         .strat-card.real-mode { border-color: rgba(0,255,136,0.2); }
         .strat-card.real-mode::before { background: linear-gradient(90deg, var(--green), var(--blue)) !important; }
         .real-mode-badge { font-size: 0.6em; color: var(--green); background: rgba(0,255,136,0.1); border: 1px solid rgba(0,255,136,0.2); padding: 2px 8px; border-radius: 4px; font-weight: 600; letter-spacing: 0.5px; }
@@ -1430,6 +1432,15 @@ function updateDashboard(data) {
 function updateStrategies(strats){
     if(!strats)return;
     function setCap(prefix,cap){if(!cap)return;setText(prefix+'-cap','$'+(cap.current||0).toFixed(2));setText(prefix+'-inv','$'+(cap.total_invested||0).toFixed(2));setText(prefix+'-gain','$'+(cap.total_gains||0).toFixed(2));setText(prefix+'-loss','$'+(cap.total_losses||0).toFixed(2));var te=document.getElementById(prefix+'-today');if(te){var tp=cap.today_pnl||0;te.textContent=(tp>=0?'+$':'-$')+Math.abs(tp).toFixed(2);te.style.color=tp>=0?'var(--green)':'var(--red)';}}
+    function setSimMetrics(cardId,m){
+        const card=document.getElementById(cardId);if(!card||!m)return;
+        let el=card.querySelector('.strat-sim-metrics');
+        if(!el){el=document.createElement('div');el.className='strat-sim-metrics';card.appendChild(el);}
+        const bad=(m.errors||0)+(m.timeouts||0);
+        el.textContent='Sim '+(m.last_ms||0).toFixed(0)+'ms (media '+(m.avg_ms||0).toFixed(0)+'ms) | lag '+(m.lag_ms||0).toFixed(0)+'ms | erros '+(m.errors||0)+' | timeouts '+(m.timeouts||0);
+        el.className='strat-sim-metrics'+(bad?' has-errors':'');
+        if(m.last_error)el.title=m.last_error;
+    }
     function setPaused(cardId,btnId,paused){const card=document.getElementById(cardId);const btn=document.getElementById(btnId);if(card){if(paused){card.classList.add('is-paused');}else{card.classList.remove('is-paused');}}if(btn){btn.textContent=paused?'Continuar':'Parar';btn.className='strat-toggle-btn '+(paused?'paused':'running');}}
     if(strats.sniper){const s=strats.sniper.stats||{},c=strats.sniper.capital||{};setPnl('strat-sniper-pnl',c.pnl_usd||0,false);setCap('strat-sniper',c);setText('strat-sniper-trades',s.total_snipes||0);setText('strat-sniper-wr',(s.win_rate||0).toFixed(0)+'%');setBar('strat-sniper-wrbar',s.win_rate||0);setText('strat-sniper-rug',s.rugged||0);setRecent('strat-sniper-recent',(strats.sniper.recent_targets||[]).slice(0,4),t=>`<div class="strat-recent-item"><span class="strat-recent-name">${t.name}</span><span class="strat-recent-pnl" style="color:${t.pnl_pct>=0?'var(--green)':'var(--red)'}">${t.pnl_pct>=0?'+':''}${t.pnl_pct}%</span></div>`);}
     if(strats.memecoin){const s=strats.memecoin.stats||{},c=strats.memecoin.capital||{};setPnl('strat-meme-pnl',c.pnl_usd||0,false);setCap('strat-meme',c);setText('strat-meme-trades',s.total_trades||0);setText('strat-meme-wr',(s.win_rate||0).toFixed(0)+'%');setBar('strat-meme-wrbar',s.win_rate||0);setText('strat-meme-momentum',s.high_momentum_count||0);setRecent('strat-meme-recent',(strats.memecoin.recent_signals||[]).slice(0,4),t=>`<div class="strat-recent-item"><span class="strat-recent-name">${t.name}</span><span class="strat-recent-pnl" style="color:${t.pnl_pct>=0?'var(--green)':'var(--red)'}">${t.pnl_pct>=0?'+':''}${t.pnl_pct}%</span></div>`);}
@@ -1444,6 +1455,8 @@ function updateStrategies(strats){
     if(strats.scalping)setPaused('strat-scalping','strat-scalp-btn',!!strats.scalping.paused);
     if(strats.leverage)setPaused('strat-leverage','strat-lev-btn',!!strats.leverage.paused);
     if(strats.whale)setPaused('strat-whale','strat-whale-btn',!!strats.whale.paused);
+    const simCards={sniper:'strat-sniper',memecoin:'strat-memecoin',arbitrage:'strat-arbitrage',scalping:'strat-scalping',leverage:'strat-leverage',whale:'strat-whale'};
+    for(const [k,cid] of Object.entries(simCards)){if(strats[k])setSimMetrics(cid,strats[k].sim_metrics);}
 }
 function setPnl(id,val,isPct){const el=document.getElementById(id);if(!el)return;const txt=isPct?((val>=0?'+':'')+val.toFixed(1)+'%'):((val>=0?'+$':'-$')+Math.abs(val).toFixed(2));el.textContent=txt;el.className='strat-pnl '+(val>0?'profit':val<0?'loss':'neutral');}
 function setText(id,val){const el=document.getElementById(id);if(el)el.textContent=val;}
@@ -0,0 +1,105 @@
+"""
+Event Bus - Pub/Sub assincrono in-process
+===========================================
+As estrategias publicam eventos tipados (TradeEvent) quando fecham um
+trade simulado; o executor do modo real assina o topico e reage na hora,
+sem precisar montar o dashboard de cada estrategia para comparar
+contagens de trades. Swaps reais executados viram RealTradeEvent
+(topico "real_trade"), assinado pelos agentes e pelas notificacoes do
+Telegram.
+
+Publicacao nunca bloqueia: assinantes por fila (asyncio.Queue) perdem o
+evento mais antigo se a fila encher; assinantes por callback sao
+chamados na hora (devem ser rapidos).
+"""
+
+import asyncio
+import logging
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional
+
+import clock
+
+logger = logging.getLogger("EventBus")
+
+TRADE_TOPIC = "trade"
+REAL_TRADE_TOPIC = "real_trade"
+
+
+@dataclass
+class TradeEvent:
+    strategy: str           # chave da estrategia (sniper, scalping, ...)
+    trade_no: int           # contador de trades da estrategia
+    direction: str          # long / short
+    pnl_pct: float          # resultado simulado (%)
+    status: str             # status do trade na estrategia
+    info: Dict = field(default_factory=dict)  # detalhes para dashboard/historico
+    timestamp: float = field(default_factory=clock.time)
+
+
+@dataclass
+class RealTradeEvent:
+    strategy: str           # chave da estrategia
+    kind: str               # instant (compra+venda), open (posicao aberta), close (posicao fechada)
+    amount_usd: float       # capital do trade
+    coin: str               # moeda da alocacao
+    tx: str                 # tx final (venda; compra quando so abriu)
+    pnl_usd: float = 0.0    # resultado real (instant/close)
+    info: Dict = field(default_factory=dict)        # tp/sl/hold, motivo, retorno...
+    allocation: Dict = field(default_factory=dict)  # alocacao da estrategia (com trade_history)
+    timestamp: float = field(default_factory=clock.time)
+
+
+class EventBus:
+    """Barramento de eventos por topico."""
+
+    def __init__(self, queue_size: int = 1000):
+        self.queue_size = queue_size
+        self._queues: Dict[str, List[asyncio.Queue]] = {}
+        self._callbacks: Dict[str, List[Callable]] = {}
+        self.published = 0
+        self.dropped = 0
+
+    def subscribe(self, topic: str, callback: Optional[Callable] = None,
+                  maxsize: Optional[int] = None) -> Optional[asyncio.Queue]:
+        """Assina um topico. Com callback, e chamado a cada evento; sem, retorna uma fila."""
+        if callback is not None:
+            self._callbacks.setdefault(topic, []).append(callback)
+            return None
+        queue = asyncio.Queue(maxsize=maxsize or self.queue_size)
+        self._queues.setdefault(topic, []).append(queue)
+        return queue
+
+    def unsubscribe(self, topic: str, subscriber):
+        for registry in (self._queues, self._callbacks):
+            subs = registry.get(topic, [])
+            if subscriber in subs:
+                subs.remove(subscriber)
+
+    def publish(self, topic: str, event):
+        """Entrega o evento a todos os assinantes sem bloquear."""
+        self.published += 1
+        for callback in self._callbacks.get(topic, []):
+            try:
+                callback(event)
+            except Exception as e:
+                logger.warning(f"Event callback error ({topic}): {e}")
+        for queue in self._queues.get(topic, []):
+            if queue.full():
+                # Assinante lento: descarta o mais antigo para nao travar o publisher
+                try:
+                    queue.get_nowait()
+                    self.dropped += 1
+                except asyncio.QueueEmpty:
+                    pass
+            queue.put_nowait(event)
+
+    @staticmethod
+    def drain(queue: asyncio.Queue) -> list:
+        """Retorna todos os eventos ja enfileirados (sem esperar)."""
+        events = []
+        while True:
+            try:
+                events.append(queue.get_nowait())
+            except asyncio.QueueEmpty:
+                return events
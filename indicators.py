@@ -9,6 +9,12 @@ import pandas as pd
 import numpy as np
 from typing import Dict, List, Tuple, Optional
 import config
+from ohlcv_buffer import OHLCVBuffer
+
+
+def _row(df, i: int):
+    """Candle i como Series (DataFrame) ou dict (OHLCVBuffer, sem pandas)."""
+    return df.row(i) if isinstance(df, OHLCVBuffer) else df.iloc[i]
 
 
 # ============================================================
@@ -35,8 +41,8 @@ def rsi_signal(df: pd.DataFrame) -> Dict:
     if "rsi" not in df.columns or len(df) < 2:
         return {"signal": None, "strength": 0, "value": 50}
 
-    rsi = df.iloc[-1]["rsi"]
-    rsi_prev = df.iloc[-2]["rsi"]
+    rsi = _row(df, -1)["rsi"]
+    rsi_prev = _row(df, -2)["rsi"]
 
     if pd.isna(rsi):
         return {"signal": None, "strength": 0, "value": 50}
@@ -93,8 +99,9 @@ def volume_signal(df: pd.DataFrame) -> Dict:
     if "volume_ratio" not in df.columns or len(df) < 2:
         return {"signal": None, "strength": 0, "ratio": 1.0}
 
-    ratio = df.iloc[-1]["volume_ratio"]
-    price_change = (df.iloc[-1]["close"] - df.iloc[-2]["close"]) / df.iloc[-2]["close"]
+    last, prev = _row(df, -1), _row(df, -2)
+    ratio = last["volume_ratio"]
+    price_change = (last["close"] - prev["close"]) / prev["close"]
 
     if pd.isna(ratio):
         return {"signal": None, "strength": 0, "ratio": 1.0}
@@ -126,7 +133,7 @@ def calculate_emas(df: pd.DataFrame, periods: List[int] = None) -> pd.DataFrame:
 
 def ema_alignment_score(df: pd.DataFrame) -> float:
     """Score -1 a 1. +1 = bullish perfeito, -1 = bearish perfeito."""
-    last = df.iloc[-1]
+    last = _row(df, -1)
     periods = sorted(config.EMA_PERIODS)
     bullish_pairs = 0
     total_pairs = 0
@@ -141,8 +148,9 @@ def ema_alignment_score(df: pd.DataFrame) -> float:
 def ema_crossover_signal(df: pd.DataFrame, short: int = 9, long: int = 21) -> Dict:
     if len(df) < 3:
         return {"signal": None, "strength": 0}
-    curr_s, prev_s = df.iloc[-1][f"ema_{short}"], df.iloc[-2][f"ema_{short}"]
-    curr_l, prev_l = df.iloc[-1][f"ema_{long}"], df.iloc[-2][f"ema_{long}"]
+    curr, prev = _row(df, -1), _row(df, -2)
+    curr_s, prev_s = curr[f"ema_{short}"], prev[f"ema_{short}"]
+    curr_l, prev_l = curr[f"ema_{long}"], prev[f"ema_{long}"]
     if prev_s <= prev_l and curr_s > curr_l:
         return {"signal": "buy", "strength": min(abs(curr_s - curr_l) / curr_l * 100, 1.0)}
     if prev_s >= prev_l and curr_s < curr_l:
@@ -168,7 +176,7 @@ def calculate_ichimoku(df: pd.DataFrame) -> pd.DataFrame:
 
 
 def ichimoku_trend_score(df: pd.DataFrame) -> float:
-    last = df.iloc[-1]
+    last = _row(df, -1)
     close = last["close"]
     scores = []
     
@@ -196,7 +204,7 @@ def ichimoku_trend_score(df: pd.DataFrame) -> float:
 def ichimoku_signal(df: pd.DataFrame) -> Dict:
     if len(df) < 3:
         return {"signal": None, "strength": 0, "type": None}
-    curr, prev = df.iloc[-1], df.iloc[-2]
+    curr, prev = _row(df, -1), _row(df, -2)
     
     # TK Cross
     if (pd.notna(curr.get("tenkan_sen")) and pd.notna(curr.get("kijun_sen")) and
@@ -223,10 +231,11 @@ def ichimoku_signal(df: pd.DataFrame) -> Dict:
 def find_swing_points(df: pd.DataFrame, lookback: int = None) -> Tuple[Optional[float], Optional[float]]:
     if lookback is None:
         lookback = config.FIBONACCI_LOOKBACK
-    recent = df.tail(lookback)
-    if len(recent) < 10:
+    # Arrays (sem copia) servem para DataFrame e OHLCVBuffer
+    highs = np.asarray(df["high"])[-lookback:]
+    if len(highs) < 10:
         return None, None
-    return recent["high"].max(), recent["low"].min()
+    return highs.max(), np.asarray(df["low"])[-lookback:].min()
 
 
 def calculate_fibonacci_levels(high: float, low: float, direction: str = "up") -> Dict[float, float]:
@@ -250,7 +259,7 @@ def fibonacci_score(df: pd.DataFrame) -> Dict:
     if high is None:
         return {"support_score": 0, "resistance_score": 0, "levels": {}}
     
-    price = df.iloc[-1]["close"]
+    price = _row(df, -1)["close"]
     direction = "up" if price > (high + low) / 2 else "down"
     levels = calculate_fibonacci_levels(high, low, direction)
     
@@ -283,7 +292,9 @@ def fibonacci_score(df: pd.DataFrame) -> Dict:
 # ============================================================
 
 def calculate_all(df: pd.DataFrame) -> pd.DataFrame:
-    """Calcula todos os indicadores de uma vez."""
+    """Calcula todos os indicadores de uma vez (OHLCVBuffer: no proprio buffer)."""
+    if isinstance(df, OHLCVBuffer):
+        return df.compute_indicators()
     df = calculate_emas(df)
     df = calculate_ichimoku(df)
     df = calculate_rsi(df)
@@ -295,6 +306,7 @@ def calculate_all(df: pd.DataFrame) -> pd.DataFrame:
 def get_all_scores(df: pd.DataFrame) -> Dict:
     """Retorna scores de todos os indicadores."""
     df = calculate_all(df)
+    last = _row(df, -1)
     return {
         "ema_alignment": ema_alignment_score(df),
         "ema_crossover": ema_crossover_signal(df),
@@ -303,7 +315,7 @@ def get_all_scores(df: pd.DataFrame) -> Dict:
         "fibonacci": fibonacci_score(df),
         "rsi": rsi_signal(df),
         "volume": volume_signal(df),
-        "atr": df.iloc[-1]["atr"] if "atr" in df.columns else 0,
-        "atr_pct": df.iloc[-1]["atr_pct"] if "atr_pct" in df.columns else 1.0,
+        "atr": last["atr"] if "atr" in df.columns else 0,
+        "atr_pct": last["atr_pct"] if "atr_pct" in df.columns else 1.0,
         "dataframe": df,
     }
@@ -5,16 +5,16 @@ Usa Jupiter Aggregator API v6 para encontrar melhor rota
 e executar swaps on-chain.
 """
 
-import httpx
+import asyncio
 import base64
 import json
 import logging
-import time
 from typing import Dict, List, Optional
-from datetime import datetime
 from dataclasses import dataclass, field
 
 import config
+import clock
+from market_recorder import market_client
 
 logger = logging.getLogger(__name__)
 
@@ -53,7 +53,9 @@ class JupiterExecutor:
     """Executa swaps via Jupiter Aggregator na Solana."""
 
     def __init__(self, learning_engine=None):
-        self.client = httpx.AsyncClient(timeout=30)
+        self.client = market_client(timeout=30)
+        # Limite compartilhado de quotes em paralelo (rate limit da API)
+        self._quote_semaphore = asyncio.Semaphore(config.JUPITER_MAX_CONCURRENT_QUOTES)
         self.positions: List[Position] = []
         self.closed_positions: List[Position] = []
         self.learning = learning_engine
@@ -104,9 +106,10 @@ class JupiterExecutor:
         }
 
         try:
-            resp = await self.client.get(
-                f"{config.JUPITER_API_URL}/quote", params=params
-            )
+            async with self._quote_semaphore:
+                resp = await self.client.get(
+                    f"{config.JUPITER_API_URL}/quote", params=params
+                )
             resp.raise_for_status()
             quote = resp.json()
 
@@ -170,7 +173,7 @@ class JupiterExecutor:
 
     def _simulate_swap(self, quote: Dict) -> str:
         """Simula swap em paper trading."""
-        fake_tx = f"PAPER_{int(time.time())}_{quote.get('outputMint', 'unknown')[:8]}"
+        fake_tx = f"PAPER_{int(clock.time())}_{quote.get('outputMint', 'unknown')[:8]}"
         in_amount = int(quote.get("inAmount", 0))
         out_amount = int(quote.get("outAmount", 0))
         logger.info(
@@ -274,7 +277,7 @@ class JupiterExecutor:
         token_quantity = out_amount / 1e8
 
         position = Position(
-            id=f"pos_{int(time.time())}",
+            id=f"pos_{int(clock.time())}",
             symbol=f"{config.TRADE_TOKEN}/{config.BASE_TOKEN}",
             direction=signal.direction,
             entry_price=current_price,
@@ -283,7 +286,7 @@ class JupiterExecutor:
             quantity_base=invest_usdc,
             stop_loss=signal.stop_loss,
             take_profits=signal.take_profits,
-            opened_at=datetime.utcnow().isoformat(),
+            opened_at=clock.utcnow().isoformat(),
             tx_hash=tx_hash,
         )
 
@@ -12,19 +12,27 @@ import json
 import os
 import logging
 import numpy as np
+import pandas as pd
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional
+from typing import Callable, Dict, List, Optional, Tuple
 from dataclasses import dataclass, field, asdict
 import config
+from clock import utcnow
+from shadow_book import ShadowBook
 
 logger = logging.getLogger("LearningEngine")
 
 # Arquivos de dados
 ANALYSIS_LOG_FILE = "analysis_log.json"
 SHADOW_TRADES_FILE = "shadow_trades.json"
+SHADOW_ARCHIVE_FILE = "shadow_trades_closed.jsonl"
 LEARNING_STATE_FILE = "learning_state.json"
 DAILY_REPORT_FILE = "daily_reports.json"
 
+# Horizontes de rotulagem (minutos); o ultimo decide would_have_profited
+LABEL_HORIZONS = {"5m": 5, "15m": 15, "30m": 30, "1h": 60}
+PROFIT_THRESHOLD_PCT = 0.5  # Pelo menos 0.5% de lucro
+
 
 @dataclass
 class AnalysisRecord:
@@ -48,6 +56,15 @@ class AnalysisRecord:
     price_after_15m: float = 0.0
     price_after_30m: float = 0.0
     price_after_1h: float = 0.0
+    # Excursoes intrabar por horizonte (% a favor / contra), via candles
+    mfe_5m: float = 0.0
+    mae_5m: float = 0.0
+    mfe_15m: float = 0.0
+    mae_15m: float = 0.0
+    mfe_30m: float = 0.0
+    mae_30m: float = 0.0
+    mfe_1h: float = 0.0
+    mae_1h: float = 0.0
     # O que teria acontecido
     would_have_profited: Optional[bool] = None
     potential_pnl_pct: float = 0.0
@@ -74,28 +91,171 @@ class ShadowTrade:
     max_adverse: float = 0.0    # Maximo contra antes de fechar
 
 
+# ============================================================
+# FRAME COLUNAR DO ANALYSIS LOG
+# ============================================================
+# Faixas usadas no agrupamento de condicoes (limite inferior inclusivo)
+RSI_BINS = [-np.inf, 30, 50, 70, np.inf]
+RSI_LABELS = ["<30", "30-50", "50-70", ">70"]
+CONF_BINS = [-np.inf, 25, 50, 75, np.inf]
+CONF_LABELS = ["<25%", "25-50%", "50-75%", ">75%"]
+
+# Colunas escalares do frame (combined_scores vira um frame separado)
+FRAME_COLUMNS = [
+    "timestamp", "direction", "confidence", "rsi_value", "signal_generated",
+    "rejection_reason", "would_have_profited", "potential_pnl_pct",
+]
+FRAME_DEFAULTS = {
+    "direction": "long", "confidence": 0.0, "rsi_value": 50.0,
+    "signal_generated": False, "rejection_reason": "", "potential_pnl_pct": 0.0,
+}
+
+# Colunas aceitas em review(by=...)
+REVIEW_GROUPS = ("day", "direction", "rejection_reason", "rsi_range", "confidence_range")
+
+
+def build_analysis_frame(records: List[Dict]) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Converte registros de analise em (frame, scores).
+    frame: uma linha por analise, colunas escalares + faixas de RSI/confianca.
+    scores: combined_scores por indicador (NaN onde o indicador nao veio).
+    """
+    frame = pd.DataFrame.from_records(records, columns=FRAME_COLUMNS)
+    frame = frame.fillna(FRAME_DEFAULTS)
+    frame["timestamp"] = pd.to_datetime(frame["timestamp"], format="ISO8601", errors="coerce")
+    frame["day"] = frame["timestamp"].dt.strftime("%Y-%m-%d")
+    frame["evaluated"] = frame["would_have_profited"].notna()
+    frame["profited"] = frame["would_have_profited"].eq(True)
+    frame["signal_generated"] = frame["signal_generated"].astype(bool)
+    frame["rsi_range"] = pd.cut(frame["rsi_value"].astype(float), RSI_BINS,
+                                labels=RSI_LABELS, right=False)
+    frame["confidence_range"] = pd.cut(frame["confidence"].astype(float) * 100, CONF_BINS,
+                                       labels=CONF_LABELS, right=False)
+
+    scores = pd.DataFrame.from_records(
+        [r.get("combined_scores") or {} for r in records], index=frame.index,
+    ).astype(float)
+    return frame, scores
+
+
+def _indicator_accuracy(frame: pd.DataFrame, scores: pd.DataFrame) -> Dict:
+    """Precisao de cada indicador (% de decisoes corretas), vetorizada."""
+    if scores.empty:
+        return {}
+    values = scores.to_numpy()
+    says_long = values > 0.1
+    says_short = values < -0.1
+
+    is_long = (frame["direction"] == "long").to_numpy()[:, None]
+    is_short = (frame["direction"] == "short").to_numpy()[:, None]
+    profited = frame["profited"].to_numpy()[:, None]
+
+    # Concordou com a direcao lucrativa, ou foi corretamente contrario
+    agree = (is_long & says_long) | (is_short & says_short)
+    oppose = (is_long & says_short) | (is_short & says_long)
+    correct = np.where(profited, agree, oppose)
+    wrong = (says_long | says_short) & ~correct
+
+    n_correct = correct.sum(axis=0)
+    n_decisions = n_correct + wrong.sum(axis=0)
+    return {
+        ind: round(float(c / d * 100), 1)
+        for ind, c, d in zip(scores.columns, n_correct, n_decisions) if d > 0
+    }
+
+
+def _best_conditions(frame: pd.DataFrame) -> List[Dict]:
+    """Win rate e P&L medio por faixa de RSI e de confianca (min 3 amostras)."""
+    conditions = []
+    for column, kind in (("rsi_range", "rsi_range"), ("confidence_range", "confidence_range")):
+        grouped = frame.groupby(column, observed=True).agg(
+            samples=("profited", "size"),
+            wins=("profited", "sum"),
+            avg_pnl=("potential_pnl_pct", "mean"),
+        )
+        for value, row in grouped[grouped["samples"] >= 3].iterrows():
+            conditions.append({
+                "type": kind,
+                "value": value,
+                "win_rate": round(row["wins"] / row["samples"] * 100, 1),
+                "avg_pnl": round(float(row["avg_pnl"]), 3),
+                "samples": int(row["samples"]),
+            })
+    return sorted(conditions, key=lambda x: x["avg_pnl"], reverse=True)
+
+
+def _review_stats(frame: pd.DataFrame, scores: pd.DataFrame) -> Dict:
+    """Estatisticas de revisao sobre analises ja avaliadas."""
+    total = len(frame)
+    would_profit = int(frame["profited"].sum())
+    signaled = frame["signal_generated"]
+    rejected = ~signaled
+    rejected_profit = int((rejected & frame["profited"]).sum())
+    return {
+        "total_analyses": total,
+        "would_profit": would_profit,
+        "would_loss": total - would_profit,
+        "accuracy": round(would_profit / total * 100, 1) if total > 0 else 0,
+        "signals_generated": int(signaled.sum()),
+        "signals_correct": int((signaled & frame["profited"]).sum()),
+        "missed_opportunities": rejected_profit,
+        "dodged_bullets": int(rejected.sum()) - rejected_profit,
+        "indicator_accuracy": _indicator_accuracy(frame, scores),
+        "best_conditions": _best_conditions(frame),
+    }
+
+
 class LearningEngine:
     """Motor de aprendizado que registra tudo e melhora continuamente."""
 
-    def __init__(self):
+    def __init__(self, data_dir: str = "", clock: Optional[Callable[[], datetime]] = None,
+                 autosave: bool = True):
+        """
+        data_dir: pasta dos arquivos de estado ("" = diretorio atual).
+        clock: fonte de tempo UTC (padrao: relogio global de clock.py).
+        autosave: False adia a escrita em disco ate flush().
+        """
+        self.data_dir = data_dir
+        self._utcnow = clock or utcnow
+        self.autosave = autosave
         self.analysis_log: List[Dict] = []
-        self.shadow_trades: List[Dict] = []
+        self.shadow_book = ShadowBook(self._path(SHADOW_TRADES_FILE),
+                                      self._path(SHADOW_ARCHIVE_FILE))
         self.state: Dict = {}
         self.daily_reports: List[Dict] = []
 
+        # Analises antes do cursor ja estao rotuladas ou expiradas
+        # (vale para a lista em _label_cursor_log; outra lista zera)
+        self._label_cursor = 0
+        self._label_cursor_log: Optional[List[Dict]] = None
+
+        # Frame colunar do analysis_log, reconstruido so quando o log muda
+        self._log_version = 0
+        self._frame_cache: Optional[Tuple[int, pd.DataFrame, pd.DataFrame]] = None
+
         self._load_all()
+        legacy_closed = self.shadow_book.load()
+        if "shadow_closed" not in self.state:
+            # Migracao: o JSON antigo tinha todos os shadow trades fechados
+            self.state["shadow_closed"] = len(legacy_closed)
+            self.state["shadow_closed_positive"] = sum(
+                1 for t in legacy_closed if t.get("pnl_pct", 0) > 0
+            )
         self._ensure_state()
 
     # --------------------------------------------------------
     # PERSISTENCIA
     # --------------------------------------------------------
+    def _path(self, filename: str) -> str:
+        return os.path.join(self.data_dir, filename)
+
     def _load_all(self):
-        for attr, filepath in [
+        for attr, filename in [
             ("analysis_log", ANALYSIS_LOG_FILE),
-            ("shadow_trades", SHADOW_TRADES_FILE),
             ("state", LEARNING_STATE_FILE),
             ("daily_reports", DAILY_REPORT_FILE),
         ]:
+            filepath = self._path(filename)
             try:
                 if os.path.exists(filepath):
                     with open(filepath) as f:
@@ -103,7 +263,10 @@ class LearningEngine:
             except (json.JSONDecodeError, Exception) as e:
                 logger.warning(f"Erro ao carregar {filepath}: {e}")
 
-    def _save(self, attr: str, filepath: str):
+    def _save(self, attr: str, filename: str, force: bool = False):
+        if not (self.autosave or force):
+            return
+        filepath = self._path(filename)
         try:
             data = getattr(self, attr)
             with open(filepath, "w") as f:
@@ -114,11 +277,29 @@ class LearningEngine:
     def _save_analysis_log(self):
         # Manter apenas ultimos 7 dias (~10000 registros max)
         if len(self.analysis_log) > 10000:
+            dropped = len(self.analysis_log) - 10000
+            same_log = self._label_cursor_log is self.analysis_log
             self.analysis_log = self.analysis_log[-10000:]
+            if same_log:
+                self._label_cursor = max(0, self._label_cursor - dropped)
+                self._label_cursor_log = self.analysis_log
+        self._log_version += 1
         self._save("analysis_log", ANALYSIS_LOG_FILE)
 
-    def _save_shadow_trades(self):
-        self._save("shadow_trades", SHADOW_TRADES_FILE)
+    def _save_shadow_trades(self, force: bool = False):
+        if not (self.autosave or force):
+            return
+        try:
+            self.shadow_book.save()
+        except Exception as e:
+            logger.error(f"Erro ao salvar {SHADOW_TRADES_FILE}: {e}")
+
+    def flush(self):
+        """Grava todos os arquivos (usado com autosave=False)."""
+        self._save("analysis_log", ANALYSIS_LOG_FILE, force=True)
+        self._save_shadow_trades(force=True)
+        self._save("state", LEARNING_STATE_FILE, force=True)
+        self._save("daily_reports", DAILY_REPORT_FILE, force=True)
 
     def _save_state(self):
         self._save("state", LEARNING_STATE_FILE)
@@ -133,6 +314,8 @@ class LearningEngine:
             "total_shadow_trades": 0,
             "shadow_wins": 0,
             "shadow_losses": 0,
+            "shadow_closed": 0,           # Shadow trades fechados (inclui arquivados)
+            "shadow_closed_positive": 0,  # ... com pnl_pct > 0
             "missed_opportunities": 0,  # Vezes que NAO entrou mas teria lucrado
             "dodged_bullets": 0,        # Vezes que NAO entrou e teria perdido
             "false_entries": 0,         # Vezes que ENTROU e perdeu
@@ -162,7 +345,7 @@ class LearningEngine:
         exec_scores = scores_by_tf.get("execution", {})
 
         record = {
-            "timestamp": datetime.utcnow().isoformat(),
+            "timestamp": self._utcnow().isoformat(),
             "analysis_number": analysis_number,
             "price": price,
             "direction": conf["direction"],
@@ -195,21 +378,133 @@ class LearningEngine:
             f"Motivo: {rejection_reason or 'n/a'}"
         )
 
+    # --------------------------------------------------------
+    # ROTULAGEM PELOS CANDLES (MFE/MAE intrabar)
+    # --------------------------------------------------------
+    @staticmethod
+    def _is_resolved(record: Dict) -> bool:
+        return record.get("would_have_profited") is not None or bool(record.get("label_expired"))
+
+    def _pending_labels(self) -> List[Dict]:
+        """
+        Analises ainda sem rotulo (nem expiradas), em ordem cronologica.
+        Um cursor avanca sobre o prefixo ja resolvido do log, entao
+        rotuladas e expiradas nao sao revisitadas a cada ciclo.
+        """
+        log = self.analysis_log
+        if self._label_cursor_log is not log:
+            self._label_cursor_log = log
+            self._label_cursor = 0
+        i = min(self._label_cursor, len(log))
+        while i < len(log) and self._is_resolved(log[i]):
+            i += 1
+        self._label_cursor = i
+        return [r for r in log[i:] if not self._is_resolved(r)]
+
+    def label_from_candles(self, candles: pd.DataFrame, now: Optional[datetime] = None) -> int:
+        """
+        Rotula as analises pendentes com os candles (index = abertura UTC,
+        colunas high/low/close) de uma vez.
+
+        A janela de cada horizonte sao os k candles a partir do primeiro
+        aberto no instante da analise ou depois dele (k = horizonte / timeframe), entao a
+        resolucao e a do timeframe dos candles. So rotula quando a janela
+        de 1h ja fechou; analises que cairam fora dos candles (gap, bot
+        parado) sao marcadas label_expired e nao entram nas revisoes.
+        Retorna quantas analises foram rotuladas.
+        """
+        if candles is None or len(candles) < 2:
+            return 0
+        pending = self._pending_labels()
+        if not pending:
+            return 0
+
+        times = candles.index.to_numpy(dtype="datetime64[ns]")
+        width = np.median(np.diff(times))
+        n_candles = len(times)
+        now = np.datetime64(now or self._utcnow(), "ns")
+        # Candles fechados: fim (abertura + timeframe) <= agora
+        n_closed = int(np.searchsorted(times + width, now, side="right"))
+
+        ts = pd.to_datetime(
+            pd.Series([r.get("timestamp") for r in pending], dtype=object),
+            format="ISO8601", errors="coerce",
+        ).to_numpy(dtype="datetime64[ns]")
+        entry = np.array([float(r.get("price") or 0) for r in pending])
+        is_long = np.array([r.get("direction") == "long" for r in pending])
+
+        start = np.searchsorted(times, ts, side="left")
+        first_open = times[np.minimum(start, n_candles - 1)]
+        in_range = start < n_candles
+        covered = in_range & (first_open - ts < width)
+        invalid = np.isnat(ts) | (entry <= 0) | (in_range & ~covered)
+
+        width_min = width / np.timedelta64(1, "m")
+        bars = {h: max(1, int(round(m / width_min))) for h, m in LABEL_HORIZONS.items()}
+        ready = covered & ~invalid & (start + max(bars.values()) <= n_closed)
+
+        high = candles["high"].to_numpy(dtype=float)
+        low = candles["low"].to_numpy(dtype=float)
+        close = candles["close"].to_numpy(dtype=float)
+        idx = start[ready]
+        entry_r = entry[ready]
+        long_r = is_long[ready]
+
+        # Max/min corridos para frente: janela [i, i+k) de cada candle
+        columns = {}
+        for horizon, k in bars.items():
+            fwd_high = np.lib.stride_tricks.sliding_window_view(high, k).max(axis=1)[idx]
+            fwd_low = np.lib.stride_tricks.sliding_window_view(low, k).min(axis=1)[idx]
+            up = (fwd_high - entry_r) / entry_r * 100
+            down = (entry_r - fwd_low) / entry_r * 100
+            columns[f"mfe_{horizon}"] = np.where(long_r, up, down)
+            columns[f"mae_{horizon}"] = np.where(long_r, down, up)
+            columns[f"price_after_{horizon}"] = close[idx + k - 1]
+
+        last_horizon = list(LABEL_HORIZONS)[-1]
+        potential = columns[f"mfe_{last_horizon}"]
+        ready_records = [r for r, ok in zip(pending, ready) if ok]
+        for i, record in enumerate(ready_records):
+            for name, values in columns.items():
+                record[name] = round(float(values[i]), 6 if name.startswith("price") else 3)
+            record["potential_pnl_pct"] = round(float(potential[i]), 3)
+            record["would_have_profited"] = bool(potential[i] > PROFIT_THRESHOLD_PCT)
+
+            if not record["signal_generated"]:
+                if record["would_have_profited"]:
+                    self.state["missed_opportunities"] = self.state.get("missed_opportunities", 0) + 1
+                else:
+                    self.state["dodged_bullets"] = self.state.get("dodged_bullets", 0) + 1
+
+        expired = 0
+        for record, bad in zip(pending, invalid):
+            if bad:
+                record["label_expired"] = True
+                expired += 1
+
+        if ready_records or expired:
+            self._save_analysis_log()
+            self._save_state()
+            logger.info(
+                f"[LEARN] {len(ready_records)} analises rotuladas pelos candles"
+                + (f" | {expired} expiradas" if expired else "")
+            )
+        return len(ready_records)
+
     # --------------------------------------------------------
     # ATUALIZA PRECOS FUTUROS (retroativamente)
     # --------------------------------------------------------
     def update_future_prices(self, current_price: float):
         """
         Atualiza precos futuros das analises passadas.
-        Chamado a cada ciclo, preenche os campos price_after_Xm.
+        Fallback sem candles: amostra o preco do ciclo nos campos
+        price_after_Xm (depende do timing do loop; label_from_candles
+        e o caminho principal).
         """
-        now = datetime.utcnow()
+        now = self._utcnow()
         updated = 0
 
-        for record in self.analysis_log:
-            if record.get("would_have_profited") is not None:
-                continue  # Ja avaliado
-
+        for record in self._pending_labels():
             try:
                 rec_time = datetime.fromisoformat(record["timestamp"])
             except (ValueError, KeyError):
@@ -274,8 +569,8 @@ class LearningEngine:
         Chamado quando a confianca esta PERTO do threshold.
         """
         trade = {
-            "id": f"shadow_{int(datetime.utcnow().timestamp())}",
-            "timestamp": datetime.utcnow().isoformat(),
+            "id": f"shadow_{int(self._utcnow().timestamp())}",
+            "timestamp": self._utcnow().isoformat(),
             "direction": conf["direction"],
             "entry_price": price,
             "stop_loss": stop_loss,
@@ -291,7 +586,7 @@ class LearningEngine:
             "max_adverse": 0.0,
         }
 
-        self.shadow_trades.append(trade)
+        self.shadow_book.add(trade)
         self.state["total_shadow_trades"] = self.state.get("total_shadow_trades", 0) + 1
         self._save_shadow_trades()
         self._save_state()
@@ -305,90 +600,37 @@ class LearningEngine:
 
     def update_shadow_trades(self, current_price: float):
         """Atualiza shadow trades com preco atual. Fecha se bateu SL/TP."""
-        for trade in self.shadow_trades:
-            if trade["status"] != "open":
-                continue
-
-            entry = trade["entry_price"]
-            direction = trade["direction"]
-
-            # Atualiza maximos
-            if direction == "long":
-                favorable = ((current_price - entry) / entry) * 100
-                adverse = ((entry - current_price) / entry) * 100
+        closed = self.shadow_book.update(current_price, now=self._utcnow())
+        if not closed:
+            return
+
+        for trade in closed:
+            status = trade["status"]
+            won = status.startswith("win") or (status == "timeout" and trade["pnl_pct"] > 0)
+            if won:
+                self.state["shadow_wins"] = self.state.get("shadow_wins", 0) + 1
             else:
-                favorable = ((entry - current_price) / entry) * 100
-                adverse = ((current_price - entry) / entry) * 100
-
-            trade["max_favorable"] = max(trade.get("max_favorable", 0), favorable)
-            trade["max_adverse"] = max(trade.get("max_adverse", 0), adverse)
-
-            # Verifica Stop Loss
-            if direction == "long" and current_price <= trade["stop_loss"]:
-                trade["status"] = "loss_sl"
-                trade["exit_price"] = current_price
-                trade["exit_time"] = datetime.utcnow().isoformat()
-                trade["pnl_pct"] = round(((current_price - entry) / entry) * 100, 3)
                 self.state["shadow_losses"] = self.state.get("shadow_losses", 0) + 1
-                self._update_streak(False)
-                logger.info(f"[SHADOW] LOSS: {trade['id']} | PnL: {trade['pnl_pct']:+.2f}%")
-
-            elif direction == "short" and current_price >= trade["stop_loss"]:
-                trade["status"] = "loss_sl"
-                trade["exit_price"] = current_price
-                trade["exit_time"] = datetime.utcnow().isoformat()
-                trade["pnl_pct"] = round(((entry - current_price) / entry) * 100, 3)
-                self.state["shadow_losses"] = self.state.get("shadow_losses", 0) + 1
-                self._update_streak(False)
-                logger.info(f"[SHADOW] LOSS: {trade['id']} | PnL: {trade['pnl_pct']:+.2f}%")
-
+            self._update_streak(won)
+            self.state["shadow_closed"] = self.state.get("shadow_closed", 0) + 1
+            if trade["pnl_pct"] > 0:
+                self.state["shadow_closed_positive"] = self.state.get("shadow_closed_positive", 0) + 1
+
+            if status == "loss_sl":
+                label = "LOSS"
+            elif status == "timeout":
+                label = "TIMEOUT"
             else:
-                # Verifica Take Profits
-                for i, tp in enumerate(trade["take_profits"]):
-                    if direction == "long" and current_price >= tp:
-                        trade["status"] = f"win_tp{i+1}"
-                        trade["exit_price"] = current_price
-                        trade["exit_time"] = datetime.utcnow().isoformat()
-                        trade["pnl_pct"] = round(((current_price - entry) / entry) * 100, 3)
-                        self.state["shadow_wins"] = self.state.get("shadow_wins", 0) + 1
-                        self._update_streak(True)
-                        logger.info(f"[SHADOW] WIN TP{i+1}: {trade['id']} | PnL: {trade['pnl_pct']:+.2f}%")
-                        break
-                    elif direction == "short" and current_price <= tp:
-                        trade["status"] = f"win_tp{i+1}"
-                        trade["exit_price"] = current_price
-                        trade["exit_time"] = datetime.utcnow().isoformat()
-                        trade["pnl_pct"] = round(((entry - current_price) / entry) * 100, 3)
-                        self.state["shadow_wins"] = self.state.get("shadow_wins", 0) + 1
-                        self._update_streak(True)
-                        logger.info(f"[SHADOW] WIN TP{i+1}: {trade['id']} | PnL: {trade['pnl_pct']:+.2f}%")
-                        break
-
-            # Timeout: fecha shadow trade apos 4 horas
-            try:
-                opened = datetime.fromisoformat(trade["timestamp"])
-                if (datetime.utcnow() - opened).total_seconds() > 4 * 3600:
-                    if trade["status"] == "open":
-                        if direction == "long":
-                            trade["pnl_pct"] = round(((current_price - entry) / entry) * 100, 3)
-                        else:
-                            trade["pnl_pct"] = round(((entry - current_price) / entry) * 100, 3)
-                        trade["status"] = "timeout"
-                        trade["exit_price"] = current_price
-                        trade["exit_time"] = datetime.utcnow().isoformat()
-                        if trade["pnl_pct"] > 0:
-                            self.state["shadow_wins"] = self.state.get("shadow_wins", 0) + 1
-                            self._update_streak(True)
-                        else:
-                            self.state["shadow_losses"] = self.state.get("shadow_losses", 0) + 1
-                            self._update_streak(False)
-                        logger.info(f"[SHADOW] TIMEOUT: {trade['id']} | PnL: {trade['pnl_pct']:+.2f}%")
-            except (ValueError, KeyError):
-                pass
+                label = f"WIN TP{status[len('win_tp'):]}"
+            logger.info(f"[SHADOW] {label}: {trade['id']} | PnL: {trade['pnl_pct']:+.2f}%")
 
         self._save_shadow_trades()
         self._save_state()
 
+    def open_shadow_count(self) -> int:
+        """Shadow trades abertos (O(1))."""
+        return self.shadow_book.open_count
+
     def _update_streak(self, won: bool):
         """Atualiza sequencia de acertos/erros."""
         streak = self.state.get("streak", 0)
@@ -404,61 +646,69 @@ class LearningEngine:
     # --------------------------------------------------------
     # REVISAO DIARIA (aprendizado)
     # --------------------------------------------------------
+    def _analysis_frame(self) -> Tuple[pd.DataFrame, pd.DataFrame]:
+        """(frame, scores) do analysis_log inteiro, em cache por versao do log."""
+        cached = self._frame_cache
+        if cached is None or cached[0] != self._log_version:
+            frame, scores = build_analysis_frame(self.analysis_log)
+            cached = self._frame_cache = (self._log_version, frame, scores)
+        return cached[1], cached[2]
+
+    def _evaluated_window(self, hours: Optional[float]) -> Tuple[pd.DataFrame, pd.DataFrame, int]:
+        """Analises avaliadas da janela (None = log inteiro) + total na janela."""
+        frame, scores = self._analysis_frame()
+        if hours is not None:
+            cutoff = self._utcnow() - timedelta(hours=hours)
+            in_window = (frame["timestamp"] >= cutoff).to_numpy()
+        else:
+            in_window = frame["timestamp"].notna().to_numpy()
+        evaluated = in_window & frame["evaluated"].to_numpy()
+        return frame[evaluated], scores[evaluated], int(in_window.sum())
+
+    def review(self, hours: Optional[float] = 24, by: Optional[str] = None) -> Dict:
+        """
+        Revisao sob demanda (nao altera estado nem parametros).
+        hours: janela em horas (None = log inteiro).
+        by: agrupa por uma coluna de REVIEW_GROUPS (ex: "day" para multi-dia).
+        """
+        frame, scores, _ = self._evaluated_window(hours)
+        if by is None:
+            return _review_stats(frame, scores)
+        if by not in REVIEW_GROUPS:
+            raise ValueError(f"review: agrupamento invalido '{by}' (use {REVIEW_GROUPS})")
+        return {
+            str(key): _review_stats(group, scores.loc[group.index])
+            for key, group in frame.groupby(by, observed=True)
+        }
+
     def daily_review(self) -> Optional[Dict]:
         """
         Faz revisao diaria: analisa o que aconteceu, ajusta parametros.
         Retorna relatorio ou None se ja fez hoje.
         """
-        today = datetime.utcnow().strftime("%Y-%m-%d")
+        today = self._utcnow().strftime("%Y-%m-%d")
         if self.state.get("last_daily_review") == today:
             return None
 
         logger.info("[LEARN] Iniciando revisao diaria...")
 
-        # Coleta analises das ultimas 24h
-        now = datetime.utcnow()
-        cutoff = now - timedelta(hours=24)
-        recent = []
-        for r in self.analysis_log:
-            try:
-                t = datetime.fromisoformat(r["timestamp"])
-                if t >= cutoff:
-                    recent.append(r)
-            except (ValueError, KeyError):
-                continue
+        # Analises das ultimas 24h (ja avaliadas)
+        evaluated, scores, recent = self._evaluated_window(24)
 
-        if len(recent) < 10:
+        if recent < 10:
             logger.info("[LEARN] Poucos dados para revisao diaria")
             return None
 
-        # Analisa resultados
-        evaluated = [r for r in recent if r.get("would_have_profited") is not None]
-        if not evaluated:
+        if evaluated.empty:
             return None
 
-        total = len(evaluated)
-        would_profit = sum(1 for r in evaluated if r["would_have_profited"])
-        would_loss = total - would_profit
-
-        # Analises que geraram sinal
-        signaled = [r for r in evaluated if r["signal_generated"]]
-        signaled_profit = sum(1 for r in signaled if r["would_have_profited"])
-
-        # Analises rejeitadas que teriam dado lucro (oportunidades perdidas)
-        rejected = [r for r in evaluated if not r["signal_generated"]]
-        rejected_profit = sum(1 for r in rejected if r["would_have_profited"])
-        rejected_loss = sum(1 for r in rejected if not r["would_have_profited"])
-
-        # Precisao dos indicadores
-        indicator_accuracy = self._calc_indicator_accuracy(evaluated)
-
-        # Melhores condicoes para lucro
-        best_conditions = self._find_best_conditions(evaluated)
+        stats = _review_stats(evaluated, scores)
+        rejected_profit = stats["missed_opportunities"]
+        rejected_loss = stats["dodged_bullets"]
 
         # Shadow trades performance
-        shadow_closed = [t for t in self.shadow_trades if t["status"] != "open"]
-        shadow_wins = sum(1 for t in shadow_closed if t.get("pnl_pct", 0) > 0)
-        shadow_total = len(shadow_closed)
+        shadow_wins = self.state.get("shadow_closed_positive", 0)
+        shadow_total = self.state.get("shadow_closed", 0)
         shadow_wr = (shadow_wins / shadow_total * 100) if shadow_total > 0 else 0
 
         # AJUSTA PARAMETROS baseado no aprendizado
@@ -469,18 +719,15 @@ class LearningEngine:
 
         report = {
             "date": today,
-            "total_analyses": total,
-            "would_profit": would_profit,
-            "would_loss": would_loss,
-            "accuracy": round(would_profit / total * 100, 1) if total > 0 else 0,
-            "signals_generated": len(signaled),
-            "signals_correct": signaled_profit,
-            "missed_opportunities": rejected_profit,
-            "dodged_bullets": rejected_loss,
+            **{k: stats[k] for k in (
+                "total_analyses", "would_profit", "would_loss", "accuracy",
+                "signals_generated", "signals_correct",
+                "missed_opportunities", "dodged_bullets",
+            )},
             "shadow_trades": shadow_total,
             "shadow_win_rate": round(shadow_wr, 1),
-            "indicator_accuracy": indicator_accuracy,
-            "best_conditions": best_conditions,
+            "indicator_accuracy": stats["indicator_accuracy"],
+            "best_conditions": stats["best_conditions"],
             "adjustments": adjustments,
             "risk_level": self.state["current_risk_level"],
             "streak": self.state["streak"],
@@ -490,8 +737,8 @@ class LearningEngine:
         self.daily_reports.append(report)
         self.state["last_daily_review"] = today
         self.state["days_learning"] = report["days_learning"]
-        self.state["indicator_accuracy"] = indicator_accuracy
-        self.state["best_conditions"] = best_conditions
+        self.state["indicator_accuracy"] = stats["indicator_accuracy"]
+        self.state["best_conditions"] = stats["best_conditions"]
 
         self._save_daily_reports()
         self._save_state()
@@ -506,103 +753,6 @@ class LearningEngine:
 
         return report
 
-    def _calc_indicator_accuracy(self, evaluated: List[Dict]) -> Dict:
-        """Calcula precisao de cada indicador."""
-        accuracy = {}
-        for record in evaluated:
-            scores = record.get("combined_scores", {})
-            profited = record.get("would_have_profited", False)
-            direction = record.get("direction", "long")
-
-            for ind, score in scores.items():
-                if ind not in accuracy:
-                    accuracy[ind] = {"correct": 0, "wrong": 0, "total": 0}
-
-                accuracy[ind]["total"] += 1
-
-                # Indicador concordou com a direcao que teria dado lucro?
-                indicator_says_long = score > 0.1
-                indicator_says_short = score < -0.1
-
-                if profited:
-                    if (direction == "long" and indicator_says_long) or \
-                       (direction == "short" and indicator_says_short):
-                        accuracy[ind]["correct"] += 1
-                    elif indicator_says_long or indicator_says_short:
-                        accuracy[ind]["wrong"] += 1
-                else:
-                    if (direction == "long" and indicator_says_short) or \
-                       (direction == "short" and indicator_says_long):
-                        accuracy[ind]["correct"] += 1  # Corretamente contrario
-                    elif indicator_says_long or indicator_says_short:
-                        accuracy[ind]["wrong"] += 1
-
-        # Converte para porcentagem
-        result = {}
-        for ind, data in accuracy.items():
-            total_decisions = data["correct"] + data["wrong"]
-            if total_decisions > 0:
-                result[ind] = round(data["correct"] / total_decisions * 100, 1)
-        return result
-
-    def _find_best_conditions(self, evaluated: List[Dict]) -> List[Dict]:
-        """Encontra as condicoes que mais deram lucro."""
-        conditions = []
-
-        # Agrupa por faixa de RSI
-        rsi_ranges = {"<30": [], "30-50": [], "50-70": [], ">70": []}
-        for r in evaluated:
-            rsi = r.get("rsi_value", 50)
-            if rsi < 30:
-                rsi_ranges["<30"].append(r)
-            elif rsi < 50:
-                rsi_ranges["30-50"].append(r)
-            elif rsi < 70:
-                rsi_ranges["50-70"].append(r)
-            else:
-                rsi_ranges[">70"].append(r)
-
-        for rsi_range, records in rsi_ranges.items():
-            if len(records) >= 3:
-                wins = sum(1 for r in records if r.get("would_have_profited"))
-                wr = wins / len(records) * 100
-                avg_pnl = np.mean([r.get("potential_pnl_pct", 0) for r in records])
-                conditions.append({
-                    "type": "rsi_range",
-                    "value": rsi_range,
-                    "win_rate": round(wr, 1),
-                    "avg_pnl": round(float(avg_pnl), 3),
-                    "samples": len(records),
-                })
-
-        # Agrupa por faixa de confianca
-        conf_ranges = {"<25%": [], "25-50%": [], "50-75%": [], ">75%": []}
-        for r in evaluated:
-            conf = r.get("confidence", 0) * 100
-            if conf < 25:
-                conf_ranges["<25%"].append(r)
-            elif conf < 50:
-                conf_ranges["25-50%"].append(r)
-            elif conf < 75:
-                conf_ranges["50-75%"].append(r)
-            else:
-                conf_ranges[">75%"].append(r)
-
-        for conf_range, records in conf_ranges.items():
-            if len(records) >= 3:
-                wins = sum(1 for r in records if r.get("would_have_profited"))
-                wr = wins / len(records) * 100
-                avg_pnl = np.mean([r.get("potential_pnl_pct", 0) for r in records])
-                conditions.append({
-                    "type": "confidence_range",
-                    "value": conf_range,
-                    "win_rate": round(wr, 1),
-                    "avg_pnl": round(float(avg_pnl), 3),
-                    "samples": len(records),
-                })
-
-        return sorted(conditions, key=lambda x: x["avg_pnl"], reverse=True)
-
     # --------------------------------------------------------
     # AJUSTE AUTOMATICO DE PARAMETROS
     # --------------------------------------------------------
@@ -735,8 +885,7 @@ class LearningEngine:
         # Zona cinza: perto do threshold mas nao passou
         if 0.25 <= confidence < threshold:
             # Limita a 3 shadow trades abertos
-            open_shadows = sum(1 for t in self.shadow_trades if t["status"] == "open")
-            return open_shadows < 3
+            return self.shadow_book.open_count < 3
 
         return False
 
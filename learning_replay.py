@@ -0,0 +1,281 @@
+"""
+Learning Replay - Aprendizado offline sobre candles historicos
+================================================================
+Passa candles historicos pela cadeia completa do loop ao vivo:
+
+    indicadores -> confluencia -> record_analysis -> rotulagem
+    -> shadow trades -> daily_review (00h BRT)
+
+usando um relogio virtual, entao meses de dados rodam em minutos.
+O resultado e a trajetoria do learning_state (um ponto por revisao
+diaria), para validar politicas de peso/threshold antes de usar capital.
+
+Os timeframes de confirmacao/tendencia sao reamostrados a partir dos
+candles de entrada; cada analise so enxerga candles ja fechados.
+
+Uso:
+    python learning_replay.py candles_5m.csv --out replay_out
+    python learning_replay.py candles_5m.csv --out replay_out --force   # refaz
+    python learning_replay.py ohlcv.json --start 2025-01-01 --end 2025-03-01 --step 5
+
+Entrada: CSV (timestamp, open, high, low, close, volume; timestamp em
+segundos unix ou ISO) ou JSON no formato ohlcv_list do GeckoTerminal.
+"""
+
+import argparse
+import copy
+import json
+import logging
+import os
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+import clock
+import config
+from confluence import ConfluenceEngine
+from indicators import get_all_scores
+from learning_engine import (
+    ANALYSIS_LOG_FILE, DAILY_REPORT_FILE, LEARNING_STATE_FILE, SHADOW_ARCHIVE_FILE,
+    SHADOW_TRADES_FILE, LearningEngine,
+)
+
+logger = logging.getLogger("LearningReplay")
+
+BR_TZ = timezone(timedelta(hours=-3))
+
+OHLCV_COLUMNS = ["open", "high", "low", "close", "volume"]
+PANDAS_RULES = {
+    "1m": "1min", "5m": "5min", "15m": "15min", "30m": "30min",
+    "1h": "1h", "4h": "4h", "1d": "1D", "1w": "7D",
+}
+WINDOW = 300        # Candles por timeframe (mesmo limite do fetch_ohlcv)
+MIN_CANDLES = 50    # Minimo para calcular indicadores (como no loop ao vivo)
+TRAJECTORY_FILE = "learning_trajectory.json"
+# Arquivos que o replay grava em out_dir (--force apaga so estes)
+OUTPUT_FILES = (
+    ANALYSIS_LOG_FILE, SHADOW_TRADES_FILE, SHADOW_ARCHIVE_FILE,
+    LEARNING_STATE_FILE, DAILY_REPORT_FILE, TRAJECTORY_FILE,
+)
+
+
+def load_candles(path: str) -> pd.DataFrame:
+    """Carrega OHLCV (CSV ou JSON ohlcv_list) indexado por abertura UTC."""
+    if path.endswith(".json"):
+        with open(path) as f:
+            data = json.load(f)
+        if isinstance(data, dict):
+            data = data.get("data", {}).get("attributes", {}).get("ohlcv_list", [])
+        df = pd.DataFrame(data, columns=["timestamp"] + OHLCV_COLUMNS)
+    else:
+        df = pd.read_csv(path)
+
+    ts = df["timestamp"]
+    if pd.api.types.is_numeric_dtype(ts):
+        df["timestamp"] = pd.to_datetime(ts, unit="s")
+    else:
+        df["timestamp"] = pd.to_datetime(ts, utc=True).dt.tz_localize(None)
+    df = df.set_index("timestamp")[OHLCV_COLUMNS].astype(float)
+    return df[~df.index.duplicated(keep="last")].sort_index()
+
+
+def resample_ohlcv(df: pd.DataFrame, timeframe: str) -> pd.DataFrame:
+    """Agrega candles para um timeframe maior (abertura do bucket)."""
+    rule = PANDAS_RULES[timeframe]
+    out = df.resample(rule, label="left", closed="left").agg({
+        "open": "first", "high": "max", "low": "min", "close": "last", "volume": "sum",
+    })
+    return out.dropna(subset=["close"])
+
+
+class LearningReplay:
+    """Roda LearningEngine + ConfluenceEngine sobre candles historicos."""
+
+    def __init__(self, candles: pd.DataFrame, out_dir: str = "replay_out",
+                 step: int = 1, timeframes: Optional[Dict[str, str]] = None,
+                 window: int = WINDOW, force: bool = False):
+        self.timeframes = timeframes or config.TIMEFRAMES[config.TRADE_MODE]
+        self.frames = {name: resample_ohlcv(candles, tf) for name, tf in self.timeframes.items()}
+        self.widths = {
+            name: pd.Timedelta(PANDAS_RULES[tf]).to_timedelta64()
+            for name, tf in self.timeframes.items()
+        }
+        # Fim (fechamento) de cada candle, para recortar so os fechados
+        self._closes = {
+            name: frame.index.to_numpy(dtype="datetime64[ns]") + self.widths[name]
+            for name, frame in self.frames.items()
+        }
+        self.step = max(1, step)
+        self.window = window
+        self.out_dir = out_dir
+        self._prepare_out_dir(force)
+
+        self.clock = clock.SimulatedClock(start=0, auto_advance=False)
+        self.learning = LearningEngine(data_dir=out_dir, clock=self.clock.utcnow, autosave=False)
+        self.confluence = ConfluenceEngine(self.learning)
+        self.analysis_count = 0
+        self.last_review_hour = -1
+        self.trajectory: List[Dict] = []
+        # Scores por timeframe, recalculados so quando fecha um candle novo
+        self._scores_cache: Dict[str, tuple] = {}
+
+    def _prepare_out_dir(self, force: bool):
+        """
+        O LearningEngine carrega o estado que estiver em out_dir e o shadow
+        book anexa ao JSONL: replay sobre pasta usada misturaria execucoes.
+        Pasta nao vazia e recusada; com force, os arquivos do replay sao apagados.
+        """
+        os.makedirs(self.out_dir, exist_ok=True)
+        if not os.listdir(self.out_dir):
+            return
+        if not force:
+            raise FileExistsError(
+                f"{self.out_dir} nao esta vazia (use outra pasta ou --force)"
+            )
+        for filename in OUTPUT_FILES:
+            path = os.path.join(self.out_dir, filename)
+            if os.path.exists(path):
+                os.remove(path)
+
+    def _closed(self, name: str) -> pd.DataFrame:
+        """Ultimos `window` candles ja fechados no instante virtual."""
+        now = np.datetime64(self.clock.utcnow(), "ns")
+        end = int(np.searchsorted(self._closes[name], now, side="right"))
+        return self.frames[name].iloc[max(0, end - self.window):end]
+
+    def _scores(self, name: str, df: pd.DataFrame) -> Dict:
+        key = df.index[-1]
+        cached = self._scores_cache.get(name)
+        if cached is None or cached[0] != key:
+            cached = self._scores_cache[name] = (key, get_all_scores(df))
+        return cached[1]
+
+    def _cycle(self):
+        """Uma rodada do loop ao vivo (passos 2-7.5 de _run_analysis)."""
+        self.analysis_count += 1
+        data = {name: self._closed(name) for name in self.frames}
+        execution = data.get("execution")
+        if execution is None or execution.empty:
+            return
+
+        scores_by_tf = {
+            name: self._scores(name, df) for name, df in data.items() if len(df) >= MIN_CANDLES
+        }
+        if len(scores_by_tf) < 2:
+            return
+
+        conf = self.confluence.calculate_confluence(scores_by_tf)
+        current_price = float(execution["close"].iloc[-1])
+        signal = self.confluence.generate_signal(
+            f"{config.TRADE_TOKEN}/{config.BASE_TOKEN}", scores_by_tf, execution
+        )
+        rejection_reason = getattr(self.confluence, "last_rejection_reason", "") if not signal else ""
+        self.learning.record_analysis(
+            price=current_price,
+            conf=conf,
+            scores_by_tf=scores_by_tf,
+            signal_generated=signal is not None,
+            rejection_reason=rejection_reason,
+            analysis_number=self.analysis_count,
+        )
+        self.learning.label_from_candles(execution)
+        self.learning.update_shadow_trades(current_price)
+
+        if not signal and self.learning.should_open_shadow_trade(conf):
+            try:
+                exec_scores = scores_by_tf.get("execution", {})
+                sl = self.confluence.calculate_stop_loss(
+                    current_price, conf["direction"], exec_scores, execution
+                )
+                tps = self.confluence.calculate_take_profits(
+                    current_price, conf["direction"], sl, exec_scores
+                )
+                self.learning.open_shadow_trade(conf, current_price, scores_by_tf, sl, tps)
+            except Exception as e:
+                logger.debug(f"Shadow trade error: {e}")
+
+        review_hour = self.clock.now(BR_TZ).hour
+        if review_hour == 0 and self.last_review_hour != 0:
+            report = self.learning.daily_review()
+            if report:
+                self.trajectory.append({
+                    "time": self.clock.utcnow().isoformat(),
+                    "report": report,
+                    "state": copy.deepcopy(self.learning.state),
+                    "effective_threshold": self.learning.get_effective_threshold(),
+                    "effective_risk_per_trade": self.learning.get_effective_risk_per_trade(),
+                })
+        self.last_review_hour = review_hour
+
+    def run(self, start: Optional[datetime] = None, end: Optional[datetime] = None) -> List[Dict]:
+        """Executa uma analise a cada `step` candles de execucao fechados."""
+        closes = self._closes["execution"]
+        if start is not None:
+            closes = closes[closes >= np.datetime64(start, "ns")]
+        if end is not None:
+            closes = closes[closes <= np.datetime64(end, "ns")]
+        closes = closes[::self.step]
+
+        started = time.perf_counter()
+        # Relogio global virtual durante o replay (timestamps de sinais etc.)
+        previous = clock.set_clock(self.clock)
+        try:
+            for i, close_ns in enumerate(closes.astype("datetime64[ns]").astype(np.int64)):
+                self.clock.advance_to(close_ns / 1e9)
+                self._cycle()
+                if i and i % 1000 == 0:
+                    logger.info(
+                        f"[REPLAY] {i}/{len(closes)} ciclos | {self.clock.utcnow():%Y-%m-%d %H:%M} | "
+                        f"{time.perf_counter() - started:.0f}s"
+                    )
+        finally:
+            clock.set_clock(previous)
+
+        self.learning.flush()
+        with open(os.path.join(self.out_dir, TRAJECTORY_FILE), "w") as f:
+            json.dump(self.trajectory, f, indent=2, default=str)
+        logger.info(
+            f"[REPLAY] {len(closes)} ciclos em {time.perf_counter() - started:.1f}s | "
+            f"{len(self.trajectory)} revisoes diarias"
+        )
+        return self.trajectory
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay offline do LearningEngine")
+    parser.add_argument("candles", help="CSV ou JSON de candles do timeframe de execucao (ou menor)")
+    parser.add_argument("--out", default="replay_out", help="Pasta de saida (estado + trajetoria)")
+    parser.add_argument("--start", help="Inicio (ISO, UTC)")
+    parser.add_argument("--end", help="Fim (ISO, UTC)")
+    parser.add_argument("--step", type=int, default=1, help="Analisa a cada N candles de execucao")
+    parser.add_argument("--force", action="store_true",
+                        help="Apaga os arquivos de um replay anterior em --out")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(name)s] %(message)s")
+    # Logs por analise/shadow trade sao muito verbosos em replay
+    logging.getLogger("LearningEngine").setLevel(logging.WARNING)
+
+    try:
+        replay = LearningReplay(load_candles(args.candles), out_dir=args.out,
+                                step=args.step, force=args.force)
+    except FileExistsError as e:
+        parser.error(str(e))
+    trajectory = replay.run(
+        start=datetime.fromisoformat(args.start) if args.start else None,
+        end=datetime.fromisoformat(args.end) if args.end else None,
+    )
+    for point in trajectory:
+        state = point["state"]
+        print(
+            f"{point['report']['date']} | precisao {point['report']['accuracy']:5.1f}% | "
+            f"risk {state['current_risk_level']:.3f} | "
+            f"threshold {point['effective_threshold']:.2f} | streak {state['streak']:+d}"
+        )
+
+
+if __name__ == "__main__":
+    main()
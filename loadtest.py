@@ -0,0 +1,531 @@
+"""
+Load Test - Clientes simulados contra os dashboards
+=====================================================
+Mede quantos espectadores cada dashboard aguenta:
+
+    web   web_dashboard.py (cloud/Render): N sessoes fazem login via
+          /login e consultam /api/data como o frontend (poll), enquanto
+          um bot falso envia /api/push (protocolo delta) no ritmo dado.
+    ws    DashboardServer (dashboard.py, local): N clientes WebSocket em
+          /ws; o bot falso muda o estado no ritmo dado e o _push_loop
+          do servidor distribui.
+
+Relatorio (stdout + JSON):
+    requests         latencia das requests HTTP (p50/p90/p99/max) e erros
+    push_rtt         latencia do POST /api/push do bot falso (web)
+    push_to_browser  tempo entre o bot gerar um dado e o cliente recebe-lo
+                     (inclui a espera do poll / do ciclo de push)
+    server           CPU (%) e RSS (MB) do processo do servidor
+
+Sem --url o servidor e iniciado aqui como subprocesso (porta livre,
+credenciais e PERSIST_DIR temporarios), o que permite medir CPU/RSS
+pelo /proc. Com --url mede so o lado do cliente.
+
+Uso:
+    python loadtest.py web --clients 50 --duration 60 --push-rate 1
+    python loadtest.py ws --clients 200 --duration 30 --push-rate 2
+    python loadtest.py web --url https://sol-trading-dashboard.onrender.com \\
+        --user USER --password PASS --api-key KEY --clients 20
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import secrets
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Dict, List, Optional
+
+import aiohttp
+import numpy as np
+
+logger = logging.getLogger("LoadTest")
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+LOADTEST_BOT_ID = "loadtest"
+POLL_INTERVAL = 5.0          # Mesmo intervalo do pollData() do frontend
+MONITOR_INTERVAL = 1.0
+SERVER_START_TIMEOUT = 30.0
+PERCENTILES = (50, 90, 99)
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _summary(values: List[float]) -> Dict:
+    """Contagem + percentis (ms) de uma lista de latencias em segundos."""
+    if not values:
+        return {"count": 0}
+    arr = np.asarray(values) * 1000
+    out = {"count": len(values), "mean_ms": round(float(arr.mean()), 2)}
+    for p, v in zip(PERCENTILES, np.percentile(arr, PERCENTILES)):
+        out[f"p{p}_ms"] = round(float(v), 2)
+    out["max_ms"] = round(float(arr.max()), 2)
+    return out
+
+
+# ============================================================
+# MONITOR DO SERVIDOR (/proc, Linux)
+# ============================================================
+class ProcessMonitor:
+    """Amostra CPU e RSS de um pid pelo /proc."""
+
+    def __init__(self, pid: int):
+        self.pid = pid
+        self.ticks = os.sysconf("SC_CLK_TCK")
+        self.cpu: List[float] = []
+        self.rss_mb: List[float] = []
+
+    def _cpu_seconds(self) -> float:
+        with open(f"/proc/{self.pid}/stat") as f:
+            fields = f.read().rsplit(")", 1)[1].split()
+        return (int(fields[11]) + int(fields[12])) / self.ticks  # utime + stime
+
+    def _rss(self) -> float:
+        with open(f"/proc/{self.pid}/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+        return 0.0
+
+    async def run(self, stop: asyncio.Event):
+        try:
+            last_cpu, last_t = self._cpu_seconds(), time.monotonic()
+            while not stop.is_set():
+                try:
+                    await asyncio.wait_for(stop.wait(), MONITOR_INTERVAL)
+                except asyncio.TimeoutError:
+                    pass
+                cpu, now = self._cpu_seconds(), time.monotonic()
+                self.cpu.append((cpu - last_cpu) / max(now - last_t, 1e-9) * 100)
+                self.rss_mb.append(self._rss())
+                last_cpu, last_t = cpu, now
+        except (FileNotFoundError, ProcessLookupError):
+            logger.warning("Servidor encerrou durante o teste")
+
+    def report(self) -> Dict:
+        if not self.cpu:
+            return {}
+        return {
+            "cpu_avg_pct": round(float(np.mean(self.cpu)), 1),
+            "cpu_max_pct": round(float(np.max(self.cpu)), 1),
+            "rss_start_mb": round(self.rss_mb[0], 1),
+            "rss_max_mb": round(max(self.rss_mb), 1),
+            "rss_end_mb": round(self.rss_mb[-1], 1),
+        }
+
+
+class LocalServer:
+    """Sobe o servidor alvo como subprocesso e espera ficar pronto."""
+
+    def __init__(self, args: List[str], env: Dict[str, str], health_url: str):
+        self.args = args
+        self.env = {**os.environ, **env}
+        self.health_url = health_url
+        self.proc: Optional[subprocess.Popen] = None
+        # Arquivo e nao PIPE: o access log do aiohttp encheria o pipe e travaria o servidor
+        self.log = tempfile.TemporaryFile()
+
+    def _tail(self) -> str:
+        self.log.seek(0)
+        return self.log.read().decode(errors="replace")[-2000:]
+
+    async def __aenter__(self):
+        self.proc = subprocess.Popen(
+            [sys.executable] + self.args, cwd=BASE_DIR, env=self.env,
+            stdout=subprocess.DEVNULL, stderr=self.log,
+        )
+        deadline = time.monotonic() + SERVER_START_TIMEOUT
+        async with aiohttp.ClientSession() as session:
+            while time.monotonic() < deadline:
+                if self.proc.poll() is not None:
+                    raise RuntimeError(f"Servidor saiu: {self._tail()}")
+                try:
+                    async with session.get(self.health_url) as resp:
+                        if resp.status < 500:
+                            return self
+                except aiohttp.ClientError:
+                    pass
+                await asyncio.sleep(0.2)
+        raise RuntimeError("Servidor nao respondeu a tempo")
+
+    async def __aexit__(self, *exc):
+        self.proc.terminate()
+        try:
+            self.proc.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            self.proc.kill()
+        self.log.close()
+
+
+# ============================================================
+# METRICAS
+# ============================================================
+class Metrics:
+    def __init__(self):
+        self.requests: List[float] = []
+        self.errors: Dict[str, int] = {}
+        self.push_rtt: List[float] = []
+        self.push_to_browser: List[float] = []
+        self.ws_connect: List[float] = []
+        self.messages = 0
+
+    def error(self, kind: str):
+        self.errors[kind] = self.errors.get(kind, 0) + 1
+
+    async def timed(self, coro_factory, kind: str):
+        """Executa a request e registra latencia (ou erro)."""
+        start = time.perf_counter()
+        try:
+            result = await coro_factory()
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            self.error(f"{kind}:{type(e).__name__}")
+            return None
+        self.requests.append(time.perf_counter() - start)
+        return result
+
+    def report(self) -> Dict:
+        return {
+            "requests": {**_summary(self.requests), "errors": self.errors},
+            "push_rtt": _summary(self.push_rtt),
+            "push_to_browser": _summary(self.push_to_browser),
+            "ws_connect": _summary(self.ws_connect),
+            "ws_messages": self.messages,
+        }
+
+
+# ============================================================
+# ALVO: web_dashboard.py
+# ============================================================
+async def _fake_cloud_bot(url: str, api_key: str, rate: float, positions: int,
+                          metrics: Metrics, stop: asyncio.Event):
+    """Envia pushes delta como o main.push_to_cloud, com marca de tempo."""
+    from benchmarks import sample_dashboard_payload
+    from push_protocol import DeltaEncoder, encode_body
+
+    payload = sample_dashboard_payload(positions)
+    encoder = DeltaEncoder(always_send=("settings_applied",))
+    headers = {"X-API-Key": api_key, "X-Bot-Id": LOADTEST_BOT_ID}
+    seq = 0
+    async with aiohttp.ClientSession() as session:
+        while not stop.is_set():
+            seq += 1
+            payload["price"] = 150.0 + seq * 0.01
+            payload["loadtest"] = {"seq": seq, "sent": time.time()}
+            envelope = encoder.build(payload)
+            body, body_headers = encode_body(envelope)
+            start = time.perf_counter()
+            try:
+                async with session.post(f"{url}/api/push", data=body,
+                                        headers={**body_headers, **headers}) as resp:
+                    result = await resp.json()
+                metrics.push_rtt.append(time.perf_counter() - start)
+                if result.get("resync"):
+                    encoder.reset()
+                else:
+                    encoder.ack(result.get("version"))
+            except (aiohttp.ClientError, asyncio.TimeoutError, ValueError) as e:
+                metrics.error(f"push:{type(e).__name__}")
+            try:
+                await asyncio.wait_for(stop.wait(), 1 / rate)
+            except asyncio.TimeoutError:
+                pass
+
+
+async def _web_viewer(url: str, user: str, password: str, poll: float, delay: float,
+                      metrics: Metrics, stop: asyncio.Event):
+    """Um navegador: login, pagina, e poll de /api/data."""
+    await asyncio.sleep(delay)
+    # unsafe=True: aceita cookies de hosts IP (127.0.0.1)
+    async with aiohttp.ClientSession(cookie_jar=aiohttp.CookieJar(unsafe=True)) as session:
+        async def login():
+            async with session.post(f"{url}/login", data={"username": user, "password": password},
+                                    allow_redirects=False) as resp:
+                await resp.read()
+                return resp.status == 302 and "session" in resp.cookies
+
+        if not await metrics.timed(login, "login"):
+            metrics.error("login:rejected")
+            return
+
+        async def index():
+            async with session.get(f"{url}/") as resp:
+                await resp.read()
+        await metrics.timed(index, "index")
+
+        last_seq = 0
+        data_url = f"{url}/api/data?bot={LOADTEST_BOT_ID}"
+        while not stop.is_set():
+            async def poll_data():
+                async with session.get(data_url) as resp:
+                    return await resp.json() if resp.status == 200 else None
+            data = await metrics.timed(poll_data, "data")
+            if data:
+                mark = data.get("loadtest") or {}
+                if mark.get("seq", 0) > last_seq:
+                    last_seq = mark["seq"]
+                    metrics.push_to_browser.append(time.time() - mark["sent"])
+            try:
+                await asyncio.wait_for(stop.wait(), poll)
+            except asyncio.TimeoutError:
+                pass
+
+
+async def run_web(args) -> Dict:
+    metrics = Metrics()
+    stop = asyncio.Event()
+    user, password, api_key = args.user, args.password, args.api_key
+    server = None
+    url = args.url.rstrip("/") if args.url else ""
+    if not url:
+        port = _free_port()
+        url = f"http://127.0.0.1:{port}"
+        user, password, api_key = "loadtest", secrets.token_hex(8), secrets.token_hex(16)
+        server = LocalServer(["web_dashboard.py"], {
+            "PORT": str(port), "DASH_USER": user, "DASH_PASS": password,
+            "DASHBOARD_API_KEY": api_key, "PERSIST_DIR": tempfile.mkdtemp(prefix="loadtest_"),
+        }, f"{url}/health")
+    elif not (user and password and api_key):
+        raise SystemExit("--url exige --user, --password e --api-key (ou DASH_USER/DASH_PASS/DASHBOARD_API_KEY)")
+
+    async def scenario():
+        monitor = ProcessMonitor(server.proc.pid) if server else None
+        tasks = [asyncio.create_task(_fake_cloud_bot(url, api_key, args.push_rate, args.positions,
+                                                     metrics, stop))]
+        if monitor:
+            tasks.append(asyncio.create_task(monitor.run(stop)))
+        tasks += [
+            asyncio.create_task(_web_viewer(url, user, password, args.poll,
+                                            args.ramp * i / max(1, args.clients), metrics, stop))
+            for i in range(args.clients)
+        ]
+        await asyncio.sleep(args.duration)
+        stop.set()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        return monitor.report() if monitor else {}
+
+    if server:
+        async with server:
+            server_report = await scenario()
+    else:
+        server_report = await scenario()
+    return {**metrics.report(), "server": server_report}
+
+
+# ============================================================
+# ALVO: DashboardServer (dashboard.py)
+# ============================================================
+class _FakePriceFetcher:
+    def __init__(self, bot):
+        self.bot = bot
+
+    async def get_current_price(self) -> float:
+        return 150.0 + self.bot.analysis_count * 0.01
+
+
+class _FakeExecutor:
+    def __init__(self, positions: List[Dict]):
+        self.positions = positions
+
+    def get_dashboard_data(self, price: float) -> Dict:
+        return {
+            "open_positions": len(self.positions), "positions": self.positions,
+            "open_pnl_usd": 0.0, "closed_pnl_usd": 0.0, "total_pnl_usd": 0.0,
+            "total_trades": 0, "win_rate": "N/A", "current_price": price,
+        }
+
+
+class FakeBot:
+    """Minimo que o DashboardServer le do TradingBot; muda a cada tick."""
+
+    def __init__(self, positions: int):
+        from benchmarks import sample_dashboard_payload
+        from strategies_manager import StrategiesManager
+        sample = sample_dashboard_payload(positions)
+        self.analysis_count = 0
+        self.last_signal = None
+        self.last_indicators = dict(sample["indicators"])
+        self.wallet = None
+        self.strategies = StrategiesManager()
+        self.price_fetcher = _FakePriceFetcher(self)
+        self.executor = _FakeExecutor(sample["positions"])
+
+    def tick(self):
+        self.analysis_count += 1
+        self.last_indicators["loadtest"] = {"seq": self.analysis_count, "sent": time.time()}
+
+
+def serve_ws(port: int, push_rate: float, positions: int):
+    """Processo do servidor: DashboardServer + FakeBot (subcomando interno)."""
+    from dashboard import DashboardServer
+
+    async def main():
+        bot = FakeBot(positions)
+        server = DashboardServer(bot)
+        bot.dashboard = server
+        await server.start(host="127.0.0.1", port=port)
+        while True:
+            bot.tick()
+            await asyncio.sleep(1 / push_rate)
+
+    asyncio.run(main())
+
+
+async def _ws_viewer(url: str, delay: float, metrics: Metrics, stop: asyncio.Event):
+    await asyncio.sleep(delay)
+    async with aiohttp.ClientSession() as session:
+        async def index():
+            async with session.get(f"{url}/") as resp:
+                await resp.read()
+        await metrics.timed(index, "index")
+
+        start = time.perf_counter()
+        try:
+            ws = await session.ws_connect(f"{url}/ws", heartbeat=30)
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            metrics.error(f"ws_connect:{type(e).__name__}")
+            return
+        metrics.ws_connect.append(time.perf_counter() - start)
+
+        last_seq = 0
+        try:
+            while not stop.is_set():
+                receive = asyncio.ensure_future(ws.receive())
+                stopped = asyncio.ensure_future(stop.wait())
+                done, _ = await asyncio.wait({receive, stopped}, return_when=asyncio.FIRST_COMPLETED)
+                if receive not in done:
+                    receive.cancel()
+                    break
+                stopped.cancel()
+                msg = receive.result()
+                if msg.type != aiohttp.WSMsgType.TEXT:
+                    if msg.type in (aiohttp.WSMsgType.CLOSED, aiohttp.WSMsgType.ERROR):
+                        metrics.error("ws:closed")
+                        break
+                    continue
+                if msg.data == "pong":
+                    continue
+                metrics.messages += 1
+                mark = json.loads(msg.data).get("indicators", {}).get("loadtest") or {}
+                if mark.get("seq", 0) > last_seq:
+                    last_seq = mark["seq"]
+                    metrics.push_to_browser.append(time.time() - mark["sent"])
+        finally:
+            await ws.close()
+
+
+async def run_ws(args) -> Dict:
+    metrics = Metrics()
+    stop = asyncio.Event()
+    server = None
+    url = args.url.rstrip("/") if args.url else ""
+    if not url:
+        port = _free_port()
+        url = f"http://127.0.0.1:{port}"
+        server = LocalServer(
+            [os.path.basename(__file__), "serve-ws", "--port", str(port),
+             "--push-rate", str(args.push_rate), "--positions", str(args.positions)],
+            {}, f"{url}/",
+        )
+
+    async def scenario():
+        monitor = ProcessMonitor(server.proc.pid) if server else None
+        tasks = [asyncio.create_task(monitor.run(stop))] if monitor else []
+        tasks += [
+            asyncio.create_task(_ws_viewer(url, args.ramp * i / max(1, args.clients), metrics, stop))
+            for i in range(args.clients)
+        ]
+        await asyncio.sleep(args.duration)
+        stop.set()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        return monitor.report() if monitor else {}
+
+    if server:
+        async with server:
+            server_report = await scenario()
+    else:
+        server_report = await scenario()
+    return {**metrics.report(), "server": server_report}
+
+
+# ============================================================
+# CLI
+# ============================================================
+def _print_report(report: Dict):
+    def line(title, stats):
+        if not stats.get("count"):
+            return f"{title:16s} -"
+        return (f"{title:16s} n={stats['count']:<6d} p50 {stats['p50_ms']:8.1f} ms | "
+                f"p90 {stats['p90_ms']:8.1f} | p99 {stats['p99_ms']:8.1f} | max {stats['max_ms']:8.1f}")
+
+    print(f"\n=== {report['target']} | {report['clients']} clientes | {report['duration_s']}s | "
+          f"push {report['push_rate']}/s ===")
+    print(line("requests", report["requests"]))
+    if report["requests"].get("errors"):
+        print(f"{'erros':16s} {report['requests']['errors']}")
+    print(line("push_rtt", report["push_rtt"]))
+    print(line("push->browser", report["push_to_browser"]))
+    print(line("ws_connect", report["ws_connect"]))
+    server = report.get("server") or {}
+    if server:
+        print(f"{'servidor':16s} CPU media {server['cpu_avg_pct']}% (max {server['cpu_max_pct']}%) | "
+              f"RSS {server['rss_start_mb']} -> {server['rss_end_mb']} MB (max {server['rss_max_mb']})")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test dos dashboards")
+    sub = parser.add_subparsers(dest="target", required=True)
+
+    for name, help_text in (("web", "web_dashboard.py (login + poll /api/data)"),
+                            ("ws", "DashboardServer (WebSocket /ws)")):
+        p = sub.add_parser(name, help=help_text)
+        p.add_argument("--url", help="Servidor ja rodando (padrao: sobe um local)")
+        p.add_argument("--clients", type=int, default=20)
+        p.add_argument("--duration", type=float, default=30, help="Segundos de teste")
+        p.add_argument("--ramp", type=float, default=5, help="Segundos para conectar todos os clientes")
+        p.add_argument("--push-rate", type=float, default=1.0, help="Atualizacoes do bot por segundo")
+        p.add_argument("--positions", type=int, default=10, help="Posicoes no payload do bot falso")
+        p.add_argument("--out", help="Grava o relatorio em JSON")
+        if name == "web":
+            p.add_argument("--poll", type=float, default=POLL_INTERVAL, help="Intervalo do poll (s)")
+            p.add_argument("--user", default=os.environ.get("DASH_USER", ""))
+            p.add_argument("--password", default=os.environ.get("DASH_PASS", ""))
+            p.add_argument("--api-key", default=os.environ.get("DASHBOARD_API_KEY", ""))
+
+    serve = sub.add_parser("serve-ws", help=argparse.SUPPRESS)
+    serve.add_argument("--port", type=int, required=True)
+    serve.add_argument("--push-rate", type=float, default=1.0)
+    serve.add_argument("--positions", type=int, default=10)
+
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.WARNING, format="%(asctime)s [%(name)s] %(message)s")
+
+    if args.target == "serve-ws":
+        serve_ws(args.port, args.push_rate, args.positions)
+        return
+
+    runner = run_web if args.target == "web" else run_ws
+    report = {
+        "target": args.target,
+        "url": args.url or "local",
+        "clients": args.clients,
+        "duration_s": args.duration,
+        "push_rate": args.push_rate,
+        **asyncio.run(runner(args)),
+    }
+    _print_report(report)
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+"""
+Logging Setup - Pipeline de log sem bloquear o event loop
+===========================================================
+Os loggers so colocam o registro numa fila (QueueHandler); uma thread
+de fundo (QueueListener) formata e escreve no console e no arquivo.
+Disco lento ou travado nao atrasa o ciclo de analise/trading.
+
+    setup_logging()   # uma vez, no inicio do processo (main.py)
+    stop_logging()    # no fim: esvazia a fila e fecha os arquivos
+
+Arquivo (config.LOG_FILE) com rotacao:
+    LOG_ROTATE_WHEN = ""          -> por tamanho (LOG_MAX_BYTES)
+    LOG_ROTATE_WHEN = "midnight"  -> por tempo (TimedRotatingFileHandler)
+    mantendo LOG_BACKUP_COUNT arquivos antigos.
+
+LOG_FORMAT = "json" grava o arquivo em JSON por linha (ts, level,
+logger, msg, exc); o console continua em texto.
+
+Fila cheia (LOG_QUEUE_SIZE): o registro e descartado em vez de
+bloquear; a contagem de descartes vai para o log assim que houver vaga.
+"""
+
+import atexit
+import copy
+import json
+import logging
+import logging.handlers
+import queue
+import sys
+from datetime import datetime, timezone
+from typing import Optional
+
+import config
+
+TEXT_FORMAT = "%(asctime)s [%(levelname)s] %(name)s: %(message)s"
+
+_listener: Optional[logging.handlers.QueueListener] = None
+
+
+class JsonFormatter(logging.Formatter):
+    """Uma linha JSON por registro."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry["exc"] = record.exc_text
+        if record.stack_info:
+            entry["stack"] = record.stack_info
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class NonBlockingQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler que descarta (e conta) quando a fila enche."""
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Resolve msg % args aqui (os args podem mudar depois), mas deixa o
+        # traceback em exc_text para o formatter do listener (texto ou JSON)
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            if self.dropped:
+                notice = logging.LogRecord(
+                    "logging_setup", logging.WARNING, __file__, 0,
+                    f"{self.dropped} mensagens de log descartadas (fila cheia)", None, None,
+                )
+                self.queue.put_nowait(notice)
+                self.dropped = 0
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+def _file_handler() -> logging.Handler:
+    if config.LOG_ROTATE_WHEN:
+        return logging.handlers.TimedRotatingFileHandler(
+            config.LOG_FILE, when=config.LOG_ROTATE_WHEN,
+            backupCount=config.LOG_BACKUP_COUNT, encoding="utf-8",
+        )
+    return logging.handlers.RotatingFileHandler(
+        config.LOG_FILE, maxBytes=config.LOG_MAX_BYTES,
+        backupCount=config.LOG_BACKUP_COUNT, encoding="utf-8",
+    )
+
+
+def setup_logging(level: Optional[str] = None) -> logging.handlers.QueueListener:
+    """Instala a fila no logger raiz e inicia a thread escritora."""
+    global _listener
+    if _listener is not None:
+        return _listener
+
+    console = logging.StreamHandler(sys.stdout)
+    console.setFormatter(logging.Formatter(TEXT_FORMAT))
+    file_handler = _file_handler()
+    file_handler.setFormatter(
+        JsonFormatter() if config.LOG_FORMAT == "json" else logging.Formatter(TEXT_FORMAT)
+    )
+
+    log_queue: queue.Queue = queue.Queue(maxsize=config.LOG_QUEUE_SIZE)
+    root = logging.getLogger()
+    for handler in root.handlers[:]:
+        root.removeHandler(handler)
+    root.addHandler(NonBlockingQueueHandler(log_queue))
+    root.setLevel(getattr(logging, level or config.LOG_LEVEL))
+
+    _listener = logging.handlers.QueueListener(
+        log_queue, console, file_handler, respect_handler_level=True
+    )
+    _listener.start()
+    atexit.register(stop_logging)
+    return _listener
+
+
+def stop_logging():
+    """Escreve o que ainda esta na fila e fecha os handlers."""
+    global _listener
+    if _listener is None:
+        return
+    listener, _listener = _listener, None
+    listener.stop()
+    for handler in listener.handlers:
+        handler.close()
@@ -15,13 +15,14 @@ import signal
 import io
 import os
 import json
-from datetime import datetime, timezone, timedelta
+from collections import deque
+from datetime import timezone, timedelta
 from typing import Dict
 
 BR_TZ = timezone(timedelta(hours=-3))
 
 def now_br():
-    return datetime.now(BR_TZ)
+    return clock.now(BR_TZ)
 
 # Fix Windows console encoding for emojis
 if os.name == "nt":
@@ -29,6 +30,7 @@ if os.name == "nt":
     sys.stderr = io.TextIOWrapper(sys.stderr.buffer, encoding="utf-8", errors="replace")
 
 import config
+import clock
 from indicators import get_all_scores
 from confluence import ConfluenceEngine
 from price_data import PriceDataFetcher
@@ -37,19 +39,14 @@ from dashboard import DashboardServer
 from learning_engine import LearningEngine
 from strategies_manager import StrategiesManager
 from wallet_monitor import WalletMonitor
+from push_protocol import DeltaEncoder, encode_body
+from event_bus import EventBus
+from logging_setup import setup_logging, stop_logging
 
 # ============================================================
-# LOGGING
+# LOGGING (fila + thread escritora, arquivo com rotacao)
 # ============================================================
-_handlers = [
-    logging.StreamHandler(sys.stdout),
-    logging.FileHandler(config.LOG_FILE, encoding="utf-8"),
-]
-logging.basicConfig(
-    level=getattr(logging, config.LOG_LEVEL),
-    format="%(asctime)s [%(levelname)s] %(name)s: %(message)s",
-    handlers=_handlers,
-)
+setup_logging()
 logger = logging.getLogger("TradingBot")
 
 # ============================================================
@@ -58,30 +55,124 @@ logger = logging.getLogger("TradingBot")
 # URL do dashboard no Render (preencha apos deploy)
 CLOUD_DASHBOARD_URL = os.environ.get("CLOUD_DASHBOARD_URL", "https://sol-trading-dashboard.onrender.com")
 CLOUD_API_KEY = os.environ.get("DASHBOARD_API_KEY", "sol-trading-2026")
+# Identifica esta instancia no dashboard (varios bots podem enviar ao mesmo painel)
+CLOUD_BOT_ID = os.environ.get("BOT_ID", "default")
+CLOUD_HEADERS = {"X-API-Key": CLOUD_API_KEY, "X-Bot-Id": CLOUD_BOT_ID}
+
+
+# Long-poll de comandos: tempo maximo que o servidor segura a requisicao
+CLOUD_COMMAND_POLL_SECONDS = int(os.environ.get("CLOUD_COMMAND_POLL_SECONDS", "25"))
+
+# Tentativas de aplicar um comando antes de confirma-lo mesmo com erro
+CLOUD_COMMAND_MAX_ATTEMPTS = 3
+
+# Protocolo: "delta" (secoes alteradas, gzip/msgpack) ou "legacy" (JSON completo)
+CLOUD_PUSH_PROTOCOL = os.environ.get("CLOUD_PUSH_PROTOCOL", "delta")
+
+# Cliente HTTP reutilizado entre pushes (evita handshake TLS a cada ciclo)
+_cloud_client = None
+# settings_applied e um evento: vai sempre que for True, mesmo sem mudanca
+_push_encoder = DeltaEncoder(always_send=("settings_applied",))
+
+
+def _get_cloud_client():
+    global _cloud_client
+    if _cloud_client is None or _cloud_client.is_closed:
+        import httpx
+        _cloud_client = httpx.AsyncClient(timeout=10)
+    return _cloud_client
+
+
+async def close_cloud_client():
+    global _cloud_client
+    if _cloud_client is not None:
+        await _cloud_client.aclose()
+        _cloud_client = None
 
 
 async def push_to_cloud(data: dict) -> list:
-    """Envia dados do bot para o dashboard na nuvem via POST. Retorna comandos pendentes."""
+    """Envia dados do bot para o dashboard na nuvem via POST. Retorna comandos pendentes.
+
+    No protocolo delta so vao as secoes alteradas desde a ultima versao
+    confirmada; se o servidor pedir resync, reenvia o snapshot completo.
+    """
     if not CLOUD_DASHBOARD_URL:
         return []
     try:
-        import httpx
-        async with httpx.AsyncClient(timeout=10) as client:
-            resp = await client.post(
-                f"{CLOUD_DASHBOARD_URL}/api/push",
-                json=data,
-                headers={"X-API-Key": CLOUD_API_KEY},
-            )
+        client = _get_cloud_client()
+        url = f"{CLOUD_DASHBOARD_URL}/api/push"
+        if CLOUD_PUSH_PROTOCOL == "legacy":
+            resp = await client.post(url, json=data, headers=CLOUD_HEADERS)
             if resp.status_code == 200:
-                result = resp.json()
-                return result.get("commands", [])
-            else:
+                return resp.json().get("commands", [])
+            logger.debug(f"Cloud push failed: {resp.status_code}")
+            return []
+
+        # Segunda tentativa so acontece apos pedido de resync (envelope completo)
+        for _ in range(2):
+            envelope = _push_encoder.build(data)
+            body, headers = encode_body(envelope)
+            headers.update(CLOUD_HEADERS)
+            resp = await client.post(url, content=body, headers=headers)
+            if resp.status_code != 200:
                 logger.debug(f"Cloud push failed: {resp.status_code}")
+                return []
+            result = resp.json()
+            if result.get("resync"):
+                logger.debug("Cloud push: servidor pediu resync")
+                _push_encoder.reset()
+                continue
+            _push_encoder.ack(result.get("version"))
+            return result.get("commands", [])
     except Exception as e:
         logger.debug(f"Cloud push error: {e}")
     return []
 
 
+async def poll_cloud_commands(after_id) -> list:
+    """Long-poll de comandos no dashboard na nuvem.
+
+    Segura a conexao ate chegar comando novo (id > after_id) ou expirar
+    o timeout do servidor. Retorna None em caso de erro.
+    """
+    if not CLOUD_DASHBOARD_URL:
+        return None
+    try:
+        client = _get_cloud_client()
+        params = {"timeout": CLOUD_COMMAND_POLL_SECONDS}
+        if after_id is not None:
+            params["after"] = after_id
+        resp = await client.get(
+            f"{CLOUD_DASHBOARD_URL}/api/commands",
+            params=params,
+            headers=CLOUD_HEADERS,
+            timeout=CLOUD_COMMAND_POLL_SECONDS + 10,
+        )
+        if resp.status_code == 200:
+            return resp.json().get("commands", [])
+        logger.debug(f"Cloud command poll failed: {resp.status_code}")
+    except Exception as e:
+        logger.debug(f"Cloud command poll error: {e}")
+    return None
+
+
+async def ack_cloud_commands(ids: list) -> bool:
+    """Confirma comandos aplicados (o servidor para de reenvia-los)."""
+    if not CLOUD_DASHBOARD_URL or not ids:
+        return False
+    try:
+        client = _get_cloud_client()
+        resp = await client.post(
+            f"{CLOUD_DASHBOARD_URL}/api/commands/ack",
+            json={"ids": ids},
+            headers=CLOUD_HEADERS,
+        )
+        return resp.status_code == 200
+    except Exception as e:
+        logger.debug(f"Cloud command ack error: {e}")
+    return False
+
+
 # ============================================================
 # TELEGRAM BOT
 # ============================================================
@@ -107,6 +198,12 @@ class TelegramBot:
         self.last_hourly_price_hour = -1  # Track last hour we sent price update
         self.last_daily_review_hour = -1  # Track daily review
         self.analysis_history = []  # Last N analyses for dashboard
+        self._applied_command_ids = deque(maxlen=500)  # Dedup de comandos reentregues
+        self._last_command_id = None
+        self._command_failures: Dict[int, int] = {}  # id -> tentativas que falharam
+        self._last_known_price = 0.0
+        self._real_trade_lock = asyncio.Lock()  # Serializa swaps reais / checagem de posicoes
+        self._background_tasks: list = []  # command_loop / real_trade_loop / notify_loop
 
         # Dashboard Web
         self.dashboard = DashboardServer(self)
@@ -316,7 +413,7 @@ class TelegramBot:
         tps = [price + risk * ext * 2 for ext in config.TAKE_PROFIT_LEVELS]
 
         signal = TradeSignal(
-            timestamp=datetime.utcnow().isoformat(),
+            timestamp=clock.utcnow().isoformat(),
             symbol=f"{config.TRADE_TOKEN}/{config.BASE_TOKEN}",
             direction="long", confidence=1.0,
             entry_price=price, stop_loss=sl, take_profits=tps[:3],
@@ -421,7 +518,7 @@ class TelegramBot:
             except Exception as e:
                 logger.error(f"Erro no loop de análise: {e}")
 
-            await asyncio.sleep(config.LOOP_INTERVAL_SECONDS)
+            await clock.sleep(config.LOOP_INTERVAL_SECONDS)
 
     async def _run_analysis(self):
         """Executa uma rodada de análise."""
@@ -438,9 +535,11 @@ class TelegramBot:
 
         # 2. Calcula indicadores para cada timeframe
         scores_by_tf = {}
-        for tf_name, df in data.items():
-            if len(df) >= 50:  # Mínimo de candles
-                scores_by_tf[tf_name] = get_all_scores(df)
+        for tf_name, buf in data.items():
+            if len(buf) >= 50:  # Mínimo de candles
+                scores_by_tf[tf_name] = get_all_scores(buf)
+        # View pandas (sem copia) do timeframe de execucao para sinal/stop/aprendizado
+        exec_df = data["execution"].to_frame()
 
         # Salva indicadores para o dashboard
         if "execution" in scores_by_tf:
@@ -461,10 +560,11 @@ class TelegramBot:
         conf = self.confluence.calculate_confluence(scores_by_tf)
 
         # 4. Preço atual (usa último candle se possível, senão busca)
-        current_price = float(data["execution"].iloc[-1]["close"]) if not data["execution"].empty else 0.0
+        current_price = float(exec_df.iloc[-1]["close"]) if not exec_df.empty else 0.0
         if current_price <= 0:
             current_price = await self.price_fetcher.get_current_price()
         self.last_price = current_price
+        self._last_known_price = current_price
 
         # 4.1 Envia preço do SOL a cada hora no Telegram
         current_hour = now_br().hour
@@ -574,7 +674,7 @@ class TelegramBot:
         risk_lvl = self.learning.state.get("current_risk_level", 1.0)
         shadow_w = self.learning.state.get("shadow_wins", 0)
         shadow_l = self.learning.state.get("shadow_losses", 0)
-        open_shadows = sum(1 for t in self.learning.shadow_trades if t["status"] == "open")
+        open_shadows = self.learning.open_shadow_count()
 
         analysis_msg = (
             f"📊 *ANÁLISE #{self.analysis_count}*\n"
@@ -642,7 +742,7 @@ class TelegramBot:
         signal = self.confluence.generate_signal(
             f"{config.TRADE_TOKEN}/{config.BASE_TOKEN}",
             scores_by_tf,
-            data["execution"]
+            exec_df
         )
 
         # 7.1 APRENDIZADO: Registra TODA analise (com ou sem sinal)
@@ -661,8 +761,11 @@ class TelegramBot:
             self.analysis_history[-1]["signal"] = signal is not None
             self.analysis_history[-1]["reason"] = rejection_reason
 
-        # 7.2 APRENDIZADO: Atualiza precos futuros de analises anteriores
-        self.learning.update_future_prices(current_price)
+        # 7.2 APRENDIZADO: Rotula analises anteriores com os candles (MFE/MAE intrabar);
+        # sem candles suficientes, cai na amostragem do preco do ciclo
+        labeled = self.learning.label_from_candles(exec_df)
+        if not labeled and (exec_df is None or len(exec_df) < 2):
+            self.learning.update_future_prices(current_price)
 
         # 7.3 APRENDIZADO: Atualiza shadow trades
         self.learning.update_shadow_trades(current_price)
@@ -673,7 +776,7 @@ class TelegramBot:
             try:
                 exec_scores_shadow = scores_by_tf.get("execution", {})
                 shadow_sl = self.confluence.calculate_stop_loss(
-                    current_price, conf["direction"], exec_scores_shadow, data["execution"]
+                    current_price, conf["direction"], exec_scores_shadow, exec_df
                 )
                 shadow_tps = self.confluence.calculate_take_profits(
                     current_price, conf["direction"], shadow_sl, exec_scores_shadow
@@ -751,20 +854,20 @@ class TelegramBot:
             except Exception as e:
                 logger.error(f"Agent config tuning error: {e}", exc_info=True)
             try:
-                await self._check_open_real_positions(current_price)
+                async with self._real_trade_lock:
+                    await self._check_open_real_positions(current_price)
             except Exception as e:
                 logger.error(f"Real position check error: {e}", exc_info=True)
 
-        # Snapshot trade counts ANTES da simulacao
-        before_counts = self.strategies.snapshot_trade_counts()
-
-        # Roda simulacao das 5 estrategias de teste
-        try:
-            await self.strategies.run_simulation_cycle()
-        except Exception as e:
-            logger.debug(f"Strategies simulation error: {e}")
+        # Sem o scheduler, as simulacoes rodam no tick da analise. Em ambos os
+        # casos trades novos chegam ao executor real pelo event bus (real_trade_loop)
+        if not self.strategies.scheduler_running:
+            try:
+                await self.strategies.run_simulation_cycle()
+            except Exception as e:
+                logger.debug(f"Strategies simulation error: {e}")
 
-        # Atualiza saldo da carteira ANTES dos trades reais (necessário para auto-funding)
+        # Atualiza saldo da carteira (dashboard / auto-retirada)
         wallet_data = {}
         if self.wallet:
             try:
@@ -772,184 +875,6 @@ class TelegramBot:
             except Exception as e:
                 logger.debug(f"Wallet update error: {e}")
 
-        # MODO REAL: detecta novos trades e executa swaps reais via Jupiter
-        try:
-            signals = self.strategies.get_new_trade_signals(before_counts)
-
-            # Converte amount_raw + amount_coin para amount_usd
-            sol_price = current_price if current_price > 0 else 100
-            for sig in signals:
-                raw = sig.pop("amount_raw", 0)
-                acoin = sig.pop("amount_coin", "USDC")
-                if acoin == "USDC" or acoin == "USDT":
-                    sig["amount_usd"] = raw
-                else:
-                    # Converte para USD usando preco atual
-                    sig["amount_usd"] = round(raw * sol_price, 4) if acoin == "SOL" else raw
-                sig["coin"] = acoin
-
-            # Auto-funding: se tem sinais e pouco USDC, converte SOL->USDC
-            if signals and not config.PAPER_TRADING:
-                usdc_bal = self.wallet.last_usdc_balance if self.wallet else 0
-                sol_bal = self.wallet.last_sol_balance if self.wallet else 0
-                total_needed = sum(s["amount_usd"] for s in signals)
-                if usdc_bal < total_needed and sol_bal > 0.01:
-                    fund_usd = total_needed - usdc_bal + 0.01  # pequena margem
-                    sol_price = current_price if current_price > 0 else 100
-                    sol_needed = fund_usd / sol_price
-                    # Garante que não usa mais que 90% do SOL (reserva para fees)
-                    sol_to_sell = min(sol_needed, sol_bal * 0.9)
-                    sol_lamports = int(sol_to_sell * (10 ** 9))
-                    if sol_lamports > 0:
-                        logger.info(
-                            f"[MODO REAL] Auto-funding: vendendo {sol_to_sell:.6f} SOL "
-                            f"(~${fund_usd:.2f}) para USDC"
-                        )
-                        sol_mint = config.TOKENS["SOL"]
-                        usdc_mint_f = config.TOKENS["USDC"]
-                        fund_quote = await self.executor.get_quote(
-                            sol_mint, usdc_mint_f, sol_lamports
-                        )
-                        if fund_quote:
-                            fund_tx = await self.executor.execute_swap(fund_quote)
-                            if fund_tx:
-                                funded = int(fund_quote.get("outAmount", 0)) / (10 ** 6)
-                                logger.info(
-                                    f"[MODO REAL] Auto-funding OK: +${funded:.4f} USDC | TX: {fund_tx}"
-                                )
-                                # Atualiza saldo USDC em memoria
-                                if self.wallet:
-                                    self.wallet.last_usdc_balance += funded
-                                    self.wallet.last_sol_balance -= sol_to_sell
-                            else:
-                                logger.warning("[MODO REAL] Auto-funding: falha no swap SOL->USDC")
-                        else:
-                            logger.warning("[MODO REAL] Auto-funding: sem quote SOL->USDC")
-
-            for sig in signals:
-                strat_key = sig["strategy"]
-                coin = sig["coin"]
-                amount_usd = sig["amount_usd"]
-                direction = sig["direction"]
-                sim_pnl_pct = sig["sim_pnl_pct"]
-                trade_id = sig["trade_id"]
-
-                # Config de hold da estrategia
-                hold_cfg = self.strategies.STRATEGY_HOLD_CONFIG.get(strat_key, {})
-                is_instant = hold_cfg.get("instant", False)
-
-                # Nao empilhar: pula se ja tem posicao aberta
-                if not is_instant and self.strategies.has_open_position(strat_key):
-                    logger.info(f"[MODO REAL] {strat_key}: ja tem posicao aberta, ignorando sinal")
-                    continue
-
-                logger.info(
-                    f"[MODO REAL] Executando trade: {strat_key} "
-                    f"${amount_usd:.2f} {coin} | dir={direction} | "
-                    f"{'instant' if is_instant else 'hold'}"
-                )
-
-                # Resolve mint addresses — par é sempre SOL/USDC
-                # 'coin' é a moeda alocada pelo usuario, mas o ativo traded é SOL
-                trade_coin = "SOL"
-                coin_mint = config.TOKENS["SOL"]
-                usdc_mint = config.TOKENS["USDC"]
-
-                decimals = {"SOL": 9, "USDC": 6, "USDT": 6, "WBTC": 8, "JUP": 6, "BONK": 5}
-                coin_decimals = decimals.get(trade_coin, 9)
-
-                try:
-                    # === PASSO 1: Compra (USDC -> Coin) ===
-                    buy_amount_lamports = int(amount_usd * (10 ** 6))
-                    buy_quote = await self.executor.get_quote(
-                        usdc_mint, coin_mint, buy_amount_lamports
-                    )
-                    if not buy_quote:
-                        logger.warning(f"[MODO REAL] {strat_key}: sem quote para compra")
-                        continue
-
-                    tx_buy = await self.executor.execute_swap(buy_quote)
-                    if not tx_buy:
-                        logger.warning(f"[MODO REAL] {strat_key}: falha na compra")
-                        continue
-
-                    coins_received = int(buy_quote.get("outAmount", 0))
-                    entry_price = amount_usd / (coins_received / (10 ** coin_decimals)) if coins_received > 0 else 0
-
-                    logger.info(
-                        f"[MODO REAL] {strat_key}: COMPROU {coins_received} {trade_coin} "
-                        f"(${amount_usd:.2f} USDC) | TX: {tx_buy}"
-                    )
-
-                    if is_instant:
-                        # === ARBITRAGE: BUY + SELL instantaneo ===
-                        sell_quote = await self.executor.get_quote(
-                            coin_mint, usdc_mint, coins_received
-                        )
-                        tx_sell = None
-                        if sell_quote:
-                            tx_sell = await self.executor.execute_swap(sell_quote)
-
-                        if tx_sell:
-                            usdc_received = int(sell_quote.get("outAmount", 0)) / (10 ** 6)
-                            real_pnl = round(usdc_received - amount_usd, 4)
-                            final_tx = tx_sell
-                        else:
-                            real_pnl = 0.0
-                            final_tx = tx_buy
-
-                        self.strategies.update_allocation_after_trade(
-                            strat_key, final_tx, real_pnl,
-                            tx_buy=tx_buy, tx_sell=tx_sell or "",
-                            amount_usd=amount_usd, coin=coin,
-                            direction=direction, sim_pnl_pct=sim_pnl_pct
-                        )
-                        self.strategies.mark_trade_executed(strat_key, trade_id, final_tx)
-
-                        pnl_emoji = "🟢" if real_pnl >= 0 else "🔴"
-                        await self.send_message(
-                            f"💰 *MODO REAL* - {strat_key} (instant)\n"
-                            f"━━━━━━━━━━━━━━━━━━━━\n"
-                            f"📦 Capital: ${amount_usd:.2f} {coin}\n"
-                            f"{pnl_emoji} PNL: ${real_pnl:+.4f}\n"
-                            f"🔗 TX: `{final_tx}`\n"
-                            f"━━━━━━━━━━━━━━━━━━━━"
-                        )
-                    else:
-                        # === HOLD: so compra, monitora TP/SL nos proximos ciclos ===
-                        self.strategies.open_real_position(
-                            strategy=strat_key, coin=trade_coin, coin_mint=coin_mint,
-                            amount_usd=amount_usd, coins_received=coins_received,
-                            coin_decimals=coin_decimals,
-                            entry_price_per_coin=entry_price,
-                            tx_buy=tx_buy, direction=direction,
-                            trade_id=trade_id, sim_pnl_pct=sim_pnl_pct,
-                        )
-                        self.strategies.mark_trade_executed(strat_key, trade_id, tx_buy)
-
-                        tp = hold_cfg.get("tp_pct", 0)
-                        sl = hold_cfg.get("sl_pct", 0)
-                        max_h = hold_cfg.get("max_hold_s", 0)
-                        hold_str = f"{max_h}s" if max_h < 120 else f"{max_h // 60}min" if max_h < 7200 else f"{max_h // 3600}h"
-
-                        await self.send_message(
-                            f"📈 *MODO REAL - POSICAO ABERTA*\n"
-                            f"━━━━━━━━━━━━━━━━━━━━\n"
-                            f"Estrategia: {strat_key}\n"
-                            f"📦 Capital: ${amount_usd:.2f} {coin}\n"
-                            f"🎯 TP: +{tp}% | 🛑 SL: -{sl}%\n"
-                            f"⏰ Max Hold: {hold_str}\n"
-                            f"🔗 Buy TX: `{tx_buy}`\n"
-                            f"━━━━━━━━━━━━━━━━━━━━"
-                        )
-
-                except Exception as ex:
-                    logger.error(f"[MODO REAL] {strat_key}: erro no swap: {ex}")
-                    continue
-
-        except Exception as e:
-            logger.error(f"Real trade execution error: {e}", exc_info=True)
-
         # Auto-retirada de lucro: quando PNL total >= R$260, transfere R$150 em SOL para carteira spot
         try:
             await self._check_profit_withdraw(current_price)
@@ -1016,49 +941,404 @@ class TelegramBot:
                 "pk_mask": (config.SOLANA_PRIVATE_KEY[:4] + "..." + config.SOLANA_PRIVATE_KEY[-4:]) if len(config.SOLANA_PRIVATE_KEY) > 8 else "",
                 "settings_applied": getattr(self, '_settings_applied', False),
             }
-            commands = await push_to_cloud(cloud_data)
+            # Reseta antes do await: o command_loop pode aplicar settings durante o push
             self._settings_applied = False
-            # Processa comandos do dashboard na nuvem
-            for cmd in commands:
-                action = cmd.get("action", "")
-                if action == "toggle_strategy":
-                    key = cmd.get("strategy", "")
-                    self.strategies.toggle_strategy(key)
-                elif action == "allocate_strategy":
-                    key = cmd.get("strategy", "")
-                    amount = float(cmd.get("amount", 0))
-                    coin = cmd.get("coin", "SOL")
-                    if self.strategies.allocate_strategy(key, amount, coin):
-                        logger.info(f"Alocacao real: ${amount:.2f} {coin} -> {key}")
-                elif action == "deallocate_strategy":
-                    key = cmd.get("strategy", "")
-                    alloc = self.strategies.get_allocation(key)
-                    if alloc:
-                        pnl = alloc.get("pnl", 0)
-                        trades = alloc.get("trades", 0)
-                        # Cash-out: converte USDC restante de volta para SOL
-                        await self._cashout_usdc_to_sol(key, alloc)
-                        self.strategies.deallocate_strategy(key)
-                        logger.info(
-                            f"Desalocacao: {key} | {trades} trades | PNL: ${pnl:+.4f}"
-                        )
-                        await self.send_message(
-                            f"🛑 *MODO REAL ENCERRADO* - {key}\n"
-                            f"━━━━━━━━━━━━━━━━━━━━\n"
-                            f"📊 Trades: {trades}\n"
-                            f"{'🟢' if pnl >= 0 else '🔴'} P&L Final: ${pnl:+.4f}\n"
-                            f"💰 USDC convertido de volta para SOL\n"
-                            f"━━━━━━━━━━━━━━━━━━━━"
-                        )
-                elif action == "save_settings":
-                    self._apply_settings(cmd)
-                    self._settings_applied = True
+            commands = await push_to_cloud(cloud_data)
+            await self._process_cloud_commands(commands)
         except Exception as e:
             logger.debug(f"Cloud push prep error: {e}")
 
+    # --------------------------------------------------------
+    # COMANDOS DO DASHBOARD NA NUVEM
+    # --------------------------------------------------------
+    async def _process_cloud_commands(self, commands: list):
+        """Aplica comandos do dashboard na nuvem e confirma (ack) os ids.
+
+        Comandos podem chegar duas vezes (long-poll e resposta do push);
+        o id garante que cada um seja aplicado uma unica vez. So os que
+        foram aplicados recebem ack: um comando que falhou fica na fila do
+        servidor e volta na resposta do proximo push (ate
+        CLOUD_COMMAND_MAX_ATTEMPTS tentativas, depois e descartado).
+        """
+        acked = []
+        for cmd in commands:
+            cid = cmd.get("id")
+            if cid is not None:
+                if self._last_command_id is None or cid > self._last_command_id:
+                    self._last_command_id = cid
+                if cid in self._applied_command_ids:
+                    acked.append(cid)
+                    continue
+            try:
+                await self._apply_cloud_command(cmd)
+            except Exception as e:
+                if cid is None:
+                    logger.warning(f"Erro aplicando comando {cmd.get('action')}: {e}")
+                    continue
+                attempts = self._command_failures.get(cid, 0) + 1
+                self._command_failures[cid] = attempts
+                if attempts < CLOUD_COMMAND_MAX_ATTEMPTS:
+                    logger.warning(
+                        f"Erro aplicando comando {cmd.get('action')} (tentativa {attempts}): {e}"
+                    )
+                    continue
+                logger.error(
+                    f"Comando {cmd.get('action')} descartado apos {attempts} tentativas: {e}"
+                )
+            if cid is not None:
+                self._command_failures.pop(cid, None)
+                self._applied_command_ids.append(cid)
+                acked.append(cid)
+        if commands:
+            # O servidor altera allocations por conta propria (alocacao otimista,
+            # forced_inactive): reenvia a visao do bot mesmo se o comando foi
+            # rejeitado/ignorado aqui e nada mudou localmente
+            _push_encoder.invalidate("allocations")
+        if acked:
+            await ack_cloud_commands(acked)
+
+    async def _apply_cloud_command(self, cmd: dict):
+        """Aplica um comando vindo do dashboard na nuvem."""
+        action = cmd.get("action", "")
+        if action == "toggle_strategy":
+            key = cmd.get("strategy", "")
+            self.strategies.toggle_strategy(key)
+        elif action == "allocate_strategy":
+            key = cmd.get("strategy", "")
+            amount = float(cmd.get("amount", 0))
+            coin = cmd.get("coin", "SOL")
+            if self.strategies.allocate_strategy(key, amount, coin):
+                logger.info(f"Alocacao real: ${amount:.2f} {coin} -> {key}")
+        elif action == "deallocate_strategy":
+            key = cmd.get("strategy", "")
+            alloc = self.strategies.get_allocation(key)
+            if alloc:
+                pnl = alloc.get("pnl", 0)
+                trades = alloc.get("trades", 0)
+                # Cash-out: converte USDC restante de volta para SOL
+                await self._cashout_usdc_to_sol(key, alloc)
+                self.strategies.deallocate_strategy(key)
+                logger.info(
+                    f"Desalocacao: {key} | {trades} trades | PNL: ${pnl:+.4f}"
+                )
+                await self.send_message(
+                    f"🛑 *MODO REAL ENCERRADO* - {key}\n"
+                    f"━━━━━━━━━━━━━━━━━━━━\n"
+                    f"📊 Trades: {trades}\n"
+                    f"{'🟢' if pnl >= 0 else '🔴'} P&L Final: ${pnl:+.4f}\n"
+                    f"💰 USDC convertido de volta para SOL\n"
+                    f"━━━━━━━━━━━━━━━━━━━━"
+                )
+        elif action == "save_settings":
+            self._apply_settings(cmd)
+            self._settings_applied = True
+
+    async def command_loop(self):
+        """Mantem um long-poll aberto com o dashboard na nuvem.
+
+        Comandos (pausar, alocar, desalocar, settings) sao aplicados em
+        menos de 1s apos o clique, independente do ciclo de analise.
+        """
+        while self.running:
+            commands = await poll_cloud_commands(self._last_command_id)
+            if commands is None:
+                await clock.sleep(5)  # Servidor fora / sem URL: tenta depois
+                continue
+            if commands:
+                await self._process_cloud_commands(commands)
+
+    # --------------------------------------------------------
+    # MODO REAL: executa sinais vindos do event bus
+    # --------------------------------------------------------
+    async def real_trade_loop(self):
+        """Consome TradeEvents das estrategias e executa swaps reais na hora.
+
+        Eventos que chegam juntos sao processados em lote (um sinal por
+        estrategia); nao espera o proximo ciclo de analise.
+        """
+        queue = self.strategies.subscribe_trades()
+        while self.running:
+            event = await queue.get()
+            events = [event] + EventBus.drain(queue)
+            try:
+                signals = self.strategies.signals_from_events(events)
+                if not signals:
+                    continue
+                price = self.last_price or self._last_known_price
+                if price <= 0:
+                    price = await self.price_fetcher.get_current_price() or 0.0
+                if self.wallet and not config.PAPER_TRADING:
+                    await self.wallet.update_balances()
+                async with self._real_trade_lock:
+                    await self._execute_real_signals(signals, price)
+            except Exception as e:
+                logger.error(f"Real trade execution error: {e}", exc_info=True)
+
+    # --------------------------------------------------------
+    # MODO REAL: notificacoes do Telegram pelo event bus
+    # --------------------------------------------------------
+    @staticmethod
+    def _format_real_trade(event) -> str:
+        """Mensagem do Telegram para um RealTradeEvent."""
+        info = event.info
+        if event.kind == "open":
+            max_h = info.get("max_hold_s", 0)
+            hold_str = f"{max_h}s" if max_h < 120 else f"{max_h // 60}min" if max_h < 7200 else f"{max_h // 3600}h"
+            return (
+                f"📈 *MODO REAL - POSICAO ABERTA*\n"
+                f"━━━━━━━━━━━━━━━━━━━━\n"
+                f"Estrategia: {event.strategy}\n"
+                f"📦 Capital: ${event.amount_usd:.2f} {event.coin}\n"
+                f"🎯 TP: +{info.get('tp_pct', 0)}% | 🛑 SL: -{info.get('sl_pct', 0)}%\n"
+                f"⏰ Max Hold: {hold_str}\n"
+                f"🔗 Buy TX: `{event.tx}`\n"
+                f"━━━━━━━━━━━━━━━━━━━━"
+            )
+        pnl_emoji = "🟢" if event.pnl_usd >= 0 else "🔴"
+        if event.kind == "close":
+            reason = info.get("reason", "")
+            reason_labels = {"tp": "TAKE PROFIT", "sl": "STOP LOSS", "timeout": "TIMEOUT",
+                             "trailing": "TRAILING STOP", "liquidated": "LIQUIDADO"}
+            reason_emojis = {"tp": "🎯", "sl": "🛑", "timeout": "⏰",
+                             "trailing": "📉", "liquidated": "💥"}
+            hold_time = info.get("hold_s", 0)
+            hold_str = f"{hold_time}s" if hold_time < 120 else f"{hold_time // 60}min"
+            return (
+                f"{reason_emojis.get(reason, '📊')} "
+                f"*MODO REAL - {reason_labels.get(reason, reason.upper())}*\n"
+                f"━━━━━━━━━━━━━━━━━━━━\n"
+                f"Estrategia: {event.strategy}\n"
+                f"Hold: {hold_str}\n"
+                f"📦 Capital: ${event.amount_usd:.2f}\n"
+                f"💰 Retorno: ${info.get('close_value_usd', 0):.2f}\n"
+                f"{pnl_emoji} PNL: ${event.pnl_usd:+.4f}\n"
+                f"🔗 Sell TX: `{event.tx}`\n"
+                f"━━━━━━━━━━━━━━━━━━━━"
+            )
+        return (
+            f"💰 *MODO REAL* - {event.strategy} (instant)\n"
+            f"━━━━━━━━━━━━━━━━━━━━\n"
+            f"📦 Capital: ${event.amount_usd:.2f} {event.coin}\n"
+            f"{pnl_emoji} PNL: ${event.pnl_usd:+.4f}\n"
+            f"🔗 TX: `{event.tx}`\n"
+            f"━━━━━━━━━━━━━━━━━━━━"
+        )
+
+    async def notify_loop(self):
+        """Envia ao Telegram os trades reais publicados no event bus.
+
+        O swap nao espera a API do Telegram: o executor so publica o evento.
+        """
+        queue = self.strategies.subscribe_real_trades()
+        while self.running:
+            event = await queue.get()
+            try:
+                await self.send_message(self._format_real_trade(event))
+            except Exception as e:
+                logger.debug(f"Real trade notify error: {e}")
+
+    async def _execute_real_signals(self, signals: list, current_price: float):
+        """Executa swaps reais (Jupiter) para os sinais das estrategias alocadas."""
+        # Converte amount_raw + amount_coin para amount_usd
+        sol_price = current_price if current_price > 0 else 100
+        for sig in signals:
+            raw = sig.pop("amount_raw", 0)
+            acoin = sig.pop("amount_coin", "USDC")
+            if acoin == "USDC" or acoin == "USDT":
+                sig["amount_usd"] = raw
+            else:
+                # Converte para USD usando preco atual
+                sig["amount_usd"] = round(raw * sol_price, 4) if acoin == "SOL" else raw
+            sig["coin"] = acoin
+
+        # Auto-funding: se tem sinais e pouco USDC, converte SOL->USDC
+        if signals and not config.PAPER_TRADING:
+            usdc_bal = self.wallet.last_usdc_balance if self.wallet else 0
+            sol_bal = self.wallet.last_sol_balance if self.wallet else 0
+            total_needed = sum(s["amount_usd"] for s in signals)
+            if usdc_bal < total_needed and sol_bal > 0.01:
+                fund_usd = total_needed - usdc_bal + 0.01  # pequena margem
+                sol_price = current_price if current_price > 0 else 100
+                sol_needed = fund_usd / sol_price
+                # Garante que não usa mais que 90% do SOL (reserva para fees)
+                sol_to_sell = min(sol_needed, sol_bal * 0.9)
+                sol_lamports = int(sol_to_sell * (10 ** 9))
+                if sol_lamports > 0:
+                    logger.info(
+                        f"[MODO REAL] Auto-funding: vendendo {sol_to_sell:.6f} SOL "
+                        f"(~${fund_usd:.2f}) para USDC"
+                    )
+                    sol_mint = config.TOKENS["SOL"]
+                    usdc_mint_f = config.TOKENS["USDC"]
+                    fund_quote = await self.executor.get_quote(
+                        sol_mint, usdc_mint_f, sol_lamports
+                    )
+                    if fund_quote:
+                        fund_tx = await self.executor.execute_swap(fund_quote)
+                        if fund_tx:
+                            funded = int(fund_quote.get("outAmount", 0)) / (10 ** 6)
+                            logger.info(
+                                f"[MODO REAL] Auto-funding OK: +${funded:.4f} USDC | TX: {fund_tx}"
+                            )
+                            # Atualiza saldo USDC em memoria
+                            if self.wallet:
+                                self.wallet.last_usdc_balance += funded
+                                self.wallet.last_sol_balance -= sol_to_sell
+                        else:
+                            logger.warning("[MODO REAL] Auto-funding: falha no swap SOL->USDC")
+                    else:
+                        logger.warning("[MODO REAL] Auto-funding: sem quote SOL->USDC")
+
+        for sig in signals:
+            strat_key = sig["strategy"]
+            coin = sig["coin"]
+            amount_usd = sig["amount_usd"]
+            direction = sig["direction"]
+            sim_pnl_pct = sig["sim_pnl_pct"]
+            trade_id = sig["trade_id"]
+
+            # Config de hold da estrategia
+            hold_cfg = self.strategies.STRATEGY_HOLD_CONFIG.get(strat_key, {})
+            is_instant = hold_cfg.get("instant", False)
+
+            # Nao empilhar: pula se ja tem posicao aberta
+            if not is_instant and self.strategies.has_open_position(strat_key):
+                logger.info(f"[MODO REAL] {strat_key}: ja tem posicao aberta, ignorando sinal")
+                continue
+
+            logger.info(
+                f"[MODO REAL] Executando trade: {strat_key} "
+                f"${amount_usd:.2f} {coin} | dir={direction} | "
+                f"{'instant' if is_instant else 'hold'}"
+            )
+
+            # Resolve mint addresses — par é sempre SOL/USDC
+            # 'coin' é a moeda alocada pelo usuario, mas o ativo traded é SOL
+            trade_coin = "SOL"
+            coin_mint = config.TOKENS["SOL"]
+            usdc_mint = config.TOKENS["USDC"]
+
+            decimals = {"SOL": 9, "USDC": 6, "USDT": 6, "WBTC": 8, "JUP": 6, "BONK": 5}
+            coin_decimals = decimals.get(trade_coin, 9)
+
+            try:
+                # === PASSO 1: Compra (USDC -> Coin) ===
+                buy_amount_lamports = int(amount_usd * (10 ** 6))
+                buy_quote = await self.executor.get_quote(
+                    usdc_mint, coin_mint, buy_amount_lamports
+                )
+                if not buy_quote:
+                    logger.warning(f"[MODO REAL] {strat_key}: sem quote para compra")
+                    continue
+
+                tx_buy = await self.executor.execute_swap(buy_quote)
+                if not tx_buy:
+                    logger.warning(f"[MODO REAL] {strat_key}: falha na compra")
+                    continue
+
+                coins_received = int(buy_quote.get("outAmount", 0))
+                entry_price = amount_usd / (coins_received / (10 ** coin_decimals)) if coins_received > 0 else 0
+
+                logger.info(
+                    f"[MODO REAL] {strat_key}: COMPROU {coins_received} {trade_coin} "
+                    f"(${amount_usd:.2f} USDC) | TX: {tx_buy}"
+                )
+
+                if is_instant:
+                    # === ARBITRAGE: BUY + SELL instantaneo ===
+                    sell_quote = await self.executor.get_quote(
+                        coin_mint, usdc_mint, coins_received
+                    )
+                    tx_sell = None
+                    if sell_quote:
+                        tx_sell = await self.executor.execute_swap(sell_quote)
+
+                    if tx_sell:
+                        usdc_received = int(sell_quote.get("outAmount", 0)) / (10 ** 6)
+                        real_pnl = round(usdc_received - amount_usd, 4)
+                        final_tx = tx_sell
+                    else:
+                        real_pnl = 0.0
+                        final_tx = tx_buy
+
+                    self.strategies.update_allocation_after_trade(
+                        strat_key, final_tx, real_pnl,
+                        tx_buy=tx_buy, tx_sell=tx_sell or "",
+                        amount_usd=amount_usd, coin=coin,
+                        direction=direction, sim_pnl_pct=sim_pnl_pct,
+                        trade_info=sig.get("trade_info"),
+                    )
+                    self.strategies.mark_trade_executed(strat_key, trade_id, final_tx)
+                else:
+                    # === HOLD: so compra, monitora TP/SL nos proximos ciclos ===
+                    self.strategies.open_real_position(
+                        strategy=strat_key, coin=trade_coin, coin_mint=coin_mint,
+                        amount_usd=amount_usd, coins_received=coins_received,
+                        coin_decimals=coin_decimals,
+                        entry_price_per_coin=entry_price,
+                        tx_buy=tx_buy, direction=direction,
+                        trade_id=trade_id, sim_pnl_pct=sim_pnl_pct,
+                    )
+                    self.strategies.mark_trade_executed(strat_key, trade_id, tx_buy)
+
+            except Exception as ex:
+                logger.error(f"[MODO REAL] {strat_key}: erro no swap: {ex}")
+                continue
+
     # --------------------------------------------------------
     # MODO REAL: monitora posicoes abertas (TP/SL/timeout)
     # --------------------------------------------------------
+    async def _value_real_positions(self, open_positions: list) -> tuple:
+        """Avalia posicoes reais abertas com uma quote por mint.
+
+        As quotes por mint saem em paralelo (limitadas pelo semaforo do
+        executor); cada posicao vale coins * preco unitario. So posicoes
+        perto de um gatilho recebem quote exata do proprio tamanho.
+        Retorna ({trade_id: valor_usd}, {trade_id: quote_exata}).
+        """
+        usdc_mint = config.TOKENS["USDC"]
+        by_mint: Dict[str, list] = {}
+        for pos in open_positions:
+            by_mint.setdefault(pos["coin_mint"], []).append(pos)
+
+        mints = list(by_mint)
+        totals = [sum(p["coins_received"] for p in by_mint[m]) for m in mints]
+        quotes = await asyncio.gather(
+            *(self.executor.get_quote(mint, usdc_mint, total) for mint, total in zip(mints, totals)),
+            return_exceptions=True,
+        )
+
+        current_values = {}
+        exact_quotes = {}
+        near_trigger = []
+        for mint, total, quote in zip(mints, totals, quotes):
+            if isinstance(quote, Exception) or not quote or total <= 0:
+                logger.debug(f"[MODO REAL] Sem quote para {mint[:8]}: {quote}")
+                continue
+            unit_out = int(quote.get("outAmount", 0)) / total  # USDC (raw) por unidade
+            group = by_mint[mint]
+            for pos in group:
+                value_usd = pos["coins_received"] * unit_out / (10 ** 6)
+                current_values[pos["trade_id"]] = value_usd
+                if len(group) == 1:
+                    exact_quotes[pos["trade_id"]] = quote  # Quote do mint ja e do tamanho exato
+                elif self.strategies.near_real_trigger(pos, value_usd):
+                    near_trigger.append(pos)
+
+        if near_trigger:
+            exact = await asyncio.gather(
+                *(self.executor.get_quote(pos["coin_mint"], usdc_mint, pos["coins_received"])
+                  for pos in near_trigger),
+                return_exceptions=True,
+            )
+            for pos, quote in zip(near_trigger, exact):
+                if isinstance(quote, Exception) or not quote:
+                    continue
+                current_values[pos["trade_id"]] = int(quote.get("outAmount", 0)) / (10 ** 6)
+                exact_quotes[pos["trade_id"]] = quote
+
+        return current_values, exact_quotes
+
     async def _check_open_real_positions(self, current_price: float):
         """Verifica posicoes reais abertas e fecha quando TP/SL/timeout."""
         open_positions = self.strategies.get_open_real_positions()
@@ -1066,23 +1346,9 @@ class TelegramBot:
             return
 
         usdc_mint = config.TOKENS["USDC"]
-        current_values = {}
-        cached_quotes = {}
 
-        # Passo 1: Checa preco atual de cada posicao via get_quote (READ-ONLY)
-        for pos in open_positions:
-            coin_mint = pos["coin_mint"]
-            coins_held = pos["coins_received"]
-            try:
-                sell_quote = await self.executor.get_quote(
-                    coin_mint, usdc_mint, coins_held
-                )
-                if sell_quote:
-                    value_usd = int(sell_quote.get("outAmount", 0)) / (10 ** 6)
-                    current_values[pos["trade_id"]] = value_usd
-                    cached_quotes[pos["trade_id"]] = sell_quote
-            except Exception as e:
-                logger.debug(f"[MODO REAL] Position check error {pos['strategy']}: {e}")
+        # Passo 1: Mark-to-market em lote (READ-ONLY)
+        current_values, cached_quotes = await self._value_real_positions(open_positions)
 
         # Passo 2: Verifica TP/SL/timeout
         to_close = self.strategies.check_real_positions_tp_sl(current_values)
@@ -1108,28 +1374,9 @@ class TelegramBot:
                 close_value = int(quote.get("outAmount", 0)) / (10 ** 6)
                 real_pnl = self.strategies.close_real_position(pos, tx_sell, close_value, reason)
 
-                hold_time = round(time.time() - pos["opened_at"])
+                hold_time = round(clock.time() - pos["opened_at"])
                 hold_str = f"{hold_time}s" if hold_time < 120 else f"{hold_time // 60}min"
 
-                reason_labels = {"tp": "TAKE PROFIT", "sl": "STOP LOSS", "timeout": "TIMEOUT",
-                                 "trailing": "TRAILING STOP", "liquidated": "LIQUIDADO"}
-                reason_emojis = {"tp": "🎯", "sl": "🛑", "timeout": "⏰",
-                                 "trailing": "📉", "liquidated": "💥"}
-                pnl_emoji = "🟢" if real_pnl >= 0 else "🔴"
-
-                await self.send_message(
-                    f"{reason_emojis.get(reason, '📊')} "
-                    f"*MODO REAL - {reason_labels.get(reason, reason.upper())}*\n"
-                    f"━━━━━━━━━━━━━━━━━━━━\n"
-                    f"Estrategia: {strat_key}\n"
-                    f"Hold: {hold_str}\n"
-                    f"📦 Capital: ${pos['amount_usd']:.2f}\n"
-                    f"💰 Retorno: ${close_value:.2f}\n"
-                    f"{pnl_emoji} PNL: ${real_pnl:+.4f}\n"
-                    f"🔗 Sell TX: `{tx_sell}`\n"
-                    f"━━━━━━━━━━━━━━━━━━━━"
-                )
-
                 logger.info(
                     f"[MODO REAL] {strat_key}: FECHOU ({reason}) | "
                     f"PNL: ${real_pnl:+.4f} | Hold: {hold_str} | TX: {tx_sell}"
@@ -1260,8 +1507,7 @@ class TelegramBot:
 
         # Verifica se ja fez retirada recente (cooldown 1h)
         last_withdraw = getattr(self, "_last_profit_withdraw", 0)
-        import time as _time
-        if _time.time() - last_withdraw < 3600:
+        if clock.time() - last_withdraw < 3600:
             return
 
         # Calcula quanto SOL transferir
@@ -1304,7 +1550,7 @@ class TelegramBot:
             await client.close()
 
             tx_hash = str(result.value)
-            self._last_profit_withdraw = _time.time()
+            self._last_profit_withdraw = clock.time()
 
             logger.info(f"[AUTO-WITHDRAW] TX: {tx_hash}")
             await self.send_message(
@@ -1347,7 +1593,7 @@ class TelegramBot:
             except Exception as e:
                 logger.error(f"Telegram loop error: {e}")
 
-            await asyncio.sleep(1)
+            await clock.sleep(1)
 
     # --------------------------------------------------------
     # INICIAR / PARAR
@@ -1365,12 +1611,37 @@ class TelegramBot:
         await self.send_message("🤖 Bot iniciando...")
         await self.cmd_start()
 
-        # Roda loops em paralelo
+        if config.STRATEGY_SCHEDULER_ENABLED:
+            self.strategies.start_scheduler()
+
+        # Roda loops em paralelo (comandos e modo real ficam em tasks que o
+        # shutdown cancela: podem estar presos num long-poll / queue.get)
+        self._start_background_loops()
         await asyncio.gather(
             self.analysis_loop(),
             self.telegram_loop(),
         )
 
+    def _start_background_loops(self):
+        """Canal de comandos da nuvem, executor real e notificacoes em tasks guardadas."""
+        self._background_tasks = [
+            asyncio.create_task(self.command_loop()),
+            asyncio.create_task(self.real_trade_loop()),
+            asyncio.create_task(self.notify_loop()),
+        ]
+
+    async def _stop_background_loops(self):
+        tasks, self._background_tasks = self._background_tasks, []
+        for task in tasks:
+            task.cancel()
+        for task in tasks:
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+            except Exception as e:
+                logger.debug(f"Background loop error: {e}")
+
     async def _console_mode(self):
         """Modo console para debug (sem Telegram)."""
         logger.info("=" * 50)
@@ -1385,6 +1656,11 @@ class TelegramBot:
         logger.info("🌐 Dashboard: http://localhost:8080")
         logger.info("📤 Para compartilhar: npx localtunnel --port 8080")
 
+        # Canal de comandos da nuvem roda em paralelo ao loop de analise
+        self._start_background_loops()
+        if config.STRATEGY_SCHEDULER_ENABLED:
+            self.strategies.start_scheduler()
+
         while self.running:
             try:
                 await self._run_analysis()
@@ -1394,13 +1670,16 @@ class TelegramBot:
             except Exception as e:
                 logger.error(f"Erro: {e}")
                 self.dashboard.add_log(f"ERRO: {e}")
-            await asyncio.sleep(config.LOOP_INTERVAL_SECONDS)
+            await clock.sleep(config.LOOP_INTERVAL_SECONDS)
 
     async def shutdown(self):
         """Desliga o bot graciosamente."""
         self.running = False
+        await self._stop_background_loops()
+        await self.strategies.stop_scheduler()
         await self.price_fetcher.close()
         await self.executor.close()
+        await close_cloud_client()
         logger.info("👋 Bot desligado")
 
 
@@ -1432,4 +1711,7 @@ if __name__ == "__main__":
 |  Comece SEMPRE em PAPER_TRADING = True         |
 +================================================+
     """)
-    asyncio.run(main())
+    try:
+        asyncio.run(main())
+    finally:
+        stop_logging()
@@ -0,0 +1,172 @@
+"""
+Market Recorder - Gravacao e redirecionamento das APIs de mercado
+===================================================================
+Transports httpx plugados nos clientes do PriceDataFetcher e do
+JupiterExecutor (GeckoTerminal, DexScreener, Jupiter):
+
+    RecordingTransport  -> repassa ao upstream e grava cada par
+                           request/response num JSONL gzip (append)
+    RedirectTransport   -> manda tudo para o market_replay_server
+                           local: https://host/path -> {replay}/host/path
+
+market_client() escolhe pelo config:
+    MARKET_REPLAY_URL   -> redireciona (offline, deterministico)
+    MARKET_RECORD_FILE  -> grava
+    (nenhum)            -> cliente httpx normal
+
+Formato da captura (uma linha JSON por request):
+    {"t", "method", "host", "path", "query", "body", "status",
+     "content_type", "response"}
+Respostas sao texto (todas as APIs aqui sao JSON). request_key() e a
+chave usada pelo servidor de replay para casar uma request com as
+respostas gravadas.
+"""
+
+import gzip
+import hashlib
+import json
+import logging
+from typing import Dict, Iterator, List, Optional
+from urllib.parse import parse_qsl, urlencode
+
+import httpx
+
+import clock
+import config
+
+logger = logging.getLogger("MarketRecorder")
+
+
+def request_key(method: str, host: str, path: str, query: str, body: str = "") -> str:
+    """Chave canonica: metodo + host + path + query ordenada (+ hash do corpo)."""
+    params = urlencode(sorted(parse_qsl(query, keep_blank_values=True)))
+    key = f"{method.upper()} {host}{path}"
+    if params:
+        key += f"?{params}"
+    if body:
+        key += f" #{hashlib.sha1(body.encode()).hexdigest()[:12]}"
+    return key
+
+
+def entry_key(entry: Dict) -> str:
+    return request_key(entry["method"], entry["host"], entry["path"],
+                       entry.get("query", ""), entry.get("body", ""))
+
+
+def iter_capture(path: str) -> Iterator[Dict]:
+    """Le uma captura (gzip se terminar em .gz)."""
+    opener = gzip.open if path.endswith(".gz") else open
+    with opener(path, "rt", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                yield json.loads(line)
+
+
+def load_capture(path: str) -> Dict[str, List[Dict]]:
+    """Captura indexada por request_key, respostas na ordem gravada."""
+    index: Dict[str, List[Dict]] = {}
+    for entry in iter_capture(path):
+        index.setdefault(entry_key(entry), []).append(entry)
+    return index
+
+
+class CaptureWriter:
+    """Arquivo de captura compartilhado pelos clientes que gravam no mesmo path."""
+
+    _open: Dict[str, "CaptureWriter"] = {}
+
+    def __init__(self, path: str):
+        opener = gzip.open if path.endswith(".gz") else open
+        self.path = path
+        self._file = opener(path, "at", encoding="utf-8")
+        self._refs = 0
+
+    @classmethod
+    def acquire(cls, path: str) -> "CaptureWriter":
+        writer = cls._open.get(path)
+        if writer is None:
+            writer = cls._open[path] = cls(path)
+        writer._refs += 1
+        return writer
+
+    def write(self, entry: Dict):
+        try:
+            self._file.write(json.dumps(entry, separators=(",", ":")) + "\n")
+            self._file.flush()
+        except OSError as e:
+            logger.warning(f"Capture write error: {e}")
+
+    def release(self):
+        self._refs -= 1
+        if self._refs <= 0:
+            self._file.close()
+            self._open.pop(self.path, None)
+
+
+class RecordingTransport(httpx.AsyncBaseTransport):
+    """Repassa ao upstream e grava request + response."""
+
+    def __init__(self, path: str, inner: Optional[httpx.AsyncBaseTransport] = None):
+        self.inner = inner or httpx.AsyncHTTPTransport()
+        self.writer = CaptureWriter.acquire(path)
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        body = (await request.aread()).decode("utf-8", errors="replace")
+        response = await self.inner.handle_async_request(request)
+        content = await response.aread()
+        await response.aclose()
+
+        entry = {
+            "t": round(clock.time(), 3),
+            "method": request.method,
+            "host": request.url.host,
+            "path": request.url.path,
+            "query": request.url.query.decode(),
+            "body": body,
+            "status": response.status_code,
+            "content_type": response.headers.get("content-type", ""),
+            "response": content.decode("utf-8", errors="replace"),
+        }
+        self.writer.write(entry)
+
+        # Conteudo ja decodificado: nao repassa content-encoding/length
+        headers = [(k, v) for k, v in response.headers.items()
+                   if k.lower() not in ("content-encoding", "content-length", "transfer-encoding")]
+        return httpx.Response(response.status_code, headers=headers,
+                              content=content, request=request)
+
+    async def aclose(self):
+        self.writer.release()
+        await self.inner.aclose()
+
+
+class RedirectTransport(httpx.AsyncBaseTransport):
+    """Reescreve https://host/path para {replay_url}/host/path."""
+
+    def __init__(self, replay_url: str, inner: Optional[httpx.AsyncBaseTransport] = None):
+        self.replay = httpx.URL(replay_url)
+        self.inner = inner or httpx.AsyncHTTPTransport()
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        url = request.url
+        prefix = self.replay.raw_path.rstrip(b"/")
+        request.url = url.copy_with(
+            scheme=self.replay.scheme, host=self.replay.host, port=self.replay.port,
+            raw_path=prefix + b"/" + url.host.encode() + url.raw_path,
+        )
+        return await self.inner.handle_async_request(request)
+
+    async def aclose(self):
+        await self.inner.aclose()
+
+
+def market_client(timeout: float = 30) -> httpx.AsyncClient:
+    """Cliente httpx das APIs de mercado (gravando/redirecionando se configurado)."""
+    if config.MARKET_REPLAY_URL:
+        logger.info(f"APIs de mercado redirecionadas para {config.MARKET_REPLAY_URL}")
+        return httpx.AsyncClient(timeout=timeout, transport=RedirectTransport(config.MARKET_REPLAY_URL))
+    if config.MARKET_RECORD_FILE:
+        logger.info(f"Gravando APIs de mercado em {config.MARKET_RECORD_FILE}")
+        return httpx.AsyncClient(timeout=timeout, transport=RecordingTransport(config.MARKET_RECORD_FILE))
+    return httpx.AsyncClient(timeout=timeout)
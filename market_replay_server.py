@@ -0,0 +1,214 @@
+"""
+Market Replay Server - GeckoTerminal / DexScreener / Jupiter offline
+======================================================================
+Servidor aiohttp local que responde nos mesmos endpoints das APIs de
+mercado. O bot chega aqui pelo RedirectTransport (market_recorder.py):
+
+    https://api.geckoterminal.com/api/v2/...  ->  /api.geckoterminal.com/api/v2/...
+
+Fontes de resposta, nessa ordem:
+    1. Captura gravada (MARKET_RECORD_FILE): respostas da mesma request
+       (request_key) servidas em sequencia; esgotadas, repete a ultima.
+       Sem casamento exato, usa a mesma rota ignorando a query.
+    2. Modo sintetico (--synthetic): mercado deterministico gerado a
+       partir do horario (OHLCV, preco do pool, DexScreener, quote Jupiter).
+    3. 404 JSON.
+
+Uso:
+    python market_replay_server.py market_capture.jsonl.gz --port 8765
+    python market_replay_server.py --synthetic --port 8765
+e no config.py do bot: MARKET_REPLAY_URL = "http://127.0.0.1:8765"
+"""
+
+import argparse
+import hashlib
+import logging
+import math
+import time
+from typing import Dict, List, Optional
+
+from aiohttp import web
+
+import config
+from market_recorder import load_capture, request_key
+
+logger = logging.getLogger("MarketReplay")
+
+# Largura de cada candle do GeckoTerminal (segundos por unidade)
+GECKO_UNITS = {"minute": 60, "hour": 3600, "day": 86400}
+SYNTHETIC_BASE_PRICE = 150.0
+TOKEN_DECIMALS = {config.TOKENS["SOL"]: 9, config.TOKENS["USDC"]: 6, config.TOKENS["USDT"]: 6}
+STABLE_MINTS = {config.TOKENS["USDC"], config.TOKENS["USDT"]}
+
+
+class SyntheticMarket:
+    """Preco deterministico em funcao do tempo (sem estado, sem seed global)."""
+
+    def __init__(self, base_price: float = SYNTHETIC_BASE_PRICE, seed: int = 0):
+        self.base_price = base_price
+        self.seed = seed
+
+    def _noise(self, minute: int) -> float:
+        digest = hashlib.sha1(f"{self.seed}:{minute}".encode()).digest()
+        return int.from_bytes(digest[:4], "big") / 0xFFFFFFFF - 0.5
+
+    def price(self, t: float) -> float:
+        """Ciclos diario/intradiario + ruido por minuto."""
+        minute = int(t // 60)
+        wave = (0.04 * math.sin(2 * math.pi * minute / 1440)
+                + 0.015 * math.sin(2 * math.pi * minute / 97)
+                + 0.004 * self._noise(minute))
+        return round(self.base_price * (1 + wave), 6)
+
+    def ohlcv(self, width: int, limit: int, now: float) -> List[list]:
+        """Candles [ts, o, h, l, c, v] do mais recente para o mais antigo (como o Gecko)."""
+        current = int(now // width) * width
+        stride = max(60, width // 60)  # Ate 60 amostras por candle
+        candles = []
+        for i in range(limit):
+            start = current - i * width
+            end = min(start + width, now)
+            samples = [self.price(t) for t in range(start, int(end) + 1, stride)] or [self.price(start)]
+            volume = 1000 + 500 * (self._noise(start // 60 + 7) + 0.5) * width / 60
+            candles.append([start, samples[0], max(samples), min(samples), samples[-1], round(volume, 2)])
+        return candles
+
+    def quote(self, input_mint: str, output_mint: str, amount: int, now: float) -> Dict:
+        price = self.price(now)
+        in_units = amount / 10 ** TOKEN_DECIMALS.get(input_mint, 9)
+        if input_mint in STABLE_MINTS and output_mint not in STABLE_MINTS:
+            out_units = in_units / price
+        elif output_mint in STABLE_MINTS and input_mint not in STABLE_MINTS:
+            out_units = in_units * price
+        else:
+            out_units = in_units
+        out_amount = int(out_units * 10 ** TOKEN_DECIMALS.get(output_mint, 9))
+        return {
+            "inputMint": input_mint,
+            "outputMint": output_mint,
+            "inAmount": str(amount),
+            "outAmount": str(out_amount),
+            "otherAmountThreshold": str(out_amount),
+            "priceImpactPct": "0",
+            "routePlan": [],
+            "contextSlot": int(now),
+        }
+
+
+class ReplayServer:
+    """Responde com a captura gravada e/ou com o mercado sintetico."""
+
+    def __init__(self, capture_path: Optional[str] = None, synthetic: bool = False,
+                 market: Optional[SyntheticMarket] = None):
+        self.capture: Dict[str, List[Dict]] = load_capture(capture_path) if capture_path else {}
+        self.by_route: Dict[str, List[Dict]] = {}
+        for entries in self.capture.values():
+            first = entries[0]
+            self.by_route.setdefault(f"{first['method']} {first['host']}{first['path']}", []).extend(entries)
+        self._cursor: Dict[str, int] = {}
+        self.market = market or (SyntheticMarket() if synthetic else None)
+        self.stats = {"replayed": 0, "synthetic": 0, "missing": 0}
+        if capture_path:
+            logger.info(
+                f"Captura {capture_path}: {sum(len(v) for v in self.capture.values())} respostas, "
+                f"{len(self.capture)} requests distintas"
+            )
+
+    def _next(self, key: str, entries: List[Dict]) -> Dict:
+        i = self._cursor.get(key, 0)
+        self._cursor[key] = i + 1
+        return entries[min(i, len(entries) - 1)]
+
+    def _recorded(self, method: str, host: str, path: str, query: str, body: str) -> Optional[Dict]:
+        key = request_key(method, host, path, query, body)
+        if key in self.capture:
+            return self._next(key, self.capture[key])
+        route = f"{method.upper()} {host}{path}"
+        if route in self.by_route:
+            return self._next(route, self.by_route[route])
+        return None
+
+    def _synthetic(self, method: str, host: str, path: str, query: Dict, body: str):
+        now = time.time()
+        market = self.market
+        parts = path.strip("/").split("/")
+
+        if host == "api.geckoterminal.com":
+            if "ohlcv" in parts:
+                unit = parts[parts.index("ohlcv") + 1] if parts[-1] != "ohlcv" else "minute"
+                width = GECKO_UNITS.get(unit, 60) * int(query.get("aggregate", 1))
+                limit = min(int(query.get("limit", 100)), 1000)
+                return {"data": {"attributes": {"ohlcv_list": market.ohlcv(width, limit, now)}}}
+            if "pools" in parts:
+                return {"data": {"attributes": {"base_token_price_usd": str(market.price(now))}}}
+
+        if host == "api.dexscreener.com":
+            return [{"chainId": "solana", "priceUsd": str(market.price(now))}]
+
+        if host.endswith("jup.ag"):
+            if parts[-1] == "quote":
+                return market.quote(query.get("inputMint", ""), query.get("outputMint", ""),
+                                    int(query.get("amount", 0)), now)
+            if parts[-1] == "price":
+                return {"data": {mint: {"id": mint, "price": str(market.price(now))}
+                                 for mint in query.get("ids", "").split(",") if mint}}
+            if parts[-1] == "swap" and method == "POST":
+                # Nao ha transacao assinavel no modo sintetico
+                return web.json_response({"error": "swap indisponivel no replay sintetico"}, status=501)
+        return None
+
+    async def handle(self, request: web.Request) -> web.Response:
+        host = request.match_info["host"]
+        path = "/" + request.match_info["path"]
+        body = (await request.read()).decode("utf-8", errors="replace")
+
+        entry = self._recorded(request.method, host, path, request.query_string, body)
+        if entry is not None:
+            self.stats["replayed"] += 1
+            content_type = (entry.get("content_type") or "application/json").split(";")[0].strip()
+            return web.Response(text=entry["response"], status=entry["status"], content_type=content_type)
+
+        if self.market is not None:
+            result = self._synthetic(request.method, host, path, request.query, body)
+            if isinstance(result, web.Response):
+                return result
+            if result is not None:
+                self.stats["synthetic"] += 1
+                return web.json_response(result)
+
+        self.stats["missing"] += 1
+        logger.warning(f"Sem resposta para {request.method} {host}{path}?{request.query_string}")
+        return web.json_response({"error": "not recorded", "host": host, "path": path}, status=404)
+
+    async def handle_stats(self, request: web.Request) -> web.Response:
+        return web.json_response(self.stats)
+
+    def app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_get("/_replay/stats", self.handle_stats)
+        app.router.add_route("*", "/{host}/{path:.*}", self.handle)
+        return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Servidor local de replay das APIs de mercado")
+    parser.add_argument("capture", nargs="?", help="Captura JSONL(.gz) do MARKET_RECORD_FILE")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--synthetic", action="store_true",
+                        help="Gera mercado sintetico para requests fora da captura")
+    parser.add_argument("--seed", type=int, default=0, help="Seed do mercado sintetico")
+    args = parser.parse_args()
+
+    if not args.capture and not args.synthetic:
+        parser.error("informe uma captura e/ou --synthetic")
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(name)s] %(message)s")
+    market = SyntheticMarket(seed=args.seed) if args.synthetic else None
+    server = ReplayServer(args.capture, market=market)
+    logger.info(f"Replay em http://{args.host}:{args.port} (MARKET_REPLAY_URL)")
+    web.run_app(server.app(), host=args.host, port=args.port, print=None)
+
+
+if __name__ == "__main__":
+    main()
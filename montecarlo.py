@@ -0,0 +1,196 @@
+"""
+Monte Carlo de Caminhos de Preco (NumPy)
+==========================================
+Gera milhares de caminhos de preco de uma vez como matriz
+(n_paths x n_steps+1) e avalia as saidas (TP / SL / trailing /
+liquidacao / timeout) em todos os caminhos sem loop Python.
+
+Modelo: GBM discreto  p[t+1] = p[t] * (1 + drift + vol * Z)
+    - drift / vol podem ser escalares, um valor por caminho (regimes)
+      ou uma faixa (lo, hi) sorteada por passo
+    - horizonte (timeout) pode variar por caminho
+
+Usado pelas simulacoes de scalping, leverage e whale: o caminho 0 e o
+trade "realizado" do ciclo; o conjunto inteiro vira valor esperado e
+percentis do P&L.
+"""
+
+from dataclasses import dataclass
+from typing import Dict, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+# Motivos de saida (int8 na matriz de resultado)
+EXIT_TIMEOUT = 0
+EXIT_TP = 1
+EXIT_SL = 2
+EXIT_TRAILING = 3
+EXIT_LIQUIDATION = 4
+
+EXIT_NAMES = {
+    EXIT_TIMEOUT: "timeout",
+    EXIT_TP: "tp",
+    EXIT_SL: "sl",
+    EXIT_TRAILING: "trailing",
+    EXIT_LIQUIDATION: "liquidation",
+}
+
+# Ordem de checagem quando dois gatilhos disparam no mesmo passo
+DEFAULT_PRIORITY = (EXIT_LIQUIDATION, EXIT_SL, EXIT_TP, EXIT_TRAILING)
+
+PERCENTILES = (5, 25, 50, 75, 95)
+
+ParamLike = Union[float, np.ndarray, Tuple[float, float]]
+
+_default_rng = np.random.default_rng()
+
+
+@dataclass
+class ExitResult:
+    """Saida de cada caminho."""
+    exit_price: np.ndarray   # (n_paths,)
+    exit_step: np.ndarray    # (n_paths,) passo em que saiu
+    reason: np.ndarray       # (n_paths,) EXIT_*
+
+    def pnl_pct(self, entry: float, direction: str) -> np.ndarray:
+        sign = 1.0 if direction == "long" else -1.0
+        return sign * (self.exit_price / entry - 1.0) * 100
+
+
+def _expand(value: ParamLike, n_paths: int, n_steps: int, rng) -> Union[float, np.ndarray]:
+    """Escalar, vetor por caminho (regime) ou faixa (lo, hi) sorteada por passo."""
+    if isinstance(value, tuple):
+        return rng.uniform(value[0], value[1], size=(n_paths, n_steps))
+    arr = np.asarray(value, dtype=np.float64)
+    if arr.ndim == 1:
+        return arr[:, None]
+    return arr if arr.ndim else float(arr)
+
+
+def simulate_paths(entry: float, n_paths: int, n_steps: int, vol: ParamLike,
+                   drift: ParamLike = 0.0, rng: Optional[np.random.Generator] = None) -> np.ndarray:
+    """Matriz (n_paths, n_steps+1) de precos; coluna 0 = entry."""
+    rng = rng or _default_rng
+    n_steps = max(1, int(n_steps))
+    shocks = rng.standard_normal((n_paths, n_steps))
+    shocks *= _expand(vol, n_paths, n_steps, rng)
+    shocks += _expand(drift, n_paths, n_steps, rng)
+    shocks += 1.0
+
+    paths = np.empty((n_paths, n_steps + 1))
+    paths[:, 0] = entry
+    np.cumprod(shocks, axis=1, out=paths[:, 1:])
+    paths[:, 1:] *= entry
+    return paths
+
+
+def regime_params(n_paths: int, regimes: Sequence[Dict],
+                  rng: Optional[np.random.Generator] = None) -> Tuple[np.ndarray, np.ndarray]:
+    """Sorteia um regime por caminho.
+
+    regimes: [{"prob": p, "vol": v, "drift": d}, ...]. "drift" pode ser
+    uma faixa (lo, hi), sorteada uniformemente por caminho.
+    Retorna (vol, drift), um valor por caminho.
+    """
+    rng = rng or _default_rng
+    probs = np.array([r["prob"] for r in regimes], dtype=np.float64)
+    idx = rng.choice(len(regimes), size=n_paths, p=probs / probs.sum())
+    vol = np.empty(n_paths)
+    drift = np.empty(n_paths)
+    for i, regime in enumerate(regimes):
+        mask = idx == i
+        count = int(mask.sum())
+        vol[mask] = regime["vol"]
+        d = regime.get("drift", 0.0)
+        drift[mask] = rng.uniform(d[0], d[1], size=count) if isinstance(d, tuple) else d
+    return vol, drift
+
+
+def _first_touch(hit: np.ndarray) -> np.ndarray:
+    """Primeiro passo True de cada linha; n_cols se nunca tocou."""
+    idx = hit.argmax(axis=1)
+    never = ~hit[np.arange(hit.shape[0]), idx]
+    idx[never] = hit.shape[1]
+    return idx
+
+
+def evaluate_exits(paths: np.ndarray, direction: str,
+                   tp_pct: Optional[float] = None, sl_pct: Optional[float] = None,
+                   trailing_pct: Optional[float] = None, liquidation_pct: Optional[float] = None,
+                   horizon: Union[int, np.ndarray, None] = None,
+                   priority: Sequence[int] = DEFAULT_PRIORITY) -> ExitResult:
+    """Avalia TP/SL/trailing/liquidacao/timeout em todos os caminhos.
+
+    Percentuais sao sobre o preco de entrada (coluna 0), no sentido da
+    posicao. horizon = ultimo passo valido (timeout) por caminho.
+    """
+    n_paths, n_cols = paths.shape
+    entry = paths[:, :1]
+    is_long = direction == "long"
+    sign = 1.0 if is_long else -1.0
+
+    steps = np.arange(n_cols)
+    if horizon is None:
+        horizon = np.full(n_paths, n_cols - 1)
+    horizon = np.minimum(np.broadcast_to(np.asarray(horizon), (n_paths,)), n_cols - 1)
+    alive = steps[None, :] <= horizon[:, None]
+
+    # Gatilho -> (primeiro passo, preco de saida)
+    touches = {}
+    for reason, pct in ((EXIT_TP, tp_pct), (EXIT_SL, sl_pct), (EXIT_LIQUIDATION, liquidation_pct)):
+        if pct is None:
+            continue
+        direction_sign = sign if reason == EXIT_TP else -sign
+        level = entry * (1 + direction_sign * pct / 100)
+        hit = (paths >= level) if direction_sign > 0 else (paths <= level)
+        touches[reason] = (_first_touch(hit & alive), np.broadcast_to(level[:, 0], (n_paths,)))
+
+    if trailing_pct is not None:
+        if is_long:
+            peak = np.maximum.accumulate(paths, axis=1)
+            stop = peak * (1 - trailing_pct / 100)
+            hit = paths <= stop
+        else:
+            peak = np.minimum.accumulate(paths, axis=1)
+            stop = peak * (1 + trailing_pct / 100)
+            hit = paths >= stop
+        first = _first_touch(hit & alive)
+        rows = np.arange(n_paths)
+        touches[EXIT_TRAILING] = (first, stop[rows, np.minimum(first, n_cols - 1)])
+
+    # Timeout por padrao; cada gatilho (na ordem de prioridade) vence se tocou antes
+    exit_step = horizon.copy()
+    reason = np.full(n_paths, EXIT_TIMEOUT, dtype=np.int8)
+    exit_price = paths[np.arange(n_paths), horizon].copy()
+    best = np.full(n_paths, n_cols)
+    for r in priority:
+        if r not in touches:
+            continue
+        first, price = touches[r]
+        wins = first < best
+        best = np.where(wins, first, best)
+        exit_step[wins] = first[wins]
+        reason[wins] = r
+        exit_price[wins] = price[wins]
+
+    return ExitResult(exit_price=exit_price, exit_step=exit_step, reason=reason)
+
+
+def summarize(pnl: np.ndarray, reason: Optional[np.ndarray] = None) -> Dict:
+    """Valor esperado, dispersao, percentis e mix de saidas."""
+    pcts = np.percentile(pnl, PERCENTILES)
+    summary = {
+        "paths": int(pnl.size),
+        "ev": round(float(pnl.mean()), 4),
+        "std": round(float(pnl.std()), 4),
+        "win_prob": round(float((pnl > 0).mean()) * 100, 1),
+    }
+    for p, value in zip(PERCENTILES, pcts):
+        summary[f"p{p}"] = round(float(value), 4)
+    if reason is not None:
+        counts = np.bincount(reason, minlength=len(EXIT_NAMES))
+        summary["exit_mix"] = {
+            EXIT_NAMES[r]: round(float(c) / reason.size * 100, 1)
+            for r, c in enumerate(counts) if c
+        }
+    return summary
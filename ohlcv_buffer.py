@@ -0,0 +1,307 @@
+"""
+OHLCV Buffer - Candles em arrays colunares pre-alocados
+=========================================================
+Um buffer por timeframe, reaproveitado a cada ciclo: o parse da resposta
+do GeckoTerminal escreve direto nos arrays (ts int64 em segundos,
+open/high/low/close/volume float64) e os indicadores sao calculados em
+arrays tambem pre-alocados, sem montar DataFrame nem colunas novas.
+
+    buf = OHLCVBuffer()
+    buf.load_rows(ohlcv_list)       # [ts, o, h, l, c, v], qualquer ordem
+    buf.compute_indicators()
+    buf["close"], buf["rsi"]        # views (sem copia) dos n candles validos
+    buf.row(-1)                     # dict com todas as colunas do candle
+    buf.to_frame()                  # DataFrame so para quem precisa de pandas
+
+As views (e o DataFrame de to_frame) apontam para a memoria do buffer:
+valem ate o proximo load_rows. Para guardar, use to_frame(copy=True).
+
+Os calculos reproduzem os de indicators.py (ewm adjust=False, rolling
+mean/max/min com NaN ate completar a janela, shift, max/min ignorando NaN).
+"""
+
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+
+import config
+
+DEFAULT_CAPACITY = 1000  # Limite de candles por request do GeckoTerminal
+OHLCV_COLUMNS = ("open", "high", "low", "close", "volume")
+RSI_PERIOD = 14
+ATR_PERIOD = 14
+VOLUME_PERIOD = 20
+
+# Bloco do EMA vetorizado: d^-bloco nao pode estourar o float64
+_EMA_MAX_SCALE = 200.0
+_ema_powers: Dict[tuple, tuple] = {}
+
+
+def indicator_columns(ema_periods: Optional[List[int]] = None) -> List[str]:
+    """Colunas que compute_indicators preenche (mesmos nomes de calculate_all)."""
+    periods = config.EMA_PERIODS if ema_periods is None else ema_periods
+    return [f"ema_{p}" for p in periods] + [
+        "tenkan_sen", "kijun_sen", "senkou_span_a", "senkou_span_b", "chikou_span",
+        "kumo_top", "kumo_bottom", "rsi", "atr", "atr_pct", "volume_sma", "volume_ratio",
+    ]
+
+
+# ============================================================
+# KERNELS (escrevem em out, sem alocar arrays do tamanho da serie)
+# ============================================================
+
+def _powers(decay: float, block: int):
+    key = (decay, block)
+    if key not in _ema_powers:
+        k = np.arange(block + 1, dtype=np.float64)
+        _ema_powers[key] = (decay ** k, decay ** -k[:block])
+    return _ema_powers[key]
+
+
+def ema_into(x: np.ndarray, span: int, out: np.ndarray, scratch: np.ndarray) -> np.ndarray:
+    """
+    EMA (ewm span, adjust=False) em blocos vetorizados:
+        y[i+k] = d^(k+1) * y[i-1] + alpha * d^k * cumsum(x[i+u] * d^-u)
+    """
+    n = len(x)
+    if n == 0:
+        return out
+    alpha = 2.0 / (span + 1)
+    decay = 1.0 - alpha
+    block = max(1, min(n, int(_EMA_MAX_SCALE / -np.log10(decay)))) if decay > 0 else 1
+    pw, inv = _powers(decay, block)
+
+    out[0] = state = x[0]
+    i = 1
+    while i < n:
+        j = min(i + block, n)
+        m = j - i
+        acc, dst = scratch[:m], out[i:j]
+        np.multiply(x[i:j], inv[:m], out=acc)
+        np.cumsum(acc, out=acc)
+        np.multiply(acc, pw[:m], out=dst)
+        dst *= alpha
+        np.multiply(pw[1:m + 1], state, out=acc)
+        dst += acc
+        state = out[j - 1]
+        i = j
+    return out
+
+
+def rolling_into(x: np.ndarray, window: int, out: np.ndarray, how: str = "mean") -> np.ndarray:
+    """rolling(window).mean/max/min: NaN ate a janela completar."""
+    n = len(x)
+    if n < window:
+        out[:n] = np.nan
+        return out
+    out[:window - 1] = np.nan
+    windows = sliding_window_view(x, window)
+    getattr(np, how)(windows, axis=1, out=out[window - 1:n])
+    return out
+
+
+def shift_into(x: np.ndarray, periods: int, out: np.ndarray) -> np.ndarray:
+    """Series.shift(periods) para periods positivo ou negativo."""
+    n = len(x)
+    p = min(abs(periods), n)
+    if periods >= 0:
+        out[p:n] = x[:n - p]
+        out[:p] = np.nan
+    else:
+        out[:n - p] = x[p:n]
+        out[n - p:n] = np.nan
+    return out
+
+
+# ============================================================
+# BUFFER
+# ============================================================
+
+class OHLCVBuffer:
+    """Candles de um timeframe em arrays contiguos reaproveitados."""
+
+    def __init__(self, capacity: int = DEFAULT_CAPACITY, ema_periods: Optional[List[int]] = None):
+        self.ema_periods = list(config.EMA_PERIODS if ema_periods is None else ema_periods)
+        self.indicator_names = indicator_columns(self.ema_periods)
+        self.length = 0
+        self.computed = False
+        self._allocate(capacity)
+
+    def _allocate(self, capacity: int):
+        self.capacity = capacity
+        self.ts = np.zeros(capacity, dtype=np.int64)
+        self.arrays: Dict[str, np.ndarray] = {
+            name: np.full(capacity, np.nan)
+            for name in OHLCV_COLUMNS + tuple(self.indicator_names)
+        }
+        # Parse (linhas da API) e temporarios dos indicadores
+        self._rows = np.empty((capacity, 6), dtype=np.float64)
+        self._scratch = [np.empty(capacity, dtype=np.float64) for _ in range(3)]
+
+    # --------------------------------------------------------
+    # ESCRITA
+    # --------------------------------------------------------
+    def load_rows(self, rows) -> int:
+        """
+        Escreve candles [ts, open, high, low, close, volume] no buffer.
+        O GeckoTerminal manda do mais recente para o mais antigo; o buffer
+        fica sempre em ordem crescente de tempo.
+        """
+        n = len(rows)
+        if n > self.capacity:
+            self._allocate(max(n, 2 * self.capacity))
+        self.length = n
+        self.computed = False
+        if n == 0:
+            return 0
+
+        parsed = self._rows[:n]
+        parsed[:] = rows
+        if n > 1 and parsed[0, 0] > parsed[-1, 0]:
+            parsed = parsed[::-1]
+        ts = parsed[:, 0]
+        if n > 2 and (ts[1:] < ts[:-1]).any():
+            parsed = parsed[np.argsort(ts, kind="stable")]
+
+        self.ts[:n] = parsed[:, 0]
+        for col, name in enumerate(OHLCV_COLUMNS, start=1):
+            self.arrays[name][:n] = parsed[:, col]
+        return n
+
+    @classmethod
+    def from_rows(cls, rows, capacity: Optional[int] = None) -> "OHLCVBuffer":
+        buf = cls(capacity or max(len(rows), 1))
+        buf.load_rows(rows)
+        return buf
+
+    # --------------------------------------------------------
+    # LEITURA
+    # --------------------------------------------------------
+    def __len__(self) -> int:
+        return self.length
+
+    @property
+    def empty(self) -> bool:
+        return self.length == 0
+
+    @property
+    def columns(self) -> List[str]:
+        if self.computed:
+            return list(OHLCV_COLUMNS) + self.indicator_names
+        return list(OHLCV_COLUMNS)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.columns
+
+    def __getitem__(self, name: str) -> np.ndarray:
+        """View (sem copia) da coluna nos candles validos."""
+        if name == "timestamp":
+            return self.ts[:self.length]
+        if name not in self.columns:
+            raise KeyError(name)
+        return self.arrays[name][:self.length]
+
+    def row(self, i: int) -> Dict[str, float]:
+        """Candle i (aceita negativo) como dict {coluna: valor}."""
+        if i < 0:
+            i += self.length
+        if not 0 <= i < self.length:
+            raise IndexError(i)
+        return {name: float(self.arrays[name][i]) for name in self.columns}
+
+    def to_frame(self, copy: bool = False) -> pd.DataFrame:
+        """
+        DataFrame indexado por timestamp (mesmo formato do fetch_ohlcv, com os
+        indicadores se ja calculados). Sem copy, as colunas sao views do buffer.
+        """
+        n = self.length
+        index = pd.DatetimeIndex(
+            self.ts[:n].astype("datetime64[s]").astype("datetime64[ns]"), name="timestamp"
+        )
+        data = {name: self.arrays[name][:n] for name in self.columns}
+        return pd.DataFrame(data, index=index, copy=copy)
+
+    # --------------------------------------------------------
+    # INDICADORES
+    # --------------------------------------------------------
+    def compute_indicators(self) -> "OHLCVBuffer":
+        """Preenche EMAs, Ichimoku, RSI, ATR e volume (como indicators.calculate_all)."""
+        n = self.length
+        self.computed = True
+        if n == 0:
+            return self
+        a = self.arrays
+        _, high, low, close, volume = (a[name][:n] for name in OHLCV_COLUMNS)
+        s1, s2, s3 = (s[:n] for s in self._scratch)
+
+        for period in self.ema_periods:
+            ema_into(close, period, a[f"ema_{period}"][:n], s1)
+
+        self._ichimoku(n, high, low, close, s1, s2)
+        self._rsi(n, close, s1, s2, s3)
+        self._atr(n, high, low, close, s1, s2, s3)
+
+        sma, ratio = a["volume_sma"][:n], a["volume_ratio"][:n]
+        rolling_into(volume, VOLUME_PERIOD, sma)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            np.divide(volume, sma, out=ratio)
+        return self
+
+    def _midpoint(self, high, low, window, out, scratch):
+        """(rolling max high + rolling min low) / 2"""
+        rolling_into(high, window, out, "max")
+        rolling_into(low, window, scratch, "min")
+        out += scratch
+        out *= 0.5
+
+    def _ichimoku(self, n, high, low, close, s1, s2):
+        t, k, s = config.ICHIMOKU_TENKAN, config.ICHIMOKU_KIJUN, config.ICHIMOKU_SENKOU_B
+        a = self.arrays
+        tenkan, kijun = a["tenkan_sen"][:n], a["kijun_sen"][:n]
+        span_a, span_b = a["senkou_span_a"][:n], a["senkou_span_b"][:n]
+
+        self._midpoint(high, low, t, tenkan, s1)
+        self._midpoint(high, low, k, kijun, s1)
+        np.add(tenkan, kijun, out=s1)
+        s1 *= 0.5
+        shift_into(s1, k, span_a)
+        self._midpoint(high, low, s, s1, s2)
+        shift_into(s1, k, span_b)
+        shift_into(close, -k, a["chikou_span"][:n])
+        np.fmax(span_a, span_b, out=a["kumo_top"][:n])
+        np.fmin(span_a, span_b, out=a["kumo_bottom"][:n])
+
+    def _rsi(self, n, close, s1, s2, s3):
+        rsi = self.arrays["rsi"][:n]
+        delta = s1
+        delta[0] = np.nan
+        np.subtract(close[1:], close[:-1], out=delta[1:])
+        # gain/loss com 0 onde delta e NaN (igual ao where do pandas)
+        np.fmax(delta, 0.0, out=s2)
+        rolling_into(s2, RSI_PERIOD, rsi)
+        np.negative(delta, out=s2)
+        np.fmax(s2, 0.0, out=s2)
+        rolling_into(s2, RSI_PERIOD, s3)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            np.divide(rsi, s3, out=rsi)
+            rsi += 1.0
+            np.divide(100.0, rsi, out=rsi)
+            np.subtract(100.0, rsi, out=rsi)
+
+    def _atr(self, n, high, low, close, s1, s2, s3):
+        a = self.arrays
+        atr = a["atr"][:n]
+        # True range = max(h-l, |h-c_prev|, |l-c_prev|), ignorando o NaN do 1o candle
+        s1[0] = s2[0] = np.nan
+        np.subtract(high[1:], close[:-1], out=s1[1:])
+        np.abs(s1, out=s1)
+        np.subtract(low[1:], close[:-1], out=s2[1:])
+        np.abs(s2, out=s2)
+        np.fmax(s1, s2, out=s1)
+        np.subtract(high, low, out=s3)
+        np.fmax(s3, s1, out=s3)
+        rolling_into(s3, ATR_PERIOD, atr)
+        np.divide(atr, close, out=a["atr_pct"][:n])
+        a["atr_pct"][:n] *= 100
@@ -0,0 +1,156 @@
+"""
+Position Book - Livro indexado de posicoes reais (MODO REAL hold)
+===================================================================
+Indices em memoria:
+    trade_id  -> posicao (abertas + fechadas recentes)
+    abertas   -> dict trade_id -> posicao (ordem de abertura)
+    estrategia -> abertas daquela estrategia
+
+Lookups sao O(1) e a checagem de TP/SL percorre so as abertas.
+Posicoes fechadas vao para um arquivo JSONL (append, cold storage);
+apenas as ultimas `recent_closed` ficam em memoria e no JSON principal.
+
+O JSON principal mantem o formato antigo (lista de posicoes abertas +
+fechadas recentes), entao arquivos existentes carregam sem migracao.
+Fechada ja gravada no JSONL leva "archived": true; as sem a marca
+(JSON anterior ao arquivo) sao arquivadas no load.
+"""
+
+import json
+import logging
+from collections import deque
+from typing import Dict, Iterable, List, Optional
+
+logger = logging.getLogger("PositionBook")
+
+
+class PositionBook:
+    """Posicoes reais indexadas por trade_id e estrategia."""
+
+    def __init__(self, path: str = "real_positions.json",
+                 archive_path: str = "real_positions_closed.jsonl",
+                 recent_closed: int = 50):
+        self.path = path
+        self.archive_path = archive_path
+        self._by_id: Dict[str, dict] = {}
+        self._open: Dict[str, dict] = {}
+        self._open_by_strategy: Dict[str, Dict[str, dict]] = {}
+        self._recent_closed: deque = deque(maxlen=recent_closed)
+
+    # ---- Persistencia ----
+
+    def load(self) -> int:
+        """Carrega o JSON principal. Retorna quantas posicoes abertas."""
+        try:
+            with open(self.path) as f:
+                positions = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return 0
+        # Migracao: toda fechada sem marca vai para o arquivo. Se o processo
+        # caiu antes do save, o JSON ainda nao tem a marca: as que ja estao
+        # no arquivo nao sao gravadas de novo
+        legacy = [p for p in positions if p.get("status") != "open" and not p.get("archived")]
+        if legacy:
+            archived = self._archived_keys()
+            for pos in legacy:
+                if self._archive_key(pos) in archived:
+                    pos["archived"] = True
+                else:
+                    self._archive(pos)
+        for pos in positions:
+            if pos.get("status") == "open":
+                self._index_open(pos)
+            else:
+                self._push_closed(pos)
+        return len(self._open)
+
+    def save(self):
+        """Persiste abertas + fechadas recentes (formato de lista antigo)."""
+        with open(self.path, "w") as f:
+            json.dump(list(self._open.values()) + list(self._recent_closed), f, indent=2)
+
+    def _archive(self, pos: dict):
+        pos["archived"] = True
+        try:
+            with open(self.archive_path, "a") as f:
+                f.write(json.dumps(pos, separators=(",", ":")) + "\n")
+        except OSError as e:
+            pos.pop("archived", None)
+            logger.warning(f"Archive write error: {e}")
+
+    @staticmethod
+    def _archive_key(pos: dict) -> tuple:
+        return (pos.get("trade_id"), pos.get("closed_at"))
+
+    def _archived_keys(self) -> set:
+        """Chaves das posicoes ja no JSONL (so lido na migracao)."""
+        keys = set()
+        try:
+            with open(self.archive_path) as f:
+                for line in f:
+                    try:
+                        keys.add(self._archive_key(json.loads(line)))
+                    except json.JSONDecodeError:
+                        continue  # Linha truncada (queda no meio da escrita)
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            logger.warning(f"Archive read error: {e}")
+        return keys
+
+    # ---- Indices ----
+
+    def _index_open(self, pos: dict):
+        trade_id = pos["trade_id"]
+        self._by_id[trade_id] = pos
+        self._open[trade_id] = pos
+        self._open_by_strategy.setdefault(pos["strategy"], {})[trade_id] = pos
+
+    def _push_closed(self, pos: dict):
+        if len(self._recent_closed) == self._recent_closed.maxlen:
+            evicted = self._recent_closed[0]
+            if self._by_id.get(evicted.get("trade_id")) is evicted:
+                del self._by_id[evicted["trade_id"]]
+        self._recent_closed.append(pos)
+        self._by_id[pos["trade_id"]] = pos
+
+    # ---- API ----
+
+    def add(self, pos: dict):
+        """Registra uma posicao aberta."""
+        self._index_open(pos)
+
+    def close(self, pos: dict):
+        """Move a posicao (status ja atualizado) das abertas para o arquivo."""
+        trade_id = pos["trade_id"]
+        self._open.pop(trade_id, None)
+        by_strategy = self._open_by_strategy.get(pos["strategy"])
+        if by_strategy is not None:
+            by_strategy.pop(trade_id, None)
+            if not by_strategy:
+                del self._open_by_strategy[pos["strategy"]]
+        self._push_closed(pos)
+        self._archive(pos)
+
+    def get(self, trade_id: str) -> Optional[dict]:
+        return self._by_id.get(trade_id)
+
+    def has_open(self, strategy: str) -> bool:
+        return bool(self._open_by_strategy.get(strategy))
+
+    def open_for(self, strategy: str) -> List[dict]:
+        return list(self._open_by_strategy.get(strategy, {}).values())
+
+    def iter_open(self) -> Iterable[dict]:
+        """View das abertas (nao abrir/fechar durante a iteracao)."""
+        return self._open.values()
+
+    def open_positions(self) -> List[dict]:
+        return list(self._open.values())
+
+    def recent_closed(self) -> List[dict]:
+        return list(self._recent_closed)
+
+    @property
+    def open_count(self) -> int:
+        return len(self._open)
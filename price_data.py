@@ -5,13 +5,14 @@ Busca candles OHLCV de tokens Solana via GeckoTerminal API (grátis, sem API key
 Fallback: DexScreener para preço atual.
 """
 
-import httpx
 import pandas as pd
-import asyncio
 import logging
 from typing import Dict, Optional
 from datetime import datetime, timedelta
 import config
+import clock
+from market_recorder import market_client
+from ohlcv_buffer import OHLCVBuffer
 
 logger = logging.getLogger(__name__)
 
@@ -38,9 +39,11 @@ class PriceDataFetcher:
     """Busca dados OHLCV para tokens Solana via GeckoTerminal (grátis)."""
 
     def __init__(self):
-        self.client = httpx.AsyncClient(timeout=30)
+        self.client = market_client(timeout=30)
         # Pool address principal para OHLCV (WBTC/USDC com mais liquidez)
         self.pool_address = config.GECKO_POOL_ADDRESS
+        # Um buffer de candles por timeframe, reescrito a cada ciclo
+        self.buffers: Dict[str, OHLCVBuffer] = {}
 
     async def close(self):
         await self.client.aclose()
@@ -48,16 +51,16 @@ class PriceDataFetcher:
     # --------------------------------------------------------
     # GECKOTERMINAL OHLCV (principal - grátis)
     # --------------------------------------------------------
-    async def fetch_ohlcv(self, timeframe: str = "5m",
-                          limit: int = 300) -> pd.DataFrame:
+    async def fetch_ohlcv_rows(self, timeframe: str = "5m", limit: int = 300) -> list:
         """
         Busca candles OHLCV via GeckoTerminal API.
         Grátis, sem API key. Rate limit: ~30 req/min.
+        Formato: [timestamp, open, high, low, close, volume], mais recente primeiro.
         """
         tf_params = GECKO_TF_MAP.get(timeframe)
         if not tf_params:
             logger.warning(f"Timeframe {timeframe} nao suportado")
-            return pd.DataFrame()
+            return []
 
         # GeckoTerminal limita a 1000 candles por request
         limit = min(limit, 1000)
@@ -88,25 +91,46 @@ class PriceDataFetcher:
                 logger.warning(
                     f"GeckoTerminal: sem dados para pool {self.pool_address} {timeframe}"
                 )
-                return pd.DataFrame()
-
-            # Formato: [timestamp, open, high, low, close, volume]
-            df = pd.DataFrame(
-                ohlcv_list,
-                columns=["timestamp", "open", "high", "low", "close", "volume"],
-            )
-            df["timestamp"] = pd.to_datetime(df["timestamp"], unit="s")
-            df = df.set_index("timestamp")
-            df = df[["open", "high", "low", "close", "volume"]].astype(float)
-            df = df.sort_index()
+                return []
 
             logger.info(
-                f"GeckoTerminal: {len(df)} candles {timeframe} recebidos"
+                f"GeckoTerminal: {len(ohlcv_list)} candles {timeframe} recebidos"
             )
-            return df
+            return ohlcv_list
 
         except Exception as e:
             logger.error(f"GeckoTerminal OHLCV error: {e}")
+            return []
+
+    async def fetch_ohlcv_buffer(self, timeframe: str = "5m",
+                                 limit: int = 300) -> Optional[OHLCVBuffer]:
+        """
+        Candles escritos no buffer do timeframe (reaproveitado a cada ciclo).
+        O conteudo anterior do buffer e sobrescrito.
+        """
+        rows = await self.fetch_ohlcv_rows(timeframe, limit)
+        if not rows:
+            return None
+        buf = self.buffers.get(timeframe)
+        if buf is None:
+            buf = self.buffers[timeframe] = OHLCVBuffer()
+        try:
+            buf.load_rows(rows)
+        except (ValueError, TypeError) as e:
+            logger.error(f"GeckoTerminal OHLCV invalido ({timeframe}): {e}")
+            return None
+        return buf
+
+    async def fetch_ohlcv(self, timeframe: str = "5m",
+                          limit: int = 300) -> pd.DataFrame:
+        """Candles como DataFrame proprio (nao compartilha memoria com os buffers)."""
+        rows = await self.fetch_ohlcv_rows(timeframe, limit)
+        if not rows:
+            return pd.DataFrame()
+        try:
+            return OHLCVBuffer.from_rows(rows).to_frame()
+        except (ValueError, TypeError) as e:
+            logger.error(f"GeckoTerminal OHLCV invalido ({timeframe}): {e}")
             return pd.DataFrame()
 
     # --------------------------------------------------------
@@ -161,20 +185,21 @@ class PriceDataFetcher:
     # --------------------------------------------------------
     # MULTI-TIMEFRAME
     # --------------------------------------------------------
-    async def fetch_multi_timeframe(self, token_address: str = None) -> Dict[str, pd.DataFrame]:
+    async def fetch_multi_timeframe(self, token_address: str = None) -> Dict[str, OHLCVBuffer]:
         """
         Busca dados para todos os timeframes configurados.
-        Retorna: {"execution": df, "confirmation": df, "trend": df}
+        Retorna: {"execution": buf, "confirmation": buf, "trend": buf}
+        Os buffers valem ate a proxima chamada (use buf.to_frame() para pandas).
         """
         tfs = config.TIMEFRAMES[config.TRADE_MODE]
         data = {}
 
         for tf_name, tf_value in tfs.items():
             logger.info(f"Buscando candles {tf_value} para {config.TRADE_TOKEN}...")
-            df = await self.fetch_ohlcv(tf_value)
-            if not df.empty:
-                data[tf_name] = df
-            await asyncio.sleep(5.0)  # Rate limit GeckoTerminal (~30 req/min)
+            buf = await self.fetch_ohlcv_buffer(tf_value)
+            if buf is not None:
+                data[tf_name] = buf
+            await clock.sleep(5.0)  # Rate limit GeckoTerminal (~30 req/min)
 
         return data
 
@@ -0,0 +1,146 @@
+"""
+Protocolo de Push Bot -> Dashboard Cloud
+==========================================
+O bot envia apenas as secoes (chaves de topo do payload) que mudaram
+desde a ultima versao confirmada pelo servidor. O corpo vai comprimido
+com gzip e, se o pacote `msgpack` estiver instalado, codificado em
+msgpack (senao JSON).
+
+Envelope:
+    {
+        "proto": 1,
+        "version": N,          # versao que o servidor passa a ter
+        "base": M,             # versao confirmada sobre a qual o delta foi feito
+        "full": bool,          # True = snapshot completo (resync)
+        "sections": {...},     # secoes alteradas
+        "removed": [...],      # secoes que sumiram do payload
+    }
+
+Se `base` nao bater com a versao do servidor, ele responde
+{"resync": true} e o bot reenvia um snapshot completo.
+
+Usado por main.py (lado bot) e web_dashboard.py (lado servidor);
+depende apenas da stdlib para rodar no build web do Render.
+"""
+
+import gzip
+import hashlib
+import json
+import time
+from typing import Dict, Iterable, Optional, Tuple
+
+try:
+    import msgpack  # opcional
+except ImportError:
+    msgpack = None
+
+PROTOCOL_VERSION = 1
+
+# Headers proprios (nao usa Content-Encoding para nao depender do
+# auto-decompress do servidor HTTP)
+ENCODING_HEADER = "X-Push-Encoding"
+FORMAT_HEADER = "X-Push-Format"
+
+GZIP_LEVEL = 6
+COMPRESS_MIN_BYTES = 512  # Abaixo disso gzip nao compensa
+
+
+def _json_dumps(value) -> bytes:
+    return json.dumps(value, separators=(",", ":"), default=str).encode("utf-8")
+
+
+def section_digest(value) -> str:
+    """Hash estavel de uma secao (usado para detectar mudancas)."""
+    raw = json.dumps(value, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.blake2b(raw.encode("utf-8"), digest_size=16).hexdigest()
+
+
+def encode_body(payload: dict, use_msgpack: Optional[bool] = None) -> Tuple[bytes, Dict[str, str]]:
+    """Serializa + comprime o payload. Retorna (body, headers)."""
+    if use_msgpack is None:
+        use_msgpack = msgpack is not None
+    if use_msgpack and msgpack is not None:
+        body = msgpack.packb(payload, use_bin_type=True, default=str)
+        headers = {FORMAT_HEADER: "msgpack", "Content-Type": "application/msgpack"}
+    else:
+        body = _json_dumps(payload)
+        headers = {FORMAT_HEADER: "json", "Content-Type": "application/json"}
+    if len(body) >= COMPRESS_MIN_BYTES:
+        body = gzip.compress(body, compresslevel=GZIP_LEVEL)
+        headers[ENCODING_HEADER] = "gzip"
+    return body, headers
+
+
+def decode_body(raw: bytes, headers) -> dict:
+    """Inverso de encode_body. Aceita tambem JSON puro (bots antigos)."""
+    if headers.get(ENCODING_HEADER, "") == "gzip":
+        raw = gzip.decompress(raw)
+    if headers.get(FORMAT_HEADER, "") == "msgpack":
+        if msgpack is None:
+            raise ValueError("msgpack payload but msgpack is not installed")
+        return msgpack.unpackb(raw, raw=False)
+    return json.loads(raw.decode("utf-8"))
+
+
+class DeltaEncoder:
+    """Lado bot: monta envelopes com as secoes alteradas desde o ultimo ack."""
+
+    def __init__(self, always_send: Iterable[str] = ()):
+        # Chaves tipo "evento" que devem ir sempre que forem truthy
+        self.always_send = set(always_send)
+        self._acked_version: Optional[int] = None
+        self._acked_digests: Dict[str, str] = {}
+        self._pending: Optional[Tuple[int, Dict[str, str]]] = None
+        # Versao inicial baseada no relogio evita reuso apos restart do bot
+        self._next_version = int(time.time() * 1000)
+
+    def reset(self):
+        """Esquece o estado confirmado: o proximo envelope sera completo."""
+        self._acked_version = None
+        self._acked_digests = {}
+        self._pending = None
+
+    def invalidate(self, *keys: str):
+        """
+        Forca o reenvio das secoes no proximo envelope, mesmo sem mudanca
+        local (o servidor pode ter editado a copia dele).
+        """
+        for key in keys:
+            self._acked_digests.pop(key, None)
+            if self._pending is not None:
+                self._pending[1].pop(key, None)
+
+    def build(self, data: dict) -> dict:
+        """Monta o envelope (delta ou completo) para o payload atual."""
+        digests = {k: section_digest(v) for k, v in data.items()}
+        full = self._acked_version is None
+        if full:
+            changed = dict(data)
+            removed = []
+        else:
+            changed = {
+                k: v for k, v in data.items()
+                if self._acked_digests.get(k) != digests[k]
+                or (k in self.always_send and v)
+            }
+            removed = [k for k in self._acked_digests if k not in data]
+
+        self._next_version += 1
+        version = self._next_version
+        self._pending = (version, digests)
+        return {
+            "proto": PROTOCOL_VERSION,
+            "version": version,
+            "base": self._acked_version,
+            "full": full,
+            "sections": changed,
+            "removed": removed,
+        }
+
+    def ack(self, version) -> bool:
+        """Servidor confirmou `version`: passa a ser a base dos proximos deltas."""
+        if self._pending is None or version != self._pending[0]:
+            return False
+        self._acked_version, self._acked_digests = self._pending
+        self._pending = None
+        return True
@@ -0,0 +1,301 @@
+"""
+Ring Buffers - Historico de tamanho fixo para as estrategias
+==============================================================
+Substitui as listas aparadas por fatiamento (`lista = lista[-200:]`),
+que copiavam o historico inteiro a cada trim.
+
+    RingBuffer   -> registros (dataclasses) com append O(1)
+    WindowStats  -> somas/min/max corridos dos registros que estao
+                    no RingBuffer (sem varrer a janela a cada trade)
+    EquityCurve  -> curva de equity em array NumPy, com pico e
+                    drawdown maximo corridos
+    DailyRollup  -> fechamento diario incremental (capital, pnl, trades)
+
+Armazenamento espelhado: cada item e escrito em i e i+capacity, entao
+os ultimos N sempre formam um trecho contiguo. Em EquityCurve isso
+permite retornar os ultimos N pontos como view, sem copia.
+"""
+
+from datetime import timezone
+from collections import deque
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence
+
+import numpy as np
+
+import clock
+
+
+class RingBuffer:
+    """Buffer circular de registros com capacidade fixa."""
+
+    __slots__ = ("capacity", "_items", "_next", "_size")
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self._items: List[Any] = [None] * (2 * capacity)
+        self._next = 0   # proxima posicao de escrita (0..capacity-1)
+        self._size = 0
+
+    def append(self, item):
+        """Adiciona item; retorna o item descartado (buffer cheio) ou None."""
+        evicted = self._items[self._next] if self._size == self.capacity else None
+        self._items[self._next] = item
+        self._items[self._next + self.capacity] = item
+        self._next = (self._next + 1) % self.capacity
+        if self._size < self.capacity:
+            self._size += 1
+        return evicted
+
+    def extend(self, items):
+        for item in items:
+            self.append(item)
+
+    def clear(self):
+        self._items = [None] * (2 * self.capacity)
+        self._next = 0
+        self._size = 0
+
+    def _end(self) -> int:
+        # Os ultimos N itens ficam em _items[end - N:end]
+        return self._next + self.capacity
+
+    def __len__(self) -> int:
+        return self._size
+
+    def __bool__(self) -> bool:
+        return self._size > 0
+
+    def __iter__(self) -> Iterator:
+        """Itens em ordem cronologica (sem copiar o buffer)."""
+        end = self._end()
+        items = self._items
+        for i in range(end - self._size, end):
+            yield items[i]
+
+    def __getitem__(self, index: int):
+        if not isinstance(index, int):
+            raise TypeError("RingBuffer aceita apenas indice inteiro (use last/recent)")
+        if index < 0:
+            index += self._size
+        if not 0 <= index < self._size:
+            raise IndexError("RingBuffer index out of range")
+        return self._items[self._end() - self._size + index]
+
+    def last(self, n: int) -> List:
+        """Ultimos n itens, do mais antigo para o mais novo."""
+        n = min(n, self._size)
+        end = self._end()
+        return self._items[end - n:end]
+
+    def recent(self, n: int) -> Iterator:
+        """Ultimos n itens, do mais novo para o mais antigo (sem copia)."""
+        end = self._end()
+        items = self._items
+        for i in range(end - 1, end - 1 - min(n, self._size), -1):
+            yield items[i]
+
+
+class WindowStats:
+    """
+    Agregados corridos dos registros de um RingBuffer que passam no filtro.
+
+        stats = WindowStats(("pnl_pct", "pnl_usd"), include=lambda t: t.status != "open")
+        stats.update(trade, trades.append(trade))   # entra trade, sai o descartado
+        stats.mean("pnl_pct"), stats.max("pnl_pct"), stats.gains("pnl_usd")
+
+    Somas sao atualizadas na entrada/saida; min/max usam deques monotonicas
+    (a janela e FIFO), entao tudo e O(1) amortizado por registro.
+    """
+
+    def __init__(self, fields: Sequence[str], include: Optional[Callable[[Any], bool]] = None):
+        self.fields = tuple(fields)
+        self.include = include
+        self.count = 0
+        self._sum = dict.fromkeys(self.fields, 0.0)
+        self._sumsq = dict.fromkeys(self.fields, 0.0)
+        self._gains = dict.fromkeys(self.fields, 0.0)
+        self._losses = dict.fromkeys(self.fields, 0.0)
+        self._positives = dict.fromkeys(self.fields, 0)
+        self._max = {f: deque() for f in self.fields}  # (seq, valor) decrescente
+        self._min = {f: deque() for f in self.fields}  # (seq, valor) crescente
+        self._added = 0    # seq do proximo registro
+        self._removed = 0  # seq do proximo a sair
+
+    def _accepts(self, item) -> bool:
+        return item is not None and (self.include is None or self.include(item))
+
+    def update(self, added=None, evicted=None):
+        """Registra o item que entrou e o que saiu do buffer (qualquer um pode ser None)."""
+        if self._accepts(evicted):
+            self._remove(evicted)
+        if self._accepts(added):
+            self._add(added)
+
+    def _add(self, item):
+        seq = self._added
+        self._added += 1
+        self.count += 1
+        for f in self.fields:
+            v = getattr(item, f)
+            self._sum[f] += v
+            self._sumsq[f] += v * v
+            if v > 0:
+                self._gains[f] += v
+                self._positives[f] += 1
+            elif v < 0:
+                self._losses[f] -= v
+            hi, lo = self._max[f], self._min[f]
+            while hi and hi[-1][1] <= v:
+                hi.pop()
+            hi.append((seq, v))
+            while lo and lo[-1][1] >= v:
+                lo.pop()
+            lo.append((seq, v))
+
+    def _remove(self, item):
+        seq = self._removed
+        self._removed += 1
+        self.count -= 1
+        for f in self.fields:
+            v = getattr(item, f)
+            self._sum[f] -= v
+            self._sumsq[f] -= v * v
+            if v > 0:
+                self._gains[f] -= v
+                self._positives[f] -= 1
+            elif v < 0:
+                self._losses[f] += v
+            for q in (self._max[f], self._min[f]):
+                if q and q[0][0] == seq:
+                    q.popleft()
+
+    def total(self, field: str) -> float:
+        return self._sum[field]
+
+    def mean(self, field: str) -> float:
+        return self._sum[field] / self.count if self.count else 0.0
+
+    def variance(self, field: str) -> float:
+        """Variancia populacional (pstdev ao quadrado)."""
+        if not self.count:
+            return 0.0
+        mean = self._sum[field] / self.count
+        return max(0.0, self._sumsq[field] / self.count - mean * mean)
+
+    def max(self, field: str) -> float:
+        q = self._max[field]
+        return q[0][1] if q else 0.0
+
+    def min(self, field: str) -> float:
+        q = self._min[field]
+        return q[0][1] if q else 0.0
+
+    def gains(self, field: str) -> float:
+        """Soma dos valores positivos."""
+        return self._gains[field]
+
+    def losses(self, field: str) -> float:
+        """Soma (em modulo) dos valores negativos."""
+        return self._losses[field]
+
+    def positives(self, field: str) -> int:
+        """Quantos valores > 0 estao na janela."""
+        return self._positives[field]
+
+
+class EquityCurve:
+    """Curva de equity acumulada em ring buffer float64."""
+
+    __slots__ = ("capacity", "_data", "_next", "_size", "peak", "max_drawdown")
+
+    def __init__(self, capacity: int = 500, initial: float = 0.0):
+        self.capacity = capacity
+        self._data = np.zeros(2 * capacity, dtype=np.float64)
+        self._next = 0
+        self._size = 0
+        self.peak = initial
+        self.max_drawdown = 0.0
+        self.append(initial)
+
+    def append(self, value: float):
+        self._data[self._next] = value
+        self._data[self._next + self.capacity] = value
+        self._next = (self._next + 1) % self.capacity
+        if self._size < self.capacity:
+            self._size += 1
+        # Pico e drawdown maximo corridos (valem para o historico inteiro)
+        if value > self.peak:
+            self.peak = value
+        drawdown = self.peak - value
+        if drawdown > self.max_drawdown:
+            self.max_drawdown = drawdown
+
+    def add(self, pnl: float):
+        """Novo ponto = ultimo + pnl."""
+        self.append(self.latest + pnl)
+
+    @property
+    def latest(self) -> float:
+        return float(self._data[self._next + self.capacity - 1])
+
+    def __len__(self) -> int:
+        return self._size
+
+    def last(self, n: int) -> np.ndarray:
+        """View (sem copia) dos ultimos n pontos, em ordem cronologica."""
+        n = min(n, self._size)
+        end = self._next + self.capacity
+        return self._data[end - n:end]
+
+    def tail(self, n: int) -> List[float]:
+        """Ultimos n pontos como lista (para JSON)."""
+        return self.last(n).tolist()
+
+
+class DailyRollup:
+    """Fechamento diario incremental de uma estrategia."""
+
+    def __init__(self, start_capital: float, tz: timezone, keep_days: int = 30):
+        self.tz = tz
+        self.days = RingBuffer(keep_days)
+        self.today = self._date_str()
+        self.start_capital = start_capital
+        self.trades = 0
+        self.wins = 0
+        self.pnl = 0.0
+
+    def _date_str(self) -> str:
+        return clock.now(self.tz).strftime("%Y-%m-%d")
+
+    def roll(self, capital: float) -> bool:
+        """Fecha o dia anterior se a data mudou. Retorna True se fechou."""
+        today = self._date_str()
+        if today == self.today:
+            return False
+        self.days.append({
+            "date": self.today,
+            "start_capital": self.start_capital,
+            "end_capital": capital,
+            "pnl": capital - self.start_capital,
+            "trades": self.trades,
+            "wins": self.wins,
+        })
+        self.today = today
+        self.start_capital = capital
+        self.trades = 0
+        self.wins = 0
+        self.pnl = 0.0
+        return True
+
+    def record_trade(self, pnl_usd: float):
+        self.trades += 1
+        self.pnl += pnl_usd
+        if pnl_usd > 0:
+            self.wins += 1
+
+    def today_pnl(self, capital: float) -> float:
+        return capital - self.start_capital
+
+    def history(self, n: Optional[int] = None) -> List[Dict]:
+        """Dias fechados (mais antigo primeiro); n = ultimos n dias."""
+        return self.days.last(n if n is not None else self.days.capacity)
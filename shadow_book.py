@@ -0,0 +1,280 @@
+"""
+Shadow Book - Trades virtuais abertos indexados por nivel de saida
+====================================================================
+Indices em memoria (heaps com remocao preguicosa):
+    long  SL -> max-heap (dispara com preco <= maior SL)
+    long  TP -> min-heap do menor TP (dispara com preco >= TP1)
+    short SL -> min-heap (dispara com preco >= menor SL)
+    short TP -> max-heap do maior TP (dispara com preco <= TP1)
+    timeout  -> min-heap do prazo de cada trade
+
+Uma atualizacao de preco so olha o topo dos heaps: toca apenas os
+trades cujos niveis foram cruzados (ou que venceram o prazo).
+
+Excursao maxima a favor/contra: o livro guarda a sequencia de precos
+desde o trade aberto mais antigo; cada trade calcula a sua fatia so ao
+fechar (ou ao salvar), em vez de recalcular todos os trades a cada ciclo.
+
+Fechados vao para um arquivo JSONL (cold storage); o JSON principal
+mantem o formato antigo (lista de abertos + fechados recentes). Fechado
+ja gravado no JSONL leva "archived": true; os sem a marca (JSON antigo,
+que guardava todos os fechados) sao arquivados no load.
+"""
+
+import heapq
+import json
+import logging
+from collections import deque
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+import clock
+
+logger = logging.getLogger("ShadowBook")
+
+SHADOW_TIMEOUT = timedelta(hours=4)
+
+
+class ShadowBook:
+    """Shadow trades abertos com heaps de SL/TP/timeout."""
+
+    def __init__(self, path: str = "shadow_trades.json",
+                 archive_path: str = "shadow_trades_closed.jsonl",
+                 recent_closed: int = 200):
+        self.path = path
+        self.archive_path = archive_path
+        self._open: Dict[str, dict] = {}
+        self._recent_closed: deque = deque(maxlen=recent_closed)
+        self._heaps: Dict[str, list] = {
+            "sl_long": [], "tp_long": [], "sl_short": [], "tp_short": [], "timeout": [],
+        }
+        self._counter = 0  # desempate estavel nos heaps
+        self._open_order: Dict[str, int] = {}
+        # Precos observados desde o trade aberto mais antigo
+        self._path: List[float] = []
+        self._path_base = 0           # sequencia global de _path[0]
+        self._path_seq: Dict[str, int] = {}
+
+    # ---- Persistencia ----
+
+    def load(self) -> List[dict]:
+        """
+        Carrega o JSON principal e indexa os abertos.
+        Retorna os fechados encontrados no arquivo (migracao de contadores:
+        antes do arquivo JSONL o JSON guardava todos os fechados).
+        """
+        try:
+            with open(self.path) as f:
+                trades = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return []
+        closed = [t for t in trades if t.get("status") != "open"]
+        # Migracao: todo fechado sem marca vai para o arquivo. Se o processo
+        # caiu antes do save, o JSON ainda nao tem a marca: os que ja estao
+        # no arquivo nao sao gravados de novo
+        legacy = [t for t in closed if not t.get("archived")]
+        if legacy:
+            archived = self._archived_keys()
+            for trade in legacy:
+                if self._archive_key(trade) in archived:
+                    trade["archived"] = True
+                else:
+                    self._archive(trade)
+        self._recent_closed.extend(closed)
+        for trade in trades:
+            if trade.get("status") == "open":
+                self._index_open(trade)
+        return closed
+
+    def save(self):
+        """Persiste abertos (com excursoes atualizadas) + fechados recentes."""
+        for trade in self._open.values():
+            self._fold_excursion(trade)
+        with open(self.path, "w") as f:
+            json.dump(list(self._open.values()) + list(self._recent_closed),
+                      f, indent=2, default=str)
+
+    def _archive(self, trade: dict):
+        trade["archived"] = True
+        try:
+            with open(self.archive_path, "a") as f:
+                f.write(json.dumps(trade, separators=(",", ":"), default=str) + "\n")
+        except OSError as e:
+            trade.pop("archived", None)
+            logger.warning(f"Archive write error: {e}")
+
+    @staticmethod
+    def _archive_key(trade: dict) -> tuple:
+        # id tem resolucao de segundos: o fechamento desempata
+        return (trade.get("id"), trade.get("exit_time"))
+
+    def _archived_keys(self) -> set:
+        """Chaves dos trades ja no JSONL (so lido na migracao)."""
+        keys = set()
+        try:
+            with open(self.archive_path) as f:
+                for line in f:
+                    try:
+                        keys.add(self._archive_key(json.loads(line)))
+                    except json.JSONDecodeError:
+                        continue  # Linha truncada (queda no meio da escrita)
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            logger.warning(f"Archive read error: {e}")
+        return keys
+
+    # ---- Indices ----
+
+    def _push(self, heap: str, key: float, trade_id: str):
+        self._counter += 1
+        heapq.heappush(self._heaps[heap], (key, self._counter, trade_id))
+
+    def _index_open(self, trade: dict):
+        trade_id = trade["id"]
+        self._open[trade_id] = trade
+        self._open_order[trade_id] = self._counter
+        self._path_seq[trade_id] = self._path_base + len(self._path)
+
+        tps = trade.get("take_profits") or []
+        if trade["direction"] == "long":
+            self._push("sl_long", -trade["stop_loss"], trade_id)
+            if tps:
+                self._push("tp_long", min(tps), trade_id)
+        else:
+            self._push("sl_short", trade["stop_loss"], trade_id)
+            if tps:
+                self._push("tp_short", -max(tps), trade_id)
+
+        try:
+            deadline = datetime.fromisoformat(trade["timestamp"]) + SHADOW_TIMEOUT
+            self._push("timeout", deadline.timestamp(), trade_id)
+        except (ValueError, KeyError):
+            pass  # Sem timestamp valido: nunca expira (como antes)
+
+    def _crossed(self, heap: str, limit: float) -> List[str]:
+        """Remove e retorna ids do topo enquanto key <= limit (pula fechados)."""
+        entries = self._heaps[heap]
+        hits = []
+        while entries and entries[0][0] <= limit:
+            _, _, trade_id = heapq.heappop(entries)
+            if trade_id in self._open:
+                hits.append(trade_id)
+        return hits
+
+    def _compact(self):
+        """Reconstroi heaps dominados por entradas de trades ja fechados."""
+        for name, entries in self._heaps.items():
+            if len(entries) > 2 * len(self._open) + 16:
+                entries[:] = [e for e in entries if e[2] in self._open]
+                heapq.heapify(entries)
+
+    # ---- Excursoes ----
+
+    def _fold_excursion(self, trade: dict):
+        """Atualiza max_favorable/max_adverse com os precos desde a abertura."""
+        prices = self._path[self._path_seq[trade["id"]] - self._path_base:]
+        if not prices:
+            return
+        entry = trade["entry_price"]
+        high, low = max(prices), min(prices)
+        if trade["direction"] == "long":
+            favorable = (high - entry) / entry * 100
+            adverse = (entry - low) / entry * 100
+        else:
+            favorable = (entry - low) / entry * 100
+            adverse = (high - entry) / entry * 100
+        trade["max_favorable"] = max(trade.get("max_favorable", 0), favorable)
+        trade["max_adverse"] = max(trade.get("max_adverse", 0), adverse)
+
+    def _trim_path(self):
+        """Descarta precos anteriores ao trade aberto mais antigo."""
+        if not self._open:
+            self._path_base += len(self._path)
+            self._path.clear()
+            return
+        oldest = min(self._path_seq[t] for t in self._open)
+        drop = oldest - self._path_base
+        if drop > 0:
+            del self._path[:drop]
+            self._path_base = oldest
+
+    # ---- API ----
+
+    def add(self, trade: dict):
+        """Registra um shadow trade aberto."""
+        self._index_open(trade)
+
+    def update(self, price: float, now: Optional[datetime] = None) -> List[dict]:
+        """
+        Aplica o preco atual. Fecha (SL > TP > timeout, como antes) os trades
+        cujos niveis foram cruzados e retorna os fechados nesta chamada.
+        """
+        if not self._open:
+            return []
+        now = now or clock.utcnow()
+        self._path.append(price)
+
+        candidates = dict.fromkeys(
+            self._crossed("sl_long", -price)
+            + self._crossed("sl_short", price)
+            + self._crossed("tp_long", price)
+            + self._crossed("tp_short", -price)
+            + self._crossed("timeout", now.timestamp())
+        )
+        closed = []
+        # Mesma ordem do loop antigo (ordem de abertura) para streak/contadores
+        for trade_id in sorted(candidates, key=self._open_order.get):
+            trade = self._open[trade_id]
+            status = self._exit_status(trade, price, now)
+            if status is None:
+                continue
+            self._close(trade, status, price, now)
+            closed.append(trade)
+        if closed:
+            self._trim_path()
+            self._compact()
+        return closed
+
+    @staticmethod
+    def _exit_status(trade: dict, price: float, now: datetime) -> Optional[str]:
+        is_long = trade["direction"] == "long"
+        if (is_long and price <= trade["stop_loss"]) or \
+           (not is_long and price >= trade["stop_loss"]):
+            return "loss_sl"
+        for i, tp in enumerate(trade.get("take_profits") or []):
+            if (is_long and price >= tp) or (not is_long and price <= tp):
+                return f"win_tp{i+1}"
+        try:
+            if now - datetime.fromisoformat(trade["timestamp"]) >= SHADOW_TIMEOUT:
+                return "timeout"
+        except (ValueError, KeyError):
+            pass
+        return None
+
+    def _close(self, trade: dict, status: str, price: float, now: datetime):
+        entry = trade["entry_price"]
+        self._fold_excursion(trade)
+        if trade["direction"] == "long":
+            trade["pnl_pct"] = round(((price - entry) / entry) * 100, 3)
+        else:
+            trade["pnl_pct"] = round(((entry - price) / entry) * 100, 3)
+        trade["status"] = status
+        trade["exit_price"] = price
+        trade["exit_time"] = now.isoformat()
+
+        del self._open[trade["id"]]
+        del self._path_seq[trade["id"]]
+        del self._open_order[trade["id"]]
+        self._recent_closed.append(trade)
+        self._archive(trade)
+
+    def open_trades(self) -> List[dict]:
+        return list(self._open.values())
+
+    def recent_closed(self) -> List[dict]:
+        return list(self._recent_closed)
+
+    @property
+    def open_count(self) -> int:
+        return len(self._open)
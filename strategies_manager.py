@@ -6,11 +6,14 @@ e fornece dados consolidados para o dashboard.
 """
 
 import asyncio
+import heapq
 import json
 import logging
 import time
 from typing import Dict, List, Optional
 
+import config
+import clock
 from strategy_sniper import SnipingStrategy
 from strategy_memecoin import MemeCoinStrategy
 from strategy_arbitrage import ArbitrageStrategy
@@ -18,6 +21,8 @@ from strategy_scalping import ScalpingStrategy
 from strategy_leverage import LeverageStrategy
 from strategy_whale import WhaleTrackingStrategy
 from strategy_agents import AgentManager
+from event_bus import EventBus, RealTradeEvent, TradeEvent, REAL_TRADE_TOPIC, TRADE_TOPIC
+from position_book import PositionBook
 
 logger = logging.getLogger("StrategiesManager")
 
@@ -79,6 +84,27 @@ class StrategiesManager:
         },
     }
 
+    # Metodo de simulacao de cada estrategia
+    SIM_METHODS = {
+        "sniper": "simulate_monitoring",
+        "memecoin": "simulate_analysis",
+        "arbitrage": "simulate_scan",
+        "scalping": "simulate_scalp",
+        "leverage": "simulate_leverage_trade",
+        "whale": "simulate_whale_tracking",
+    }
+
+    # Scheduler: cada estrategia roda na sua cadencia (interval_s) com um
+    # orcamento de tempo (deadline_s); estourou = cancela e conta timeout
+    STRATEGY_SCHEDULE = {
+        "sniper": {"interval_s": 10, "deadline_s": 5.0},
+        "memecoin": {"interval_s": 60, "deadline_s": 10.0},
+        "arbitrage": {"interval_s": 10, "deadline_s": 5.0},
+        "scalping": {"interval_s": 5, "deadline_s": 3.0},
+        "leverage": {"interval_s": 300, "deadline_s": 10.0},
+        "whale": {"interval_s": 30, "deadline_s": 10.0},
+    }
+
     def __init__(self):
         self.sniper = SnipingStrategy()
         self.memecoin = MemeCoinStrategy()
@@ -96,20 +122,46 @@ class StrategiesManager:
             self.whale,
         ]
 
+        # Barramento de eventos: estrategias publicam TradeEvent a cada trade
+        self.event_bus = EventBus()
+        for strat in self.strategies:
+            strat.event_bus = self.event_bus
+        self._last_trade_event: Dict[str, TradeEvent] = {}
+        # Ultimo sinal real por estrategia (clock.monotonic): limita a cadencia
+        # real a REAL_TRADE_MIN_INTERVAL_S mesmo com o scheduler rodando a 5-10s
+        self._last_real_signal: Dict[str, float] = {}
+        self.event_bus.subscribe(TRADE_TOPIC, callback=self._on_trade_event)
+
         # Estado pausado por estrategia
         self.paused = {k: False for k in self.STRATEGY_KEYS}
 
+        # Latencia / erros / timeouts / atraso de agenda das simulacoes (dashboard)
+        self.sim_metrics = {
+            k: {"runs": 0, "errors": 0, "timeouts": 0,
+                "last_ms": 0.0, "avg_ms": 0.0, "max_ms": 0.0, "last_error": "",
+                "lag_ms": 0.0, "avg_lag_ms": 0.0, "max_lag_ms": 0.0, "skipped": 0}
+            for k in self.STRATEGY_KEYS
+        }
+        self._scheduler_task: Optional[asyncio.Task] = None
+
+        # Cache do dashboard: por estrategia (versao, dict) e do conjunto
+        # (chave = versoes + pausas, dados). sim_metrics muda a cada rodada
+        # e entra por referencia, sem invalidar o cache
+        self._dashboard_cache: Dict[str, tuple] = {}
+        self._all_dashboard_cache: tuple = (None, None)
+
         # Alocacoes de capital real por estrategia
         # {key: {"amount": float, "active": bool, "allocated_at": float}}
         self.allocations: Dict[str, Dict] = {}
         self._load_allocations()
 
         # Posicoes reais abertas (MODO REAL com hold)
-        self.real_positions: List[Dict] = []
+        self.position_book = PositionBook("real_positions.json")
         self._load_real_positions()
 
-        # Agentes adaptativos por estrategia
+        # Agentes adaptativos por estrategia (reagem aos trades reais pelo bus)
         self.agent_manager = AgentManager()
+        self.agent_manager.subscribe(self.event_bus)
 
     def toggle_strategy(self, key: str) -> bool:
         """Alterna pausa de uma estrategia. Retorna novo estado (True=pausado)."""
@@ -119,53 +171,120 @@ class StrategiesManager:
             return self.paused[key]
         return False
 
-    async def run_simulation_cycle(self) -> Dict:
-        """Roda um ciclo de simulacao para todas as estrategias (pula pausadas)."""
-        results = {}
+    async def _run_strategy_sim(self, key: str):
+        """Roda a simulacao de uma estrategia dentro do seu orcamento de tempo.
 
-        if not self.paused.get("sniper"):
-            try:
-                data1 = await self.sniper.simulate_monitoring()
-                results["sniper"] = data1
-            except Exception as e:
-                logger.debug(f"Sniper sim error: {e}")
+        Timeout cancela a task; erros e latencia vao para sim_metrics.
+        """
+        strat = getattr(self, key)
+        metrics = self.sim_metrics[key]
+        deadline = self.STRATEGY_SCHEDULE[key]["deadline_s"]
+        started = time.perf_counter()
+        try:
+            # O dashboard nao e montado aqui: _strategy_dashboard reconstroi
+            # sob demanda quando strat.version muda
+            await asyncio.wait_for(
+                getattr(strat, self.SIM_METHODS[key])(),
+                timeout=deadline,
+            )
+            return True
+        except asyncio.TimeoutError:
+            metrics["timeouts"] += 1
+            metrics["last_error"] = "timeout"
+            logger.warning(f"{key} sim timeout ({deadline}s)")
+        except Exception as e:
+            metrics["errors"] += 1
+            metrics["last_error"] = str(e)[:200]
+            logger.warning(f"{key} sim error: {e}")
+        finally:
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            metrics["runs"] += 1
+            metrics["last_ms"] = round(elapsed_ms, 2)
+            metrics["max_ms"] = round(max(metrics["max_ms"], elapsed_ms), 2)
+            # Media movel exponencial (suaviza picos isolados)
+            if metrics["runs"] == 1:
+                metrics["avg_ms"] = round(elapsed_ms, 2)
+            else:
+                metrics["avg_ms"] = round(metrics["avg_ms"] * 0.9 + elapsed_ms * 0.1, 2)
+        return False
 
-        if not self.paused.get("memecoin"):
-            try:
-                data2 = await self.memecoin.simulate_analysis()
-                results["memecoin"] = data2
-            except Exception as e:
-                logger.debug(f"Memecoin sim error: {e}")
+    async def run_simulation_cycle(self) -> List[str]:
+        """Roda um ciclo de simulacao para todas as estrategias (pula pausadas).
 
-        if not self.paused.get("arbitrage"):
-            try:
-                data3 = await self.arbitrage.simulate_scan()
-                results["arbitrage"] = data3
-            except Exception as e:
-                logger.debug(f"Arbitrage sim error: {e}")
+        As estrategias rodam como tasks concorrentes: a mais lenta nao
+        segura as outras e nenhuma passa do seu deadline em STRATEGY_SCHEDULE.
+        Usado quando o scheduler por estrategia nao esta rodando.
+        Retorna as estrategias que completaram a simulacao.
+        """
+        keys = [k for k in self.STRATEGY_KEYS if not self.paused.get(k)]
+        outputs = await asyncio.gather(*(self._run_strategy_sim(k) for k in keys))
+        return [k for k, ok in zip(keys, outputs) if ok]
 
-        if not self.paused.get("scalping"):
-            try:
-                data4 = await self.scalping.simulate_scalp()
-                results["scalping"] = data4
-            except Exception as e:
-                logger.debug(f"Scalping sim error: {e}")
+    # ---- Scheduler por estrategia ----
 
-        if not self.paused.get("leverage"):
-            try:
-                data5 = await self.leverage.simulate_leverage_trade()
-                results["leverage"] = data5
-            except Exception as e:
-                logger.debug(f"Leverage sim error: {e}")
+    @property
+    def scheduler_running(self) -> bool:
+        return self._scheduler_task is not None and not self._scheduler_task.done()
 
-        if not self.paused.get("whale"):
-            try:
-                data6 = await self.whale.simulate_whale_tracking()
-                results["whale"] = data6
-            except Exception as e:
-                logger.debug(f"Whale sim error: {e}")
+    def start_scheduler(self):
+        """Inicia o scheduler em background (substitui run_simulation_cycle)."""
+        if not self.scheduler_running:
+            self._scheduler_task = asyncio.create_task(self._scheduler_loop())
 
-        return results
+    async def stop_scheduler(self):
+        if self._scheduler_task is not None:
+            self._scheduler_task.cancel()
+            try:
+                await self._scheduler_task
+            except asyncio.CancelledError:
+                pass
+            self._scheduler_task = None
+
+    def _record_lag(self, key: str, lag_s: float):
+        metrics = self.sim_metrics[key]
+        lag_ms = max(lag_s, 0.0) * 1000
+        metrics["lag_ms"] = round(lag_ms, 2)
+        metrics["max_lag_ms"] = round(max(metrics["max_lag_ms"], lag_ms), 2)
+        metrics["avg_lag_ms"] = round(metrics["avg_lag_ms"] * 0.9 + lag_ms * 0.1, 2)
+
+    async def _scheduler_loop(self):
+        """Fila de prioridade (heap) por horario devido.
+
+        Cada estrategia roda a cada interval_s; empate no horario favorece a
+        de menor intervalo. Uma estrategia nunca roda sobreposta a si mesma:
+        se a anterior ainda nao terminou, a rodada e pulada (skipped). Atraso
+        entre o horario devido e o inicio real e reportado como lag.
+        """
+        start = clock.monotonic()
+        heap = [(start, cfg["interval_s"], key) for key, cfg in self.STRATEGY_SCHEDULE.items()]
+        heapq.heapify(heap)
+        running: Dict[str, asyncio.Task] = {}
+        logger.info("Strategy scheduler iniciado: " + ", ".join(
+            f"{k}={cfg['interval_s']}s" for k, cfg in self.STRATEGY_SCHEDULE.items()))
+        try:
+            while True:
+                due, interval, key = heap[0]
+                delay = due - clock.monotonic()
+                if delay > 0:
+                    await clock.sleep(delay)
+                    continue
+                heapq.heappop(heap)
+                now = clock.monotonic()
+                if not self.paused.get(key):
+                    task = running.get(key)
+                    if task is not None and not task.done():
+                        self.sim_metrics[key]["skipped"] += 1
+                    else:
+                        self._record_lag(key, now - due)
+                        running[key] = asyncio.create_task(self._run_strategy_sim(key))
+                # Proxima rodada; se ficou muito atrasado, nao tenta "compensar"
+                next_due = due + interval
+                if next_due < now:
+                    next_due = now + interval
+                heapq.heappush(heap, (next_due, interval, key))
+        finally:
+            for task in running.values():
+                task.cancel()
 
     # ---- Alocacao de capital real ----
 
@@ -187,23 +306,13 @@ class StrategiesManager:
 
     def _load_real_positions(self):
         """Carrega posicoes reais abertas do disco."""
-        try:
-            with open("real_positions.json") as f:
-                self.real_positions = json.load(f)
-                open_count = sum(1 for p in self.real_positions if p.get("status") == "open")
-                if open_count:
-                    logger.info(f"Loaded {open_count} open real positions")
-        except (FileNotFoundError, json.JSONDecodeError):
-            self.real_positions = []
+        open_count = self.position_book.load()
+        if open_count:
+            logger.info(f"Loaded {open_count} open real positions")
 
     def _save_real_positions(self):
-        """Persiste posicoes reais em disco."""
-        # Mantem apenas abertas + ultimas 50 fechadas
-        open_pos = [p for p in self.real_positions if p.get("status") == "open"]
-        closed = [p for p in self.real_positions if p.get("status") != "open"]
-        self.real_positions = open_pos + closed[-50:]
-        with open("real_positions.json", "w") as f:
-            json.dump(self.real_positions, f, indent=2)
+        """Persiste posicoes reais em disco (abertas + ultimas 50 fechadas)."""
+        self.position_book.save()
 
     def open_real_position(self, strategy: str, coin: str, coin_mint: str,
                            amount_usd: float, coins_received: int,
@@ -225,7 +334,7 @@ class StrategiesManager:
             "direction": direction,
             "trade_id": trade_id,
             "sim_pnl_pct": sim_pnl_pct,
-            "opened_at": time.time(),
+            "opened_at": clock.time(),
             "tp_pct": hold_cfg.get("tp_pct", 10.0),
             "sl_pct": hold_cfg.get("sl_pct", 5.0),
             "max_hold_s": hold_cfg.get("max_hold_s", 300),
@@ -236,48 +345,84 @@ class StrategiesManager:
             "unrealized_pnl_usd": 0.0,
             "unrealized_pnl_pct": 0.0,
             "current_value_usd": amount_usd,
-            "last_checked": time.time(),
+            "last_checked": clock.time(),
         }
-        self.real_positions.append(pos)
+        self.position_book.add(pos)
         self._save_real_positions()
         logger.info(
             f"[MODO REAL] Posicao aberta: {strategy} | ${amount_usd:.2f} {coin} | "
             f"TP: +{pos['tp_pct']}% SL: -{pos['sl_pct']}% "
             f"Hold: {pos['max_hold_s']}s"
         )
+        self.event_bus.publish(REAL_TRADE_TOPIC, RealTradeEvent(
+            strategy=strategy, kind="open", amount_usd=amount_usd,
+            coin=self.allocations.get(strategy, {}).get("coin", coin), tx=tx_buy,
+            info={"tp_pct": pos["tp_pct"], "sl_pct": pos["sl_pct"], "max_hold_s": pos["max_hold_s"]},
+        ))
         return pos
 
     def has_open_position(self, strategy: str) -> bool:
         """Checa se estrategia ja tem posicao aberta (sem empilhar)."""
-        return any(
-            p["strategy"] == strategy and p["status"] == "open"
-            for p in self.real_positions
-        )
+        return self.position_book.has_open(strategy)
 
     def get_open_real_positions(self) -> List[Dict]:
         """Retorna posicoes abertas."""
-        return [p for p in self.real_positions if p["status"] == "open"]
+        return self.position_book.open_positions()
 
     def close_real_position(self, pos: dict, tx_sell: str,
                             close_value_usd: float, reason: str) -> float:
         """Fecha posicao real com resultado da venda."""
         pos["tx_sell"] = tx_sell
         pos["status"] = f"closed_{reason}"
-        pos["closed_at"] = time.time()
+        pos["closed_at"] = clock.time()
         pos["close_value_usd"] = close_value_usd
         real_pnl = round(close_value_usd - pos["amount_usd"], 4)
         pos["realized_pnl_usd"] = real_pnl
 
-        # Atualiza allocation stats
+        # Atualiza allocation stats (e publica o fechamento no bus)
         self.update_allocation_after_trade(
             pos["strategy"], tx_sell, real_pnl,
             tx_buy=pos["tx_buy"], tx_sell=tx_sell,
             amount_usd=pos["amount_usd"], coin=pos["coin"],
-            direction=pos["direction"], sim_pnl_pct=pos["sim_pnl_pct"]
+            direction=pos["direction"], sim_pnl_pct=pos["sim_pnl_pct"],
+            kind="close",
+            event_info={"reason": reason, "close_value_usd": close_value_usd,
+                        "hold_s": round(pos["closed_at"] - pos["opened_at"])},
         )
+        self.position_book.close(pos)
         self._save_real_positions()
         return real_pnl
 
+    def near_real_trigger(self, pos: dict, current_val: float,
+                          margin_pct: float = None) -> bool:
+        """True se a posicao esta a menos de margin_pct (pontos de PnL) de TP/SL/liquidacao/trailing.
+
+        Usado no mark-to-market em lote: so essas posicoes pedem quote exata.
+        """
+        if margin_pct is None:
+            margin_pct = config.REAL_QUOTE_TRIGGER_MARGIN_PCT
+        entry_usd = pos["amount_usd"]
+        if entry_usd <= 0:
+            return True
+        lev = pos.get("leverage", 1)
+        pnl_pct = ((current_val - entry_usd) / entry_usd) * 100 * lev
+
+        tp = pos.get("tp_pct", 0)
+        if tp > 0 and pnl_pct >= tp - margin_pct:
+            return True
+        sl = pos.get("sl_pct", 0)
+        if sl > 0 and pnl_pct <= -sl + margin_pct:
+            return True
+        if lev > 1 and pnl_pct <= -90.0 + margin_pct:
+            return True
+        trailing = pos.get("trailing_pct", 0)
+        if trailing > 0 and current_val > entry_usd:
+            highest = max(pos.get("highest_value_usd", entry_usd), current_val)
+            drop_pct = ((highest - current_val) / highest) * 100
+            if drop_pct >= trailing - margin_pct:
+                return True
+        return False
+
     def check_real_positions_tp_sl(self, current_values: dict) -> list:
         """
         Verifica TP/SL/timeout/trailing/liquidacao em posicoes abertas.
@@ -285,12 +430,9 @@ class StrategiesManager:
         Retorna lista de (pos, reason) para fechar.
         """
         to_close = []
-        now = time.time()
-
-        for pos in self.real_positions:
-            if pos["status"] != "open":
-                continue
+        now = clock.time()
 
+        for pos in self.position_book.iter_open():
             current_val = current_values.get(pos["trade_id"])
             if current_val is None:
                 continue
@@ -361,14 +503,13 @@ class StrategiesManager:
                 "sl_pct": p.get("sl_pct", 0),
                 "trailing_pct": p.get("trailing_pct", 0),
                 "max_hold_s": p.get("max_hold_s", 0),
-                "hold_time_s": round(time.time() - p["opened_at"]),
+                "hold_time_s": round(clock.time() - p["opened_at"]),
                 "tx_buy": p["tx_buy"],
                 "direction": p["direction"],
                 "status": p["status"],
                 "opened_at": p["opened_at"],
             }
-            for p in self.real_positions
-            if p["status"] == "open"
+            for p in self.position_book.iter_open()
         ]
 
     # ---- Alocacao de capital real ----
@@ -383,7 +524,7 @@ class StrategiesManager:
             "amount": amount,
             "coin": coin,
             "active": True,
-            "allocated_at": time.time(),
+            "allocated_at": clock.time(),
             "pnl": 0.0,
             "trades": 0,
         }
@@ -411,59 +552,51 @@ class StrategiesManager:
         """Retorna todas as alocacoes para o dashboard."""
         return dict(self.allocations)
 
-    def _get_trade_count(self, key: str) -> int:
-        """Retorna total de trades de uma estrategia."""
-        strat = getattr(self, key, None)
-        if not strat:
-            return 0
-        data = strat.get_dashboard_data()
-        stats = data.get("stats", {})
-        if key == "sniper":
-            return stats.get("total_snipes", 0)
-        elif key == "arbitrage":
-            return stats.get("executed", 0)
-        return stats.get("total_trades", 0)
-
-    def snapshot_trade_counts(self) -> Dict[str, int]:
-        """Tira foto do total de trades ANTES da simulacao."""
-        return {k: self._get_trade_count(k) for k in self.STRATEGY_KEYS}
-
-    def get_new_trade_signals(self, before_counts: Dict[str, int]) -> List[Dict]:
+    def _on_trade_event(self, event: TradeEvent):
+        """Guarda o ultimo trade de cada estrategia (info para alocacoes)."""
+        self._last_trade_event[event.strategy] = event
+
+    def subscribe_trades(self):
+        """Fila de TradeEvent para consumidores (executor do modo real, etc)."""
+        return self.event_bus.subscribe(TRADE_TOPIC)
+
+    def subscribe_real_trades(self):
+        """Fila de RealTradeEvent (notificacoes do Telegram)."""
+        return self.event_bus.subscribe(REAL_TRADE_TOPIC)
+
+    def signals_from_events(self, events: List[TradeEvent]) -> List[Dict]:
         """
-        Compara trade counts apos simulacao para detectar trades novos.
-        Para estrategias com capital real alocado, retorna sinais de
-        swap para executar via Jupiter.
+        Converte eventos de trade simulado em sinais de swap real para as
+        estrategias com capital real alocado. Varios eventos da mesma
+        estrategia no lote viram um unico sinal (o mais recente), e cada
+        estrategia gera no maximo um sinal a cada REAL_TRADE_MIN_INTERVAL_S.
         """
+        now = clock.monotonic()
+        latest: Dict[str, TradeEvent] = {}
+        for event in events:
+            latest[event.strategy] = event
+
         signals = []
-        for key in self.STRATEGY_KEYS:
+        for key, event in latest.items():
             alloc = self.get_allocation(key)
             if not alloc:
                 continue
-
-            before = before_counts.get(key, 0)
-            after = self._get_trade_count(key)
-            if after <= before:
+            last = self._last_real_signal.get(key)
+            if last is not None and now - last < config.REAL_TRADE_MIN_INTERVAL_S:
                 continue
 
-            # Novo trade detectado! Pega detalhes
-            strat = getattr(self, key, None)
-            if not strat:
-                continue
-            data = strat.get_dashboard_data()
-            trade_info = self._get_last_trade_info(key, data)
-            if not trade_info:
-                continue
+            trade_info = dict(event.info)
 
             # Determina token e direcao do swap
             coin = alloc.get("coin", "SOL")
-            direction = trade_info.get("direction", "long")
+            direction = event.direction or "long"
             # Sniper, memecoin, arbitrage, whale sao sempre long (compra SOL)
             if key in ("sniper", "memecoin", "arbitrage", "whale"):
                 direction = "long"
-            pnl_pct = trade_info.get("pnl_pct", 0)
+            pnl_pct = event.pnl_pct
             won = pnl_pct > 0
 
-            trade_id = f"{key}_{int(time.time())}_{after}"
+            trade_id = f"{key}_{int(event.timestamp)}_{event.trade_no}"
 
             signal = {
                 "strategy": key,
@@ -478,7 +611,7 @@ class StrategiesManager:
 
             # Agente avalia se deve executar
             history = alloc.get("trade_history", [])
-            should_exec, reason = self.agent_manager.evaluate_signal(signal, history)
+            should_exec, reason = self.agent_manager.evaluate_signal(signal, history, alloc)
             signal["agent_decision"] = reason
 
             if not should_exec:
@@ -487,6 +620,7 @@ class StrategiesManager:
                 )
                 continue
 
+            self._last_real_signal[key] = now
             signals.append(signal)
 
             logger.info(
@@ -499,18 +633,22 @@ class StrategiesManager:
     def update_allocation_after_trade(self, key: str, tx_hash: str, pnl_usd: float,
                                       tx_buy: str = "", tx_sell: str = "",
                                       amount_usd: float = 0, coin: str = "SOL",
-                                      direction: str = "long", sim_pnl_pct: float = 0):
-        """Atualiza dados da alocacao apos executar trade real."""
+                                      direction: str = "long", sim_pnl_pct: float = 0,
+                                      trade_info: Optional[Dict] = None,
+                                      kind: str = "instant", event_info: Optional[Dict] = None):
+        """Atualiza dados da alocacao apos executar trade real e publica
+        RealTradeEvent (agentes e notificacoes reagem pelo bus)."""
         if key not in self.allocations:
             return
         alloc = self.allocations[key]
         alloc["trades"] = alloc.get("trades", 0) + 1
         alloc["pnl"] = round(alloc.get("pnl", 0) + pnl_usd, 4)
         alloc["last_tx"] = tx_hash
-        alloc["last_trade_time"] = time.time()
+        alloc["last_trade_time"] = clock.time()
 
-        # Pega info do ultimo trade
-        trade_info = self._get_last_trade_info(key, getattr(self, key).get_dashboard_data())
+        # Info do trade simulado que originou o sinal (ou o ultimo publicado)
+        if trade_info is None and key in self._last_trade_event:
+            trade_info = dict(self._last_trade_event[key].info)
         if trade_info:
             alloc["last_trade_info"] = trade_info
             alloc["sim_pnl_pct"] = trade_info.get("pnl_pct", 0)
@@ -519,7 +657,7 @@ class StrategiesManager:
         if "trade_history" not in alloc:
             alloc["trade_history"] = []
         trade_record = {
-            "time": time.time(),
+            "time": clock.time(),
             "pnl": pnl_usd,
             "tx_buy": tx_buy,
             "tx_sell": tx_sell,
@@ -537,53 +675,11 @@ class StrategiesManager:
 
         self._save_allocations()
 
-        # Atualiza agente com novo historico
-        self.agent_manager.update_after_trade(key, alloc.get("trade_history", []), alloc)
-
-    def _get_last_trade_info(self, key: str, data: Dict) -> Optional[Dict]:
-        """Extrai info do ultimo trade da simulacao para mostrar no dashboard."""
-        try:
-            if key == "scalping":
-                recent = data.get("recent_trades", [])
-                if recent:
-                    t = recent[-1]
-                    return {"token": t.get("token", "?"), "direction": t.get("direction", "?"),
-                            "pnl_pct": t.get("pnl_pct", 0), "status": t.get("status", "?")}
-            elif key == "memecoin":
-                recent = data.get("recent_signals", [])
-                if recent:
-                    t = recent[-1]
-                    return {"name": t.get("name", "?"), "pnl_pct": t.get("pnl_pct", 0),
-                            "status": t.get("status", "?")}
-            elif key == "arbitrage":
-                recent = data.get("recent_opportunities", [])
-                if recent:
-                    t = recent[-1]
-                    return {"token": t.get("token", "?"), "profit": t.get("profit", 0),
-                            "status": t.get("status", "?")}
-            elif key == "sniper":
-                recent = data.get("recent_targets", [])
-                if recent:
-                    t = recent[-1]
-                    return {"name": t.get("name", "?"), "pnl_pct": t.get("pnl_pct", 0),
-                            "status": t.get("status", "?")}
-            elif key == "leverage":
-                recent = data.get("recent_positions", [])
-                if recent:
-                    t = recent[-1]
-                    return {"token": t.get("token", "?"), "direction": t.get("direction", "?"),
-                            "pnl_pct": t.get("pnl_pct", 0), "leverage": t.get("leverage", "?"),
-                            "status": t.get("status", "?")}
-            elif key == "whale":
-                recent = data.get("recent_trades", [])
-                if recent:
-                    t = recent[-1]
-                    return {"name": t.get("whale", "?"), "direction": t.get("direction", "long"),
-                            "pnl_pct": t.get("pnl_pct", 0), "status": t.get("status", "?"),
-                            "move_type": t.get("move_type", "?")}
-        except Exception:
-            pass
-        return None
+        self.event_bus.publish(REAL_TRADE_TOPIC, RealTradeEvent(
+            strategy=key, kind=kind, amount_usd=amount_usd or alloc.get("amount", 0),
+            coin=coin, tx=tx_hash, pnl_usd=pnl_usd,
+            info=dict(event_info or {}), allocation=alloc,
+        ))
 
     def mark_trade_executed(self, key: str, trade_id: str, tx_hash: str):
         """Marca que um trade real foi executado para evitar duplicata."""
@@ -592,20 +688,38 @@ class StrategiesManager:
             self.allocations[key]["last_tx"] = tx_hash
             self._save_allocations()
 
+    def _strategy_dashboard(self, key: str) -> Dict:
+        """Dashboard de uma estrategia, reconstruido so quando a versao muda."""
+        strat = getattr(self, key)
+        cached = self._dashboard_cache.get(key)
+        if cached is None or cached[0] != strat.version:
+            cached = self._dashboard_cache[key] = (strat.version, strat.get_dashboard_data())
+        return cached[1]
+
     def get_all_dashboard_data(self) -> Dict:
-        """Retorna dados de todas as estrategias para o dashboard."""
-        data = {
-            "sniper": self.sniper.get_dashboard_data(),
-            "memecoin": self.memecoin.get_dashboard_data(),
-            "arbitrage": self.arbitrage.get_dashboard_data(),
-            "scalping": self.scalping.get_dashboard_data(),
-            "leverage": self.leverage.get_dashboard_data(),
-            "whale": self.whale.get_dashboard_data(),
-        }
-        # Adiciona estado pausado a cada estrategia
+        """Retorna dados de todas as estrategias para o dashboard.
+
+        Sem mudanca de estado, devolve o mesmo objeto da chamada anterior
+        (compartilhado: quem chama nao deve altera-lo). sim_metrics e o dict
+        vivo de cada estrategia, sempre com os valores atuais.
+        """
+        cache_key = (
+            tuple(getattr(self, k).version for k in self.STRATEGY_KEYS),
+            tuple(self.paused.get(k, False) for k in self.STRATEGY_KEYS),
+        )
+        if self._all_dashboard_cache[0] == cache_key:
+            return self._all_dashboard_cache[1]
+
+        # Adiciona estado pausado e metricas de simulacao a cada estrategia
+        # (copia rasa: o dict em cache da estrategia nao e alterado)
+        data = {}
         for key in self.STRATEGY_KEYS:
-            if key in data:
-                data[key]["paused"] = self.paused.get(key, False)
+            data[key] = {
+                **self._strategy_dashboard(key),
+                "paused": self.paused.get(key, False),
+                "sim_metrics": self.sim_metrics[key],
+            }
+        self._all_dashboard_cache = (cache_key, data)
         return data
 
     def get_summary(self) -> Dict:
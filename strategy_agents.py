@@ -16,18 +16,26 @@ O agente aprende com:
 """
 
 import json
-import time
 import logging
 import os
+from collections import deque
 from datetime import datetime, timezone, timedelta
 from typing import Dict, List, Optional, Tuple
 
+import clock
+from event_bus import REAL_TRADE_TOPIC
+
 logger = logging.getLogger("StrategyAgents")
 
 BR_TZ = timezone(timedelta(hours=-3))
 
 AGENTS_FILE = os.path.join(os.path.dirname(__file__), "agents_state.json")
 
+# Janela de performance recente (ultimos N trades)
+RECENT_WINDOW = 20
+# Janela das metricas do agente (mesmo limite do trade_history da alocacao)
+HISTORY_WINDOW = 100
+
 # Minimo de trades para comecar a ajustar
 MIN_TRADES_TO_ADAPT = 10
 # Minimo de trades para ajustar config
@@ -51,6 +59,191 @@ ORIGINAL_HOLD_CONFIG = {
 }
 
 
+class TradeStatsAccumulator:
+    """Metricas dos ultimos HISTORY_WINDOW trades da alocacao atual.
+
+    Mesma janela do trade_history da alocacao (ultimos 100 trades), mas
+    atualizada por trade: o trade novo soma nos contadores, somas e
+    agregados por horario/sinal/fechamento e o que sai da janela e
+    subtraido. Uma nova alocacao (allocated_at diferente) zera tudo.
+    Trades novos sao contados pelo total de trades da alocacao (alloc
+    "trades"), entao trades com o mesmo timestamp nao se perdem.
+    """
+
+    # Campos do trade guardados na janela (e persistidos)
+    TRADE_FIELDS = ("time", "pnl", "signal", "status", "sim_pnl_pct")
+
+    def __init__(self, allocated_at: float = 0):
+        self.reset(allocated_at)
+
+    def reset(self, allocated_at: float = 0):
+        self.allocated_at = allocated_at
+        self.seen = 0              # trades da alocacao ja acumulados
+        self.total = 0
+        self.wins = 0
+        self.losses = 0
+        self.neutral = 0
+        self.total_pnl = 0.0
+        self.gross_profit = 0.0
+        self.gross_loss = 0.0      # soma (negativa) das perdas
+        self.peak = 0.0
+        self.max_drawdown = 0.0
+        self.streak = 0
+        self.sim_count = 0
+        self.sim_correct = 0
+        self.hour_pnl: Dict[int, Dict] = {}
+        self.signal_perf: Dict[str, Dict] = {}
+        self.close_reasons: Dict[str, Dict] = {}
+        self.window: deque = deque()
+        self.recent: deque = deque(maxlen=RECENT_WINDOW)
+
+    def add(self, trade: Dict):
+        trade = {k: trade.get(k) for k in self.TRADE_FIELDS}
+        self.window.append(trade)
+        self._apply(trade, 1)
+        pnl = trade["pnl"] or 0
+        if pnl > 0:
+            self.streak = self.streak + 1 if self.streak >= 0 else 1
+        elif pnl < 0:
+            self.streak = self.streak - 1 if self.streak <= 0 else -1
+        else:
+            self.streak = 0
+        self.recent.append(pnl)
+
+        if len(self.window) > HISTORY_WINDOW:
+            self._apply(self.window.popleft(), -1)
+            # Sequencia nunca passa do tamanho da janela
+            if abs(self.streak) > self.total:
+                self.streak = self.total if self.streak > 0 else -self.total
+            self._rebuild_drawdown()
+        else:
+            # Drawdown sobre o PnL acumulado
+            if self.total_pnl > self.peak:
+                self.peak = self.total_pnl
+            self.max_drawdown = max(self.max_drawdown, self.peak - self.total_pnl)
+
+    def _apply(self, trade: Dict, sign: int):
+        """Soma (sign=1) ou subtrai (sign=-1) um trade dos agregados."""
+        pnl = trade["pnl"] or 0
+        self.total += sign
+        self.total_pnl += sign * pnl
+        if pnl > 0:
+            self.wins += sign
+            self.gross_profit += sign * pnl
+        elif pnl < 0:
+            self.losses += sign
+            self.gross_loss += sign * pnl
+        else:
+            self.neutral += sign
+
+        ts = trade["time"]
+        if ts:
+            self._bump(self.hour_pnl, datetime.fromtimestamp(ts, BR_TZ).hour, pnl, sign)
+        self._bump(self.signal_perf, trade["signal"] or "unknown", pnl, sign)
+
+        status = trade["status"] or "ok"
+        reason = self.close_reasons.setdefault(status, {"count": 0, "pnl": 0})
+        reason["count"] += sign
+        reason["pnl"] += sign * pnl
+        if not reason["count"]:
+            del self.close_reasons[status]
+
+        if trade["sim_pnl_pct"] is not None:
+            self.sim_count += sign
+            if (trade["sim_pnl_pct"] > 0) == (pnl > 0):
+                self.sim_correct += sign
+
+    @staticmethod
+    def _bump(table: Dict, key, pnl: float, sign: int):
+        entry = table.setdefault(key, {"pnl": 0, "count": 0, "wins": 0})
+        entry["pnl"] += sign * pnl
+        entry["count"] += sign
+        if pnl > 0:
+            entry["wins"] += sign
+        if not entry["count"]:
+            del table[key]
+
+    def _rebuild_drawdown(self):
+        """Pico/drawdown da janela (PnL acumulado a partir de 0)."""
+        running = peak = max_dd = 0.0
+        for trade in self.window:
+            running += trade["pnl"] or 0
+            if running > peak:
+                peak = running
+            if peak - running > max_dd:
+                max_dd = peak - running
+        self.peak = peak
+        self.max_drawdown = max_dd
+
+    def sync(self, allocation: Dict) -> int:
+        """Acumula os trades da alocacao que ainda nao foram vistos.
+
+        Normalmente so o ultimo. Alocacao nova (ou contador menor que o ja
+        visto) zera o acumulador e recomeca pelo trade_history dela.
+        Retorna quantos trades foram adicionados.
+        """
+        allocated_at = allocation.get("allocated_at", 0)
+        history = allocation.get("trade_history", [])
+        count = allocation.get("trades", len(history))
+        if allocated_at != self.allocated_at or count < self.seen:
+            self.reset(allocated_at)
+        new = min(count - self.seen, len(history))
+        if new > 0:
+            for trade in history[-new:]:
+                self.add(trade)
+        self.seen = count
+        return max(new, 0)
+
+    # ---- Metricas derivadas ----
+
+    @property
+    def win_rate(self) -> float:
+        return self.wins / self.total if self.total else 0
+
+    @property
+    def profit_factor(self) -> float:
+        gross_loss = abs(self.gross_loss)
+        if gross_loss > 0:
+            return self.gross_profit / gross_loss
+        return float('inf') if self.gross_profit > 0 else 0
+
+    @property
+    def recent_win_rate(self) -> float:
+        if not self.recent:
+            return 0
+        return sum(1 for p in self.recent if p > 0) / len(self.recent)
+
+    @property
+    def recent_pnl(self) -> float:
+        return sum(self.recent)
+
+    @property
+    def sim_accuracy(self) -> float:
+        return self.sim_correct / self.sim_count if self.sim_count >= 5 else 0
+
+    # ---- Persistencia ----
+
+    def to_dict(self) -> Dict:
+        """Janela + posicao; os agregados sao refeitos no from_dict."""
+        return {
+            "allocated_at": self.allocated_at,
+            "seen": self.seen,
+            "window": list(self.window),
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "TradeStatsAccumulator":
+        acc = cls(data.get("allocated_at", 0))
+        window = data.get("window")
+        if window is None:
+            # Formato antigo (sem janela): recomeca pelo trade_history
+            return acc
+        for trade in window:
+            acc.add(trade)
+        acc.seen = data.get("seen", 0)
+        return acc
+
+
 class StrategyAgent:
     """Agente adaptativo para uma estrategia individual."""
 
@@ -71,9 +264,13 @@ class StrategyAgent:
         self.current_config_mods = {}  # Modificacoes atuais vs original
         self.phase = "aprendendo"  # aprendendo, analisando, otimizando, confiante
 
+        # Metricas incrementais do historico + flag de persistencia
+        self.stats = TradeStatsAccumulator()
+        self.dirty = False
+
     def _add_thought(self, thought: str):
         """Adiciona pensamento com timestamp."""
-        now = datetime.now(BR_TZ).strftime("%H:%M")
+        now = clock.now(BR_TZ).strftime("%H:%M")
         self.thoughts.append(f"[{now}] {thought}")
         if len(self.thoughts) > 10:
             self.thoughts = self.thoughts[-10:]
@@ -81,7 +278,7 @@ class StrategyAgent:
     def _add_adjustment(self, param: str, old_val, new_val, reason: str):
         """Registra ajuste no historico."""
         self.adjustment_history.append({
-            "time": time.time(),
+            "time": clock.time(),
             "param": param,
             "old": old_val,
             "new": new_val,
@@ -91,111 +288,48 @@ class StrategyAgent:
             self.adjustment_history = self.adjustment_history[-20:]
 
     def analyze_history(self, trade_history: List[Dict], allocation: Dict) -> Dict:
-        """Analisa historico de trades e retorna metricas."""
-        if not trade_history:
+        """Analisa historico de trades e retorna metricas.
+
+        Trades novos entram no acumulador (janela dos ultimos 100 da
+        alocacao atual); o resto usa apenas os agregados.
+        """
+        stats = self.stats
+        stats.sync(allocation)
+        self.dirty = True
+        if not stats.total:
             self.analysis = {"status": "sem_dados", "trades": 0}
             self.phase = "aprendendo"
             return self.analysis
 
-        total = len(trade_history)
-        wins = [t for t in trade_history if (t.get("pnl", 0)) > 0]
-        losses = [t for t in trade_history if (t.get("pnl", 0)) < 0]
-        neutral = [t for t in trade_history if (t.get("pnl", 0)) == 0]
-
-        win_rate = len(wins) / total if total > 0 else 0
-        total_pnl = sum(t.get("pnl", 0) for t in trade_history)
-        avg_pnl = total_pnl / total if total > 0 else 0
-        avg_win = sum(t.get("pnl", 0) for t in wins) / len(wins) if wins else 0
-        avg_loss = sum(t.get("pnl", 0) for t in losses) / len(losses) if losses else 0
-
-        # Profit factor
-        gross_profit = sum(t.get("pnl", 0) for t in wins)
-        gross_loss = abs(sum(t.get("pnl", 0) for t in losses))
-        profit_factor = gross_profit / gross_loss if gross_loss > 0 else (float('inf') if gross_profit > 0 else 0)
+        total = stats.total
+        win_rate = stats.win_rate
+        total_pnl = stats.total_pnl
+        avg_pnl = total_pnl / total
+        avg_win = stats.gross_profit / stats.wins if stats.wins else 0
+        avg_loss = stats.gross_loss / stats.losses if stats.losses else 0
+        profit_factor = stats.profit_factor
 
         # Ultimos N trades (performance recente)
-        recent_n = min(20, total)
-        recent = trade_history[-recent_n:]
-        recent_wins = [t for t in recent if (t.get("pnl", 0)) > 0]
-        recent_win_rate = len(recent_wins) / len(recent) if recent else 0
-        recent_pnl = sum(t.get("pnl", 0) for t in recent)
-
-        # Streak atual
-        streak = 0
-        for t in reversed(trade_history):
-            pnl = t.get("pnl", 0)
-            if pnl > 0:
-                if streak >= 0:
-                    streak += 1
-                else:
-                    break
-            elif pnl < 0:
-                if streak <= 0:
-                    streak -= 1
-                else:
-                    break
-            else:
-                break
-        self.streak = streak
+        recent_win_rate = stats.recent_win_rate
+        recent_pnl = stats.recent_pnl
 
-        # Drawdown maximo
-        peak = 0
-        running = 0
-        max_dd = 0
-        for t in trade_history:
-            running += t.get("pnl", 0)
-            if running > peak:
-                peak = running
-            dd = peak - running
-            if dd > max_dd:
-                max_dd = dd
+        streak = stats.streak
+        self.streak = streak
+        max_dd = stats.max_drawdown
 
         # Analise por horario (UTC-3)
-        hour_pnl = {}
-        for t in trade_history:
-            ts = t.get("time", 0)
-            if ts:
-                h = datetime.fromtimestamp(ts, BR_TZ).hour
-                if h not in hour_pnl:
-                    hour_pnl[h] = {"pnl": 0, "count": 0, "wins": 0}
-                hour_pnl[h]["pnl"] += t.get("pnl", 0)
-                hour_pnl[h]["count"] += 1
-                if t.get("pnl", 0) > 0:
-                    hour_pnl[h]["wins"] += 1
-
-        best_hours = sorted(hour_pnl.items(), key=lambda x: x[1]["pnl"], reverse=True)[:3]
-        worst_hours = sorted(hour_pnl.items(), key=lambda x: x[1]["pnl"])[:3]
+        best_hours = sorted(stats.hour_pnl.items(), key=lambda x: x[1]["pnl"], reverse=True)[:3]
+        worst_hours = sorted(stats.hour_pnl.items(), key=lambda x: x[1]["pnl"])[:3]
 
         # Correlacao sim vs real
-        sim_real_corr = 0
-        corr_trades = [t for t in trade_history if t.get("sim_pnl_pct") is not None]
-        if len(corr_trades) >= 5:
-            sim_correct = sum(1 for t in corr_trades
-                              if (t.get("sim_pnl_pct", 0) > 0) == (t.get("pnl", 0) > 0))
-            sim_real_corr = sim_correct / len(corr_trades)
+        sim_real_corr = stats.sim_accuracy
 
         # Analise por token/sinal
-        signal_perf = {}
-        for t in trade_history:
-            sig = t.get("signal", "unknown")
-            if sig not in signal_perf:
-                signal_perf[sig] = {"pnl": 0, "count": 0, "wins": 0}
-            signal_perf[sig]["pnl"] += t.get("pnl", 0)
-            signal_perf[sig]["count"] += 1
-            if t.get("pnl", 0) > 0:
-                signal_perf[sig]["wins"] += 1
-
-        best_signals = sorted(signal_perf.items(), key=lambda x: x[1]["pnl"], reverse=True)[:5]
-        worst_signals = sorted(signal_perf.items(), key=lambda x: x[1]["pnl"])[:3]
+        best_signals = sorted(stats.signal_perf.items(), key=lambda x: x[1]["pnl"], reverse=True)[:5]
+        worst_signals = sorted(stats.signal_perf.items(), key=lambda x: x[1]["pnl"])[:3]
 
         # Analise de fechamento (como as posicoes fecharam)
-        close_reasons = {}
-        for t in trade_history:
-            status = t.get("status", "ok")
-            if status not in close_reasons:
-                close_reasons[status] = {"count": 0, "pnl": 0}
-            close_reasons[status]["count"] += 1
-            close_reasons[status]["pnl"] += t.get("pnl", 0)
+        close_reasons = {k: dict(v) for k, v in stats.close_reasons.items()}
 
         # Calcula confianca
         conf = 0.3
@@ -230,9 +364,9 @@ class StrategyAgent:
         self.analysis = {
             "status": "analisado",
             "trades": total,
-            "wins": len(wins),
-            "losses": len(losses),
-            "neutral": len(neutral),
+            "wins": stats.wins,
+            "losses": stats.losses,
+            "neutral": stats.neutral,
             "win_rate": round(win_rate * 100, 1),
             "total_pnl": round(total_pnl, 4),
             "avg_pnl": round(avg_pnl, 4),
@@ -251,7 +385,7 @@ class StrategyAgent:
             "worst_signals": [(s, round(d["pnl"], 4), d["count"]) for s, d in worst_signals],
             "close_reasons": close_reasons,
         }
-        self.last_analyzed = time.time()
+        self.last_analyzed = clock.time()
 
         # Gera pensamentos baseados na analise
         self._generate_thoughts(trade_history)
@@ -336,19 +470,21 @@ class StrategyAgent:
             self._add_thought(f"Ajustes ativos: {', '.join(mods)}")
 
     def compute_config_adjustments(self, trade_history: List[Dict],
-                                    current_hold_config: Dict) -> Dict:
+                                    current_hold_config: Dict, allocation: Dict) -> Dict:
         """
         Calcula e APLICA ajustes ao STRATEGY_HOLD_CONFIG.
         Retorna o config atualizado para a estrategia.
         """
-        if len(trade_history) < MIN_TRADES_TO_TUNE:
+        self.stats.sync(allocation)
+        total_trades = self.stats.total
+        if total_trades < MIN_TRADES_TO_TUNE:
             return current_hold_config
 
         if self.key == "arbitrage":
             return current_hold_config  # Arbitrage é instant, não ajusta
 
-        if time.time() - self.last_analyzed > 300:
-            self.analyze_history(trade_history, {})
+        if clock.time() - self.last_analyzed > 300:
+            self.analyze_history(trade_history, allocation)
 
         an = self.analysis
         if not an or an.get("trades", 0) < MIN_TRADES_TO_TUNE:
@@ -378,7 +514,7 @@ class StrategyAgent:
                 tp_mult = 1.2
                 reason = "win rate alto mas lucros pequenos - aumentando TP 20%"
             # Se muitos trades fecham por TP e performance boa: pode subir mais
-            elif close_reasons.get("ok", {}).get("count", 0) > len(trade_history) * 0.4 and pf > 1.5:
+            elif close_reasons.get("ok", {}).get("count", 0) > total_trades * 0.4 and pf > 1.5:
                 tp_mult = 1.15
                 reason = "muitos TPs atingidos e PF bom - testando TP 15% maior"
             # Se performance ruim: reduzir TP para garantir mais lucros
@@ -426,7 +562,7 @@ class StrategyAgent:
         orig_hold = orig.get("max_hold_s", 0)
         if orig_hold > 0:
             timeout_trades = close_reasons.get("timeout", {}).get("count", 0)
-            timeout_pct = timeout_trades / len(trade_history) if trade_history else 0
+            timeout_pct = timeout_trades / total_trades if total_trades else 0
 
             # Se muitos timeouts com PnL positivo: aumentar hold
             timeout_pnl = close_reasons.get("timeout", {}).get("pnl", 0)
@@ -449,6 +585,8 @@ class StrategyAgent:
                     changes_made.append(("max_hold_s", old_hold, new_hold, reason))
 
         # Registra ajustes
+        if changes_made:
+            self.dirty = True
         for param, old_val, new_val, reason in changes_made:
             self._add_adjustment(param, old_val, new_val, reason)
             self.current_config_mods[param] = new_val
@@ -457,17 +595,20 @@ class StrategyAgent:
 
         return new_config
 
-    def should_execute(self, signal: Dict, trade_history: List[Dict]) -> Tuple[bool, str]:
+    def should_execute(self, signal: Dict, trade_history: List[Dict],
+                       allocation: Dict) -> Tuple[bool, str]:
         """Decide se deve executar um sinal baseado na analise."""
         self.decisions_made += 1
-        total_trades = len(trade_history) if trade_history else 0
+        self.dirty = True
+        self.stats.sync(allocation)
+        total_trades = self.stats.total
 
         if total_trades < MIN_TRADES_TO_ADAPT:
             self.signals_approved += 1
             return True, f"aprendendo ({total_trades}/{MIN_TRADES_TO_ADAPT} trades)"
 
-        if time.time() - self.last_analyzed > 300:
-            self.analyze_history(trade_history, {})
+        if clock.time() - self.last_analyzed > 300:
+            self.analyze_history(trade_history, allocation)
 
         analysis = self.analysis
         if not analysis or analysis.get("status") == "sem_dados":
@@ -489,7 +630,7 @@ class StrategyAgent:
         if max_dd > 0 and total_pnl > 0 and max_dd > total_pnl * 2:
             reasons_reject.append(f"drawdown alto (${max_dd:.4f})")
 
-        now_hour = datetime.now(BR_TZ).hour
+        now_hour = clock.now(BR_TZ).hour
         worst_hours = [h for h, pnl, cnt in analysis.get("worst_hours", [])
                        if pnl < 0 and cnt >= 5]
         if now_hour in worst_hours and total_trades >= 30:
@@ -555,6 +696,7 @@ class AgentManager:
 
     def __init__(self):
         self.agents: Dict[str, StrategyAgent] = {}
+        self._state_cache: Dict[str, Dict] = {}  # Ultimo estado serializado por agente
         self._load_state()
 
     def get_agent(self, strategy_key: str) -> StrategyAgent:
@@ -562,10 +704,23 @@ class AgentManager:
             self.agents[strategy_key] = StrategyAgent(strategy_key)
         return self.agents[strategy_key]
 
-    def evaluate_signal(self, signal: Dict, trade_history: List[Dict]) -> Tuple[bool, str]:
+    def evaluate_signal(self, signal: Dict, trade_history: List[Dict],
+                        allocation: Dict) -> Tuple[bool, str]:
         key = signal.get("strategy", "")
         agent = self.get_agent(key)
-        return agent.should_execute(signal, trade_history)
+        return agent.should_execute(signal, trade_history, allocation)
+
+    def subscribe(self, bus):
+        """Assina os trades reais do EventBus (analise apos cada resultado)."""
+        bus.subscribe(REAL_TRADE_TOPIC, callback=self._on_real_trade)
+
+    def _on_real_trade(self, event):
+        # Abertura de posicao ainda nao tem resultado
+        if event.kind == "open" or not event.allocation:
+            return
+        self.update_after_trade(
+            event.strategy, event.allocation.get("trade_history", []), event.allocation
+        )
 
     def update_after_trade(self, strategy_key: str, trade_history: List[Dict],
                            allocation: Dict):
@@ -587,7 +742,7 @@ class AgentManager:
             alloc = allocations.get(key)
             if alloc and alloc.get("active"):
                 history = alloc.get("trade_history", [])
-                new_cfg = agent.compute_config_adjustments(history, cfg)
+                new_cfg = agent.compute_config_adjustments(history, cfg, alloc)
                 updated[key] = new_cfg
             else:
                 updated[key] = cfg
@@ -596,26 +751,35 @@ class AgentManager:
     def get_all_dashboard_data(self) -> List[Dict]:
         return [agent.get_dashboard_data() for agent in self.agents.values()]
 
+    def _agent_state(self, agent: StrategyAgent) -> Dict:
+        return {
+            "confidence": agent.confidence,
+            "decisions_made": agent.decisions_made,
+            "signals_approved": agent.signals_approved,
+            "signals_rejected": agent.signals_rejected,
+            "streak": agent.streak,
+            "analysis": agent.analysis,
+            "adjustments": agent.adjustments,
+            "last_analyzed": agent.last_analyzed,
+            "thoughts": agent.thoughts,
+            "adjustment_history": agent.adjustment_history,
+            "current_config_mods": agent.current_config_mods,
+            "phase": agent.phase,
+            "stats": agent.stats.to_dict(),
+        }
+
     def _save_state(self):
+        """Persiste o estado; so agentes alterados sao re-serializados."""
+        dirty = [key for key, agent in self.agents.items() if agent.dirty]
+        if not dirty:
+            return
         try:
-            state = {}
-            for key, agent in self.agents.items():
-                state[key] = {
-                    "confidence": agent.confidence,
-                    "decisions_made": agent.decisions_made,
-                    "signals_approved": agent.signals_approved,
-                    "signals_rejected": agent.signals_rejected,
-                    "streak": agent.streak,
-                    "analysis": agent.analysis,
-                    "adjustments": agent.adjustments,
-                    "last_analyzed": agent.last_analyzed,
-                    "thoughts": agent.thoughts,
-                    "adjustment_history": agent.adjustment_history,
-                    "current_config_mods": agent.current_config_mods,
-                    "phase": agent.phase,
-                }
+            for key in dirty:
+                self._state_cache[key] = self._agent_state(self.agents[key])
             with open(AGENTS_FILE, "w") as f:
-                json.dump(state, f, indent=2)
+                json.dump(self._state_cache, f, indent=2)
+            for key in dirty:
+                self.agents[key].dirty = False
         except Exception as e:
             logger.warning(f"Failed to save agents state: {e}")
 
@@ -637,6 +801,9 @@ class AgentManager:
                 agent.adjustment_history = data.get("adjustment_history", [])
                 agent.current_config_mods = data.get("current_config_mods", {})
                 agent.phase = data.get("phase", "aprendendo")
+                if data.get("stats"):
+                    agent.stats = TradeStatsAccumulator.from_dict(data["stats"])
+                self._state_cache[key] = data
             logger.info(f"Loaded {len(state)} agent states")
         except (FileNotFoundError, json.JSONDecodeError):
             pass
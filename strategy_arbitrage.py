@@ -12,18 +12,21 @@ Ideal para: Traders tecnicos com habilidades de programacao
 
 import asyncio
 import logging
-import time
 import random
 from datetime import datetime, timezone, timedelta
 from dataclasses import dataclass
-from typing import List, Dict, Optional
+from typing import Dict, Optional
+
+import clock
+from event_bus import TRADE_TOPIC, TradeEvent
+from ring_buffer import DailyRollup, RingBuffer, WindowStats
 
 logger = logging.getLogger("StrategyArbitrage")
 
 BR_TZ = timezone(timedelta(hours=-3))
 
 
-@dataclass
+@dataclass(slots=True)
 class ArbitrageOpportunity:
     token: str
     detected_at: float
@@ -74,14 +77,16 @@ class ArbitrageStrategy:
     INITIAL_CAPITAL = 100.0
 
     def __init__(self):
-        self.opportunities: List[ArbitrageOpportunity] = []
+        self.opportunities: RingBuffer = RingBuffer(100)  # ArbitrageOpportunity
+        self._executed = WindowStats(
+            ("net_profit", "spread_pct", "execution_time_ms"),
+            include=lambda o: o.status == "executed",
+        )
         self.capital = self.INITIAL_CAPITAL
         self.total_invested = 0.0
         self.total_gains = 0.0
         self.total_losses = 0.0
-        self.daily_history: List[Dict] = []
-        self._today_str = datetime.now(BR_TZ).strftime("%Y-%m-%d")
-        self._today_start_capital = self.capital
+        self.daily = DailyRollup(self.capital, BR_TZ)
         self.stats = {
             "total_scans": 0,
             "opportunities_found": 0,
@@ -109,23 +114,15 @@ class ArbitrageStrategy:
             "max_concurrent": 3,            # Max trades simultaneos
             "trade_size_pct": 20.0,         # Usa 20% do capital por arb
         }
-        self._start_time = time.time()
+        self._start_time = clock.time()
+        self.event_bus = None  # Injetado pelo StrategiesManager
+        self.version = 0  # Incrementa a cada mudanca de estado (cache do dashboard)
 
     def _check_new_day(self):
-        today = datetime.now(BR_TZ).strftime("%Y-%m-%d")
-        if today != self._today_str:
-            self.daily_history.append({
-                "date": self._today_str,
-                "start_capital": self._today_start_capital,
-                "end_capital": self.capital,
-                "pnl": self.capital - self._today_start_capital,
-            })
-            if len(self.daily_history) > 30:
-                self.daily_history = self.daily_history[-30:]
-            self._today_str = today
-            self._today_start_capital = self.capital
+        if self.daily.roll(self.capital):
+            self.version += 1
 
-    async def simulate_scan(self) -> Dict:
+    async def simulate_scan(self) -> None:
         """
         Simula scan de arbitragem entre DEXs.
         Em producao: consultaria todas DEXs via websocket simultaneamente.
@@ -133,7 +130,7 @@ class ArbitrageStrategy:
         """
         self._check_new_day()
         self.stats["total_scans"] += 1
-        now = time.time()
+        now = clock.time()
 
         pair = random.choice(self.TOKENS_PAIRS)
         dex1, dex2 = random.sample(self.DEXS, 2)
@@ -199,6 +196,15 @@ class ArbitrageStrategy:
                 else:
                     self.total_losses += abs(actual_profit)
                 self.capital += actual_profit
+                self.daily.record_trade(actual_profit)
+                if self.event_bus is not None:
+                    self.event_bus.publish(TRADE_TOPIC, TradeEvent(
+                        strategy="arbitrage", trade_no=self.stats["executed"], direction="long",
+                        pnl_pct=round(actual_profit / trade_usd * 100, 4) if trade_usd else 0.0,
+                        status=opp.status,
+                        info={"token": opp.token, "profit": round(actual_profit, 4),
+                              "status": opp.status},
+                    ))
             elif random.random() < 0.5:
                 opp.status = "missed"
                 self.stats["missed"] += 1
@@ -209,34 +215,27 @@ class ArbitrageStrategy:
                 self.capital -= gas_cost
                 self.total_losses += gas_cost
 
-            self.opportunities.append(opp)
+            self._executed.update(opp, self.opportunities.append(opp))
             self.stats["opportunities_found"] += 1
 
-        if len(self.opportunities) > 100:
-            self.opportunities = self.opportunities[-100:]
-
         self._update_stats()
-        return self.get_dashboard_data()
+        self.version += 1
 
     def _update_stats(self):
-        executed = [o for o in self.opportunities if o.status == "executed"]
-        if executed:
-            profits = [o.net_profit for o in executed]
-            spreads = [o.spread_pct for o in executed]
-            exec_times = [o.execution_time_ms for o in executed]
-            self.stats["avg_profit_usd"] = sum(profits) / len(profits)
-            self.stats["avg_spread_pct"] = sum(spreads) / len(spreads)
-            self.stats["avg_execution_ms"] = sum(exec_times) / len(exec_times)
-            self.stats["best_profit"] = max(profits)
+        executed = self._executed
+        if executed.count:
+            self.stats["avg_profit_usd"] = executed.mean("net_profit")
+            self.stats["avg_spread_pct"] = executed.mean("spread_pct")
+            self.stats["avg_execution_ms"] = executed.mean("execution_time_ms")
+            self.stats["best_profit"] = executed.max("net_profit")
             self.stats["net_profit"] = self.stats["total_profit_usd"] - self.stats["total_gas_paid"]
 
-            elapsed_h = (time.time() - self._start_time) / 3600
+            elapsed_h = (clock.time() - self._start_time) / 3600
             if elapsed_h > 0:
                 self.stats["profit_per_hour"] = self.stats["net_profit"] / elapsed_h
 
     def get_dashboard_data(self) -> Dict:
-        recent = self.opportunities[-10:] if self.opportunities else []
-        today_pnl = self.capital - self._today_start_capital
+        today_pnl = self.daily.today_pnl(self.capital)
         return {
             "strategy_name": self.NAME,
             "risk_level": self.RISK_LEVEL,
@@ -254,7 +253,7 @@ class ArbitrageStrategy:
                 "pnl_pct": round(((self.capital - self.INITIAL_CAPITAL) / self.INITIAL_CAPITAL) * 100, 2),
                 "today_pnl": round(today_pnl, 2),
             },
-            "daily_history": self.daily_history[-7:],
+            "daily_history": self.daily.history(7),
             "stats": self.stats.copy(),
             "recent_opportunities": [
                 {
@@ -267,7 +266,7 @@ class ArbitrageStrategy:
                     "exec_ms": round(o.execution_time_ms, 0),
                     "time": datetime.fromtimestamp(o.detected_at, tz=BR_TZ).strftime("%H:%M:%S"),
                 }
-                for o in reversed(recent)
+                for o in self.opportunities.recent(10)
             ],
             "config": self.config.copy(),
         }
@@ -12,19 +12,26 @@ Ideal para: Traders experientes com gestao de risco rigorosa
 
 import asyncio
 import logging
-import time
 import random
 import math
 from datetime import datetime, timezone, timedelta
 from dataclasses import dataclass
-from typing import List, Dict, Optional
+from typing import Dict, Optional
+
+import numpy as np
+
+import clock
+from event_bus import TRADE_TOPIC, TradeEvent
+from montecarlo import (EXIT_LIQUIDATION, EXIT_SL, EXIT_TP, evaluate_exits,
+                        simulate_paths, summarize)
+from ring_buffer import DailyRollup, EquityCurve, RingBuffer, WindowStats
 
 logger = logging.getLogger("StrategyLeverage")
 
 BR_TZ = timezone(timedelta(hours=-3))
 
 
-@dataclass
+@dataclass(slots=True)
 class LeveragePosition:
     token: str
     platform: str
@@ -81,16 +88,27 @@ class LeverageStrategy:
     ]
 
     INITIAL_CAPITAL = 100.0
+    # Caminhos Monte Carlo por trade (192 passos cada). 200 mantem o custo
+    # perto do loop escalar original (o EV ainda converge bem para o dashboard)
+    MC_PATHS = 200
+    # Drift por passo era uniforme em (-0.0005, 0.001): mesma media e variancia
+    # com drift escalar + vol inflada, sem sortear uma matriz de uniformes
+    DRIFT_MEAN = 0.00025
+    DRIFT_VAR = 0.0015 ** 2 / 12
+    MAX_HOLD_HOURS = 48
+    EXIT_STATUS = {EXIT_LIQUIDATION: "liquidated", EXIT_SL: "sl_hit", EXIT_TP: "tp_hit"}
 
     def __init__(self):
-        self.positions: List[LeveragePosition] = []
+        self.positions: RingBuffer = RingBuffer(100)  # LeveragePosition
+        self._completed = WindowStats(
+            ("pnl_pct", "pnl_usd", "leverage", "hold_time_h"),
+            include=lambda p: p.status != "open",
+        )
         self.capital = self.INITIAL_CAPITAL
         self.total_invested = 0.0
         self.total_gains = 0.0
         self.total_losses = 0.0
-        self.daily_history: List[Dict] = []
-        self._today_str = datetime.now(BR_TZ).strftime("%Y-%m-%d")
-        self._today_start_capital = self.capital
+        self.daily = DailyRollup(self.capital, BR_TZ)
         self.stats = {
             "total_trades": 0,
             "wins": 0,
@@ -120,30 +138,41 @@ class LeverageStrategy:
             "funding_check_interval_h": 8,
             "preferred_platform": "Jupiter Perps",
         }
-        self._equity_curve = [0.0]
+        self._equity_curve = EquityCurve()
+        self.event_bus = None  # Injetado pelo StrategiesManager
+        self.version = 0  # Incrementa a cada mudanca de estado (cache do dashboard)
+        self._rng = np.random.default_rng()
+        self.monte_carlo: Dict = {}  # EV / percentis do ultimo trade
 
     def _check_new_day(self):
-        today = datetime.now(BR_TZ).strftime("%Y-%m-%d")
-        if today != self._today_str:
-            self.daily_history.append({
-                "date": self._today_str,
-                "start_capital": self._today_start_capital,
-                "end_capital": self.capital,
-                "pnl": self.capital - self._today_start_capital,
-            })
-            if len(self.daily_history) > 30:
-                self.daily_history = self.daily_history[-30:]
-            self._today_str = today
-            self._today_start_capital = self.capital
-
-    async def simulate_leverage_trade(self) -> Dict:
+        if self.daily.roll(self.capital):
+            self.version += 1
+
+    def _simulate_paths(self, entry: float, direction: str, leverage: int, daily_vol: float):
+        """Caminhos 15min (ate MAX_HOLD_HOURS) e saidas de cada um."""
+        hold_hours_all = self._rng.uniform(1, self.MAX_HOLD_HOURS, size=self.MC_PATHS)
+        hourly_vol = daily_vol / math.sqrt(24)
+        # Leve drift por passo (viés do mercado)
+        step_vol = math.sqrt((hourly_vol * math.sqrt(0.25)) ** 2 + self.DRIFT_VAR)
+        paths = simulate_paths(entry, self.MC_PATHS, self.MAX_HOLD_HOURS * 4,
+                               step_vol, drift=self.DRIFT_MEAN, rng=self._rng)
+        exits = evaluate_exits(
+            paths, direction,
+            tp_pct=self.config["take_profit_pct"], sl_pct=self.config["stop_loss_pct"],
+            liquidation_pct=90.0 / leverage,  # ~90% da margem
+            horizon=(hold_hours_all * 4).astype(np.int64),
+            priority=(EXIT_LIQUIDATION, EXIT_SL, EXIT_TP),
+        )
+        return hold_hours_all, paths, exits
+
+    async def simulate_leverage_trade(self) -> None:
         """
         Simula um trade com alavancagem.
         Em producao: usaria Jupiter Perpetuals API para abrir posicao real.
         Capital ficticio: $100 inicial.
         """
         self._check_new_day()
-        now = time.time()
+        now = clock.time()
         token_data = random.choice(self.LEVERAGE_TOKENS)
         platform = random.choice(self.PLATFORMS)
 
@@ -163,72 +192,23 @@ class LeverageStrategy:
         else:
             liquidation = entry * (1 + 0.9 / leverage)
 
-        # Simula movimento (horas a dias)
-        hold_hours = random.uniform(1, 48)
-        daily_vol = token_data["daily_vol"] / 100
-        hourly_vol = daily_vol / math.sqrt(24)
+        # Simula movimento (horas a dias, granularidade de 15min) em MC_PATHS
+        # caminhos: o caminho 0 e o trade realizado, o conjunto da o EV.
+        # Numpy roda numa thread para nao segurar o event loop
+        hold_hours_all, paths, exits = await asyncio.to_thread(
+            self._simulate_paths, entry, direction, leverage, token_data["daily_vol"] / 100
+        )
+        hold_hours = float(hold_hours_all[0])
 
-        # Simula caminho de preco
-        price_path = [entry]
-        for h in range(int(hold_hours * 4)):  # granularidade de 15min
-            change = random.gauss(0, hourly_vol * math.sqrt(0.25))
-            # Adiciona leve drift baseado em direcao (viés do mercado)
-            drift = random.uniform(-0.0005, 0.001)
-            new_price = price_path[-1] * (1 + change + drift)
-            price_path.append(new_price)
+        exit_price = float(exits.exit_price[0])
+        status = self.EXIT_STATUS.get(int(exits.reason[0]), "closed")
 
-        # Calcula SL/TP e verifica liquidacao
-        if direction == "long":
-            sl_price = entry * (1 - self.config["stop_loss_pct"] / 100)
-            tp_price = entry * (1 + self.config["take_profit_pct"] / 100)
-        else:
-            sl_price = entry * (1 + self.config["stop_loss_pct"] / 100)
-            tp_price = entry * (1 - self.config["take_profit_pct"] / 100)
-
-        exit_price = price_path[-1]
-        status = "closed"
-        max_pnl = 0
-        min_pnl = 0
-
-        for p in price_path:
-            # PnL instantaneo
-            if direction == "long":
-                inst_pnl = ((p - entry) / entry) * leverage * 100
-            else:
-                inst_pnl = ((entry - p) / entry) * leverage * 100
-
-            max_pnl = max(max_pnl, inst_pnl)
-            min_pnl = min(min_pnl, inst_pnl)
-
-            # Verifica liquidacao
-            if direction == "long" and p <= liquidation:
-                exit_price = liquidation
-                status = "liquidated"
-                break
-            elif direction == "short" and p >= liquidation:
-                exit_price = liquidation
-                status = "liquidated"
-                break
-
-            # Verifica SL
-            if direction == "long" and p <= sl_price:
-                exit_price = sl_price
-                status = "sl_hit"
-                break
-            elif direction == "short" and p >= sl_price:
-                exit_price = sl_price
-                status = "sl_hit"
-                break
-
-            # Verifica TP
-            if direction == "long" and p >= tp_price:
-                exit_price = tp_price
-                status = "tp_hit"
-                break
-            elif direction == "short" and p <= tp_price:
-                exit_price = tp_price
-                status = "tp_hit"
-                break
+        # PnL instantaneo (max/min) do trade realizado ate a saida
+        sign = 1 if direction == "long" else -1
+        realized = paths[0, :int(exits.exit_step[0]) + 1]
+        inst_pnl = sign * (realized / entry - 1) * leverage * 100
+        max_pnl = max(0.0, float(inst_pnl.max()))
+        min_pnl = min(0.0, float(inst_pnl.min()))
 
         # Calcula PnL final
         if direction == "long":
@@ -242,6 +222,15 @@ class LeverageStrategy:
         else:
             pnl_usd = margin * (pnl_pct / 100)
 
+        # Distribuicao: mesmo calculo vetorizado, com funding/fees por caminho
+        mc_pnl = exits.pnl_pct(entry, direction) * leverage
+        mc_pnl[exits.reason == EXIT_LIQUIDATION] = -90.0
+        mc_costs = position_size * (
+            platform["funding_8h"] / 100 * hold_hours_all / 8 + platform["fee_pct"] / 100 * 2
+        )
+        self.monte_carlo = summarize(mc_pnl, exits.reason)
+        self.monte_carlo["ev_usd"] = round(float((margin * mc_pnl / 100 - mc_costs).mean()), 4)
+
         # Funding rate
         funding_periods = hold_hours / 8
         funding_paid = position_size * (platform["funding_8h"] / 100) * funding_periods
@@ -256,6 +245,7 @@ class LeverageStrategy:
         else:
             self.total_losses += abs(pnl_usd)
         self.capital += pnl_usd
+        self.daily.record_trade(pnl_usd)
 
         pos = LeveragePosition(
             token=token_data["token"],
@@ -278,9 +268,7 @@ class LeverageStrategy:
             funding_paid=funding_paid,
         )
 
-        self.positions.append(pos)
-        if len(self.positions) > 100:
-            self.positions = self.positions[-100:]
+        self._completed.update(pos, self.positions.append(pos))
 
         self.stats["total_trades"] += 1
         self.stats["total_volume_traded"] += position_size
@@ -295,25 +283,28 @@ class LeverageStrategy:
         else:
             self.stats["losses"] += 1
 
-        self._equity_curve.append(self._equity_curve[-1] + pnl_usd)
+        self._equity_curve.add(pnl_usd)
 
         self._update_stats()
-        return self.get_dashboard_data()
+
+        if self.event_bus is not None:
+            self.event_bus.publish(TRADE_TOPIC, TradeEvent(
+                strategy="leverage", trade_no=self.stats["total_trades"], direction=direction,
+                pnl_pct=round(pnl_pct, 2), status=status,
+                info={"token": pos.token, "direction": direction, "pnl_pct": round(pnl_pct, 2),
+                      "leverage": f"{leverage}x", "status": status},
+            ))
+        self.version += 1
 
     def _update_stats(self):
-        completed = [p for p in self.positions if p.status != "open"]
-        if completed:
-            pnls = [p.pnl_pct for p in completed]
-            pnls_usd = [p.pnl_usd for p in completed]
-            leverages = [p.leverage for p in completed]
-            hold_times = [p.hold_time_h for p in completed]
-
-            self.stats["avg_pnl_pct"] = sum(pnls) / len(pnls)
-            self.stats["total_pnl_usd"] = sum(pnls_usd)
-            self.stats["best_trade_pct"] = max(pnls)
-            self.stats["worst_trade_pct"] = min(pnls)
-            self.stats["avg_leverage"] = sum(leverages) / len(leverages)
-            self.stats["avg_hold_time_h"] = sum(hold_times) / len(hold_times)
+        completed = self._completed
+        if completed.count:
+            self.stats["avg_pnl_pct"] = completed.mean("pnl_pct")
+            self.stats["total_pnl_usd"] = completed.total("pnl_usd")
+            self.stats["best_trade_pct"] = completed.max("pnl_pct")
+            self.stats["worst_trade_pct"] = completed.min("pnl_pct")
+            self.stats["avg_leverage"] = completed.mean("leverage")
+            self.stats["avg_hold_time_h"] = completed.mean("hold_time_h")
 
             total = self.stats["wins"] + self.stats["losses"]
             self.stats["win_rate"] = (self.stats["wins"] / total) * 100 if total else 0
@@ -321,20 +312,11 @@ class LeverageStrategy:
                 (self.stats["liquidations"] / total) * 100 if total else 0
             )
 
-            # Max drawdown
-            peak = 0
-            max_dd = 0
-            for eq in self._equity_curve:
-                if eq > peak:
-                    peak = eq
-                dd = peak - eq
-                if dd > max_dd:
-                    max_dd = dd
-            self.stats["max_drawdown_pct"] = round(max_dd, 2)
+            # Max drawdown (corrido na EquityCurve)
+            self.stats["max_drawdown_pct"] = round(self._equity_curve.max_drawdown, 2)
 
     def get_dashboard_data(self) -> Dict:
-        recent = self.positions[-10:] if self.positions else []
-        today_pnl = self.capital - self._today_start_capital
+        today_pnl = self.daily.today_pnl(self.capital)
         return {
             "strategy_name": self.NAME,
             "risk_level": self.RISK_LEVEL,
@@ -352,7 +334,7 @@ class LeverageStrategy:
                 "pnl_pct": round(((self.capital - self.INITIAL_CAPITAL) / self.INITIAL_CAPITAL) * 100, 2),
                 "today_pnl": round(today_pnl, 2),
             },
-            "daily_history": self.daily_history[-7:],
+            "daily_history": self.daily.history(7),
             "stats": self.stats.copy(),
             "recent_positions": [
                 {
@@ -368,8 +350,9 @@ class LeverageStrategy:
                     "liq_price": round(p.liquidation_price, 2),
                     "time": datetime.fromtimestamp(p.detected_at, tz=BR_TZ).strftime("%H:%M:%S"),
                 }
-                for p in reversed(recent)
+                for p in self.positions.recent(10)
             ],
-            "equity_curve": self._equity_curve[-50:],
+            "equity_curve": self._equity_curve.tail(50),
+            "monte_carlo": self.monte_carlo,
             "config": self.config.copy(),
         }
@@ -12,18 +12,21 @@ Ideal para: Traders experientes em analise on-chain e sentimento de mercado
 
 import asyncio
 import logging
-import time
 import random
 from datetime import datetime, timezone, timedelta
 from dataclasses import dataclass
-from typing import List, Dict, Optional
+from typing import Dict, Optional
+
+import clock
+from event_bus import TRADE_TOPIC, TradeEvent
+from ring_buffer import DailyRollup, RingBuffer, WindowStats
 
 logger = logging.getLogger("StrategyMemeCoin")
 
 BR_TZ = timezone(timedelta(hours=-3))
 
 
-@dataclass
+@dataclass(slots=True)
 class MemeCoinSignal:
     token_address: str
     token_name: str
@@ -78,14 +81,15 @@ class MemeCoinStrategy:
     INITIAL_CAPITAL = 100.0
 
     def __init__(self):
-        self.signals: List[MemeCoinSignal] = []
+        self.signals: RingBuffer = RingBuffer(100)  # MemeCoinSignal
+        self._completed = WindowStats(
+            ("pnl_pct",), include=lambda s: s.status in ("exited", "stopped"),
+        )
         self.capital = self.INITIAL_CAPITAL
         self.total_invested = 0.0
         self.total_gains = 0.0
         self.total_losses = 0.0
-        self.daily_history: List[Dict] = []
-        self._today_str = datetime.now(BR_TZ).strftime("%Y-%m-%d")
-        self._today_start_capital = self.capital
+        self.daily = DailyRollup(self.capital, BR_TZ)
         self.stats = {
             "total_trades": 0,
             "wins": 0,
@@ -110,29 +114,21 @@ class MemeCoinStrategy:
             "max_position_pct": 10.0,      # Max 10% do capital
             "trailing_stop_pct": 8.0,      # Trailing 8%
         }
+        self.event_bus = None  # Injetado pelo StrategiesManager
+        self.version = 0  # Incrementa a cada mudanca de estado (cache do dashboard)
 
     def _check_new_day(self):
-        today = datetime.now(BR_TZ).strftime("%Y-%m-%d")
-        if today != self._today_str:
-            self.daily_history.append({
-                "date": self._today_str,
-                "start_capital": self._today_start_capital,
-                "end_capital": self.capital,
-                "pnl": self.capital - self._today_start_capital,
-            })
-            if len(self.daily_history) > 30:
-                self.daily_history = self.daily_history[-30:]
-            self._today_str = today
-            self._today_start_capital = self.capital
+        if self.daily.roll(self.capital):
+            self.version += 1
 
-    async def simulate_analysis(self) -> Dict:
+    async def simulate_analysis(self) -> None:
         """
         Simula analise de meme coins.
         Em producao: usaria DexScreener/Birdeye APIs para dados reais.
         Capital ficticio: $100 inicial.
         """
         self._check_new_day()
-        now = time.time()
+        now = clock.time()
         token = random.choice(self.TRACKED_TOKENS)
 
         # Simula metricas
@@ -198,34 +194,39 @@ class MemeCoinStrategy:
                 else:
                     self.total_losses += abs(trade_pnl_usd)
                 self.capital += trade_pnl_usd
+                self.daily.record_trade(trade_pnl_usd)
 
             self.stats["total_trades"] += 1
             if momentum >= 0.7:
                 self.stats["high_momentum_count"] += 1
+
+            if self.event_bus is not None:
+                self.event_bus.publish(TRADE_TOPIC, TradeEvent(
+                    strategy="memecoin", trade_no=self.stats["total_trades"], direction="long",
+                    pnl_pct=round(signal.pnl_pct, 2), status=signal.status,
+                    info={"name": signal.token_name, "pnl_pct": round(signal.pnl_pct, 2),
+                          "status": signal.status},
+                ))
         else:
             signal.status = "watching"
 
-        self.signals.append(signal)
-        if len(self.signals) > 100:
-            self.signals = self.signals[-100:]
+        self._completed.update(signal, self.signals.append(signal))
 
         self._update_stats()
-        return self.get_dashboard_data()
+        self.version += 1
 
     def _update_stats(self):
-        completed = [s for s in self.signals if s.status in ("exited", "stopped")]
-        if completed:
-            pnls = [s.pnl_pct for s in completed]
-            self.stats["avg_pnl"] = sum(pnls) / len(pnls)
-            self.stats["best_trade"] = max(pnls)
-            self.stats["worst_trade"] = min(pnls)
-            self.stats["total_pnl"] = sum(pnls)
+        completed = self._completed
+        if completed.count:
+            self.stats["avg_pnl"] = completed.mean("pnl_pct")
+            self.stats["best_trade"] = completed.max("pnl_pct")
+            self.stats["worst_trade"] = completed.min("pnl_pct")
+            self.stats["total_pnl"] = completed.total("pnl_pct")
             total = self.stats["wins"] + self.stats["losses"]
             self.stats["win_rate"] = (self.stats["wins"] / total) * 100 if total else 0
 
     def get_dashboard_data(self) -> Dict:
-        recent = self.signals[-10:] if self.signals else []
-        today_pnl = self.capital - self._today_start_capital
+        today_pnl = self.daily.today_pnl(self.capital)
         return {
             "strategy_name": self.NAME,
             "risk_level": self.RISK_LEVEL,
@@ -243,7 +244,7 @@ class MemeCoinStrategy:
                 "pnl_pct": round(((self.capital - self.INITIAL_CAPITAL) / self.INITIAL_CAPITAL) * 100, 2),
                 "today_pnl": round(today_pnl, 2),
             },
-            "daily_history": self.daily_history[-7:],
+            "daily_history": self.daily.history(7),
             "stats": self.stats.copy(),
             "recent_signals": [
                 {
@@ -257,7 +258,7 @@ class MemeCoinStrategy:
                     "holders": s.holders,
                     "time": datetime.fromtimestamp(s.detected_at, tz=BR_TZ).strftime("%H:%M:%S"),
                 }
-                for s in reversed(recent)
+                for s in self.signals.recent(10)
             ],
             "config": self.config.copy(),
         }
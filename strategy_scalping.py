@@ -12,19 +12,25 @@ Ideal para: Traders disciplinados com estrategia definida de stop-loss
 
 import asyncio
 import logging
-import time
 import random
 import math
 from datetime import datetime, timezone, timedelta
 from dataclasses import dataclass
-from typing import List, Dict, Optional
+from typing import Dict, Optional
+
+import numpy as np
+
+import clock
+from event_bus import TRADE_TOPIC, TradeEvent
+from montecarlo import EXIT_SL, EXIT_TP, evaluate_exits, simulate_paths, summarize
+from ring_buffer import DailyRollup, EquityCurve, RingBuffer, WindowStats
 
 logger = logging.getLogger("StrategyScalping")
 
 BR_TZ = timezone(timedelta(hours=-3))
 
 
-@dataclass
+@dataclass(slots=True)
 class ScalpTrade:
     token: str
     detected_at: float
@@ -74,16 +80,19 @@ class ScalpingStrategy:
     ]
 
     INITIAL_CAPITAL = 100.0
+    MC_PATHS = 500  # Caminhos Monte Carlo por scalp (custo perto do loop original)
+    EXIT_STATUS = {EXIT_TP: "tp_hit", EXIT_SL: "sl_hit"}
 
     def __init__(self):
-        self.trades: List[ScalpTrade] = []
+        self.trades: RingBuffer = RingBuffer(200)  # ScalpTrade
+        self._completed = WindowStats(
+            ("pnl_pct", "pnl_usd", "hold_time_s"), include=lambda t: t.status != "open",
+        )
         self.capital = self.INITIAL_CAPITAL
         self.total_invested = 0.0
         self.total_gains = 0.0
         self.total_losses = 0.0
-        self.daily_history: List[Dict] = []
-        self._today_str = datetime.now(BR_TZ).strftime("%Y-%m-%d")
-        self._today_start_capital = self.capital
+        self.daily = DailyRollup(self.capital, BR_TZ)
         self.stats = {
             "total_trades": 0,
             "wins": 0,
@@ -116,33 +125,39 @@ class ScalpingStrategy:
             "max_trades_per_hour": 20,   # Max 20 trades/hora
             "trailing_micro_pct": 0.15,  # Micro trailing stop
         }
-        self._start_time = time.time()
-        self._equity_curve = [0.0]
+        self._start_time = clock.time()
+        self._equity_curve = EquityCurve()
         self._consecutive_wins = 0
         self._consecutive_losses = 0
+        self.event_bus = None  # Injetado pelo StrategiesManager
+        self.version = 0  # Incrementa a cada mudanca de estado (cache do dashboard)
+        self._rng = np.random.default_rng()
+        self.monte_carlo: Dict = {}  # EV / percentis do ultimo scalp
 
     def _check_new_day(self):
-        today = datetime.now(BR_TZ).strftime("%Y-%m-%d")
-        if today != self._today_str:
-            self.daily_history.append({
-                "date": self._today_str,
-                "start_capital": self._today_start_capital,
-                "end_capital": self.capital,
-                "pnl": self.capital - self._today_start_capital,
-            })
-            if len(self.daily_history) > 30:
-                self.daily_history = self.daily_history[-30:]
-            self._today_str = today
-            self._today_start_capital = self.capital
-
-    async def simulate_scalp(self) -> Dict:
+        if self.daily.roll(self.capital):
+            self.version += 1
+
+    def _simulate_paths(self, entry: float, direction: str, vol: float):
+        """Caminhos de ticks de 10s (ate 5 min) e saidas de cada um."""
+        hold_times = self._rng.integers(30, 301, size=self.MC_PATHS)
+        paths = simulate_paths(entry, self.MC_PATHS, 300 // 10,
+                               vol * math.sqrt(10/60), rng=self._rng)
+        exits = evaluate_exits(
+            paths, direction,
+            tp_pct=self.config["take_profit_pct"], sl_pct=self.config["stop_loss_pct"],
+            horizon=hold_times // 10, priority=(EXIT_SL, EXIT_TP),
+        )
+        return hold_times, exits
+
+    async def simulate_scalp(self) -> None:
         """
         Simula uma operacao de scalping.
         Em producao: usaria dados tick-by-tick e order book.
         Capital ficticio: $100 inicial.
         """
         self._check_new_day()
-        now = time.time()
+        now = clock.time()
         token_data = random.choice(self.SCALP_TOKENS)
 
         # Simula RSI rapido (periodo 7)
@@ -156,19 +171,17 @@ class ScalpingStrategy:
             direction = "short"
         else:
             # Sem setup - nao opera
-            return self.get_dashboard_data()
+            return
 
         entry = token_data["price"]
         spread_cost = token_data["spread"] / 100
         vol = token_data["volatility_1m"] / 100
 
-        # Simula movimento de preco em 1-5 min
-        hold_time = random.randint(30, 300)
-        ticks = hold_time // 10
-        price_path = [entry]
-        for _ in range(ticks):
-            change = random.gauss(0, vol * math.sqrt(10/60))
-            price_path.append(price_path[-1] * (1 + change))
+        # Simula movimento de preco em 1-5 min (ticks de 10s) em MC_PATHS
+        # caminhos: o caminho 0 e o scalp realizado, o conjunto da o EV.
+        # Numpy roda numa thread para nao segurar o event loop
+        hold_times, exits = await asyncio.to_thread(self._simulate_paths, entry, direction, vol)
+        hold_time = int(hold_times[0])
 
         # Calcula SL e TP
         if direction == "long":
@@ -178,31 +191,11 @@ class ScalpingStrategy:
             sl = entry * (1 + self.config["stop_loss_pct"] / 100)
             tp = entry * (1 - self.config["take_profit_pct"] / 100)
 
-        # Simula execucao
-        exit_price = entry
-        status = "timeout"
-        for p in price_path:
-            if direction == "long":
-                if p <= sl:
-                    exit_price = sl
-                    status = "sl_hit"
-                    break
-                elif p >= tp:
-                    exit_price = tp
-                    status = "tp_hit"
-                    break
-            else:
-                if p >= sl:
-                    exit_price = sl
-                    status = "sl_hit"
-                    break
-                elif p <= tp:
-                    exit_price = tp
-                    status = "tp_hit"
-                    break
-        else:
-            exit_price = price_path[-1]
-            status = "timeout"
+        exit_price = float(exits.exit_price[0])
+        status = self.EXIT_STATUS.get(int(exits.reason[0]), "timeout")
+        self.monte_carlo = summarize(
+            exits.pnl_pct(entry, direction) - spread_cost * 100, exits.reason
+        )
 
         # Calcula PnL
         if direction == "long":
@@ -222,6 +215,7 @@ class ScalpingStrategy:
         else:
             self.total_losses += abs(pnl_usd)
         self.capital += pnl_usd
+        self.daily.record_trade(pnl_usd)
 
         trade = ScalpTrade(
             token=token_data["token"],
@@ -241,9 +235,7 @@ class ScalpingStrategy:
             volume_ratio=volume_ratio,
         )
 
-        self.trades.append(trade)
-        if len(self.trades) > 200:
-            self.trades = self.trades[-200:]
+        self._completed.update(trade, self.trades.append(trade))
 
         # Atualiza contadores
         self.stats["total_trades"] += 1
@@ -265,58 +257,53 @@ class ScalpingStrategy:
         self.stats["consecutive_wins"] = self._consecutive_wins
         self.stats["consecutive_losses"] = self._consecutive_losses
 
-        self._equity_curve.append(self._equity_curve[-1] + pnl_usd)
+        self._equity_curve.add(pnl_usd)
 
         self._update_stats()
-        return self.get_dashboard_data()
+
+        if self.event_bus is not None:
+            self.event_bus.publish(TRADE_TOPIC, TradeEvent(
+                strategy="scalping", trade_no=self.stats["total_trades"], direction=direction,
+                pnl_pct=round(pnl_pct, 3), status=status,
+                info={"token": trade.token, "direction": direction,
+                      "pnl_pct": round(pnl_pct, 3), "status": status},
+            ))
+        self.version += 1
 
     def _update_stats(self):
-        completed = [t for t in self.trades if t.status != "open"]
-        if completed:
-            pnls = [t.pnl_pct for t in completed]
-            pnls_usd = [t.pnl_usd for t in completed]
-            hold_times = [t.hold_time_s for t in completed]
-
-            self.stats["avg_pnl_pct"] = sum(pnls) / len(pnls)
-            self.stats["total_pnl_pct"] = sum(pnls)
-            self.stats["total_pnl_usd"] = sum(pnls_usd)
-            self.stats["best_trade_pct"] = max(pnls)
-            self.stats["worst_trade_pct"] = min(pnls)
-            self.stats["avg_hold_time_s"] = sum(hold_times) / len(hold_times)
+        completed = self._completed
+        if completed.count:
+            self.stats["avg_pnl_pct"] = completed.mean("pnl_pct")
+            self.stats["total_pnl_pct"] = completed.total("pnl_pct")
+            self.stats["total_pnl_usd"] = completed.total("pnl_usd")
+            self.stats["best_trade_pct"] = completed.max("pnl_pct")
+            self.stats["worst_trade_pct"] = completed.min("pnl_pct")
+            self.stats["avg_hold_time_s"] = completed.mean("hold_time_s")
 
             total = self.stats["wins"] + self.stats["losses"]
             self.stats["win_rate"] = (self.stats["wins"] / total) * 100 if total else 0
 
-            elapsed_h = (time.time() - self._start_time) / 3600
+            elapsed_h = (clock.time() - self._start_time) / 3600
             if elapsed_h > 0:
-                self.stats["trades_per_hour"] = len(completed) / elapsed_h
+                self.stats["trades_per_hour"] = completed.count / elapsed_h
 
             # Profit factor
-            gross_wins = sum(p for p in pnls_usd if p > 0)
-            gross_losses = abs(sum(p for p in pnls_usd if p < 0))
+            gross_wins = completed.gains("pnl_usd")
+            gross_losses = completed.losses("pnl_usd")
             self.stats["profit_factor"] = gross_wins / gross_losses if gross_losses > 0 else 0
 
             # Sharpe estimate
-            if len(pnls) > 1:
-                avg = sum(pnls) / len(pnls)
-                variance = sum((p - avg) ** 2 for p in pnls) / len(pnls)
+            if completed.count > 1:
+                avg = completed.mean("pnl_pct")
+                variance = completed.variance("pnl_pct")
                 std = math.sqrt(variance) if variance > 0 else 1
                 self.stats["sharpe_estimate"] = round((avg / std) * math.sqrt(252), 2)
 
-            # Max drawdown
-            peak = 0
-            max_dd = 0
-            for eq in self._equity_curve:
-                if eq > peak:
-                    peak = eq
-                dd = peak - eq
-                if dd > max_dd:
-                    max_dd = dd
-            self.stats["max_drawdown_pct"] = round(max_dd, 2)
+            # Max drawdown (corrido na EquityCurve)
+            self.stats["max_drawdown_pct"] = round(self._equity_curve.max_drawdown, 2)
 
     def get_dashboard_data(self) -> Dict:
-        recent = self.trades[-10:] if self.trades else []
-        today_pnl = self.capital - self._today_start_capital
+        today_pnl = self.daily.today_pnl(self.capital)
         return {
             "strategy_name": self.NAME,
             "risk_level": self.RISK_LEVEL,
@@ -334,7 +321,7 @@ class ScalpingStrategy:
                 "pnl_pct": round(((self.capital - self.INITIAL_CAPITAL) / self.INITIAL_CAPITAL) * 100, 2),
                 "today_pnl": round(today_pnl, 2),
             },
-            "daily_history": self.daily_history[-7:],
+            "daily_history": self.daily.history(7),
             "stats": self.stats.copy(),
             "recent_trades": [
                 {
@@ -347,8 +334,9 @@ class ScalpingStrategy:
                     "rsi": round(t.rsi_at_entry, 1),
                     "time": datetime.fromtimestamp(t.detected_at, tz=BR_TZ).strftime("%H:%M:%S"),
                 }
-                for t in reversed(recent)
+                for t in self.trades.recent(10)
             ],
-            "equity_curve": self._equity_curve[-50:],
+            "equity_curve": self._equity_curve.tail(50),
+            "monte_carlo": self.monte_carlo,
             "config": self.config.copy(),
         }
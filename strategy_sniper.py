@@ -12,18 +12,21 @@ Ideal para: Traders agressivos com capital para testar multiplos lancamentos
 
 import asyncio
 import logging
-import time
 import random
 from datetime import datetime, timezone, timedelta
 from dataclasses import dataclass, field
-from typing import List, Dict, Optional
+from typing import Dict, Optional
+
+import clock
+from event_bus import TRADE_TOPIC, TradeEvent
+from ring_buffer import DailyRollup, RingBuffer, WindowStats
 
 logger = logging.getLogger("StrategySniping")
 
 BR_TZ = timezone(timedelta(hours=-3))
 
 
-@dataclass
+@dataclass(slots=True)
 class SnipeTarget:
     token_address: str
     token_name: str
@@ -63,14 +66,16 @@ class SnipingStrategy:
     INITIAL_CAPITAL = 100.0
 
     def __init__(self):
-        self.targets: List[SnipeTarget] = []
+        self.targets: RingBuffer = RingBuffer(100)  # SnipeTarget
+        self._completed = WindowStats(
+            ("pnl_pct",),
+            include=lambda t: t.status in ("sold", "rugged", "failed") and t.pnl_pct != 0,
+        )
         self.capital = self.INITIAL_CAPITAL
         self.total_invested = 0.0
         self.total_gains = 0.0
         self.total_losses = 0.0
-        self.daily_history: List[Dict] = []
-        self._today_str = datetime.now(BR_TZ).strftime("%Y-%m-%d")
-        self._today_start_capital = self.capital
+        self.daily = DailyRollup(self.capital, BR_TZ)
         self.stats = {
             "total_snipes": 0,
             "successful": 0,
@@ -97,22 +102,14 @@ class SnipingStrategy:
             "trade_size_pct": 10.0,     # Usa 10% do capital por snipe
         }
         self._running = False
+        self.event_bus = None  # Injetado pelo StrategiesManager
+        self.version = 0  # Incrementa a cada mudanca de estado (cache do dashboard)
 
     def _check_new_day(self):
-        today = datetime.now(BR_TZ).strftime("%Y-%m-%d")
-        if today != self._today_str:
-            self.daily_history.append({
-                "date": self._today_str,
-                "start_capital": self._today_start_capital,
-                "end_capital": self.capital,
-                "pnl": self.capital - self._today_start_capital,
-            })
-            if len(self.daily_history) > 30:
-                self.daily_history = self.daily_history[-30:]
-            self._today_str = today
-            self._today_start_capital = self.capital
-
-    async def simulate_monitoring(self) -> Dict:
+        if self.daily.roll(self.capital):
+            self.version += 1
+
+    async def simulate_monitoring(self) -> None:
         """
         Simula monitoramento de novos tokens.
         Em producao: conectaria ao websocket do Pump.fun para detectar lancamentos.
@@ -120,7 +117,7 @@ class SnipingStrategy:
         Capital ficticio: $100 inicial, cada snipe usa % do capital.
         """
         self._check_new_day()
-        now = time.time()
+        now = clock.time()
         simulated_tokens = [
             {"name": "DOGE2024", "liq": 5.2, "holders": 12, "price_change": random.uniform(-80, 500)},
             {"name": "MOONCAT", "liq": 2.1, "holders": 8, "price_change": random.uniform(-90, 1000)},
@@ -174,32 +171,36 @@ class SnipingStrategy:
             else:
                 self.total_losses += abs(trade_pnl_usd)
             self.capital += trade_pnl_usd
+            self.daily.record_trade(trade_pnl_usd)
 
         target.current_price = target.buy_price * (1 + target.pnl_pct / 100)
-        self.targets.append(target)
-        if len(self.targets) > 100:
-            self.targets = self.targets[-100:]
+        self._completed.update(target, self.targets.append(target))
 
         self.stats["total_snipes"] += 1
         self.stats["tokens_monitored"] += 1
         self._update_stats()
 
-        return self.get_dashboard_data()
+        if self.event_bus is not None:
+            self.event_bus.publish(TRADE_TOPIC, TradeEvent(
+                strategy="sniper", trade_no=self.stats["total_snipes"], direction="long",
+                pnl_pct=round(target.pnl_pct, 2), status=target.status,
+                info={"name": target.token_name, "pnl_pct": round(target.pnl_pct, 2),
+                      "status": target.status},
+            ))
+
+        self.version += 1
 
     def _update_stats(self):
-        completed = [t for t in self.targets if t.status in ("sold", "rugged", "failed") and t.pnl_pct != 0]
-        if completed:
-            pnls = [t.pnl_pct for t in completed]
-            self.stats["avg_pnl"] = sum(pnls) / len(pnls)
-            self.stats["best_pnl"] = max(pnls)
-            self.stats["worst_pnl"] = min(pnls)
-            self.stats["total_pnl"] = sum(pnls)
-            wins = sum(1 for p in pnls if p > 0)
-            self.stats["win_rate"] = (wins / len(pnls)) * 100 if pnls else 0
+        completed = self._completed
+        if completed.count:
+            self.stats["avg_pnl"] = completed.mean("pnl_pct")
+            self.stats["best_pnl"] = completed.max("pnl_pct")
+            self.stats["worst_pnl"] = completed.min("pnl_pct")
+            self.stats["total_pnl"] = completed.total("pnl_pct")
+            self.stats["win_rate"] = (completed.positives("pnl_pct") / completed.count) * 100
 
     def get_dashboard_data(self) -> Dict:
-        recent = self.targets[-10:] if self.targets else []
-        today_pnl = self.capital - self._today_start_capital
+        today_pnl = self.daily.today_pnl(self.capital)
         return {
             "strategy_name": self.NAME,
             "risk_level": self.RISK_LEVEL,
@@ -217,7 +218,7 @@ class SnipingStrategy:
                 "pnl_pct": round(((self.capital - self.INITIAL_CAPITAL) / self.INITIAL_CAPITAL) * 100, 2),
                 "today_pnl": round(today_pnl, 2),
             },
-            "daily_history": self.daily_history[-7:],
+            "daily_history": self.daily.history(7),
             "stats": self.stats.copy(),
             "recent_targets": [
                 {
@@ -228,7 +229,7 @@ class SnipingStrategy:
                     "holders": t.holders,
                     "time": datetime.fromtimestamp(t.detected_at, tz=BR_TZ).strftime("%H:%M:%S"),
                 }
-                for t in reversed(recent)
+                for t in self.targets.recent(10)
             ],
             "config": self.config.copy(),
         }
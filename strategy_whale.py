@@ -25,13 +25,20 @@ Ferramentas: Whale Alert API, Solana RPC, Jupiter DEX
 
 import asyncio
 import logging
-import time
 import random
 import math
 import hashlib
 from datetime import datetime, timezone, timedelta
 from dataclasses import dataclass, field
-from typing import List, Dict, Optional
+from typing import Dict, Optional
+
+import numpy as np
+
+import clock
+from event_bus import TRADE_TOPIC, TradeEvent
+from montecarlo import (EXIT_SL, EXIT_TP, evaluate_exits, regime_params,
+                        simulate_paths, summarize)
+from ring_buffer import DailyRollup, EquityCurve, RingBuffer, WindowStats
 
 logger = logging.getLogger("StrategyWhale")
 
@@ -67,7 +74,7 @@ WHALE_WALLETS = [
 ]
 
 
-@dataclass
+@dataclass(slots=True)
 class WhaleSignal:
     """Sinal detectado de movimentacao de baleia."""
     detected_at: float
@@ -110,16 +117,20 @@ class WhaleTrackingStrategy:
     TOOLS = ["Whale Alert API", "Solana RPC", "Jupiter DEX", "Wallet Tracker"]
 
     INITIAL_CAPITAL = 100.0
+    MC_PATHS = 300  # Caminhos Monte Carlo por trade (custo perto do loop original)
+    EXIT_STATUS = {EXIT_TP: "tp_hit", EXIT_SL: "sl_hit"}
 
     def __init__(self):
-        self.trades: List[WhaleSignal] = []
+        self.trades: RingBuffer = RingBuffer(200)  # WhaleSignal
+        self._completed = WindowStats(
+            ("pnl_pct", "pnl_usd", "hold_time_s", "amount_usd"),
+            include=lambda t: t.status not in ("detected", "skipped"),
+        )
         self.capital = self.INITIAL_CAPITAL
         self.total_invested = 0.0
         self.total_gains = 0.0
         self.total_losses = 0.0
-        self.daily_history: List[Dict] = []
-        self._today_str = datetime.now(BR_TZ).strftime("%Y-%m-%d")
-        self._today_start_capital = self.capital
+        self.daily = DailyRollup(self.capital, BR_TZ)
         self.stats = {
             "total_trades": 0,
             "wins": 0,
@@ -152,24 +163,18 @@ class WhaleTrackingStrategy:
             "follow_buys_only": False,    # Se True, so segue compras (mais conservador)
             "trailing_pct": 1.5,          # Trailing stop %
         }
-        self._start_time = time.time()
-        self._equity_curve = [0.0]
+        self._start_time = clock.time()
+        self._equity_curve = EquityCurve()
         self._last_trade_time = 0
         self._whale_performance: Dict[str, Dict] = {}  # Performance por baleia
+        self.event_bus = None  # Injetado pelo StrategiesManager
+        self.version = 0  # Incrementa a cada mudanca de estado (cache do dashboard)
+        self._rng = np.random.default_rng()
+        self.monte_carlo: Dict = {}  # EV / percentis do ultimo trade
 
     def _check_new_day(self):
-        today = datetime.now(BR_TZ).strftime("%Y-%m-%d")
-        if today != self._today_str:
-            self.daily_history.append({
-                "date": self._today_str,
-                "start_capital": self._today_start_capital,
-                "end_capital": self.capital,
-                "pnl": self.capital - self._today_start_capital,
-            })
-            if len(self.daily_history) > 30:
-                self.daily_history = self.daily_history[-30:]
-            self._today_str = today
-            self._today_start_capital = self.capital
+        if self.daily.roll(self.capital):
+            self.version += 1
 
     def _generate_whale_signal(self) -> Optional[WhaleSignal]:
         """
@@ -219,12 +224,12 @@ class WhaleTrackingStrategy:
             destination = whale["label"]
         else:
             source = whale["label"]
-            destination = f"Wallet_{hashlib.md5(str(time.time()).encode()).hexdigest()[:8]}"
+            destination = f"Wallet_{hashlib.md5(str(clock.time()).encode()).hexdigest()[:8]}"
 
         self.stats["signals_detected"] += 1
 
         return WhaleSignal(
-            detected_at=time.time(),
+            detected_at=clock.time(),
             whale_label=whale["label"],
             move_type=move_type,
             direction=direction,
@@ -274,43 +279,71 @@ class WhaleTrackingStrategy:
 
         return max(0.1, min(0.95, conf))
 
-    async def simulate_whale_tracking(self) -> Dict:
+    def _simulate_paths(self, base_price: float, direction: str, conf: float):
+        """Caminhos de ticks de 30s (ate max_hold_time_s) e saidas de cada um."""
+        n = self.MC_PATHS
+        volatility = 0.001 * math.sqrt(30/60)  # SOL volatilidade por minuto, ticks de 30s
+        if direction == "long":
+            right_drift, wrong_drift = (0.0002, 0.001), (-0.0008, 0.0002)    # Sobe / lateral-cai
+        else:
+            right_drift, wrong_drift = (-0.001, -0.0002), (-0.0002, 0.0008)  # Cai / lateral-sobe
+        vol, drift = regime_params(n, [
+            {"prob": conf, "vol": volatility, "drift": right_drift},
+            {"prob": 1 - conf, "vol": volatility, "drift": wrong_drift},
+        ], rng=self._rng)
+
+        hold_times = self._rng.integers(60, self.config["max_hold_time_s"] + 1, size=n)
+        paths = simulate_paths(base_price, n, max(1, self.config["max_hold_time_s"] // 30),
+                               vol, drift=drift, rng=self._rng)
+
+        # Aplica TP/SL nos caminhos
+        exits = evaluate_exits(
+            paths, direction,
+            tp_pct=self.config["take_profit_pct"], sl_pct=self.config["stop_loss_pct"],
+            horizon=np.maximum(1, hold_times // 30), priority=(EXIT_TP, EXIT_SL),
+        )
+        return hold_times, exits
+
+    async def simulate_whale_tracking(self) -> None:
         """
         Simula um ciclo de monitoramento de baleias.
         Em producao: buscaria dados da Whale Alert API e Solana RPC.
         """
         self._check_new_day()
-        now = time.time()
+        now = clock.time()
 
         # Gera sinal de baleia
         signal = self._generate_whale_signal()
 
         if not signal:
-            return self.get_dashboard_data()
+            return
+
+        # Sinal novo: contadores (e possivelmente um trade) mudam
+        self.version += 1
 
         # Filtro: tamanho minimo
         if signal.amount_usd < self.config["min_whale_amount_usd"]:
             signal.status = "skipped"
             self.stats["skipped"] += 1
-            return self.get_dashboard_data()
+            return
 
         # Filtro: confianca minima
         if signal.confidence_score < self.config["min_confidence"]:
             signal.status = "skipped"
             self.stats["skipped"] += 1
-            return self.get_dashboard_data()
+            return
 
         # Filtro: so segue compras se configurado
         if self.config["follow_buys_only"] and signal.direction != "long":
             signal.status = "skipped"
             self.stats["skipped"] += 1
-            return self.get_dashboard_data()
+            return
 
         # Filtro: cooldown
         if now - self._last_trade_time < self.config["cooldown_s"]:
             signal.status = "skipped"
             self.stats["skipped"] += 1
-            return self.get_dashboard_data()
+            return
 
         # === SIMULA EXECUCAO DO TRADE ===
         self.stats["signals_followed"] += 1
@@ -320,79 +353,24 @@ class WhaleTrackingStrategy:
         base_price = 180.0 + random.uniform(-10, 10)
         signal.entry_price = base_price
 
-        # Simula movimento de preco apos o sinal
-        # Baleias geralmente movem o mercado na direcao certa 55-70% do tempo
-        whale_accuracy = random.random()
-        whale_is_right = whale_accuracy < signal.confidence_score
-
         trade_size = self.capital * (self.config["trade_size_pct"] / 100)
         if trade_size < 0.01:
             trade_size = 0.01
 
-        hold_time = random.randint(60, self.config["max_hold_time_s"])
-
-        # Simula path de preco
-        volatility = 0.001  # SOL volatilidade por minuto
-        ticks = hold_time // 30
-        price_path = [base_price]
-
-        # Drift baseado em se a baleia acertou
-        if whale_is_right:
-            if signal.direction == "long":
-                drift = random.uniform(0.0002, 0.001)  # Sobe
-            else:
-                drift = random.uniform(-0.001, -0.0002)  # Cai
-        else:
-            if signal.direction == "long":
-                drift = random.uniform(-0.0008, 0.0002)  # Lateral/cai
-            else:
-                drift = random.uniform(-0.0002, 0.0008)  # Lateral/sobe
-
-        for _ in range(max(1, ticks)):
-            change = drift + random.gauss(0, volatility * math.sqrt(30/60))
-            price_path.append(price_path[-1] * (1 + change))
-
-        # Aplica TP/SL no path
-        tp_pct = self.config["take_profit_pct"]
-        sl_pct = self.config["stop_loss_pct"]
+        # Simula movimento de preco apos o sinal em MC_PATHS caminhos.
+        # Baleias geralmente movem o mercado na direcao certa 55-70% do tempo:
+        # cada caminho sorteia se a baleia acertou (prob = confianca) e o drift
+        # do regime correspondente. Caminho 0 = trade realizado.
+        # Numpy roda numa thread para nao segurar o event loop
+        hold_times, exits = await asyncio.to_thread(
+            self._simulate_paths, base_price, signal.direction, signal.confidence_score
+        )
+        hold_time = int(hold_times[0])
 
-        if signal.direction == "long":
-            tp_price = base_price * (1 + tp_pct / 100)
-            sl_price = base_price * (1 - sl_pct / 100)
-        else:
-            tp_price = base_price * (1 - tp_pct / 100)
-            sl_price = base_price * (1 + sl_pct / 100)
-
-        exit_price = base_price
-        status = "timeout"
-        actual_hold = hold_time
-
-        for i, p in enumerate(price_path):
-            if signal.direction == "long":
-                if p >= tp_price:
-                    exit_price = tp_price
-                    status = "tp_hit"
-                    actual_hold = (i + 1) * 30
-                    break
-                elif p <= sl_price:
-                    exit_price = sl_price
-                    status = "sl_hit"
-                    actual_hold = (i + 1) * 30
-                    break
-            else:
-                if p <= tp_price:
-                    exit_price = tp_price
-                    status = "tp_hit"
-                    actual_hold = (i + 1) * 30
-                    break
-                elif p >= sl_price:
-                    exit_price = sl_price
-                    status = "sl_hit"
-                    actual_hold = (i + 1) * 30
-                    break
-        else:
-            exit_price = price_path[-1]
-            status = "timeout"
+        exit_price = float(exits.exit_price[0])
+        status = self.EXIT_STATUS.get(int(exits.reason[0]), "timeout")
+        actual_hold = (int(exits.exit_step[0]) + 1) * 30 if status != "timeout" else hold_time
+        self.monte_carlo = summarize(exits.pnl_pct(base_price, signal.direction), exits.reason)
 
         # Calcula PnL
         if signal.direction == "long":
@@ -409,6 +387,7 @@ class WhaleTrackingStrategy:
         else:
             self.total_losses += abs(pnl_usd)
         self.capital += pnl_usd
+        self.daily.record_trade(pnl_usd)
 
         # Atualiza sinal
         signal.status = status
@@ -417,9 +396,7 @@ class WhaleTrackingStrategy:
         signal.pnl_usd = pnl_usd
         signal.hold_time_s = actual_hold
 
-        self.trades.append(signal)
-        if len(self.trades) > 200:
-            self.trades = self.trades[-200:]
+        self._completed.update(signal, self.trades.append(signal))
 
         # Atualiza stats
         self.stats["total_trades"] += 1
@@ -437,28 +414,30 @@ class WhaleTrackingStrategy:
             self._whale_performance[wl]["wins"] += 1
         self._whale_performance[wl]["pnl"] += pnl_usd
 
-        self._equity_curve.append(self._equity_curve[-1] + pnl_usd)
+        self._equity_curve.add(pnl_usd)
         self._update_stats()
 
-        return self.get_dashboard_data()
+        if self.event_bus is not None:
+            self.event_bus.publish(TRADE_TOPIC, TradeEvent(
+                strategy="whale", trade_no=self.stats["total_trades"], direction=signal.direction,
+                pnl_pct=round(pnl_pct, 3), status=status,
+                info={"name": signal.whale_label, "direction": signal.direction,
+                      "pnl_pct": round(pnl_pct, 3), "status": status,
+                      "move_type": signal.move_type},
+            ))
 
     def _update_stats(self):
-        completed = [t for t in self.trades if t.status not in ("detected", "skipped")]
-        if not completed:
+        completed = self._completed
+        if not completed.count:
             return
 
-        pnls = [t.pnl_pct for t in completed]
-        pnls_usd = [t.pnl_usd for t in completed]
-        hold_times = [t.hold_time_s for t in completed]
-        amounts = [t.amount_usd for t in completed]
-
-        self.stats["avg_pnl_pct"] = sum(pnls) / len(pnls)
-        self.stats["total_pnl_pct"] = sum(pnls)
-        self.stats["total_pnl_usd"] = sum(pnls_usd)
-        self.stats["best_trade_pct"] = max(pnls)
-        self.stats["worst_trade_pct"] = min(pnls)
-        self.stats["avg_hold_time_s"] = sum(hold_times) / len(hold_times)
-        self.stats["avg_whale_amount_usd"] = sum(amounts) / len(amounts)
+        self.stats["avg_pnl_pct"] = completed.mean("pnl_pct")
+        self.stats["total_pnl_pct"] = completed.total("pnl_pct")
+        self.stats["total_pnl_usd"] = completed.total("pnl_usd")
+        self.stats["best_trade_pct"] = completed.max("pnl_pct")
+        self.stats["worst_trade_pct"] = completed.min("pnl_pct")
+        self.stats["avg_hold_time_s"] = completed.mean("hold_time_s")
+        self.stats["avg_whale_amount_usd"] = completed.mean("amount_usd")
 
         total = self.stats["wins"] + self.stats["losses"]
         self.stats["win_rate"] = (self.stats["wins"] / total) * 100 if total else 0
@@ -470,8 +449,7 @@ class WhaleTrackingStrategy:
             self.stats["top_whale_pnl"] = round(best[1]["pnl"], 4)
 
     def get_dashboard_data(self) -> Dict:
-        recent = self.trades[-10:] if self.trades else []
-        today_pnl = self.capital - self._today_start_capital
+        today_pnl = self.daily.today_pnl(self.capital)
 
         # Top baleias para dashboard
         whale_rankings = []
@@ -502,7 +480,7 @@ class WhaleTrackingStrategy:
                 "pnl_pct": round(((self.capital - self.INITIAL_CAPITAL) / self.INITIAL_CAPITAL) * 100, 2),
                 "today_pnl": round(today_pnl, 2),
             },
-            "daily_history": self.daily_history[-7:],
+            "daily_history": self.daily.history(7),
             "stats": self.stats.copy(),
             "recent_trades": [
                 {
@@ -519,10 +497,11 @@ class WhaleTrackingStrategy:
                     "destination": t.destination,
                     "time": datetime.fromtimestamp(t.detected_at, tz=BR_TZ).strftime("%H:%M:%S"),
                 }
-                for t in reversed(recent)
+                for t in self.trades.recent(10)
                 if t.status not in ("detected", "skipped")
             ],
             "whale_rankings": whale_rankings,
-            "equity_curve": self._equity_curve[-50:],
+            "equity_curve": self._equity_curve.tail(50),
+            "monte_carlo": self.monte_carlo,
             "config": self.config.copy(),
         }
@@ -0,0 +1,259 @@
+"""
+Mercado Sintetico - Gerador vetorizado de candles OHLCV
+=========================================================
+Gera candles no mesmo formato do PriceDataFetcher.fetch_ohlcv
+(DataFrame indexado por "timestamp" UTC naive, colunas open/high/low/
+close/volume em float), com seed, para backtests, benchmarks e testes
+de escala dos indicadores e do aprendizado.
+
+Modelo (tudo em NumPy, sem loop por candle):
+    - regimes de volatilidade/tendencia (calmo, normal, volatil,
+      tendencia de alta/baixa) em blocos de duracao geometrica
+    - retornos log normais (ou t de Student com tail_df) por regime
+    - saltos: eventos raros de mercado que atingem todos os ativos
+    - volume com clustering: ruido log-normal suavizado + regime +
+      tamanho do movimento do candle
+    - multiplos ativos correlacionados (Cholesky da matriz de correlacao)
+
+Tamanho: next(n) gera n candles de uma vez; iter_ohlcv() entrega em
+blocos contiguos (preco, regime e volume continuam de um bloco ao
+outro), entao centenas de milhoes de candles cabem em memoria constante.
+
+Uso:
+    df = generate_ohlcv(10_000, timeframe="5m", seed=42)
+    market = generate_market(["SOL", "JUP"], 10_000, corr=[[1, .7], [.7, 1]])
+    for chunk in iter_ohlcv(500_000_000, chunk=1_000_000): ...
+
+    python synthetic_market.py --bars 100000 --timeframe 5m --out candles.csv
+    python learning_replay.py candles.csv
+"""
+
+import argparse
+from typing import Dict, Iterator, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+OHLCV_COLUMNS = ["open", "high", "low", "close", "volume"]
+
+TIMEFRAME_SECONDS = {
+    "1m": 60, "5m": 300, "15m": 900, "30m": 1800,
+    "1h": 3600, "4h": 14400, "1d": 86400, "1w": 604800,
+}
+
+DEFAULT_START = "2024-01-01"
+
+# Regimes por hora: vol = desvio do retorno log em 1h, drift = retorno
+# medio em 1h, hours = duracao media, volume = multiplicador de volume.
+# "prob" = chance de ser o proximo bloco.
+REGIMES = [
+    {"name": "calm",     "prob": 0.30, "vol": 0.004, "drift": 0.0,     "hours": 24, "volume": 0.6},
+    {"name": "normal",   "prob": 0.35, "vol": 0.008, "drift": 0.0,     "hours": 12, "volume": 1.0},
+    {"name": "volatile", "prob": 0.15, "vol": 0.018, "drift": 0.0,     "hours": 6,  "volume": 2.2},
+    {"name": "trend_up", "prob": 0.10, "vol": 0.009, "drift": 0.0012,  "hours": 18, "volume": 1.3},
+    {"name": "trend_dn", "prob": 0.10, "vol": 0.011, "drift": -0.0012, "hours": 18, "volume": 1.5},
+]
+
+JUMP_PROB_PER_HOUR = 0.004    # Eventos de salto (todos os ativos)
+JUMP_VOL = 0.03               # Desvio do salto (retorno log)
+VOLUME_HALFLIFE = 12          # Candles de memoria do clustering de volume
+VOLUME_NOISE = 0.35           # Desvio do ruido log do volume
+VOLUME_MOVE_BETA = 0.4        # Peso do |retorno| (em desvios) no volume
+VOLUME_MOVE_CAP = 6.0         # Saltos nao explodem o volume
+WICK_SCALE = 0.5              # Pavios em desvios do candle
+
+
+class MarketGenerator:
+    """
+    Gerador com estado: cada next(n) continua do ultimo candle.
+
+    symbols: nomes dos ativos (colunas da correlacao).
+    prices: preco inicial por ativo (padrao 150).
+    corr: matriz de correlacao dos retornos (padrao identidade).
+    vol_scale: multiplicador de volatilidade por ativo (padrao 1).
+    tail_df: graus de liberdade da t de Student (None = normal).
+    """
+
+    def __init__(self, symbols: Sequence[str] = ("SOL",), timeframe: str = "5m",
+                 start=DEFAULT_START, prices: Optional[Sequence[float]] = None,
+                 corr=None, vol_scale: Optional[Sequence[float]] = None,
+                 base_volume: Optional[Sequence[float]] = None,
+                 regimes: Sequence[Dict] = REGIMES, jump_prob_per_hour: float = JUMP_PROB_PER_HOUR,
+                 jump_vol: float = JUMP_VOL, tail_df: Optional[float] = None,
+                 seed: Optional[int] = None, dtype=np.float64):
+        if timeframe not in TIMEFRAME_SECONDS:
+            raise ValueError(f"Timeframe {timeframe} nao suportado")
+        self.symbols = list(symbols)
+        k = len(self.symbols)
+        self.timeframe = timeframe
+        self.width = TIMEFRAME_SECONDS[timeframe]
+        self.rng = np.random.default_rng(seed)
+        self.dtype = dtype
+        self.tail_df = tail_df
+
+        start = pd.Timestamp(start)
+        if start.tz is not None:
+            start = start.tz_convert("UTC").tz_localize(None)
+        self._next_ts = (start.value // 10**9) // self.width * self.width
+
+        corr = np.eye(k) if corr is None else np.asarray(corr, dtype=np.float64)
+        self.chol = np.linalg.cholesky(corr)
+
+        # Parametros por candle a partir dos valores por hora
+        hours = self.width / 3600
+        self.regimes = list(regimes)
+        self.reg_vol = np.array([r["vol"] for r in regimes]) * np.sqrt(hours)
+        self.reg_drift = np.array([r["drift"] for r in regimes]) * hours
+        self.reg_volume = np.log([r.get("volume", 1.0) for r in regimes])
+        self.reg_bars = np.maximum(1.0, np.array([r["hours"] for r in regimes]) / hours)
+        probs = np.array([r["prob"] for r in regimes], dtype=np.float64)
+        self.reg_prob = probs / probs.sum()
+        self.jump_prob = min(1.0, jump_prob_per_hour * hours)
+        self.jump_vol = jump_vol
+
+        self.vol_scale = np.ones(k) if vol_scale is None else np.asarray(vol_scale, dtype=np.float64)
+        self.log_base_volume = np.log(
+            np.full(k, 1000.0 * self.width / 60) if base_volume is None else np.asarray(base_volume, float)
+        )
+
+        # Kernel exponencial do clustering de volume (variancia unitaria)
+        decay = 0.5 ** (1 / VOLUME_HALFLIFE)
+        kernel = decay ** np.arange(VOLUME_HALFLIFE * 8)
+        self.kernel = kernel / np.sqrt((kernel ** 2).sum())
+
+        # Estado entre blocos
+        self._log_close = np.log(np.full(k, 150.0) if prices is None else np.asarray(prices, float))
+        self._regime = int(self.rng.choice(len(self.regimes), p=self.reg_prob))
+        self._regime_left = int(self.rng.geometric(1 / self.reg_bars[self._regime]))
+        self._noise_tail = self.rng.standard_normal((len(self.kernel) - 1, k))
+
+    def _regime_path(self, n: int) -> np.ndarray:
+        """Regime de cada candle: blocos de duracao geometrica (media = hours)."""
+        out = np.empty(n, dtype=np.intp)
+        head = min(n, self._regime_left)
+        out[:head] = self._regime
+        filled = head
+        self._regime_left -= head
+        while filled < n:
+            runs = max(16, int((n - filled) / self.reg_bars.min()) // 4)
+            labels = self.rng.choice(len(self.regimes), size=runs, p=self.reg_prob)
+            lengths = self.rng.geometric(1 / self.reg_bars[labels])
+            path = np.repeat(labels, lengths)
+            take = min(n - filled, len(path))
+            out[filled:filled + take] = path[:take]
+            filled += take
+            if filled == n:
+                # Sobra do ultimo bloco fica para o proximo next()
+                ends = np.cumsum(lengths)
+                last = int(np.searchsorted(ends, take - 1, side="right"))
+                self._regime = int(labels[last])
+                self._regime_left = int(ends[last] - take)
+        return out
+
+    def _shocks(self, n: int) -> np.ndarray:
+        """Choques correlacionados (n, k) com variancia unitaria."""
+        z = self.rng.standard_normal((n, len(self.symbols)))
+        if self.tail_df:
+            df = self.tail_df
+            z *= np.sqrt((df - 2) / self.rng.chisquare(df, size=(n, 1)))
+        return z @ self.chol.T
+
+    def next(self, n: int) -> Dict[str, pd.DataFrame]:
+        """Proximos n candles de cada ativo."""
+        k = len(self.symbols)
+        regime = self._regime_path(n)
+        bar_vol = self.reg_vol[regime][:, None] * self.vol_scale
+        z = self._shocks(n)
+
+        returns = z * bar_vol
+        returns += self.reg_drift[regime][:, None]
+        jumps = np.flatnonzero(self.rng.random(n) < self.jump_prob)
+        if len(jumps):
+            returns[jumps] += self._shocks(len(jumps)) * self.jump_vol * self.vol_scale
+
+        log_close = np.cumsum(returns, axis=0)
+        log_close += self._log_close
+        log_open = np.empty_like(log_close)
+        log_open[0] = self._log_close
+        log_open[1:] = log_close[:-1]
+        self._log_close = log_close[-1].copy()
+
+        wick = np.abs(self.rng.standard_normal((2, n, k))) * (bar_vol * WICK_SCALE)
+        log_high = np.maximum(log_open, log_close) + wick[0]
+        log_low = np.minimum(log_open, log_close) - wick[1]
+
+        # Volume: ruido suavizado (memoria entre blocos) + regime + movimento
+        noise = np.concatenate([self._noise_tail, self.rng.standard_normal((n, k))])
+        self._noise_tail = noise[-(len(self.kernel) - 1):]
+        smooth = np.column_stack([
+            np.convolve(noise[:, j], self.kernel, mode="valid") for j in range(k)
+        ])
+        move = np.minimum(np.abs(returns) / np.maximum(bar_vol, 1e-12), VOLUME_MOVE_CAP)
+        log_volume = self.log_base_volume + self.reg_volume[regime][:, None] \
+            + VOLUME_NOISE * smooth + VOLUME_MOVE_BETA * (move - 0.8)
+
+        stamps = self._next_ts + self.width * np.arange(n, dtype=np.int64)
+        self._next_ts = int(stamps[-1]) + self.width if n else self._next_ts
+        index = pd.DatetimeIndex(stamps.astype("datetime64[s]").astype("datetime64[ns]"), name="timestamp")
+
+        frames = {}
+        for j, symbol in enumerate(self.symbols):
+            columns = (log_open[:, j], log_high[:, j], log_low[:, j], log_close[:, j], log_volume[:, j])
+            data = {name: np.exp(col).astype(self.dtype, copy=False) for name, col in zip(OHLCV_COLUMNS, columns)}
+            frames[symbol] = pd.DataFrame(data, index=index, columns=OHLCV_COLUMNS)
+        return frames
+
+
+def generate_ohlcv(n: int, timeframe: str = "5m", seed: Optional[int] = None,
+                   price: float = 150.0, **kwargs) -> pd.DataFrame:
+    """n candles de um ativo (formato do fetch_ohlcv)."""
+    gen = MarketGenerator(("SYN",), timeframe=timeframe, prices=[price], seed=seed, **kwargs)
+    return gen.next(n)["SYN"]
+
+
+def generate_market(symbols: Sequence[str], n: int, timeframe: str = "5m",
+                    corr=None, seed: Optional[int] = None, **kwargs) -> Dict[str, pd.DataFrame]:
+    """n candles de varios ativos correlacionados (mesmos regimes e saltos)."""
+    return MarketGenerator(symbols, timeframe=timeframe, corr=corr, seed=seed, **kwargs).next(n)
+
+
+def iter_ohlcv(n: int, chunk: int = 1_000_000, timeframe: str = "5m",
+               seed: Optional[int] = None, **kwargs) -> Iterator[pd.DataFrame]:
+    """n candles de um ativo em blocos contiguos de ate `chunk`."""
+    gen = MarketGenerator(("SYN",), timeframe=timeframe, seed=seed, **kwargs)
+    done = 0
+    while done < n:
+        size = min(chunk, n - done)
+        yield gen.next(size)["SYN"]
+        done += size
+
+
+def to_ohlcv_list(df: pd.DataFrame) -> list:
+    """Formato ohlcv_list do GeckoTerminal ([ts, o, h, l, c, v], mais recente primeiro)."""
+    stamps = df.index.to_numpy(dtype="datetime64[s]").astype(np.int64)
+    rows = np.column_stack([stamps, df[OHLCV_COLUMNS].to_numpy(dtype=np.float64)])
+    return [[int(r[0]), *r[1:].tolist()] for r in rows[::-1]]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Gera candles OHLCV sinteticos")
+    parser.add_argument("--bars", type=int, default=100_000)
+    parser.add_argument("--timeframe", default="5m", choices=sorted(TIMEFRAME_SECONDS))
+    parser.add_argument("--start", default=DEFAULT_START, help="Abertura do primeiro candle (UTC)")
+    parser.add_argument("--price", type=float, default=150.0)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--out", default="synthetic_candles.csv")
+    args = parser.parse_args()
+
+    first = True
+    for chunk in iter_ohlcv(args.bars, timeframe=args.timeframe, seed=args.seed,
+                            start=args.start, prices=[args.price]):
+        out = chunk.reset_index()
+        out["timestamp"] = out["timestamp"].to_numpy(dtype="datetime64[s]").astype(np.int64)
+        out.to_csv(args.out, mode="w" if first else "a", header=first, index=False)
+        first = False
+    print(f"{args.bars} candles {args.timeframe} -> {args.out}")
+
+
+if __name__ == "__main__":
+    main()
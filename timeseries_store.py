@@ -0,0 +1,211 @@
+"""
+Time-Series Store - Historico compacto para graficos do dashboard
+==================================================================
+Guarda series numericas (preco, P&L, capital por estrategia, confianca)
+em ring buffers de tamanho fixo (array('d'), 16 bytes por ponto) com
+tres niveis de resolucao:
+
+    raw  -> cada snapshot recebido
+    1m   -> media por minuto
+    1h   -> media por hora
+
+Consultas por intervalo escolhem o nivel mais fino que cobre o periodo
+e decimam com LTTB (Largest-Triangle-Three-Buckets), entao um grafico de
+30 dias recebe algumas centenas de pontos em vez das amostras brutas.
+
+Somente stdlib: roda no build web do Render (apenas aiohttp).
+"""
+
+from array import array
+from typing import Dict, List, Optional, Tuple
+
+# (nome, largura do bucket em segundos, capacidade)
+TIERS = (
+    ("raw", 0, 4320),      # ~3 dias com push a cada 60s
+    ("1m", 60, 10080),     # 7 dias
+    ("1h", 3600, 8760),    # 1 ano
+)
+
+
+def lttb(xs, ys, threshold: int) -> Tuple[List[float], List[float]]:
+    """Decimacao Largest-Triangle-Three-Buckets (preserva picos e vales)."""
+    n = len(xs)
+    if threshold >= n or threshold < 3:
+        return list(xs), list(ys)
+
+    out_x = [xs[0]]
+    out_y = [ys[0]]
+    every = (n - 2) / (threshold - 2)
+    a = 0
+    for i in range(threshold - 2):
+        # Media do proximo bucket (terceiro vertice do triangulo)
+        avg_start = int((i + 1) * every) + 1
+        avg_end = min(int((i + 2) * every) + 1, n)
+        count = avg_end - avg_start
+        avg_x = sum(xs[avg_start:avg_end]) / count
+        avg_y = sum(ys[avg_start:avg_end]) / count
+
+        # Ponto do bucket atual com maior area
+        range_start = int(i * every) + 1
+        range_end = int((i + 1) * every) + 1
+        ax, ay = xs[a], ys[a]
+        max_area = -1.0
+        next_a = range_start
+        for j in range(range_start, range_end):
+            area = abs((ax - avg_x) * (ys[j] - ay) - (ax - xs[j]) * (avg_y - ay))
+            if area > max_area:
+                max_area = area
+                next_a = j
+        out_x.append(xs[next_a])
+        out_y.append(ys[next_a])
+        a = next_a
+
+    out_x.append(xs[n - 1])
+    out_y.append(ys[n - 1])
+    return out_x, out_y
+
+
+class _Ring:
+    """Ring buffer de pares (timestamp, valor) pre-alocado."""
+
+    __slots__ = ("capacity", "ts", "val", "start", "size")
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self.ts = array("d", bytes(8 * capacity))
+        self.val = array("d", bytes(8 * capacity))
+        self.start = 0
+        self.size = 0
+
+    def append(self, ts: float, value: float):
+        if self.size < self.capacity:
+            idx = (self.start + self.size) % self.capacity
+            self.size += 1
+        else:
+            idx = self.start
+            self.start = (self.start + 1) % self.capacity
+        self.ts[idx] = ts
+        self.val[idx] = value
+
+    def oldest(self) -> Optional[float]:
+        return self.ts[self.start] if self.size else None
+
+    def between(self, t0: float, t1: float) -> Tuple[List[float], List[float]]:
+        """Pontos com t0 <= ts <= t1, em ordem cronologica."""
+        xs, ys = [], []
+        for i in range(self.size):
+            idx = (self.start + i) % self.capacity
+            t = self.ts[idx]
+            if t < t0:
+                continue
+            if t > t1:
+                break
+            xs.append(t)
+            ys.append(self.val[idx])
+        return xs, ys
+
+    def to_lists(self) -> Tuple[List[float], List[float]]:
+        return self.between(float("-inf"), float("inf"))
+
+
+class Series:
+    """Uma serie com os niveis raw / 1m / 1h."""
+
+    def __init__(self):
+        self.rings = {name: _Ring(cap) for name, _, cap in TIERS}
+        # Buckets em agregacao: nome -> [inicio, soma, contagem]
+        self._buckets = {name: None for name, width, _ in TIERS if width}
+
+    def add(self, ts: float, value: float):
+        self.rings["raw"].append(ts, value)
+        for name, width, _ in TIERS:
+            if not width:
+                continue
+            bucket_start = ts - (ts % width)
+            bucket = self._buckets[name]
+            if bucket is not None and bucket[0] != bucket_start:
+                self.rings[name].append(bucket[0], bucket[1] / bucket[2])
+                bucket = None
+            if bucket is None:
+                bucket = self._buckets[name] = [bucket_start, 0.0, 0]
+            bucket[1] += value
+            bucket[2] += 1
+
+    def query(self, t0: float, t1: float, max_points: int = 300) -> Dict:
+        """Pontos do intervalo, do nivel mais fino que cobre t0, decimados."""
+        chosen = TIERS[-1][0]
+        for name, _, _ in TIERS:
+            ring = self.rings[name]
+            oldest = ring.oldest()
+            # Cobre o intervalo se ja tem dado antes de t0 ou se nunca descartou nada
+            if oldest is not None and (oldest <= t0 or ring.size < ring.capacity):
+                chosen = name
+                break
+        xs, ys = self.rings[chosen].between(t0, t1)
+        # Bucket em andamento (ainda nao fechado no ring)
+        bucket = self._buckets.get(chosen)
+        if bucket is not None and t0 <= bucket[0] <= t1:
+            xs.append(bucket[0])
+            ys.append(bucket[1] / bucket[2])
+        xs, ys = lttb(xs, ys, max_points)
+        return {"tier": chosen, "t": xs, "v": ys}
+
+    def to_dict(self) -> Dict:
+        data = {}
+        for name, ring in self.rings.items():
+            xs, ys = ring.to_lists()
+            data[name] = [xs, ys]
+        # Copia: o snapshot pode ser serializado fora do event loop
+        data["buckets"] = {k: list(v) if v else v for k, v in self._buckets.items()}
+        return data
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "Series":
+        series = cls()
+        for name, ring in series.rings.items():
+            xs, ys = data.get(name, [[], []])
+            for t, v in zip(xs, ys):
+                ring.append(t, v)
+        for name, bucket in (data.get("buckets") or {}).items():
+            if name in series._buckets and bucket:
+                series._buckets[name] = list(bucket)
+        return series
+
+
+class TimeSeriesStore:
+    """Conjunto de series nomeadas."""
+
+    def __init__(self):
+        self.series: Dict[str, Series] = {}
+
+    def record(self, ts: float, values: Dict[str, float]):
+        for name, value in values.items():
+            if value is None:
+                continue
+            try:
+                value = float(value)
+            except (TypeError, ValueError):
+                continue
+            series = self.series.get(name)
+            if series is None:
+                series = self.series[name] = Series()
+            series.add(ts, value)
+
+    def names(self) -> List[str]:
+        return sorted(self.series)
+
+    def query(self, name: str, t0: float, t1: float, max_points: int = 300) -> Optional[Dict]:
+        series = self.series.get(name)
+        if series is None:
+            return None
+        return series.query(t0, t1, max_points)
+
+    def to_dict(self) -> Dict:
+        return {name: s.to_dict() for name, s in self.series.items()}
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "TimeSeriesStore":
+        store = cls()
+        for name, sdata in (data or {}).items():
+            store.series[name] = Series.from_dict(sdata)
+        return store
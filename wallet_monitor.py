@@ -6,9 +6,10 @@ Modo read-only (só consulta, não executa transações).
 """
 
 import logging
-import time
 from typing import Dict, Optional
 
+import clock
+
 logger = logging.getLogger("WalletMonitor")
 
 # USDC Mint na Solana mainnet
@@ -78,7 +79,7 @@ class WalletMonitor:
 
     async def update_balances(self) -> Dict:
         """Atualiza saldos (com cache para evitar rate limit)."""
-        now = time.time()
+        now = clock.time()
         if now - self.last_update < self.cache_ttl:
             return self.get_data()
 
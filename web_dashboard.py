@@ -8,6 +8,7 @@ Deploy: Render.com (gratis)
 """
 
 import os
+import copy
 import json
 import time
 import hashlib
@@ -17,6 +18,9 @@ from aiohttp import web
 import asyncio
 import logging
 
+from push_protocol import decode_body
+from timeseries_store import TimeSeriesStore
+
 logger = logging.getLogger("WebDashboard")
 
 # ============================================================
@@ -32,9 +36,15 @@ SESSION_MAX_AGE = 86400 * 7  # 7 dias
 # Persistent storage path (survives process restarts within same deploy)
 PERSIST_DIR = os.environ.get("PERSIST_DIR", "/tmp/dashboard_data")
 PERSIST_FILE = os.path.join(PERSIST_DIR, "state.json")
+# Intervalo minimo entre gravacoes: handlers so marcam o estado como sujo
+PERSIST_MIN_INTERVAL = float(os.environ.get("PERSIST_MIN_INTERVAL", "5"))
+_state_dirty = False
+# Historico das series (arquivo separado, gravado com menos frequencia)
+SERIES_FILE = os.path.join(PERSIST_DIR, "timeseries.json")
+SERIES_PERSIST_INTERVAL = float(os.environ.get("SERIES_PERSIST_INTERVAL", "600"))
 
-# Dados compartilhados (in-memory)
-BOT_DATA = {
+# Estado inicial dos dados de um bot (in-memory)
+BOT_DATA_DEFAULTS = {
     "price": 0,
     "capital": 500.0,
     "mode": "Day Trade",
@@ -54,66 +64,311 @@ BOT_DATA = {
     "last_push": 0,
 }
 
-# Comandos pendentes para o bot (o bot le na resposta do push)
-PENDING_COMMANDS = []
+# Varios processos do bot (um por par / grupo de estrategias) podem
+# enviar para o mesmo dashboard, identificados pelo header X-Bot-Id.
+DEFAULT_BOT_ID = "default"
+MAX_BOTS = 64
+BOT_ID_CHARS = set("abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789_.-")
+BOTS = {}  # bot_id -> estado do bot (ver _new_bot_state)
 
-# Estrategias marcadas como inativas pelo usuario (persiste ate bot confirmar)
-FORCED_INACTIVE = set()
+# Carteira agregada de todos os bots, atualizada incrementalmente a cada
+# push (subtrai a contribuicao anterior do bot e soma a nova)
+PORTFOLIO = {
+    "total_pnl": 0.0,
+    "open_pnl": 0.0,
+    "open_positions": 0,
+    "total_trades": 0,
+    "strategy_capital": 0.0,
+    "real_allocated": 0.0,
+    "real_pnl": 0.0,
+}
+
+# Comandos pendentes (por bot). Cada comando recebe um "id" e so sai da
+# fila quando o bot confirma (POST /api/commands/ack). O bot recebe via
+# long-poll (GET /api/commands) ou na resposta do push.
+COMMAND_POLL_MAX_SECONDS = 30
+# Ids baseados no relogio: nao colidem com ids anteriores a um restart
+_command_seq = int(time.time() * 1000)
 
 # Secret key para o bot enviar dados (evita spam)
 API_KEY = os.environ.get("DASHBOARD_API_KEY", "sol-trading-2026")
 
 
-def _save_persistent_state():
-    """Salva estado critico em disco (sobrevive restarts do processo)."""
-    try:
-        os.makedirs(PERSIST_DIR, exist_ok=True)
+def _new_bot_state():
+    return {
+        "data": json.loads(json.dumps(BOT_DATA_DEFAULTS)),
+        # Versao do protocolo delta aplicada em data (None = sem snapshot completo)
+        "version": None,
+        "commands": [],
+        "commands_changed": asyncio.Event(),
+        # Estrategias marcadas como inativas pelo usuario (persiste ate bot confirmar)
+        "forced_inactive": set(),
+        "contribution": {},
+        # Historico de preco/P&L/capital/confianca (ver timeseries_store)
+        "series": TimeSeriesStore(),
+    }
+
+
+def _valid_bot_id(bot_id):
+    return bool(bot_id) and len(bot_id) <= 64 and set(bot_id) <= BOT_ID_CHARS
+
+
+def _get_bot(bot_id, create=True):
+    """Retorna o estado do bot (cria se necessario). None se id invalido."""
+    bot = BOTS.get(bot_id)
+    if bot is None and create and _valid_bot_id(bot_id) and len(BOTS) < MAX_BOTS:
+        bot = BOTS[bot_id] = _new_bot_state()
+    return bot
+
+
+def _primary_bot_id():
+    """Bot exibido por padrao: "default" se existir, senao o ultimo a enviar."""
+    if DEFAULT_BOT_ID in BOTS or not BOTS:
+        return DEFAULT_BOT_ID
+    return max(BOTS, key=lambda b: BOTS[b]["data"].get("last_push", 0))
+
+
+def _request_bot(request):
+    """Bot alvo de um request do frontend (?bot=). Nunca cria: bots novos
+    so surgem no push autenticado por API key (X-Bot-Id)."""
+    bot_id = request.query.get("bot") or _primary_bot_id()
+    return bot_id, _get_bot(bot_id, create=False)
+
+
+def _bot_contribution(data):
+    allocs = data.get("allocations") or {}
+    active = [a for a in allocs.values() if isinstance(a, dict) and a.get("active")]
+    strategies = data.get("strategies") or {}
+    return {
+        "total_pnl": float(data.get("total_pnl") or 0),
+        "open_pnl": float(data.get("open_pnl") or 0),
+        "open_positions": int(data.get("open_positions") or 0),
+        "total_trades": int(data.get("total_trades") or 0),
+        "strategy_capital": sum(
+            float((s.get("capital") or {}).get("current", 0) or 0)
+            for s in strategies.values() if isinstance(s, dict)
+        ),
+        "real_allocated": sum(float(a.get("amount", 0) or 0) for a in active),
+        "real_pnl": sum(float(a.get("pnl", 0) or 0) for a in active),
+    }
+
+
+def _update_portfolio(bot):
+    """Atualiza o agregado com a nova contribuicao do bot (O(1) em nº de bots)."""
+    new = _bot_contribution(bot["data"])
+    old = bot["contribution"]
+    for k, v in new.items():
+        PORTFOLIO[k] += v - old.get(k, 0)
+    bot["contribution"] = new
+
+
+def _portfolio_view():
+    now = time.time()
+    view = {k: round(v, 4) if isinstance(v, float) else v for k, v in PORTFOLIO.items()}
+    view["bots"] = len(BOTS)
+    view["bots_online"] = sum(1 for b in BOTS.values()
+                              if now - b["data"].get("last_push", 0) < 120)
+    return view
+
+
+def _bots_summary():
+    return [
+        {
+            "bot_id": bot_id,
+            "last_push": b["data"].get("last_push", 0),
+            "price": b["data"].get("price", 0),
+            "total_pnl": b["data"].get("total_pnl", 0),
+            "pending_commands": len(b["commands"]),
+        }
+        for bot_id, b in BOTS.items()
+    ]
+
+
+def _record_series(bot, ts):
+    """Extrai as series-chave do snapshot atual do bot para o historico."""
+    data = bot["data"]
+    values = {
+        "price": data.get("price"),
+        "total_pnl": data.get("total_pnl"),
+        "open_pnl": data.get("open_pnl"),
+        "confidence": (data.get("confluence") or {}).get("confidence"),
+    }
+    for key, strat in (data.get("strategies") or {}).items():
+        if isinstance(strat, dict):
+            values[f"capital.{key}"] = (strat.get("capital") or {}).get("current")
+    bot["series"].record(ts, values)
+
+
+def _parse_range(value):
+    """'90m', '6h', '30d' ou segundos -> segundos."""
+    units = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+    value = (value or "24h").strip().lower()
+    if value[-1:] in units:
+        return float(value[:-1]) * units[value[-1]]
+    return float(value)
+
+
+def _queue_command(bot, cmd):
+    """Enfileira comando para o bot com id unico e acorda os long-polls."""
+    global _command_seq
+    _command_seq += 1
+    cmd["id"] = _command_seq
+    bot["commands"].append(cmd)
+    bot["commands_changed"].set()
+    bot["commands_changed"] = asyncio.Event()
+    return cmd
+
+
+def _mark_state_dirty():
+    """Agenda gravacao do estado (feita em background por _persist_loop)."""
+    global _state_dirty
+    _state_dirty = True
+
+
+def _atomic_write_json(path, obj):
+    """Grava JSON via arquivo temporario + fsync + rename atomico."""
+    tmp_file = path + ".tmp"
+    with open(tmp_file, "w") as f:
+        json.dump(obj, f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_file, path)
+
+
+def _persistent_state_snapshot():
+    """Estado critico a persistir (montado no event loop, gravado numa thread)."""
+    bots = {}
+    for bot_id, bot in BOTS.items():
         # Só persistir comandos criticos (deallocate/settings), nao allocate
-        safe_cmds = [c for c in PENDING_COMMANDS
+        safe_cmds = [dict(c) for c in bot["commands"]
                      if c.get("action") in ("deallocate_strategy", "save_settings")]
-        state = {
-            "pending_settings": BOT_DATA.get("pending_settings"),
+        bots[bot_id] = {
+            "pending_settings": bot["data"].get("pending_settings"),
             "pending_commands": safe_cmds,
-            "forced_inactive": list(FORCED_INACTIVE),
-            "sessions": {k: v for k, v in SESSIONS.items()
-                         if time.time() - v.get("created", 0) < SESSION_MAX_AGE},
-            "allocations": BOT_DATA.get("allocations"),
-            "real_positions": BOT_DATA.get("real_positions"),
-        }
-        with open(PERSIST_FILE, "w") as f:
-            json.dump(state, f)
+            "forced_inactive": list(bot["forced_inactive"]),
+            "allocations": copy.deepcopy(bot["data"].get("allocations")),
+            "real_positions": copy.deepcopy(bot["data"].get("real_positions")),
+        }
+    return {
+        "sessions": {k: dict(v) for k, v in SESSIONS.items()
+                     if time.time() - v.get("created", 0) < SESSION_MAX_AGE},
+        "bots": bots,
+    }
+
+
+async def _save_persistent_state():
+    """Salva estado critico em disco (sobrevive restarts do processo).
+
+    Grava em arquivo temporario + fsync + rename atomico: um restart no
+    meio da escrita nunca deixa state.json truncado. O snapshot e montado
+    no event loop; serializacao e disco ficam numa thread.
+    """
+    global _state_dirty
+    try:
+        os.makedirs(PERSIST_DIR, exist_ok=True)
+        state = _persistent_state_snapshot()
+        _state_dirty = False
+        await asyncio.to_thread(_atomic_write_json, PERSIST_FILE, state)
     except Exception as e:
+        _state_dirty = True
         logger.warning(f"Failed to save persistent state: {e}")
 
 
+async def _save_series():
+    """Grava o historico de series de todos os bots (json.dump numa thread)."""
+    try:
+        os.makedirs(PERSIST_DIR, exist_ok=True)
+        snapshot = {bot_id: b["series"].to_dict() for bot_id, b in BOTS.items()}
+        await asyncio.to_thread(_atomic_write_json, SERIES_FILE, snapshot)
+    except Exception as e:
+        logger.warning(f"Failed to save series: {e}")
+
+
+def _load_series():
+    try:
+        with open(SERIES_FILE) as f:
+            saved = json.load(f)
+        for bot_id, data in saved.items():
+            bot = _get_bot(bot_id)
+            if bot is not None:
+                bot["series"] = TimeSeriesStore.from_dict(data)
+    except (FileNotFoundError, json.JSONDecodeError):
+        pass
+    except Exception as e:
+        logger.warning(f"Failed to load series: {e}")
+
+
+async def _flush_persistent_state():
+    """Grava o estado se houver mudancas pendentes."""
+    if _state_dirty:
+        await _save_persistent_state()
+
+
+async def _persist_loop():
+    """Flush em background com taxa limitada (no maximo 1x por intervalo)."""
+    last_series_save = time.time()
+    while True:
+        await asyncio.sleep(PERSIST_MIN_INTERVAL)
+        await _flush_persistent_state()
+        if time.time() - last_series_save >= SERIES_PERSIST_INTERVAL:
+            await _save_series()
+            last_series_save = time.time()
+
+
+async def _start_persist_loop(app):
+    app["persist_task"] = asyncio.create_task(_persist_loop())
+
+
+async def _stop_persist_loop(app):
+    task = app.get("persist_task")
+    if task:
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+    # Flush final no shutdown
+    await _flush_persistent_state()
+    await _save_series()
+
+
 def _load_persistent_state():
     """Carrega estado salvo em disco."""
-    global PENDING_COMMANDS, SESSIONS, FORCED_INACTIVE
+    global _command_seq
     try:
         with open(PERSIST_FILE) as f:
             state = json.load(f)
-        ps = state.get("pending_settings")
-        if ps:
-            BOT_DATA["pending_settings"] = ps
-        cmds = state.get("pending_commands", [])
-        if cmds:
-            PENDING_COMMANDS.extend(cmds)
-        fi = state.get("forced_inactive", [])
-        if fi:
-            FORCED_INACTIVE.update(fi)
         saved_sessions = state.get("sessions", {})
         for k, v in saved_sessions.items():
             if time.time() - v.get("created", 0) < SESSION_MAX_AGE:
                 SESSIONS[k] = v
-        saved_allocs = state.get("allocations")
-        if saved_allocs:
-            BOT_DATA["allocations"] = saved_allocs
-        saved_rp = state.get("real_positions")
-        if saved_rp is not None:
-            BOT_DATA["real_positions"] = saved_rp
+        # Formato antigo (um bot so): chaves no topo do arquivo
+        saved_bots = state.get("bots")
+        if saved_bots is None:
+            saved_bots = {DEFAULT_BOT_ID: state}
+        n_cmds = 0
+        for bot_id, saved in saved_bots.items():
+            bot = _get_bot(bot_id)
+            if bot is None:
+                continue
+            ps = saved.get("pending_settings")
+            if ps:
+                bot["data"]["pending_settings"] = ps
+            for cmd in saved.get("pending_commands", []):
+                if "id" not in cmd:
+                    _command_seq += 1
+                    cmd["id"] = _command_seq
+                _command_seq = max(_command_seq, cmd["id"])
+                bot["commands"].append(cmd)
+                n_cmds += 1
+            bot["forced_inactive"].update(saved.get("forced_inactive", []))
+            if saved.get("allocations"):
+                bot["data"]["allocations"] = saved["allocations"]
+            if saved.get("real_positions") is not None:
+                bot["data"]["real_positions"] = saved["real_positions"]
+            _update_portfolio(bot)
         logger.info(f"Loaded persistent state: {len(saved_sessions)} sessions, "
-                     f"pending_settings={'yes' if ps else 'no'}, "
-                     f"{len(cmds)} pending commands")
+                     f"{len(saved_bots)} bots, {n_cmds} pending commands")
     except (FileNotFoundError, json.JSONDecodeError):
         pass
     except Exception as e:
@@ -122,6 +377,7 @@ def _load_persistent_state():
 
 # Load saved state on startup
 _load_persistent_state()
+_load_series()
 
 
 # ============================================================
@@ -502,6 +758,9 @@ def get_dashboard_html():
         .wallet-bal-label { font-size: 0.65em; color: var(--text-muted); text-transform: uppercase; letter-spacing: 1px; margin-bottom: 4px; }
         .wallet-bal-value { font-family: 'JetBrains Mono', monospace; font-size: 1.1em; font-weight: 700; }
         .wallet-bal-sub { font-size: 0.65em; color: var(--text-muted); margin-top: 2px; }
+        .portfolio-bots { display: flex; gap: 8px; flex-wrap: wrap; margin-top: 14px; }
+        .portfolio-bot { display: flex; align-items: center; gap: 6px; font-family: 'JetBrains Mono', monospace; font-size: 0.72em; color: var(--text-secondary); background: rgba(255,255,255,0.04); padding: 4px 10px; border-radius: 6px; text-decoration: none; }
+        .portfolio-bot.selected { color: var(--text-primary); box-shadow: inset 0 0 0 1px var(--purple); }
         .wallet-readonly { font-size: 0.65em; color: var(--text-muted); background: rgba(255,255,255,0.04); padding: 3px 8px; border-radius: 4px; margin-left: auto; }
         .wallet-allocate { margin-top: 16px; padding-top: 16px; border-top: 1px solid var(--border-color); }
         .wallet-alloc-title { font-size: 0.8em; font-weight: 700; color: var(--yellow); margin-bottom: 10px; letter-spacing: 0.5px; }
@@ -629,6 +888,8 @@ def get_dashboard_html():
         .strat-card.is-paused .strat-pnl { color: var(--text-muted) !important; }
         .strat-paused-badge { display: none; font-size: 0.6em; color: var(--red); background: rgba(255,68,102,0.1); border: 1px solid rgba(255,68,102,0.2); padding: 2px 8px; border-radius: 4px; font-weight: 600; letter-spacing: 0.5px; margin-left: auto; }
         .strat-card.is-paused .strat-paused-badge { display: inline-block; }
+        .strat-sim-metrics { font-size: 0.62em; color: var(--text-muted); font-family: 'JetBrains Mono', monospace; margin-top: 6px; }
+        .strat-sim-metrics.has-errors { color: var(--red); }
         .strat-card.real-mode { border-color: rgba(0,255,136,0.2); }
         .strat-card.real-mode::before { background: linear-gradient(90deg, var(--green), var(--blue)) !important; }
         .real-mode-badge { font-size: 0.6em; color: var(--green); background: rgba(0,255,136,0.1); border: 1px solid rgba(0,255,136,0.2); padding: 2px 8px; border-radius: 4px; font-weight: 600; letter-spacing: 0.5px; }
@@ -690,6 +951,18 @@ def get_dashboard_html():
         </div>
     </header>
     <main class="main">
+        <!-- ===== PORTFOLIO (todos os bots) ===== -->
+        <div class="card wallet-card" id="portfolio-card" style="display:none">
+            <div class="card-label"><svg viewBox="0 0 24 24" fill="none" stroke="currentColor" stroke-width="2"><rect x="3" y="3" width="7" height="7" rx="1"/><rect x="14" y="3" width="7" height="7" rx="1"/><rect x="3" y="14" width="7" height="7" rx="1"/><rect x="14" y="14" width="7" height="7" rx="1"/></svg> Portfolio <span id="pf-bots-count"></span></div>
+            <div class="wallet-balances">
+                <div class="wallet-bal"><div class="wallet-bal-label">PnL Total</div><div class="wallet-bal-value" id="pf-total-pnl">$0.00</div></div>
+                <div class="wallet-bal"><div class="wallet-bal-label">PnL Aberto</div><div class="wallet-bal-value" id="pf-open-pnl">$0.00</div><div class="wallet-bal-sub" id="pf-open-pos">0 posicoes</div></div>
+                <div class="wallet-bal"><div class="wallet-bal-label">Trades</div><div class="wallet-bal-value" id="pf-trades">0</div></div>
+                <div class="wallet-bal"><div class="wallet-bal-label">Capital Estrategias</div><div class="wallet-bal-value" id="pf-strat-cap" style="color:var(--yellow)">$0.00</div></div>
+                <div class="wallet-bal"><div class="wallet-bal-label">Capital Real</div><div class="wallet-bal-value" id="pf-real-alloc" style="color:var(--purple)">$0.00</div><div class="wallet-bal-sub" id="pf-real-pnl">PnL $0.00</div></div>
+            </div>
+            <div class="portfolio-bots" id="pf-bots"></div>
+        </div>
         <!-- ===== CARTEIRA PHANTOM ===== -->
         <div class="card wallet-card" id="wallet-card" style="display:none">
             <div class="card-label"><svg viewBox="0 0 24 24" fill="none" stroke="currentColor" stroke-width="2"><rect x="2" y="6" width="20" height="12" rx="2"/><circle cx="16" cy="12" r="2"/><path d="M2 10h4"/></svg> Carteira Phantom</div>
@@ -1122,11 +1395,14 @@ function updateChartLegend() { const legend = document.getElementById('chart-leg
     for (const [id, ind] of Object.entries(indicatorOverlays)) { if (ind.enabled) html += '<div class="chart-legend-item"><span class="chart-legend-dot" style="background:' + ind.color + '"></span>' + ind.label + '</div>'; }
     legend.innerHTML = html; }
 
+// ?bot=<id> na URL seleciona qual bot (multi-instancia) o painel controla
+const BOT_QS = new URLSearchParams(location.search).get('bot') ? '?bot=' + encodeURIComponent(new URLSearchParams(location.search).get('bot')) : '';
 async function pollData() {
     try {
-        const r = await fetch('/api/data');
+        const r = await fetch('/api/data' + BOT_QS);
         if(r.status===401){window.location.href='/login';return;}
         const data = await r.json();
+        updatePortfolio(data.portfolio, data.bots, data.bot_id);
         if (data.price > 0) {
             updateDashboard(data);
             document.getElementById('ws-dot').className = 'status-dot';
@@ -1143,6 +1419,23 @@ async function pollData() {
     }
 }
 
+// Historico salvo no servidor (/api/history) preenche o grafico ao abrir a pagina
+async function loadPriceHistory() {
+    try {
+        const qs = 'series=price&range=24h&points=500' + (BOT_QS ? '&' + BOT_QS.slice(1) : '');
+        const r = await fetch('/api/history?' + qs);
+        if (!r.ok) return;
+        const res = await r.json();
+        const s = (res.series || {}).price;
+        if (!s || !s.t.length) return;
+        const first = priceHistory.length ? priceHistory[0].time.getTime() / 1000 : Infinity;
+        const past = [];
+        for (let i = 0; i < s.t.length; i++) { if (s.t[i] < first && s.v[i] > 0) past.push({time: new Date(s.t[i] * 1000), price: s.v[i]}); }
+        priceHistory = past.concat(priceHistory).slice(-500);
+        drawChart();
+    } catch(e) {}
+}
+
 function updateDashboard(data) {
     if(!data)return;
     const price = data.price || 0;
@@ -1219,6 +1512,15 @@ function updateStrategies(strats){
         var te=document.getElementById(prefix+'-today');
         if(te){var tp=cap.today_pnl||0;te.textContent=(tp>=0?'+$':'-$')+Math.abs(tp).toFixed(2);te.style.color=tp>=0?'var(--green)':'var(--red)';}
     }
+    function setSimMetrics(cardId,m){
+        const card=document.getElementById(cardId);if(!card||!m)return;
+        let el=card.querySelector('.strat-sim-metrics');
+        if(!el){el=document.createElement('div');el.className='strat-sim-metrics';card.appendChild(el);}
+        const bad=(m.errors||0)+(m.timeouts||0);
+        el.textContent='Sim '+(m.last_ms||0).toFixed(0)+'ms (media '+(m.avg_ms||0).toFixed(0)+'ms) | lag '+(m.lag_ms||0).toFixed(0)+'ms | erros '+(m.errors||0)+' | timeouts '+(m.timeouts||0);
+        el.className='strat-sim-metrics'+(bad?' has-errors':'');
+        if(m.last_error)el.title=m.last_error;
+    }
     function setPaused(cardId,btnId,paused){
         const card=document.getElementById(cardId);
         const btn=document.getElementById(btnId);
@@ -1293,14 +1595,44 @@ function updateStrategies(strats){
     if(strats.scalping)setPaused('strat-scalping','strat-scalp-btn',!!strats.scalping.paused);
     if(strats.leverage)setPaused('strat-leverage','strat-lev-btn',!!strats.leverage.paused);
     if(strats.whale)setPaused('strat-whale','strat-whale-btn',!!strats.whale.paused);
+    const simCards={sniper:'strat-sniper',memecoin:'strat-memecoin',arbitrage:'strat-arbitrage',scalping:'strat-scalping',leverage:'strat-leverage',whale:'strat-whale'};
+    for(const [k,cid] of Object.entries(simCards)){if(strats[k])setSimMetrics(cid,strats[k].sim_metrics);}
 }
 function setPnl(id,val,isPct){const el=document.getElementById(id);if(!el)return;const txt=isPct?((val>=0?'+':'')+val.toFixed(1)+'%'):((val>=0?'+$':'-$')+Math.abs(val).toFixed(2));el.textContent=txt;el.className='strat-pnl '+(val>0?'profit':val<0?'loss':'neutral');}
 function setText(id,val){const el=document.getElementById(id);if(el)el.textContent=val;}
 function setBar(id,pct){const el=document.getElementById(id);if(!el)return;el.style.width=Math.min(100,Math.max(0,pct))+'%';el.style.background=pct>=60?'var(--green)':pct>=40?'var(--yellow)':'var(--red)';}
+function setSignedUsd(id,val){const el=document.getElementById(id);if(!el)return;el.textContent=(val>=0?'+$':'-$')+Math.abs(val).toFixed(2);el.style.color=val>0?'var(--green)':val<0?'var(--red)':'';}
+// Agregado de todos os bots (/api/data "portfolio") + lista de bots para trocar o painel
+function updatePortfolio(p,bots,current){
+    const card=document.getElementById('portfolio-card');
+    if(!card||!p||!p.bots){if(card)card.style.display='none';return;}
+    card.style.display='';
+    setText('pf-bots-count','('+p.bots_online+'/'+p.bots+' bots online)');
+    setSignedUsd('pf-total-pnl',p.total_pnl||0);
+    setSignedUsd('pf-open-pnl',p.open_pnl||0);
+    setText('pf-open-pos',(p.open_positions||0)+' posicoes');
+    setText('pf-trades',p.total_trades||0);
+    setText('pf-strat-cap','$'+(p.strategy_capital||0).toFixed(2));
+    setText('pf-real-alloc','$'+(p.real_allocated||0).toFixed(2));
+    const rp=p.real_pnl||0;setText('pf-real-pnl','PnL '+(rp>=0?'+$':'-$')+Math.abs(rp).toFixed(2));
+    // bot_id vem do header X-Bot-Id: monta via DOM/textContent, sem innerHTML
+    const list=document.getElementById('pf-bots');list.replaceChildren();
+    const now=Date.now()/1000;
+    for(const b of (bots||[])){
+        const a=document.createElement('a');
+        a.className='portfolio-bot'+(b.bot_id===current?' selected':'');
+        a.href='?bot='+encodeURIComponent(b.bot_id);
+        const dot=document.createElement('span');
+        dot.className='wallet-dot'+(now-(b.last_push||0)<120?' connected':'');
+        const pnl=b.total_pnl||0;
+        a.append(dot,b.bot_id+' '+(pnl>=0?'+$':'-$')+Math.abs(pnl).toFixed(2));
+        list.appendChild(a);
+    }
+}
 function setRecent(id,items,renderer){const el=document.getElementById(id);if(!el||!items.length)return;el.innerHTML=items.map(renderer).join('');}
 async function toggleStrategy(key){
     try{
-        const resp=await fetch('/api/toggle-strategy',{method:'POST',headers:{'Content-Type':'application/json'},body:JSON.stringify({strategy:key})});
+        const resp=await fetch('/api/toggle-strategy'+BOT_QS,{method:'POST',headers:{'Content-Type':'application/json'},body:JSON.stringify({strategy:key})});
         const data=await resp.json();
         if(data.ok){
             // Feedback visual imediato enquanto espera o bot confirmar
@@ -1334,7 +1666,7 @@ async function allocateStrategy(){
     const btn=document.getElementById('alloc-play-btn');
     btn.disabled=true;btn.textContent='Enviando...';
     try{
-        const resp=await fetch('/api/allocate-strategy',{method:'POST',headers:{'Content-Type':'application/json'},body:JSON.stringify({strategy:strategy,amount:amount,coin:coin})});
+        const resp=await fetch('/api/allocate-strategy'+BOT_QS,{method:'POST',headers:{'Content-Type':'application/json'},body:JSON.stringify({strategy:strategy,amount:amount,coin:coin})});
         const data=await resp.json();
         if(data.ok){
             activeAllocations[strategy]={amount:amount,coin:coin,status:'active',pnl:0,trades:0,last_tx:'',sim_pnl_pct:0,last_trade_info:null,trade_history:[]};
@@ -1354,7 +1686,7 @@ async function deallocateStrategy(key){
         const pnlStr=pnl>=0?'+$'+pnl.toFixed(4):'-$'+Math.abs(pnl).toFixed(4);
         if(!confirm('Parar MODO REAL para '+(nameMap[key]||key)+'?\n\nTrades: '+trades+'\nP&L: '+pnlStr+'\n\nO USDC sera convertido de volta para SOL.'))return;
         pendingDeallocations.add(key);
-        const resp=await fetch('/api/deallocate-strategy',{method:'POST',headers:{'Content-Type':'application/json'},body:JSON.stringify({strategy:key})});
+        const resp=await fetch('/api/deallocate-strategy'+BOT_QS,{method:'POST',headers:{'Content-Type':'application/json'},body:JSON.stringify({strategy:key})});
         if(resp.status===401){pendingDeallocations.delete(key);window.location.href='/login';return;}
         const result=await resp.json();
         if(result.ok){
@@ -1725,6 +2057,7 @@ function setChartRange(n){chartRange=n;document.querySelectorAll('.chart-tab').f
 window.addEventListener('resize',drawChart);
 setInterval(pollData, 5000);
 pollData();
+loadPriceHistory();
 // === SETTINGS MODAL ===
 let currentPkMask='';
 let currentPaperMode=true;
@@ -1760,7 +2093,7 @@ async function saveSettings(){
     btn.disabled=true;btn.textContent='Salvando...';
     status.className='setting-status';status.textContent='';
     try{
-        const resp=await fetch('/api/save-settings',{method:'POST',headers:{'Content-Type':'application/json'},body:JSON.stringify({private_key:pk||null,paper_trading:!liveMode})});
+        const resp=await fetch('/api/save-settings'+BOT_QS,{method:'POST',headers:{'Content-Type':'application/json'},body:JSON.stringify({private_key:pk||null,paper_trading:!liveMode})});
         const data=await resp.json();
         if(data.ok){
             status.className='setting-status success';
@@ -1893,7 +2226,7 @@ async def handle_login_post(request):
         expired = [k for k, v in SESSIONS.items() if now - v["created"] > SESSION_MAX_AGE]
         for k in expired:
             SESSIONS.pop(k, None)
-        _save_persistent_state()
+        _mark_state_dirty()
         resp = web.HTTPFound("/")
         resp.set_cookie("session", token, max_age=SESSION_MAX_AGE, httponly=True, samesite="Lax")
         raise resp
@@ -1918,46 +2251,164 @@ async def handle_index(request):
 
 
 async def handle_get_data(request):
-    """Frontend polls this endpoint."""
+    """Frontend polls this endpoint (?bot=<id> escolhe o bot exibido)."""
+    if not check_session(request):
+        return web.json_response({"error": "unauthorized"}, status=401)
+    bot_id, bot = _request_bot(request)
+    data = dict(bot["data"] if bot else BOT_DATA_DEFAULTS)
+    data["bot_id"] = bot_id
+    data["bots"] = _bots_summary()
+    data["portfolio"] = _portfolio_view()
+    return web.json_response(data)
+
+
+async def handle_get_history(request):
+    """Series historicas: /api/history?series=price,total_pnl&range=30d&points=300.
+
+    Sem ?series= retorna os nomes disponiveis.
+    """
     if not check_session(request):
         return web.json_response({"error": "unauthorized"}, status=401)
-    return web.json_response(BOT_DATA)
+    bot_id, bot = _request_bot(request)
+    if bot is None:
+        return web.json_response({"bot_id": bot_id, "names": [], "series": {}})
+    store = bot["series"]
+    names = [n for n in request.query.get("series", "").split(",") if n]
+    if not names:
+        return web.json_response({"bot_id": bot_id, "names": store.names()})
+    try:
+        span = _parse_range(request.query.get("range"))
+        points = max(3, min(int(request.query.get("points", 300)), 2000))
+    except ValueError:
+        return web.json_response({"error": "invalid params"}, status=400)
+    t1 = time.time()
+    t0 = t1 - span
+    result = {}
+    for name in names:
+        res = store.query(name, t0, t1, points)
+        if res is not None:
+            result[name] = res
+    return web.json_response({"bot_id": bot_id, "from": t0, "to": t1, "series": result})
+
+
+def _apply_push_envelope(bot, envelope):
+    """Aplica um envelope do protocolo delta (push_protocol).
+
+    Retorna o dict de secoes alteradas, ou None se a base do delta nao
+    bate com a versao atual (bot deve reenviar snapshot completo).
+    """
+    if not envelope.get("full") and envelope.get("base") != bot["version"]:
+        return None
+    for key in envelope.get("removed", []):
+        if key not in ("allocations", "pending_settings", "last_push"):
+            bot["data"].pop(key, None)
+    bot["version"] = envelope.get("version")
+    return envelope.get("sections", {})
 
 
 async def handle_push_data(request):
-    """Bot pushes data here via POST."""
+    """Bot pushes data here via POST (JSON completo ou envelope delta)."""
     auth = request.headers.get("X-API-Key", "")
     if auth != API_KEY:
         return web.json_response({"error": "unauthorized"}, status=401)
+    bot_id = request.headers.get("X-Bot-Id") or DEFAULT_BOT_ID
+    bot = _get_bot(bot_id)
+    if bot is None:
+        return web.json_response({"error": "invalid bot id"}, status=400)
 
     try:
-        data = await request.json()
+        payload = decode_body(await request.read(), request.headers)
+        acked_by_bot = bool(payload.get("proto"))
+        if acked_by_bot:
+            data = _apply_push_envelope(bot, payload)
+            if data is None:
+                # Versoes divergiram (restart do servidor, push perdido...)
+                return web.json_response({"ok": False, "resync": True, "version": bot["version"]})
+        else:
+            data = payload
+        bot_data = bot["data"]
+        forced_inactive = bot["forced_inactive"]
         # Se bot confirma que aplicou settings, limpa pending
         if data.get("settings_applied"):
-            BOT_DATA.pop("pending_settings", None)
+            bot_data.pop("pending_settings", None)
         # Merge allocations: usa dados do bot mas respeita FORCED_INACTIVE
         incoming_allocs = data.pop("allocations", None)
-        BOT_DATA.update(data)
+        bot_data.update(data)
         if incoming_allocs is not None:
             for key, bot_val in incoming_allocs.items():
-                if key in FORCED_INACTIVE:
+                if key in forced_inactive:
                     if not bot_val.get("active"):
                         # Bot confirmou que desalocou: remove do forced
-                        FORCED_INACTIVE.discard(key)
+                        forced_inactive.discard(key)
                     else:
                         # Bot ainda nao processou: forcar inativo
                         bot_val["active"] = False
-            BOT_DATA["allocations"] = incoming_allocs
-        BOT_DATA["last_push"] = time.time()
-        # Retorna comandos pendentes para o bot
-        cmds = list(PENDING_COMMANDS)
-        PENDING_COMMANDS.clear()
-        # Se ha settings pendentes em BOT_DATA, inclui como comando
-        ps = BOT_DATA.get("pending_settings")
+            bot_data["allocations"] = incoming_allocs
+        bot_data["last_push"] = time.time()
+        _update_portfolio(bot)
+        _record_series(bot, bot_data["last_push"])
+        # Retorna comandos pendentes para o bot. Bots novos confirmam via
+        # /api/commands/ack; bots antigos (JSON puro) nao, entao limpa a fila.
+        cmds = list(bot["commands"])
+        if not acked_by_bot:
+            bot["commands"].clear()
+        # Se ha settings pendentes, inclui como comando
+        ps = bot_data.get("pending_settings")
         if ps and not any(c.get("action") == "save_settings" for c in cmds):
             cmds.append(ps)
-        _save_persistent_state()
-        return web.json_response({"ok": True, "commands": cmds})
+        _mark_state_dirty()
+        return web.json_response({"ok": True, "commands": cmds, "version": bot["version"]})
+    except Exception as e:
+        return web.json_response({"error": str(e)}, status=400)
+
+
+async def handle_get_commands(request):
+    """Long-poll do bot: segura a requisicao ate haver comando com id > after."""
+    auth = request.headers.get("X-API-Key", "")
+    if auth != API_KEY:
+        return web.json_response({"error": "unauthorized"}, status=401)
+    bot = _get_bot(request.headers.get("X-Bot-Id") or DEFAULT_BOT_ID)
+    if bot is None:
+        return web.json_response({"error": "invalid bot id"}, status=400)
+    try:
+        after = request.query.get("after")
+        after = int(after) if after not in (None, "") else None
+        timeout = min(float(request.query.get("timeout", 25)), COMMAND_POLL_MAX_SECONDS)
+    except ValueError:
+        return web.json_response({"error": "invalid params"}, status=400)
+
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    while True:
+        cmds = [c for c in bot["commands"] if after is None or c.get("id", 0) > after]
+        remaining = deadline - loop.time()
+        if cmds or remaining <= 0:
+            break
+        event = bot["commands_changed"]
+        try:
+            await asyncio.wait_for(event.wait(), remaining)
+        except asyncio.TimeoutError:
+            pass
+    return web.json_response({"ok": True, "commands": cmds})
+
+
+async def handle_ack_commands(request):
+    """Bot confirma comandos aplicados: remove da fila (idempotente)."""
+    auth = request.headers.get("X-API-Key", "")
+    if auth != API_KEY:
+        return web.json_response({"error": "unauthorized"}, status=401)
+    bot = _get_bot(request.headers.get("X-Bot-Id") or DEFAULT_BOT_ID, create=False)
+    if bot is None:
+        return web.json_response({"ok": True, "removed": 0})
+    try:
+        data = await request.json()
+        ids = set(data.get("ids", []))
+        queue = bot["commands"]
+        before = len(queue)
+        queue[:] = [c for c in queue if c.get("id") not in ids]
+        if len(queue) != before:
+            _mark_state_dirty()
+        return web.json_response({"ok": True, "removed": before - len(queue)})
     except Exception as e:
         return web.json_response({"error": str(e)}, status=400)
 
@@ -1972,9 +2423,12 @@ async def handle_toggle_strategy(request):
         valid_keys = ["sniper", "memecoin", "arbitrage", "scalping", "leverage", "whale"]
         if key not in valid_keys:
             return web.json_response({"error": "invalid strategy"}, status=400)
-        PENDING_COMMANDS.append({"action": "toggle_strategy", "strategy": key})
-        _save_persistent_state()
-        return web.json_response({"ok": True, "strategy": key, "queued": True})
+        bot_id, bot = _request_bot(request)
+        if bot is None:
+            return web.json_response({"error": "unknown bot id"}, status=404)
+        _queue_command(bot, {"action": "toggle_strategy", "strategy": key})
+        _mark_state_dirty()
+        return web.json_response({"ok": True, "strategy": key, "bot_id": bot_id, "queued": True})
     except Exception as e:
         return web.json_response({"error": str(e)}, status=400)
 
@@ -1993,17 +2447,20 @@ async def handle_allocate_strategy(request):
             return web.json_response({"error": "invalid strategy"}, status=400)
         if amount <= 0:
             return web.json_response({"error": "invalid amount"}, status=400)
-        PENDING_COMMANDS.append({
+        bot_id, bot = _request_bot(request)
+        if bot is None:
+            return web.json_response({"error": "unknown bot id"}, status=404)
+        _queue_command(bot, {
             "action": "allocate_strategy",
             "strategy": key,
             "amount": amount,
             "coin": coin,
         })
-        # Marca como ativo imediatamente no BOT_DATA
-        allocs = BOT_DATA.get("allocations")
+        # Marca como ativo imediatamente nos dados do bot
+        allocs = bot["data"].get("allocations")
         if not isinstance(allocs, dict):
             allocs = {}
-            BOT_DATA["allocations"] = allocs
+            bot["data"]["allocations"] = allocs
         allocs[key] = {
             "amount": amount,
             "coin": coin,
@@ -2016,8 +2473,10 @@ async def handle_allocate_strategy(request):
             "last_trade_info": None,
             "trade_history": [],
         }
-        _save_persistent_state()
-        return web.json_response({"ok": True, "strategy": key, "amount": amount, "coin": coin, "queued": True})
+        _update_portfolio(bot)
+        _mark_state_dirty()
+        return web.json_response({"ok": True, "strategy": key, "amount": amount, "coin": coin,
+                                  "bot_id": bot_id, "queued": True})
     except Exception as e:
         return web.json_response({"error": str(e)}, status=400)
 
@@ -2032,24 +2491,28 @@ async def handle_deallocate_strategy(request):
         valid_keys = ["sniper", "memecoin", "arbitrage", "scalping", "leverage", "whale"]
         if key not in valid_keys:
             return web.json_response({"error": "invalid strategy"}, status=400)
-        PENDING_COMMANDS.append({
+        bot_id, bot = _request_bot(request)
+        if bot is None:
+            return web.json_response({"error": "unknown bot id"}, status=404)
+        _queue_command(bot, {
             "action": "deallocate_strategy",
             "strategy": key,
         })
         # Marca como inativo imediatamente e persiste ate bot confirmar
-        FORCED_INACTIVE.add(key)
-        allocs = BOT_DATA.get("allocations")
+        bot["forced_inactive"].add(key)
+        allocs = bot["data"].get("allocations")
         if isinstance(allocs, dict) and key in allocs:
             allocs[key]["active"] = False
-        _save_persistent_state()
-        return web.json_response({"ok": True, "strategy": key, "queued": True})
+        _update_portfolio(bot)
+        _mark_state_dirty()
+        return web.json_response({"ok": True, "strategy": key, "bot_id": bot_id, "queued": True})
     except Exception as e:
         return web.json_response({"error": str(e)}, status=400)
 
 
 async def handle_save_settings(request):
     """Salva configuracoes (private key, paper mode) via comando para o bot.
-    Guarda em BOT_DATA para persistir entre deploys do Render."""
+    Guarda nos dados do bot para persistir entre deploys do Render."""
     if not check_session(request):
         return web.json_response({"error": "unauthorized"}, status=401)
     try:
@@ -2061,17 +2524,21 @@ async def handle_save_settings(request):
             cmd["private_key"] = pk
         if paper is not None:
             cmd["paper_trading"] = paper
-        # Guarda tanto na fila normal quanto em BOT_DATA (persiste ate bot pegar)
-        PENDING_COMMANDS.append(cmd)
-        BOT_DATA["pending_settings"] = cmd
-        _save_persistent_state()
-        return web.json_response({"ok": True, "queued": True})
+        bot_id, bot = _request_bot(request)
+        if bot is None:
+            return web.json_response({"error": "unknown bot id"}, status=404)
+        # Guarda tanto na fila normal quanto nos dados do bot (persiste ate bot pegar)
+        _queue_command(bot, cmd)
+        bot["data"]["pending_settings"] = cmd
+        _mark_state_dirty()
+        return web.json_response({"ok": True, "bot_id": bot_id, "queued": True})
     except Exception as e:
         return web.json_response({"error": str(e)}, status=400)
 
 
 async def handle_health(request):
-    return web.json_response({"status": "ok", "last_push": BOT_DATA.get("last_push", 0)})
+    bots = {bot_id: b["data"].get("last_push", 0) for bot_id, b in BOTS.items()}
+    return web.json_response({"status": "ok", "last_push": max(bots.values(), default=0), "bots": bots})
 
 
 # ============================================================
@@ -2079,12 +2546,17 @@ async def handle_health(request):
 # ============================================================
 def create_app():
     app = web.Application()
+    app.on_startup.append(_start_persist_loop)
+    app.on_cleanup.append(_stop_persist_loop)
     app.router.add_get('/login', handle_login_page)
     app.router.add_post('/login', handle_login_post)
     app.router.add_get('/logout', handle_logout)
     app.router.add_get('/', handle_index)
     app.router.add_get('/api/data', handle_get_data)
+    app.router.add_get('/api/history', handle_get_history)
     app.router.add_post('/api/push', handle_push_data)
+    app.router.add_get('/api/commands', handle_get_commands)
+    app.router.add_post('/api/commands/ack', handle_ack_commands)
     app.router.add_post('/api/toggle-strategy', handle_toggle_strategy)
     app.router.add_post('/api/allocate-strategy', handle_allocate_strategy)
     app.router.add_post('/api/deallocate-strategy', handle_deallocate_strategy)